@@ -1,14 +1,18 @@
 import os #文件操作
 import hmac
 import logging
+import random
 import threading
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, session, url_for #Flask框架
+import time
+from urllib.parse import quote, urlencode
+from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, session, url_for, g, copy_current_request_context, has_request_context #Flask框架
 from datetime import timedelta
 from flask_compress import Compress #压缩代码
 from PIL import Image #图像处理
 import requests
 from flask import Response
 from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_etags
 
 from video_collection import database, movie_metadata, schema, security
 from video_collection.config import env_bool, env_int
@@ -16,8 +20,25 @@ from video_collection.paths import is_path_inside
 from video_collection import uploads as upload_helpers
 from video_collection import videos as video_helpers
 from video_collection.api_handlers import ApiHandlerDependencies, ApiHandlers
-from video_collection.emby import EmbyClient
+from video_collection.api_cache import API_CACHE_CONTROL, DATA_VERSION_SCOPES, DataVersions, api_response_etag
+from video_collection.api_handlers_integrations import EXTERNAL_IMAGE_FETCH_WORKERS
+from video_collection.emby import (
+    EmbyClient,
+    normalize_emby_playback_mode,
+    parse_network_list,
+    resolve_emby_playback_mode,
+)
+from video_collection.json_provider import FastJSONProvider
+from video_collection.maintenance_jobs import MaintenanceJobCancelled, MaintenanceJobManager
 from video_collection.media_routes import MediaRouteDependencies, MediaRouteHandlers
+from video_collection.metrics import METRICS_CONTENT_TYPE, AppMetrics
+from video_collection.pinned_http import PinnedHostAdapter
+from video_collection.profiling import ProfileStore, SamplingProfiler
+from video_collection.response_cache import ResponseCache
+from video_collection.static_assets import HASHED_ASSET_DIR, StaticAssetManifest, send_precompressed_asset
+from video_collection.shared_state import DEFAULT_SHARED_STATE_PATH, SHARED_STATE_BACKENDS, create_shared_state
+from video_collection.stream_proxy import StreamProxyEngine
+from video_collection.task_scheduler import TASK_RESULT_SKIPPED, CronExpression, TaskScheduler
 from video_collection.uploads import (
     ALLOWED_EXTENSIONS,
     ALLOWED_STORED_IMAGE_EXTENSIONS,
@@ -28,19 +49,24 @@ from video_collection.uploads import (
     normalize_upload_filename,
     process_image,
     process_image_variants,
+    process_pil_image_variants,
     save_image_variants,
 )
 from video_collection.videos import ALLOWED_VIDEO_EXTENSIONS
 from video_collection.api_registry import (
+    API_BATCH_KEY,
     API_EVENTS,
     api_event,
     api_event_metadata,
+    api_event_name,
     normalize_api_event_id,
     normalize_api_method,
+    run_api_batch,
 )
 from video_collection.backups import (
     BACKUP_FILENAME_PATTERN,
     SCHEDULED_BACKUP_PREFIX,
+    BackupInUseError,
     BackupService,
     DatabaseUpgradeRequiredError,
     add_bytes_to_tar,
@@ -55,6 +81,7 @@ from video_collection.backups import (
 )
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 Compress(app)
 logging.basicConfig(
     level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
@@ -67,9 +94,16 @@ UPLOAD_FOLDER = '/images'
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 VIDEO_LIBRARY_ROOT = os.environ.get('VIDEO_LIBRARY_ROOT', '/videos')
 VIDEO_STREAM_CHUNK_BYTES = max(64 * 1024, env_int('VIDEO_STREAM_CHUNK_BYTES', 1024 * 1024))
+EMBY_STREAM_CHUNK_BYTES = max(64 * 1024, env_int('EMBY_STREAM_CHUNK_BYTES', 1024 * 1024))
+EMBY_STREAM_READAHEAD_CHUNKS = max(0, env_int('EMBY_STREAM_READAHEAD_CHUNKS', 4))
 MAX_IMAGE_UPLOAD_MB = max(1, env_int('MAX_IMAGE_UPLOAD_MB', 10))
 MAX_IMAGE_UPLOAD_BYTES = MAX_IMAGE_UPLOAD_MB * 1024 * 1024
 app.config['MAX_CONTENT_LENGTH'] = MAX_IMAGE_UPLOAD_BYTES
+EXTERNAL_IMAGE_SESSION = requests.Session()
+EXTERNAL_IMAGE_SESSION.mount('https://', PinnedHostAdapter(
+    pool_connections=EXTERNAL_IMAGE_FETCH_WORKERS,
+    pool_maxsize=EXTERNAL_IMAGE_FETCH_WORKERS
+))
 
 Image.MAX_IMAGE_PIXELS = env_int('MAX_IMAGE_PIXELS', 20000000)
 
@@ -110,8 +144,17 @@ def fallback_secret_key():
 AUTH_SESSION_KEY = 'app_authenticated'
 CSRF_SESSION_KEY = 'csrf_token'
 SAFE_HTTP_METHODS = {'GET', 'HEAD', 'OPTIONS'}
-AUTH_RATE_LIMIT_FAILURES = {}
-AUTH_RATE_LIMIT_LOCK = threading.Lock()
+SHARED_STATE_BACKEND = os.environ.get('SHARED_STATE_BACKEND', 'memory').strip().lower() or 'memory'
+SHARED_STATE_PATH = os.environ.get('SHARED_STATE_PATH', '').strip() or DEFAULT_SHARED_STATE_PATH
+if SHARED_STATE_BACKEND not in SHARED_STATE_BACKENDS:
+    logger.warning("Unsupported SHARED_STATE_BACKEND %r, using in-process state", SHARED_STATE_BACKEND)
+    SHARED_STATE_BACKEND = 'memory'
+shared_state = create_shared_state(SHARED_STATE_BACKEND, SHARED_STATE_PATH)
+AUTH_RATE_LIMIT_FAILURES = shared_state.namespace('auth_rate_limit')
+AUTH_RATE_LIMIT_LOCK = shared_state.lock('auth_rate_limit')
+WTL_STATUS_CACHE = shared_state.namespace('wtl_status')
+WTL_STATUS_LOCK = shared_state.lock('wtl_status')
+API_DATA_VERSIONS = DataVersions(shared_state.namespace('data_versions'), shared_state.lock('data_versions'))
 AUTH_RATE_LIMIT_ATTEMPTS = max(1, env_int('AUTH_RATE_LIMIT_ATTEMPTS', 10))
 AUTH_RATE_LIMIT_WINDOW_SECONDS = max(30, env_int('AUTH_RATE_LIMIT_WINDOW_SECONDS', 300))
 AUTH_RATE_LIMIT_LOCK_SECONDS = max(60, env_int('AUTH_RATE_LIMIT_LOCK_SECONDS', AUTH_RATE_LIMIT_WINDOW_SECONDS))
@@ -156,7 +199,7 @@ def auth_rate_limit_exceeded(key, now=None):
         AUTH_RATE_LIMIT_WINDOW_SECONDS,
         AUTH_RATE_LIMIT_LOCK_SECONDS,
         key,
-        now
+        now if now is not None else shared_state.now()
     )
 
 def auth_rate_limit_retry_after(key, now=None):
@@ -167,7 +210,7 @@ def auth_rate_limit_retry_after(key, now=None):
         AUTH_RATE_LIMIT_WINDOW_SECONDS,
         AUTH_RATE_LIMIT_LOCK_SECONDS,
         key,
-        now
+        now if now is not None else shared_state.now()
     )
 
 def record_auth_failure(key, now=None):
@@ -178,16 +221,147 @@ def record_auth_failure(key, now=None):
         AUTH_RATE_LIMIT_WINDOW_SECONDS,
         AUTH_RATE_LIMIT_LOCK_SECONDS,
         key,
-        now
+        now if now is not None else shared_state.now()
     )
 
 def clear_auth_failures(key):
     return security.clear_auth_failures(AUTH_RATE_LIMIT_FAILURES, AUTH_RATE_LIMIT_LOCK, key)
 
+STATIC_ASSET_MANIFEST = StaticAssetManifest(app.static_folder, logger)
+
+def asset_url(filename):
+    return url_for('static', filename=STATIC_ASSET_MANIFEST.resolve(filename))
+
 @app.context_processor
 def inject_template_security_context():
     return {
-        'csrf_token': get_csrf_token
+        'csrf_token': get_csrf_token,
+        'asset_url': asset_url
+    }
+
+# 请求计数与耗时；在途计数在响应关闭（响应体发送完毕）时才减少，流式响应也不会提前释放
+# 查询记录放在 environ 中，批量请求的工作线程（各自的 g）也能写入同一份记录
+REQUEST_QUERY_TRACE_KEY = 'video_collection.query_trace'
+
+def request_metrics_endpoint():
+    return request.endpoint or 'unmatched'
+
+def current_query_trace():
+    if not has_request_context():
+        return None
+    return request.environ.get(REQUEST_QUERY_TRACE_KEY)
+
+def db_server_timing_enabled():
+    return DB_SERVER_TIMING or app.debug
+
+def add_db_server_timing(response, trace):
+    # 调试模式下在响应头中汇总本次请求的数据库耗时，并记录最耗时的语句
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={trace.seconds * 1000:.1f};desc="{trace.count} queries"'
+    )
+    if trace.count:
+        logger.debug(
+            "%s %s issued %d queries in %.1f ms: %s",
+            request.method,
+            request.path,
+            trace.count,
+            trace.seconds * 1000,
+            '; '.join(f'{count}x {seconds * 1000:.1f} ms {statement}' for statement, count, seconds in trace.summary())
+        )
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started_at = time.perf_counter()
+    request.environ[REQUEST_QUERY_TRACE_KEY] = database.QueryTrace()
+    APP_METRICS.http_in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    started_at = g.get('metrics_started_at')
+    if started_at is not None:
+        APP_METRICS.observe_http(
+            request_metrics_endpoint(),
+            request.method,
+            response.status_code,
+            time.perf_counter() - started_at,
+            response.content_length
+        )
+        # 普通生成器响应的 teardown 早于响应体迭代，只有 close 时才算请求结束
+        response.call_on_close(APP_METRICS.http_in_flight.dec)
+        g.metrics_in_flight_dec_on_close = True
+    trace = current_query_trace()
+    if trace is not None and db_server_timing_enabled():
+        add_db_server_timing(response, trace)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if g.pop('metrics_started_at', None) is None:
+        return
+    if not g.pop('metrics_in_flight_dec_on_close', False):
+        APP_METRICS.http_in_flight.dec()
+    trace = request.environ.pop(REQUEST_QUERY_TRACE_KEY, None)
+    if trace is not None:
+        APP_METRICS.observe_request_db_usage(request_metrics_endpoint(), trace.count, trace.seconds)
+
+def profile_token_is_valid():
+    provided = request.headers.get('X-Profile-Token') or request.args.get('_profile', '')
+    return bool(PROFILE_TOKEN and provided) and hmac.compare_digest(provided, PROFILE_TOKEN)
+
+def request_profile_label():
+    label = request_metrics_endpoint()
+    if label == 'api_handler':
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and API_BATCH_KEY in payload:
+            return f'{label}-batch'
+        if isinstance(payload, dict):
+            return f'{label}-{api_event_name(payload)}'
+    return label
+
+# 按请求头/查询参数中的令牌，或按 1/N 抽样，对请求做采样分析
+@app.before_request
+def start_request_profile():
+    requested = profile_token_is_valid()
+    sampled = PROFILE_SAMPLE_RATE and random.randrange(PROFILE_SAMPLE_RATE) == 0
+    if not requested and not sampled:
+        return None
+    g.request_profiler = SamplingProfiler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000).start()
+    g.request_profile_requested = requested
+    return None
+
+@app.after_request
+def save_request_profile(response):
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    try:
+        filename = PROFILE_STORE.save(request_profile_label(), profiler)
+    except OSError as e:
+        logger.warning("Unable to save request profile: %s", e)
+        return response
+    if g.get('request_profile_requested'):
+        response.headers['X-Profile'] = filename
+    return response
+
+@app.teardown_request
+def stop_request_profile(error=None):
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def list_request_profiles(filename=None):
+    if filename:
+        return PROFILE_STORE.read_profile(filename)
+    return PROFILE_STORE.list_profiles()
+
+def request_profiling_status():
+    return {
+        'token_enabled': bool(PROFILE_TOKEN),
+        'sample_rate': PROFILE_SAMPLE_RATE,
+        'interval_ms': PROFILE_INTERVAL_MS,
+        'retention_count': PROFILE_RETENTION_COUNT
     }
 
 @app.after_request
@@ -213,6 +387,8 @@ def require_app_session_auth():
         return None
     if request.endpoint in {'auth', 'healthz'}:
         return None
+    if request.endpoint == 'metrics' and METRICS_TOKEN:
+        return None
     if is_authenticated_session():
         return None
     return unauthorized_response()
@@ -288,7 +464,7 @@ def get_image_variant_filename(filename, variant):
 
 
 def ensure_upload_image_cover(filename):
-    return ensure_image_cover(
+    return timed_ensure_image_cover(
         filename,
         app.config['UPLOAD_FOLDER'],
         ALLOWED_STORED_IMAGE_EXTENSIONS
@@ -337,12 +513,46 @@ DB_BACKUP_DIR = os.environ.get('DB_BACKUP_DIR', '/backups')
 DB_BACKUP_INCLUDE_ROUTINES = env_bool('DB_BACKUP_INCLUDE_ROUTINES', False)
 DB_BACKUP_SCHEDULE_ENABLED = env_bool('DB_BACKUP_SCHEDULE_ENABLED', False)
 DB_BACKUP_SCHEDULE_TIME = os.environ.get('DB_BACKUP_SCHEDULE_TIME', '03:30').strip() or '03:30'
+DB_BACKUP_SCHEDULE_CRON = os.environ.get('DB_BACKUP_SCHEDULE_CRON', '').strip()
 DB_BACKUP_RETENTION_COUNT = max(0, env_int('DB_BACKUP_RETENTION_COUNT', 7))
+DB_BACKUP_INCREMENTAL = env_bool('DB_BACKUP_INCREMENTAL', False)
+DB_BACKUP_FULL_INTERVAL = max(1, env_int('DB_BACKUP_FULL_INTERVAL', 7))
+DB_BACKUP_COMPRESSION = os.environ.get('DB_BACKUP_COMPRESSION', 'gzip').strip().lower()
+DB_BACKUP_DUMP_FORMAT = os.environ.get('DB_BACKUP_DUMP_FORMAT', 'sql').strip().lower()
+SCHEDULER_JITTER_SECONDS = max(0, env_int('SCHEDULER_JITTER_SECONDS', 60))
+SCHEDULER_VERIFY_CRON = os.environ.get('SCHEDULER_VERIFY_CRON', '0 5 * * 0').strip()
+SCHEDULER_COVER_PREWARM_CRON = os.environ.get('SCHEDULER_COVER_PREWARM_CRON', '15 4 * * *').strip()
+SCHEDULER_ORPHAN_CLEANUP_CRON = os.environ.get('SCHEDULER_ORPHAN_CLEANUP_CRON', '').strip()
+SCHEDULER_CACHE_REFRESH_CRON = os.environ.get('SCHEDULER_CACHE_REFRESH_CRON', '*/30 * * * *').strip()
+ORPHAN_IMAGE_MIN_AGE_SECONDS = 24 * 60 * 60
+API_BATCH_MAX_EVENTS = max(1, env_int('API_BATCH_MAX_EVENTS', 20))
+API_BATCH_WORKERS = max(1, env_int('API_BATCH_WORKERS', 4))
+SEARCH_CACHE_MAX_ENTRIES = max(0, env_int('SEARCH_CACHE_MAX_ENTRIES', 256))
+SEARCH_CACHE_MAX_MB = max(0, env_int('SEARCH_CACHE_MAX_MB', 32))
+SEARCH_RESPONSE_CACHE = ResponseCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_MB * 1024 * 1024)
+DB_SLOW_QUERY_MS = max(0, env_int('DB_SLOW_QUERY_MS', 200))
+DB_SERVER_TIMING = env_bool('DB_SERVER_TIMING', False)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(DB_BACKUP_DIR, 'profiles'))
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '').strip()
+PROFILE_SAMPLE_RATE = max(0, env_int('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = max(1, env_int('PROFILE_INTERVAL_MS', 5))
+PROFILE_RETENTION_COUNT = max(1, env_int('PROFILE_RETENTION_COUNT', 50))
+PROFILE_STORE = ProfileStore(PROFILE_DIR, PROFILE_RETENTION_COUNT)
+METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '').strip()
+APP_METRICS = AppMetrics()
+timed_ensure_image_cover = APP_METRICS.timed_image_operation('cover', ensure_image_cover)
+timed_process_image = APP_METRICS.timed_image_operation('process', process_image)
+timed_process_image_variants = APP_METRICS.timed_image_operation('variants', process_image_variants)
+timed_process_pil_image_variants = APP_METRICS.timed_image_operation('pil_variants', process_pil_image_variants)
 
 EMBY_CLIENT_NAME = 'video-collection'
 EMBY_DEVICE_NAME = 'video-collection-server'
 EMBY_DEVICE_ID = os.environ.get('EMBY_DEVICE_ID', 'video-collection-server')
 EMBY_CLIENT_VERSION = '1.0.0'
+EMBY_PLAYBACK_MODE = normalize_emby_playback_mode(os.environ.get('EMBY_PLAYBACK_MODE', 'proxy'))
+EMBY_DIRECT_PLAY_NETWORKS = parse_network_list(os.environ.get('EMBY_DIRECT_PLAY_NETWORKS', ''))
+EMBY_DIRECT_PLAY_TTL_SECONDS = max(60, env_int('EMBY_DIRECT_PLAY_TTL_SECONDS', 4 * 60 * 60))
 emby_client = EmbyClient(
     environ=os.environ,
     requests_module=requests,
@@ -352,6 +562,11 @@ emby_client = EmbyClient(
     client_version=EMBY_CLIENT_VERSION
 )
 EMBY_TOKEN_CACHE = emby_client.token_cache
+emby_stream_proxy = StreamProxyEngine(
+    chunk_bytes=EMBY_STREAM_CHUNK_BYTES,
+    readahead_chunks=EMBY_STREAM_READAHEAD_CHUNKS,
+    logger=logger
+)
 
 def get_emby_server_url():
     return emby_client.get_server_url()
@@ -376,6 +591,30 @@ def emby_request(method, path, params=None, headers=None, stream=False, timeout=
         force_refresh=force_refresh
     )
 
+def get_emby_playback_mode(requested_mode=None):
+    return resolve_emby_playback_mode(
+        EMBY_PLAYBACK_MODE,
+        request.remote_addr,
+        EMBY_DIRECT_PLAY_NETWORKS,
+        requested_mode
+    )
+
+def emby_direct_signature_value(item_id):
+    return f'emby-direct:{item_id}'
+
+def sign_emby_direct_url(item_id, now=None):
+    expires_at = int((now or time.time()) + EMBY_DIRECT_PLAY_TTL_SECONDS)
+    signature = security.sign_expiring_value(app.secret_key, emby_direct_signature_value(item_id), expires_at)
+    return f"/emby/direct/{quote(str(item_id), safe='')}?{urlencode({'expires': expires_at, 'signature': signature})}"
+
+def verify_emby_direct_signature(item_id, expires_at, signature):
+    return security.verify_expiring_signature(
+        app.secret_key,
+        emby_direct_signature_value(item_id),
+        expires_at,
+        signature
+    )
+
 _media_routes = MediaRouteHandlers(MediaRouteDependencies(
     normalize_upload_filename=normalize_upload_filename,
     get_upload_folder=lambda: app.config['UPLOAD_FOLDER'],
@@ -389,23 +628,73 @@ _media_routes = MediaRouteHandlers(MediaRouteDependencies(
     ),
     allowed_video_file=lambda filename: video_helpers.allowed_video_file(filename, ALLOWED_VIDEO_EXTENSIONS),
     parse_byte_range=video_helpers.parse_byte_range,
-    stream_file_slice=lambda abs_path, start, end: video_helpers.stream_file_slice(
-        abs_path,
-        start,
-        end,
-        VIDEO_STREAM_CHUNK_BYTES
+    stream_file_slice=lambda abs_path, start, end: APP_METRICS.count_streamed_bytes(
+        'video',
+        video_helpers.stream_file_slice(abs_path, start, end, VIDEO_STREAM_CHUNK_BYTES)
     ),
     emby_request=lambda *args, **kwargs: emby_request(*args, **kwargs),
+    proxy_stream=lambda upstream, label='': APP_METRICS.count_streamed_bytes(
+        'emby',
+        emby_stream_proxy.stream(upstream, label)
+    ),
+    verify_emby_direct_signature=lambda item_id, expires_at, signature: verify_emby_direct_signature(
+        item_id,
+        expires_at,
+        signature
+    ),
+    build_emby_stream_url=lambda item_id: emby_client.build_stream_url(item_id),
     log_exception=lambda action, exc: log_exception(action, exc),
     get_service_url=lambda service_name: get_service_url(service_name),
 ))
 
+def record_db_query(record):
+    APP_METRICS.observe_db_query(record.duration)
+    if DB_SLOW_QUERY_MS and record.duration * 1000 >= DB_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, %s rows): %s",
+            record.duration * 1000,
+            '?' if record.rows is None else record.rows,
+            record.statement
+        )
+    trace = current_query_trace()
+    if trace is not None:
+        trace.add(record)
+
 def get_db_connection():
-    return database.get_db_connection(DB_CONFIG)
+    return database.get_db_connection(DB_CONFIG, observer=record_db_query)
+
+def get_api_db_connection():
+    # 批量请求内顺序执行的事件共用同一个数据库连接
+    shared_connection = g.get('api_db_connection') if has_request_context() else None
+    if shared_connection is not None:
+        return shared_connection.borrow()
+    return get_db_connection()
 
 def check_database_connection():
     return database.check_database_connection(get_db_connection)
 
+def collect_scrape_metrics():
+    APP_METRICS.observe_cache_stats('search', SEARCH_RESPONSE_CACHE.stats())
+    APP_METRICS.observe_stream_proxy(emby_stream_proxy.totals())
+
+APP_METRICS.registry.add_collector(collect_scrape_metrics)
+
+def metrics_token_is_valid():
+    provided = request.headers.get('Authorization', '')
+    scheme, _, token = provided.partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), METRICS_TOKEN)
+
+@app.route('/metrics')
+def metrics():
+    # 设置 METRICS_TOKEN 后抓取端使用 Bearer 令牌；否则沿用页面登录会话
+    if not METRICS_ENABLED:
+        return Response(status=404)
+    if METRICS_TOKEN and not metrics_token_is_valid():
+        return Response('Unauthorized', status=401, headers={'WWW-Authenticate': 'Bearer'})
+    response = Response(APP_METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/healthz')
 def healthz():
     try:
@@ -432,13 +721,28 @@ backup_service = BackupService(
     include_routines_getter=lambda: DB_BACKUP_INCLUDE_ROUTINES,
     schedule_enabled_getter=lambda: DB_BACKUP_SCHEDULE_ENABLED,
     schedule_time_getter=lambda: DB_BACKUP_SCHEDULE_TIME,
-    retention_count_getter=lambda: DB_BACKUP_RETENTION_COUNT
+    retention_count_getter=lambda: DB_BACKUP_RETENTION_COUNT,
+    incremental_getter=lambda: DB_BACKUP_INCREMENTAL,
+    full_interval_getter=lambda: DB_BACKUP_FULL_INTERVAL,
+    compression_getter=lambda: DB_BACKUP_COMPRESSION,
+    dump_format_getter=lambda: DB_BACKUP_DUMP_FORMAT,
+    schedule_cron_getter=lambda: DB_BACKUP_SCHEDULE_CRON
 )
 DB_MAINTENANCE_LOCK = backup_service.maintenance_lock
+maintenance_jobs = MaintenanceJobManager(
+    DB_MAINTENANCE_LOCK,
+    logger,
+    state=shared_state.namespace('maintenance_jobs'),
+    state_lock=shared_state.lock('maintenance_jobs')
+)
 SCHEDULED_BACKUP_STATE_LOCK = backup_service.state_lock
-SCHEDULED_BACKUP_THREAD_LOCK = backup_service.thread_lock
-SCHEDULED_BACKUP_THREAD_STARTED = backup_service.thread_started
 SCHEDULED_BACKUP_STATE = backup_service.state
+task_scheduler = TaskScheduler(
+    logger,
+    lock_factory=lambda name: database.advisory_lock(get_db_connection, f"vc-task:{name}:{DB_CONFIG['database']}"),
+    state=shared_state.namespace('scheduled_tasks'),
+    state_lock=shared_state.lock('scheduled_tasks')
+)
 
 
 def backup_feature_enabled():
@@ -477,8 +781,8 @@ def run_database_dump_to_file(target_path):
     return backup_service.run_database_dump_to_file(target_path)
 
 
-def run_database_backup(prefix=''):
-    return backup_service.run_database_backup(prefix)
+def run_database_backup(prefix='', incremental=False):
+    return backup_service.run_database_backup(prefix, incremental)
 
 
 def run_database_restore_from_path(backup_path):
@@ -489,32 +793,27 @@ def validate_full_backup_member(member):
     return backup_service.validate_full_backup_member(member)
 
 
-def extract_full_backup_to_temp(backup_path):
-    return backup_service.extract_full_backup_to_temp(backup_path)
-
-
 def validate_extracted_images(images_path):
     return backup_service.validate_extracted_images(images_path)
 
 
-def clear_directory_contents(directory_path):
-    return backup_service.clear_directory_contents(directory_path)
-
-
-def copy_directory_contents(source_dir, target_dir):
-    return backup_service.copy_directory_contents(source_dir, target_dir)
+def run_full_backup_restore(filename, differential=False):
+    return backup_service.run_full_backup_restore(filename, differential=differential)
 
 
-def restore_images_snapshot(images_path):
-    return backup_service.restore_images_snapshot(images_path)
+def run_backup_restore(filename, differential=False):
+    try:
+        return backup_service.run_backup_restore(filename, differential=differential)
+    finally:
+        API_DATA_VERSIONS.bump(*DATA_VERSION_SCOPES)
 
 
-def run_full_backup_restore(filename):
-    return backup_service.run_full_backup_restore(filename)
+def preview_backup_restore(filename):
+    return backup_service.preview_backup_restore(filename)
 
 
-def run_backup_restore(filename):
-    return backup_service.run_backup_restore(filename)
+def verify_backup(filename):
+    return backup_service.verify_backup(filename)
 
 
 def format_backup_file(filename, path):
@@ -561,14 +860,66 @@ def run_scheduled_backup_once():
     return backup_service.run_scheduled_backup_once()
 
 
-def scheduled_backup_worker():
-    return backup_service.scheduled_backup_worker()
+def prewarm_image_covers_task():
+    generated = upload_helpers.prewarm_image_covers(app.config['UPLOAD_FOLDER'], ALLOWED_STORED_IMAGE_EXTENSIONS)
+    return f'已生成 {generated} 个封面缩略图'
+
 
+def cleanup_orphaned_images_task():
+    if not DB_MAINTENANCE_LOCK.acquire(blocking=False):
+        return {'result': TASK_RESULT_SKIPPED, 'message': '已有数据库维护任务正在执行，已跳过本次图片清理'}
+
+    try:
+        candidates = [
+            filename for filename, _ in upload_helpers.iter_uploaded_images(
+                app.config['UPLOAD_FOLDER'],
+                ALLOWED_STORED_IMAGE_EXTENSIONS,
+                min_age_seconds=ORPHAN_IMAGE_MIN_AGE_SECONDS
+            )
+        ]
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            referenced = movie_metadata.list_referenced_image_filenames(cursor)
+            deleted = delete_unreferenced_uploaded_images(
+                cursor,
+                [filename for filename in candidates if filename not in referenced]
+            )
+    finally:
+        DB_MAINTENANCE_LOCK.release()
+    return f'已清理 {deleted} 个未引用图片'
+
+
+def refresh_caches_task():
+    backup_count = backup_service.refresh_backup_catalog()
+    return f'已刷新备份列表缓存（{backup_count} 个备份）'
+
+
+def register_scheduled_tasks():
+    backup_service.register_scheduled_backup_task(task_scheduler, jitter_seconds=SCHEDULER_JITTER_SECONDS)
+    for name, schedule, target in (
+        ('verify_backups', SCHEDULER_VERIFY_CRON, backup_service.run_scheduled_verification),
+        ('prewarm_covers', SCHEDULER_COVER_PREWARM_CRON, prewarm_image_covers_task),
+        ('cleanup_orphaned_images', SCHEDULER_ORPHAN_CLEANUP_CRON, cleanup_orphaned_images_task),
+        ('refresh_caches', SCHEDULER_CACHE_REFRESH_CRON, refresh_caches_task),
+    ):
+        if not schedule:
+            continue
+        try:
+            task_scheduler.add_task(name, CronExpression(schedule), target, jitter_seconds=SCHEDULER_JITTER_SECONDS)
+        except ValueError as e:
+            logger.warning("Scheduled task %s disabled: %s", name, e)
+
+
+def start_task_scheduler(debug_enabled=False):
+    if debug_enabled and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    if not task_scheduler.tasks:
+        register_scheduled_tasks()
+    return task_scheduler.start()
 
-def start_scheduled_backup_thread(debug_enabled=False):
-    global SCHEDULED_BACKUP_THREAD_STARTED
-    backup_service.start_scheduled_backup_thread(debug_enabled)
-    SCHEDULED_BACKUP_THREAD_STARTED = backup_service.thread_started
+
+def get_scheduled_task_status():
+    return task_scheduler.status()
 
 MOVIE_METADATA_MIGRATION = movie_metadata.MOVIE_METADATA_MIGRATION
 MOVIE_IMAGES_MIGRATION = movie_metadata.MOVIE_IMAGES_MIGRATION
@@ -698,6 +1049,15 @@ def init_db():
 def index():
     return render_template("index.html")  # 确保 index.html 存在于 templates 文件夹中
 
+# 带内容哈希的静态资源，优先返回预压缩文件
+@app.route(f'/static/{HASHED_ASSET_DIR}/<path:filename>')
+def serve_hashed_asset(filename):
+    return send_precompressed_asset(
+        os.path.join(app.static_folder, HASHED_ASSET_DIR),
+        filename,
+        request.accept_encodings
+    )
+
 # src目录的静态文件路由
 @app.route('/src/<path:filename>')
 def serve_src(filename):
@@ -742,6 +1102,10 @@ def serve_emby_image(item_id):
 def stream_emby_video(item_id):
     return _media_routes.stream_emby_video(item_id)
 
+@app.route('/emby/direct/<item_id>')
+def redirect_emby_video(item_id):
+    return _media_routes.redirect_emby_video(item_id)
+
 @app.route('/services/<service_name>')
 def service_redirect(service_name):
     target_url = build_service_redirect_url(service_name)
@@ -749,6 +1113,102 @@ def service_redirect(service_name):
         return Response(status=404)
     return redirect(target_url)
 
+def api_event_etag(event_id, event, method, data):
+    if event['cache_scopes'] is None:
+        return None
+    # 响应内容与会话相关（CSRF令牌、登录状态），一并计入ETag
+    vary = (session.get(CSRF_SESSION_KEY, ''), is_authenticated_session())
+    versions = API_DATA_VERSIONS.snapshot(event['cache_scopes'])
+    return api_response_etag(event_id, method, data, versions, vary)
+
+def dispatch_api_event(payload, if_none_match=None):
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = app.make_response(run_api_event(payload, if_none_match))
+        status = response.status_code
+        return response
+    finally:
+        APP_METRICS.observe_api_event(api_event_name(payload), status, time.perf_counter() - started_at)
+
+def run_api_event(payload, if_none_match=None):
+    if not isinstance(payload, dict):
+        return json_error('Invalid API payload', 400)
+
+    event_id = normalize_api_event_id(payload.get('e'))
+    data = payload.get('d', {})
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return json_error('Invalid event payload', 400)
+
+    method = normalize_api_method(payload.get('m', 'POST')) # 获取原始method
+    event = API_EVENTS.get(event_id)
+    if not event:
+        return jsonify({"success": False, "message": "无效的事件ID"}), 400
+    if method not in event['methods']:
+        response = jsonify({
+            "success": False,
+            "message": f"Method {method} is not allowed for event {event_id}"
+        })
+        response.headers['Allow'] = ', '.join(sorted(event['methods']))
+        return response, 405
+
+    etag = api_event_etag(event_id, event, method, data)
+    if etag and if_none_match is not None and if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = API_CACHE_CONTROL
+        return response
+
+    result = event['handler'](data, method) # 传递method给处理器
+    if not etag and not event['invalidates']:
+        return result
+
+    response = app.make_response(result)
+    if event['invalidates'] and response.status_code < 400:
+        API_DATA_VERSIONS.bump(*event['invalidates'])
+    if etag and response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = API_CACHE_CONTROL
+    return response
+
+def dispatch_api_batch_event(payload):
+    try:
+        if_none_match = None
+        if isinstance(payload, dict) and isinstance(payload.get('v'), str):
+            if_none_match = parse_etags(payload['v'])
+        response = app.make_response(dispatch_api_event(payload, if_none_match))
+    except Exception as e:
+        response = app.make_response(json_exception('API batch event', e))
+    result = {
+        'status': response.status_code,
+        'body': response.get_json(silent=True)
+    }
+    if response.headers.get('ETag'):
+        result['etag'] = response.headers['ETag']
+    return result
+
+def api_batch_handler(entries):
+    if not isinstance(entries, list) or not entries:
+        return json_error('Invalid API batch', 400)
+    if len(entries) > API_BATCH_MAX_EVENTS:
+        return json_error(f'API batch exceeds {API_BATCH_MAX_EVENTS} events', 413)
+
+    shared_connection = database.SharedConnection(get_db_connection)
+    g.api_db_connection = shared_connection
+    try:
+        results = run_api_batch(
+            entries,
+            dispatch_api_batch_event,
+            workers=API_BATCH_WORKERS,
+            wrap=copy_current_request_context
+        )
+    finally:
+        g.pop('api_db_connection', None)
+        shared_connection.close()
+    return jsonify({'success': True, 'results': results})
+
 # 统一api入口
 @app.route('/api', methods=['POST'])
 def api_handler():
@@ -761,27 +1221,9 @@ def api_handler():
         payload = request.get_json(silent=True) or {}
         if not isinstance(payload, dict):
             return json_error('Invalid API payload', 400)
-
-        event_id = normalize_api_event_id(payload.get('e'))
-        data = payload.get('d', {})
-        if data is None:
-            data = {}
-        if not isinstance(data, dict):
-            return json_error('Invalid event payload', 400)
-
-        method = normalize_api_method(payload.get('m', 'POST')) # 获取原始method
-        event = API_EVENTS.get(event_id)
-        if not event:
-            return jsonify({"success": False, "message": "无效的事件ID"}), 400
-        if method not in event['methods']:
-            response = jsonify({
-                "success": False,
-                "message": f"Method {method} is not allowed for event {event_id}"
-            })
-            response.headers['Allow'] = ', '.join(sorted(event['methods']))
-            return response, 405
-            
-        return event['handler'](data, method) # 传递method给处理器
+        if API_BATCH_KEY in payload:
+            return api_batch_handler(payload[API_BATCH_KEY])
+        return dispatch_api_event(payload, request.if_none_match)
         
     except Exception as e:
         return json_exception('API handler', e)
@@ -791,7 +1233,7 @@ _api_handlers = ApiHandlers(ApiHandlerDependencies(
     json_error=json_error,
     json_exception=json_exception,
     log_exception=log_exception,
-    get_db_connection=get_db_connection,
+    get_db_connection=get_api_db_connection,
     replace_movie_images=replace_movie_images,
     sync_movie_metadata=sync_movie_metadata,
     parse_image_filenames=parse_image_filenames,
@@ -802,12 +1244,17 @@ _api_handlers = ApiHandlers(ApiHandlerDependencies(
     resolve_tag_ids=resolve_tag_ids,
     resolve_rating_dimension_id=resolve_rating_dimension_id,
     hydrate_movie_rows=hydrate_movie_rows,
+    search_response_cache=SEARCH_RESPONSE_CACHE,
+    get_search_data_version=lambda: API_DATA_VERSIONS.snapshot(DATA_VERSION_SCOPES),
+    json_body_response=lambda body: app.response_class(body, mimetype=app.json.mimetype),
     access_token_required=access_token_required,
     get_csrf_token=get_csrf_token,
     api_event_metadata=api_event_metadata,
     get_service_url=get_service_url,
     emby_request=emby_request,
     get_emby_user_id=lambda: authenticate_emby()[1],
+    get_emby_playback_mode=lambda requested_mode=None: get_emby_playback_mode(requested_mode),
+    sign_emby_direct_url=lambda item_id: sign_emby_direct_url(item_id),
     get_movie_image_filenames=get_movie_image_filenames,
     get_database_upgrade_diagnostics=get_database_upgrade_diagnostics,
     check_database_connection=check_database_connection,
@@ -816,12 +1263,20 @@ _api_handlers = ApiHandlers(ApiHandlerDependencies(
     list_database_backups=list_database_backups,
     backup_feature_enabled=backup_feature_enabled,
     db_maintenance_lock=DB_MAINTENANCE_LOCK,
+    maintenance_jobs=maintenance_jobs,
+    maintenance_job_cancelled_error=MaintenanceJobCancelled,
     run_database_backup=run_database_backup,
     database_upgrade_command_hint=database_upgrade_command_hint,
     database_upgrade_required_error=DatabaseUpgradeRequiredError,
+    backup_in_use_error=BackupInUseError,
     safe_backup_filename=safe_backup_filename,
     get_backup_file_path=get_backup_file_path,
     run_backup_restore=run_backup_restore,
+    preview_backup_restore=preview_backup_restore,
+    verify_backup=verify_backup,
+    get_scheduled_task_status=get_scheduled_task_status,
+    list_request_profiles=list_request_profiles,
+    get_request_profiling_status=request_profiling_status,
     delete_database_backup_file=delete_database_backup_file,
     normalize_video_relative_path=normalize_video_relative_path,
     get_video_library_abs_path=get_video_library_abs_path,
@@ -829,12 +1284,16 @@ _api_handlers = ApiHandlers(ApiHandlerDependencies(
     format_video_file_item=format_video_file_item,
     delete_video_file=delete_video_file,
     allowed_file=allowed_file,
-    process_image=process_image,
-    process_image_variants=process_image_variants,
+    process_image=timed_process_image,
+    process_image_variants=timed_process_image_variants,
+    process_pil_image_variants=timed_process_pil_image_variants,
     save_image_variants=save_uploaded_image_variants,
     get_upload_file_path=get_upload_file_path,
     get_upload_folder=lambda: app.config['UPLOAD_FOLDER'],
     external_image_get=lambda *args, **kwargs: requests.get(*args, **kwargs),
+    external_image_session_get=lambda *args, **kwargs: EXTERNAL_IMAGE_SESSION.get(*args, **kwargs),
+    wtl_status_cache=WTL_STATUS_CACHE,
+    wtl_status_lock=WTL_STATUS_LOCK,
     get_max_image_upload_bytes=lambda: MAX_IMAGE_UPLOAD_BYTES,
 ))
 
@@ -882,6 +1341,9 @@ def link_movie_emby_handler(data, method='POST'):
 def fetch_external_image_handler(data, method='POST'):
     return _api_handlers.fetch_external_image_handler(data, method)
 
+def fetch_external_images_handler(data, method='POST'):
+    return _api_handlers.fetch_external_images_handler(data, method)
+
 
 def check_wtl_status_handler(data, method='GET'):
     return _api_handlers.check_wtl_status_handler(data, method)
@@ -939,6 +1401,26 @@ def delete_db_backup_handler(data, method='DELETE'):
     return _api_handlers.delete_db_backup_handler(data, method)
 
 
+def verify_db_backup_handler(data, method='POST'):
+    return _api_handlers.verify_db_backup_handler(data, method)
+
+
+def get_scheduled_tasks_handler(data, method='GET'):
+    return _api_handlers.get_scheduled_tasks_handler(data, method)
+
+
+def list_request_profiles_handler(data, method='GET'):
+    return _api_handlers.list_request_profiles_handler(data, method)
+
+
+def get_maintenance_job_handler(data, method='GET'):
+    return _api_handlers.get_maintenance_job_handler(data, method)
+
+
+def cancel_maintenance_job_handler(data, method='POST'):
+    return _api_handlers.cancel_maintenance_job_handler(data, method)
+
+
 def list_video_files_handler(data, method='POST'):
     return _api_handlers.list_video_files_handler(data, method)
 
@@ -951,32 +1433,38 @@ def upload_image_handler(data, method='POST'):
     return _api_handlers.upload_image_handler(data, method)
 
 API_EVENTS.update({
-    1001: api_event('get_services_config', get_services_config_handler, methods=('GET', 'POST')),
-    1002: api_event('get_tags', get_tags_handler, methods=('GET', 'POST')),
-    1003: api_event('get_ratings_dimensions', get_ratings_dimensions_handler, methods=('GET', 'POST')),
-    1004: api_event('add_tag', add_tag_handler, methods=('POST',)),
-    1005: api_event('update_tag', update_tag_handler, methods=('POST', 'PUT')),
-    1006: api_event('add_rating_dimension', add_rating_dimension_handler, methods=('POST',)),
-    1007: api_event('update_rating_dimension', update_rating_dimension_handler, methods=('POST', 'PUT')),
-    1008: api_event('add_movie', add_movie_handler, methods=('POST',)),
+    1001: api_event('get_services_config', get_services_config_handler, methods=('GET', 'POST'), cache_scopes=()),
+    1002: api_event('get_tags', get_tags_handler, methods=('GET', 'POST'), read_only=True, cache_scopes=('catalog',)),
+    1003: api_event('get_ratings_dimensions', get_ratings_dimensions_handler, methods=('GET', 'POST'), read_only=True, cache_scopes=('catalog',)),
+    1004: api_event('add_tag', add_tag_handler, methods=('POST',), invalidates=('catalog',)),
+    1005: api_event('update_tag', update_tag_handler, methods=('POST', 'PUT'), invalidates=('catalog',)),
+    1006: api_event('add_rating_dimension', add_rating_dimension_handler, methods=('POST',), invalidates=('catalog',)),
+    1007: api_event('update_rating_dimension', update_rating_dimension_handler, methods=('POST', 'PUT'), invalidates=('catalog',)),
+    1008: api_event('add_movie', add_movie_handler, methods=('POST',), invalidates=('movies',)),
     1009: api_event('check_duplicates', check_duplicates_handler, methods=('POST',)),
     1010: api_event('upload_image', upload_image_handler, methods=('POST',)),
-    1011: api_event('search_movies', search_movies_handler, methods=('GET', 'POST')),
-    1012: api_event('update_movie', update_movie_handler, methods=('PUT', 'POST')),
-    1013: api_event('delete_movie', delete_movie_handler, methods=('DELETE', 'POST')),
+    1011: api_event('search_movies', search_movies_handler, methods=('GET', 'POST'), read_only=True, cache_scopes=('catalog', 'movies')),
+    1012: api_event('update_movie', update_movie_handler, methods=('PUT', 'POST'), invalidates=('movies',)),
+    1013: api_event('delete_movie', delete_movie_handler, methods=('DELETE', 'POST'), invalidates=('movies',)),
     1014: api_event('search_emby', search_emby_handler, methods=('POST',)),
     1015: api_event('list_video_files', list_video_files_handler, methods=('POST',)),
-    1016: api_event('delete_tag', delete_tag_handler, methods=('DELETE', 'POST')),
-    1017: api_event('delete_rating_dimension', delete_rating_dimension_handler, methods=('DELETE', 'POST')),
-    1018: api_event('list_db_backups', list_db_backups_handler, methods=('GET', 'POST')),
+    1016: api_event('delete_tag', delete_tag_handler, methods=('DELETE', 'POST'), invalidates=('catalog',)),
+    1017: api_event('delete_rating_dimension', delete_rating_dimension_handler, methods=('DELETE', 'POST'), invalidates=('catalog',)),
+    1018: api_event('list_db_backups', list_db_backups_handler, methods=('GET', 'POST'), read_only=True),
     1019: api_event('create_db_backup', create_db_backup_handler, methods=('POST',)),
     1020: api_event('restore_db_backup', restore_db_backup_handler, methods=('POST',)),
     1021: api_event('delete_db_backup', delete_db_backup_handler, methods=('DELETE', 'POST')),
     1022: api_event('fetch_external_image', fetch_external_image_handler, methods=('POST',)),
     1023: api_event('check_wtl_status', check_wtl_status_handler, methods=('GET', 'POST')),
     1024: api_event('delete_video_file', delete_video_file_handler, methods=('DELETE',)),
-    1025: api_event('resolve_movie_emby_playback', resolve_movie_emby_playback_handler, methods=('POST',)),
-    1026: api_event('link_movie_emby', link_movie_emby_handler, methods=('POST',))
+    1025: api_event('resolve_movie_emby_playback', resolve_movie_emby_playback_handler, methods=('POST',), invalidates=('movies',)),
+    1026: api_event('link_movie_emby', link_movie_emby_handler, methods=('POST',), invalidates=('movies',)),
+    1027: api_event('fetch_external_images', fetch_external_images_handler, methods=('POST',)),
+    1028: api_event('get_maintenance_job', get_maintenance_job_handler, methods=('GET', 'POST'), read_only=True),
+    1029: api_event('cancel_maintenance_job', cancel_maintenance_job_handler, methods=('POST',)),
+    1030: api_event('verify_db_backup', verify_db_backup_handler, methods=('POST',)),
+    1031: api_event('get_scheduled_tasks', get_scheduled_tasks_handler, methods=('GET', 'POST'), read_only=True),
+    1032: api_event('list_request_profiles', list_request_profiles_handler, methods=('GET', 'POST'), read_only=True)
 })
 
 APP_INITIALIZATION_LOCK = threading.Lock()
@@ -997,7 +1485,8 @@ def initialize_application(startup_debug_enabled=None):
         normalized_count = normalize_upload_image_permissions()
         if normalized_count:
             logger.info("Normalized permissions for %d uploaded image file(s)", normalized_count)
-        start_scheduled_backup_thread(startup_debug_enabled)
+        API_DATA_VERSIONS.start_epoch()
+        start_task_scheduler(startup_debug_enabled)
         APP_INITIALIZED = True
         return True
 
@@ -0,0 +1,132 @@
+"""Compare backup archive and dump compression modes on synthetic data.
+
+    python benchmarks/backup_compression.py --images 50000 --dump-mb 256
+
+Images are random bytes (like WebP/JPEG payloads they do not compress), the
+dump is repetitive SQL text. Results are printed as JSON.
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_collection.backup_codecs import (  # noqa: E402
+    ARCHIVE_GZIP_LEVEL,
+    ARCHIVE_IMAGE_GZIP_LEVEL,
+    BackupArchiveWriter,
+    open_dump_writer,
+    zstd_available,
+)
+
+
+def write_images(root, count, size):
+    files = []
+    for index in range(count):
+        relative_path = f'{2000 + index % 20}/{index:08d}.webp'
+        path = os.path.join(root, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as output:
+            output.write(os.urandom(size))
+        files.append((path, relative_path))
+    return files
+
+
+def write_dump(path, megabytes):
+    row = "INSERT INTO `movies` VALUES (%d,'Title %d','2026-01-01 00:00:00','tag-a,tag-b',NULL);\n"
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, 'wb') as output:
+        index = 0
+        while written < target:
+            chunk = ''.join(row % (index + offset, index + offset) for offset in range(1000)).encode('utf-8')
+            output.write(chunk)
+            written += len(chunk)
+            index += 1000
+    return written
+
+
+def timed(callback):
+    started = time.perf_counter()
+    callback()
+    return round(time.perf_counter() - started, 3)
+
+
+def bench_archive(work_dir, files, compression, compresslevel=ARCHIVE_IMAGE_GZIP_LEVEL):
+    archive_path = os.path.join(work_dir, f'images.{compression}.{compresslevel}.tar')
+
+    def run():
+        with open(archive_path, 'wb') as raw, BackupArchiveWriter(raw, compression) as archive:
+            for abs_path, relative_path in files:
+                archive.add_file(abs_path, f'images/{relative_path}', compresslevel=compresslevel)
+
+    seconds = timed(run)
+    size = os.path.getsize(archive_path)
+    os.remove(archive_path)
+    return {'seconds': seconds, 'bytes': size}
+
+
+def bench_dump(work_dir, dump_path, label, writer_factory):
+    output_path = os.path.join(work_dir, f'dump.{label}')
+
+    def run():
+        with open(dump_path, 'rb') as source, open(output_path, 'wb') as output_file:
+            with writer_factory(output_file) as output:
+                shutil.copyfileobj(source, output, 1024 * 1024)
+
+    seconds = timed(run)
+    size = os.path.getsize(output_path)
+    os.remove(output_path)
+    return {'seconds': seconds, 'bytes': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=50000)
+    parser.add_argument('--image-kb', type=int, default=40)
+    parser.add_argument('--dump-mb', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='backup_bench_')
+    try:
+        files = write_images(os.path.join(work_dir, 'images'), args.images, args.image_kb * 1024)
+        dump_path = os.path.join(work_dir, 'database.sql')
+        dump_bytes = write_dump(dump_path, args.dump_mb)
+
+        dump_results = {
+            'gzip_single': bench_dump(
+                work_dir, dump_path, 'gz1', lambda output: gzip.GzipFile(fileobj=output, mode='wb')
+            ),
+            'gzip_parallel': bench_dump(
+                work_dir, dump_path, 'gzp', lambda output: open_dump_writer(output, 'gzip', args.workers)
+            ),
+        }
+        if zstd_available():
+            dump_results['zstd'] = bench_dump(
+                work_dir, dump_path, 'zst', lambda output: open_dump_writer(output, 'zstd', args.workers)
+            )
+
+        results = {
+            'images': args.images,
+            'image_bytes': args.images * args.image_kb * 1024,
+            'dump_bytes': dump_bytes,
+            'archive': {
+                'gzip_deflated_images': bench_archive(work_dir, files, 'gzip', ARCHIVE_GZIP_LEVEL),
+                'gzip': bench_archive(work_dir, files, 'gzip'),
+                'store': bench_archive(work_dir, files, 'store'),
+            },
+            'dump': dump_results,
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Synthetic catalog generator shared by the benchmark suite.
+
+    python benchmarks/dataset.py --movies 5000 --output /tmp/vc-bench
+
+Writes movies with tags, ratings and image rows through the app's
+``%s``-style SQL, and real WebP files into an upload folder laid out like
+production (``<year>/<name>.webp``). The same ``--seed`` always yields
+the same catalog.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from benchmarks.sqlite_standin import SQLiteStandIn  # noqa: E402
+
+TITLE_WORDS = ['夜', '城市', '海', '风', 'Blue', 'Night', 'Red', '追踪', '记忆', 'Summer', '迷雾', 'Echo']
+REVIEW_SENTENCE = '这是一段用于基准测试的合成影评，内容长度接近真实记录。'
+BENCHMARK_TABLES = ('movie_images', 'movie_ratings', 'movie_tags', 'movies', 'tags', 'ratings_dimensions')
+INSERT_BATCH_ROWS = 1000
+DISTINCT_IMAGES = 8
+
+
+@dataclass
+class DatasetSpec:
+    movies: int = 2000
+    tags: int = 30
+    rating_dimensions: int = 6
+    tags_per_movie: int = 3
+    images_per_movie: int = 3
+    image_width: int = 1280
+    image_height: int = 720
+    seed: int = 1
+
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    titles: list
+    tag_names: list
+    dimension_names: list
+    image_filenames: list
+    upload_folder: str
+
+
+def movie_title(rng, index):
+    words = rng.sample(TITLE_WORDS, 2)
+    return f'{words[0]}{words[1]} {index:06d}'
+
+
+def render_image(rng, width, height):
+    image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(10, max(11, width // 6))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randrange(256) for _ in range(3)))
+    return image
+
+
+def encode_image(image, image_format='WEBP', quality=85):
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+def write_images(rng, spec, upload_folder, titles):
+    """Write ``images_per_movie`` files per movie, cycling a few distinct encodings."""
+    payloads = [
+        encode_image(render_image(rng, spec.image_width, spec.image_height))
+        for _ in range(min(DISTINCT_IMAGES, max(1, spec.movies * spec.images_per_movie)))
+    ]
+    rows = []
+    filenames = []
+    for movie_index, title in enumerate(titles):
+        year = 2020 + movie_index % 7
+        os.makedirs(os.path.join(upload_folder, str(year)), exist_ok=True)
+        for sort_order in range(spec.images_per_movie):
+            filename = f'{year}/bench-{movie_index:06d}-{sort_order}.webp'
+            with open(os.path.join(upload_folder, str(year), os.path.basename(filename)), 'wb') as image_file:
+                image_file.write(payloads[len(filenames) % len(payloads)])
+            rows.append((title, filename, sort_order))
+            filenames.append(filename)
+    return rows, filenames
+
+
+def insert_rows(cursor, statement, rows):
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        cursor.executemany(statement, rows[start:start + INSERT_BATCH_ROWS])
+
+
+def clear_tables(connection_factory):
+    with connection_factory() as conn:
+        cursor = conn.cursor()
+        for table in BENCHMARK_TABLES:
+            cursor.execute(f'DELETE FROM {table}')
+        conn.commit()
+
+
+def generate_dataset(connection_factory, upload_folder, spec):
+    rng = random.Random(spec.seed)
+    titles = [movie_title(rng, index) for index in range(spec.movies)]
+    tag_names = [f'标签{index:03d}' for index in range(spec.tags)]
+    dimension_names = [f'维度{index:02d}' for index in range(spec.rating_dimensions)]
+    newest = datetime(2026, 1, 1, 12, 0, 0)
+
+    image_rows, image_filenames = write_images(rng, spec, upload_folder, titles)
+    with connection_factory() as conn:
+        cursor = conn.cursor()
+        insert_rows(cursor, "INSERT INTO tags (name) VALUES (%s)", [(name,) for name in tag_names])
+        insert_rows(cursor, "INSERT INTO ratings_dimensions (name) VALUES (%s)", [(name,) for name in dimension_names])
+        cursor.execute("SELECT id FROM tags ORDER BY id")
+        tag_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM ratings_dimensions ORDER BY id")
+        dimension_ids = [row[0] for row in cursor.fetchall()]
+
+        insert_rows(cursor, """
+            INSERT INTO movies (title, recommended, review, added_date, emby_item_id)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [
+            (
+                title,
+                1 if rng.random() < 0.3 else 0,
+                REVIEW_SENTENCE * rng.randrange(1, 12),
+                newest - timedelta(minutes=index * 7),
+                str(100000 + index) if index % 4 == 0 else None
+            )
+            for index, title in enumerate(titles)
+        ])
+        insert_rows(cursor, "INSERT INTO movie_tags (movie_title, tag_id) VALUES (%s, %s)", [
+            (title, tag_id)
+            for title in titles
+            for tag_id in rng.sample(tag_ids, min(spec.tags_per_movie, len(tag_ids)))
+        ])
+        insert_rows(cursor, "INSERT INTO movie_ratings (movie_title, dimension_id, rating) VALUES (%s, %s, %s)", [
+            (title, dimension_id, rng.randint(1, 5))
+            for title in titles
+            for dimension_id in dimension_ids
+            if rng.random() < 0.8
+        ])
+        insert_rows(cursor, "INSERT INTO movie_images (movie_title, filename, sort_order) VALUES (%s, %s, %s)", image_rows)
+        conn.commit()
+
+    return Dataset(spec, titles, tag_names, dimension_names, image_filenames, upload_folder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', required=True, help='directory for the SQLite file and uploads')
+    for field, default in asdict(DatasetSpec()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(**{field: getattr(args, field) for field in asdict(DatasetSpec())})
+    os.makedirs(args.output, exist_ok=True)
+    database_path = os.path.join(args.output, 'catalog.sqlite3')
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    standin = SQLiteStandIn(database_path)
+    standin.create_schema()
+    dataset = generate_dataset(standin.connection, os.path.join(args.output, 'uploads'), spec)
+    print(json.dumps({'database': standin.path, 'images': len(dataset.image_filenames), **asdict(spec)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Time API response serialization for search pages of different sizes.
+
+    python benchmarks/json_serialization.py --sizes 10 100 500 --repeat 200
+
+Builds search_movies payloads shaped like hydrated rows (review text,
+ratings_display, image lists) and times the stdlib and orjson encoders of
+the app's JSON provider, plus gzip and brotli at the Flask-Compress levels.
+Needs no database. Results are printed as JSON, in milliseconds per response.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from video_collection import json_provider  # noqa: E402
+from video_collection.json_provider import FastJSONProvider  # noqa: E402
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+RATING_DIMENSIONS = ['剧情', '画面', '配乐', '演技', '节奏']
+TAGS = ['动作', '剧情', '科幻', '悬疑', '纪录片', '动画']
+
+
+def build_movie(index, added_date):
+    ratings = {name: (index + offset) % 5 + 1 for offset, name in enumerate(RATING_DIMENSIONS)}
+    images = [f'2026/{index:05d}-{shot}.webp' for shot in range(6)]
+    return {
+        'title': f'测试电影 {index:05d}',
+        'recommended': index % 3 == 0,
+        'review': '这是一段用于基准测试的影评。' * 12,
+        'added_date': added_date - timedelta(minutes=index),
+        'emby_item_id': str(100000 + index),
+        'image_filename': ','.join(images),
+        'tag_names': ', '.join(TAGS[index % len(TAGS):] + TAGS[:index % 2]),
+        'ratings': ','.join(f'{position + 1}:{rating}' for position, rating in enumerate(ratings.values())),
+        'ratings_display': ratings
+    }
+
+
+def build_payload(size):
+    added_date = datetime(2026, 7, 1, 12, 0, 0)
+    return {
+        'success': True,
+        'data': [build_movie(index, added_date) for index in range(size)],
+        'total': size * 10,
+        'page': 1,
+        'per_page': size
+    }
+
+
+def time_per_call(callback, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = callback()
+    return round((time.perf_counter() - started) * 1000 / repeat, 4), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 500])
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    encoders = {'stdlib': False}
+    if json_provider.orjson is not None:
+        encoders['orjson'] = True
+
+    results = {'encoders': sorted(encoders), 'sizes': {}}
+    for size in args.sizes:
+        payload = build_payload(size)
+        row = {}
+        for name, use_orjson in encoders.items():
+            provider.use_orjson = use_orjson
+            dump_ms, body = time_per_call(lambda: provider.dumps_bytes(payload), args.repeat)
+            row[name] = {'dump_ms': dump_ms, 'bytes': len(body)}
+        gzip_ms, compressed = time_per_call(lambda: gzip.compress(body, compresslevel=6), args.repeat)
+        row['gzip'] = {'compress_ms': gzip_ms, 'bytes': len(compressed)}
+        if brotli is not None:
+            brotli_ms, compressed = time_per_call(lambda: brotli.compress(body, quality=4), args.repeat)
+            row['brotli'] = {'compress_ms': brotli_ms, 'bytes': len(compressed)}
+        results['sizes'][str(size)] = row
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,627 @@
+"""Replay a realistic request mix against the app over HTTP.
+
+    python benchmarks/load_test.py --users 16 --duration 60
+    python benchmarks/load_test.py --workers 2 --threads 8 --output w2t8.json
+    python benchmarks/load_test.py --mix search=5,edit=1,stream_emby=2 --think-ms 200
+
+Generates a catalog with benchmarks/dataset.py, starts a fake Emby server
+and serves the app with gunicorn's gthread worker (the dockerfile's
+``--workers 1 --threads 4`` unless overridden; ``--server werkzeug`` uses
+the development server instead). ``--users`` client threads then send a
+weighted mix of searches, page-load batches, image and cover requests,
+movie edits, uploads, local video ranges and proxied Emby streams for
+``--duration`` seconds, and the report lists throughput, error rate and
+p50/p95/p99 latency per scenario. Requests made during ``--warmup`` are
+not counted. The database is the SQLite stand-in unless ``--backend
+mariadb --allow-writes`` is given; the load generator shares this
+machine's CPUs with the server, so compare runs made on the same host.
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from benchmarks.dataset import TITLE_WORDS, DatasetSpec, clear_tables, encode_image, generate_dataset, render_image  # noqa: E402
+from benchmarks.sqlite_standin import SQLiteStandIn  # noqa: E402
+from benchmarks.suite import git_commit, prepare_environment  # noqa: E402
+
+DEFAULT_MIX = 'search=35,page_load=10,image=18,cover=5,edit=8,upload=2,stream_local=10,stream_emby=10,emby_image=2'
+EMBY_ITEM_COUNT = 500
+EMBY_USER_ID = 'load-test-user'
+EMBY_ACCESS_TOKEN = 'load-test-token'
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)$')
+EMBY_PATH_PATTERN = re.compile(r'^/emby/(Items|Videos)/([^/]+)/(Images/Primary|stream)$')
+SERVER_START_TIMEOUT_SECONDS = 60
+REQUEST_TIMEOUT_SECONDS = 120
+RESULTS_VERSION = 1
+
+
+class FakeEmbyHandler(BaseHTTPRequestHandler):
+    """The Emby endpoints the app calls: login, primary images and ranged streams."""
+
+    protocol_version = 'HTTP/1.1'
+    video_path = None
+    image_bytes = b''
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.split('?', 1)[0] != '/emby/Users/AuthenticateByName':
+            return self.send_body(404, b'', 'text/plain')
+        body = json.dumps({'AccessToken': EMBY_ACCESS_TOKEN, 'User': {'Id': EMBY_USER_ID}}).encode('utf-8')
+        self.send_body(200, body, 'application/json')
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        match = EMBY_PATH_PATTERN.match(self.path.split('?', 1)[0])
+        if not match:
+            return self.send_body(404, b'', 'text/plain')
+        if match.group(3) == 'Images/Primary':
+            return self.send_body(200, self.image_bytes, 'image/jpeg')
+        self.send_video(self.headers.get('Range'))
+
+    def send_video(self, range_header):
+        file_size = os.path.getsize(self.video_path)
+        start, end = 0, file_size - 1
+        status = 200
+        match = RANGE_PATTERN.match(range_header or '')
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(end, int(match.group(2))) if match.group(2) else end
+            else:
+                start = max(0, file_size - int(match.group(2)))
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{file_size}')
+        self.end_headers()
+        with open(self.video_path, 'rb') as video_file:
+            video_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = video_file.read(min(remaining, 256 * 1024))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def build_fake_emby(video_path, image_bytes, latency_ms):
+    handler = type('LoadTestEmbyHandler', (FakeEmbyHandler,), {
+        'video_path': video_path,
+        'image_bytes': image_bytes,
+        'latency': latency_ms / 1000
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    return server
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def serve_with_gunicorn(application, port, args):
+    from gunicorn.app.base import BaseApplication
+
+    class LoadTestApplication(BaseApplication):
+        def load_config(self):
+            for name, value in {
+                'bind': f'127.0.0.1:{port}',
+                'workers': args.workers,
+                'threads': args.threads,
+                'worker_class': 'gthread',
+                'timeout': args.timeout,
+                'loglevel': 'warning'
+            }.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return application
+
+    LoadTestApplication().run()
+
+
+def serve_with_werkzeug(application, port, args):
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    make_server('127.0.0.1', port, application, threaded=True).serve_forever()
+
+
+SERVERS = {
+    'gunicorn': serve_with_gunicorn,
+    'werkzeug': serve_with_werkzeug,
+}
+
+
+def wait_until_ready(base_url, process):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise SystemExit(f'App server exited during startup with status {process.exitcode}')
+        try:
+            if requests.get(f'{base_url}/healthz', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f'App server did not become healthy within {SERVER_START_TIMEOUT_SECONDS}s')
+
+
+def stop_process(process):
+    if process.is_alive():
+        process.terminate()
+        process.join(30)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def parse_mix(value):
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for '{name}': {weight}")
+        if weights[name] < 0:
+            raise argparse.ArgumentTypeError(f"weight for '{name}' must not be negative")
+    weights = {name: weight for name, weight in weights.items() if weight}
+    if not weights:
+        raise argparse.ArgumentTypeError('the mix needs at least one scenario with a positive weight')
+    return weights
+
+
+class LoadClient:
+    """One simulated user: a keep-alive HTTP session and its own random stream."""
+
+    def __init__(self, base_url, fixture, seed):
+        self.base_url = base_url
+        self.fixture = fixture
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+
+    def get(self, path, **kwargs):
+        return self.session.get(f'{self.base_url}{path}', timeout=REQUEST_TIMEOUT_SECONDS, **kwargs)
+
+    def api(self, event, data=None, method='POST'):
+        return self.session.post(
+            f'{self.base_url}/api',
+            json=self.fixture.api_payload(event, data, method),
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+
+    def random_range(self, file_size):
+        range_bytes = min(file_size, self.fixture.range_bytes)
+        start = self.rng.randrange(0, file_size - range_bytes + 1)
+        return {'Range': f'bytes={start}-{start + range_bytes - 1}'}
+
+    def close(self):
+        self.session.close()
+
+
+class LoadFixture:
+    """Catalog facts the scenarios draw from, shared read-only by all clients."""
+
+    def __init__(self, dataset, event_ids, dimension_ids, upload_bytes, video_size, range_bytes):
+        self.dataset = dataset
+        self.event_ids = event_ids
+        self.dimension_ids = dimension_ids
+        self.upload_bytes = upload_bytes
+        self.video_size = video_size
+        self.range_bytes = range_bytes
+
+    def api_payload(self, event, data=None, method='POST'):
+        return {'e': self.event_ids[event], 'd': data or {}, 'm': method}
+
+    def movie_images(self, movie_index):
+        per_movie = self.dataset.spec.images_per_movie
+        return self.dataset.image_filenames[movie_index * per_movie:(movie_index + 1) * per_movie]
+
+
+def search_filters(client):
+    rng = client.rng
+    dataset = client.fixture.dataset
+    data = {'page': rng.choice((1, 1, 1, 2, 3)), 'per_page': rng.choice((10, 20, 50))}
+    if rng.random() < 0.4:
+        data['title'] = rng.choice(TITLE_WORDS)
+    if rng.random() < 0.2:
+        data['recommended'] = '1'
+    if dataset.tag_names and rng.random() < 0.3:
+        data['tags'] = ','.join(rng.sample(dataset.tag_names, min(len(dataset.tag_names), rng.choice((1, 1, 2)))))
+    if dataset.dimension_names and rng.random() < 0.2:
+        data['rating_dimension'] = rng.choice(dataset.dimension_names)
+        data['min_rating'] = str(rng.randint(2, 5))
+    return data
+
+
+def scenario_search(client):
+    return client.api('search_movies', search_filters(client))
+
+
+def scenario_page_load(client):
+    # 首页加载时前端一次批量请求标签、评分维度和第一页结果
+    fixture = client.fixture
+    return client.session.post(f'{client.base_url}/api', json={'b': [
+        fixture.api_payload('get_tags', method='GET'),
+        fixture.api_payload('get_ratings_dimensions', method='GET'),
+        fixture.api_payload('search_movies', {'page': 1, 'per_page': 20})
+    ]}, timeout=REQUEST_TIMEOUT_SECONDS)
+
+
+def scenario_image(client):
+    return client.get(f'/images/{client.rng.choice(client.fixture.dataset.image_filenames)}')
+
+
+def scenario_cover(client):
+    return client.get(f'/images/{client.rng.choice(client.fixture.dataset.image_filenames)}', params={'variant': 'cover'})
+
+
+def scenario_edit(client):
+    rng = client.rng
+    fixture = client.fixture
+    dataset = fixture.dataset
+    movie_index = rng.randrange(len(dataset.titles))
+    images = fixture.movie_images(movie_index)
+    tags = rng.sample(dataset.tag_names, min(len(dataset.tag_names), dataset.spec.tags_per_movie))
+    ratings = ','.join(f'{dimension_id}:{rng.randint(1, 5)}' for dimension_id in fixture.dimension_ids)
+    return client.api('update_movie', {
+        'title': dataset.titles[movie_index],
+        'recommended': rng.random() < 0.3,
+        'review': f'压测修改 {rng.randrange(10 ** 6)}',
+        'ratings': ratings,
+        'tags': ','.join(tags),
+        'image_filenames': ','.join(images),
+        'original_images': json.dumps(images)
+    }, method='PUT')
+
+
+def scenario_upload(client):
+    return client.session.post(
+        f'{client.base_url}/api',
+        files={'image': ('upload.jpg', client.fixture.upload_bytes, 'image/jpeg')},
+        timeout=REQUEST_TIMEOUT_SECONDS
+    )
+
+
+def scenario_stream_local(client):
+    return client.get('/videos/sample.mp4', headers=client.random_range(client.fixture.video_size))
+
+
+def scenario_stream_emby(client):
+    item_id = 100000 + client.rng.randrange(EMBY_ITEM_COUNT)
+    return client.get(f'/emby/stream/{item_id}', headers=client.random_range(client.fixture.video_size))
+
+
+def scenario_emby_image(client):
+    return client.get(f'/emby/image/{100000 + client.rng.randrange(EMBY_ITEM_COUNT)}')
+
+
+SCENARIOS = {
+    'search': scenario_search,
+    'page_load': scenario_page_load,
+    'image': scenario_image,
+    'cover': scenario_cover,
+    'edit': scenario_edit,
+    'upload': scenario_upload,
+    'stream_local': scenario_stream_local,
+    'stream_emby': scenario_stream_emby,
+    'emby_image': scenario_emby_image,
+}
+
+
+def response_failed(response):
+    if response.status_code >= 400:
+        return True
+    if response.headers.get('Content-Type', '').startswith('application/json'):
+        body = response.json()
+        # 批量请求整体返回 200，逐项检查各事件的状态
+        if isinstance(body, dict) and isinstance(body.get('results'), list):
+            return any((result or {}).get('status', 500) >= 400 for result in body['results'])
+        if isinstance(body, dict) and body.get('success') is False:
+            return True
+    return False
+
+
+class ScenarioSamples:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self.statuses = Counter()
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        self.bytes += other.bytes
+        self.statuses.update(other.statuses)
+
+
+def run_user(client, weights, record_after, deadline, think_seconds, samples):
+    names = list(weights)
+    name_weights = list(weights.values())
+    try:
+        while time.perf_counter() < deadline:
+            name = client.rng.choices(names, name_weights)[0]
+            started = time.perf_counter()
+            try:
+                response = SCENARIOS[name](client)
+                failed = response_failed(response)
+                status = str(response.status_code)
+                payload_bytes = len(response.content)
+            except (requests.RequestException, ValueError) as e:
+                failed = True
+                status = type(e).__name__
+                payload_bytes = 0
+            elapsed = time.perf_counter() - started
+            if started >= record_after:
+                result = samples.setdefault(name, ScenarioSamples())
+                result.latencies.append(elapsed)
+                result.errors += 1 if failed else 0
+                result.bytes += payload_bytes
+                result.statuses[status] += 1
+            if think_seconds:
+                time.sleep(client.rng.expovariate(1 / think_seconds))
+    finally:
+        client.close()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize_samples(samples, seconds):
+    ordered = sorted(samples.latencies)
+    count = len(ordered)
+    result = {
+        'requests': count,
+        'errors': samples.errors,
+        'error_rate': round(samples.errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / seconds, 2) if seconds else None,
+        'statuses': dict(sorted(samples.statuses.items()))
+    }
+    if count:
+        result.update({
+            'mean_ms': round(sum(ordered) / count * 1000, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2)
+        })
+    if samples.bytes:
+        result['bytes'] = samples.bytes
+        result['mb_per_s'] = round(samples.bytes / (1024 * 1024) / seconds, 2) if seconds else None
+    return result
+
+
+def run_load(base_url, fixture, args):
+    started = time.perf_counter()
+    record_after = started + args.warmup
+    deadline = record_after + args.duration
+    per_user = [{} for _ in range(args.users)]
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(
+                LoadClient(base_url, fixture, args.seed * 1000 + index),
+                args.mix,
+                record_after,
+                deadline,
+                args.think_ms / 1000,
+                per_user[index]
+            ),
+            name=f'load-user-{index}',
+            daemon=True
+        )
+        for index in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 持续时间内发出、之后才完成的请求也计入，吞吐按实际窗口计算
+    seconds = max(args.duration, time.perf_counter() - record_after)
+
+    merged = {}
+    total = ScenarioSamples()
+    for samples in per_user:
+        for name, result in samples.items():
+            merged.setdefault(name, ScenarioSamples()).merge(result)
+            total.merge(result)
+    return {
+        'seconds': round(seconds, 3),
+        'totals': summarize_samples(total, seconds),
+        'scenarios': {name: summarize_samples(merged[name], seconds) for name in sorted(merged)}
+    }
+
+
+@contextmanager
+def standin_app_connection(standin, observer):
+    from video_collection.database import InstrumentedConnection
+
+    with standin.connection() as conn:
+        yield InstrumentedConnection(conn, observer)
+
+
+def prepare_backend(args, app_module, work_dir):
+    if args.backend == 'sqlite':
+        standin = SQLiteStandIn(os.path.join(work_dir, 'catalog.sqlite3'))
+        standin.create_schema()
+        # 服务进程由本进程 fork 而来，替换模块级工厂后所有请求都走 SQLite
+        app_module.get_db_connection = lambda: standin_app_connection(standin, app_module.record_db_query)
+        return standin.connection
+    if not app_module.init_db():
+        raise SystemExit('Database schema initialization failed')
+    clear_tables(app_module.get_db_connection)
+    return app_module.get_db_connection
+
+
+def write_sample_video(video_root, size_mb):
+    os.makedirs(video_root, exist_ok=True)
+    video_path = os.path.join(video_root, 'sample.mp4')
+    with open(video_path, 'wb') as video_file:
+        for _ in range(size_mb):
+            video_file.write(os.urandom(1024 * 1024))
+    return video_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'mariadb'), default='sqlite')
+    parser.add_argument('--allow-writes', action='store_true', help='required for --backend mariadb')
+    parser.add_argument('--server', choices=tuple(SERVERS), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--timeout', type=int, default=120, help='gunicorn worker timeout in seconds')
+    parser.add_argument('--users', type=int, default=8, help='concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds of load before measuring')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean pause between a user\'s requests')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--video-mb', type=int, default=32)
+    parser.add_argument('--range-kb', type=int, default=1024)
+    parser.add_argument('--emby-latency-ms', type=float, default=0.0, help='delay added by the fake Emby server')
+    parser.add_argument('--output', help='write results to this file instead of stdout')
+    parser.add_argument('--keep', action='store_true', help='keep the generated work directory')
+    for field, default in asdict(DatasetSpec(movies=1000)).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+    if args.backend == 'mariadb' and not args.allow_writes:
+        parser.error('--backend mariadb replaces the catalog tables; pass --allow-writes to confirm')
+    if args.users < 1 or args.duration <= 0 or args.video_mb < 1:
+        parser.error('--users, --duration and --video-mb must be positive')
+
+    spec = DatasetSpec(**{field: getattr(args, field) for field in asdict(DatasetSpec())})
+    work_dir = tempfile.mkdtemp(prefix='vc_load_')
+    fake_emby = None
+    processes = []
+    try:
+        prepare_environment(args, work_dir)
+        video_root = os.path.join(work_dir, 'videos')
+        video_path = write_sample_video(video_root, args.video_mb)
+        rng = random.Random(args.seed)
+        upload_bytes = encode_image(render_image(rng, 1920, 1080), 'JPEG', 90)
+        fake_emby = build_fake_emby(video_path, encode_image(render_image(rng, 400, 600), 'JPEG', 85), args.emby_latency_ms)
+        os.environ['EMBY_SERVER_URL'] = f'http://127.0.0.1:{fake_emby.server_address[1]}'
+        os.environ['EMBY_USERNAME'] = 'load-test'
+        os.environ['EMBY_PASSWORD'] = 'load-test'
+
+        import app as app_module
+
+        upload_folder = os.path.join(work_dir, 'uploads')
+        app_module.app.config['UPLOAD_FOLDER'] = upload_folder
+        app_module.VIDEO_LIBRARY_ROOT = video_root
+        connection_factory = prepare_backend(args, app_module, work_dir)
+        dataset = generate_dataset(connection_factory, upload_folder, spec)
+        with connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM ratings_dimensions ORDER BY id")
+            dimension_ids = [row[0] for row in cursor.fetchall()]
+        fixture = LoadFixture(
+            dataset,
+            {event['name']: event_id for event_id, event in app_module.API_EVENTS.items()},
+            dimension_ids,
+            upload_bytes,
+            args.video_mb * 1024 * 1024,
+            args.range_kb * 1024
+        )
+
+        # 先 fork 服务进程，再启动线程，子进程里不会带着半截的锁
+        fork = multiprocessing.get_context('fork')
+        port = free_port()
+        processes.append(fork.Process(target=fake_emby.serve_forever, name='fake-emby', daemon=True))
+        processes.append(fork.Process(target=SERVERS[args.server], args=(app_module.app, port, args), name='app-server'))
+        for process in processes:
+            process.start()
+        base_url = f'http://127.0.0.1:{port}'
+        wait_until_ready(base_url, processes[-1])
+
+        load = run_load(base_url, fixture, args)
+        results = {
+            'version': RESULTS_VERSION,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'backend': args.backend,
+            'server': {
+                'kind': args.server,
+                **({'workers': args.workers, 'threads': args.threads, 'timeout': args.timeout} if args.server == 'gunicorn' else {})
+            },
+            'load': {
+                'users': args.users,
+                'duration': args.duration,
+                'warmup': args.warmup,
+                'think_ms': args.think_ms,
+                'mix': args.mix,
+                'range_kb': args.range_kb,
+                'emby_latency_ms': args.emby_latency_ms
+            },
+            'dataset': asdict(spec),
+            **load
+        }
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as output_file:
+                output_file.write(f'{output}\n')
+        else:
+            print(output)
+        return 0
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+        if fake_emby is not None:
+            fake_emby.server_close()
+        if args.keep:
+            print(f'work directory kept at {work_dir}', file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
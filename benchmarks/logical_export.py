@@ -0,0 +1,91 @@
+"""Compare the mariadb-dump export with the native logical exporter.
+
+    DB_HOST=127.0.0.1 DB_USER=... DB_PASSWORD=... DB_DATABASE=movies \\
+        python benchmarks/logical_export.py --workers 1 2 4
+
+Both exporters stream into a byte counter, so only export and compression
+time is measured. Needs a reachable MariaDB and, for the baseline, the
+mariadb-dump binary. Results are printed as JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_collection import database  # noqa: E402
+from video_collection.backups import BackupService  # noqa: E402
+
+
+class CountingSink:
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def timed_export(callback):
+    sink = CountingSink()
+    started = time.perf_counter()
+    callback(sink)
+    return {'seconds': round(time.perf_counter() - started, 3), 'bytes': sink.bytes}
+
+
+def table_row_counts(db_config):
+    with database.get_db_connection(db_config) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        """, (db_config['database'],))
+        return {name: rows for name, rows in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--skip-mariadb-dump', action='store_true')
+    args = parser.parse_args()
+
+    db_config = database.build_db_config()
+    work_dir = tempfile.mkdtemp(prefix='logical_bench_')
+    try:
+        service = BackupService(
+            db_config_getter=lambda: db_config,
+            backup_dir_getter=lambda: work_dir,
+            upload_folder_getter=lambda: work_dir,
+            db_connection_factory=lambda: database.get_db_connection(db_config),
+            logger=logging.getLogger('logical_export'),
+            image_filename_normalizer=lambda filename: filename,
+            include_routines_getter=lambda: False,
+            schedule_enabled_getter=lambda: False,
+            schedule_time_getter=lambda: '03:30',
+            retention_count_getter=lambda: 0
+        )
+        results = {'estimated_rows': table_row_counts(db_config), 'exports': {}}
+        if not args.skip_mariadb_dump:
+            results['exports']['mariadb_dump_gzip'] = timed_export(
+                lambda sink: service.stream_database_dump(sink, 'gzip')
+            )
+        for workers in args.workers:
+            results['exports'][f'logical_{workers}_workers'] = timed_export(
+                lambda sink, workers=workers: service.stream_logical_dump(sink, workers=workers)
+            )
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Embedded SQLite stand-in for MariaDB, used by the benchmark suite.
+
+Speaks just enough of the ``mysql.connector`` interface for the app's
+query code (``%s`` placeholders, ``cursor(dictionary=True)``) and builds
+the schema from ``video_collection.schema``. Timings against it show
+relative changes in the Python side of a request; absolute query times
+differ from MariaDB.
+"""
+import os
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_collection import schema  # noqa: E402
+from video_collection.backup_codecs import open_dump_writer  # noqa: E402
+from video_collection.backups import BackupService  # noqa: E402
+
+SQLITE_DDL_REPLACEMENTS = (
+    ('INT AUTO_INCREMENT PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+)
+# movie_metadata 写入时使用的 MariaDB 方言
+SQLITE_DML_REPLACEMENTS = (
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+    (re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'\bVALUES\((\w+)\)'), r'excluded.\1'),
+)
+EMBY_LINK_COLUMN_SQL = "ALTER TABLE movies ADD COLUMN emby_item_id VARCHAR(128) NULL"
+
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode('utf-8')))
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' ', timespec='seconds'))
+
+
+def sqlite_statement(statement):
+    for pattern, replacement in SQLITE_DML_REPLACEMENTS:
+        statement = pattern.sub(replacement, statement)
+    return statement.replace('%s', '?')
+
+
+class StandInCursor:
+    def __init__(self, cursor, dictionary=False):
+        self.cursor = cursor
+        self.dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    def execute(self, statement, params=()):
+        self.cursor.execute(sqlite_statement(statement), tuple(params or ()))
+
+    def executemany(self, statement, rows):
+        self.cursor.executemany(sqlite_statement(statement), [tuple(row) for row in rows])
+
+    def convert(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self.cursor.description, row)}
+
+    def fetchone(self):
+        return self.convert(self.cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self.convert(row) for row in self.cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self.convert(row) for row in self.cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self.cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, path):
+        # 批量请求的只读事件会在工作线程中共用同一连接
+        self.conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StandInCursor(self.conn.cursor(), dictionary)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def is_connected(self):
+        return self.conn is not None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class SQLiteStandIn:
+    """A file-backed SQLite database with the app's core schema."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db_config = {'host': 'sqlite', 'user': '', 'password': '', 'database': 'benchmark'}
+
+    @contextmanager
+    def connection(self):
+        conn = StandInConnection(self.path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create_schema(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # WAL 让并发请求的读不被写阻塞，接近 InnoDB 的行为
+            cursor.execute('PRAGMA journal_mode = WAL')
+            for create_sql in schema.CORE_TABLES:
+                for mysql_sql, sqlite_sql in SQLITE_DDL_REPLACEMENTS:
+                    create_sql = create_sql.replace(mysql_sql, sqlite_sql)
+                cursor.execute(create_sql)
+            for _, _, create_sql in schema.CORE_INDEXES:
+                cursor.execute(create_sql)
+            cursor.execute(EMBY_LINK_COLUMN_SQL)
+            conn.commit()
+
+    def dump_sql(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            yield from conn.iterdump()
+        finally:
+            conn.close()
+
+    def restore_sql(self, script):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute('PRAGMA foreign_keys = OFF')
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            for table in tables:
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.executescript(script)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class StandInBackupService(BackupService):
+    """``BackupService`` with the ``mariadb-dump``/``mariadb`` pipes replaced.
+
+    Archive writing, image manifests, extraction and the image swap run
+    the production code; only the SQL export and import go to SQLite.
+    """
+
+    def __init__(self, standin, **kwargs):
+        super().__init__(db_config_getter=lambda: standin.db_config, **kwargs)
+        self.standin = standin
+
+    def stream_database_dump(self, output, compression):
+        with open_dump_writer(output, compression) as writer:
+            for statement in self.standin.dump_sql():
+                writer.write(f'{statement}\n'.encode('utf-8'))
+
+    def stream_database_restore(self, input_file):
+        self.standin.restore_sql(input_file.read().decode('utf-8'))
+
+
+__all__ = [
+    'SQLiteStandIn',
+    'StandInBackupService',
+]
@@ -0,0 +1,451 @@
+"""Run the performance benchmark suite on a synthetic catalog.
+
+    python benchmarks/suite.py --movies 2000 --output results.json
+    python benchmarks/suite.py --output new.json --compare results.json --threshold 0.15
+    DB_HOST=127.0.0.1 DB_USER=... DB_PASSWORD=... DB_DATABASE=bench \\
+        python benchmarks/suite.py --backend mariadb --allow-writes
+
+Generates the catalog with benchmarks/dataset.py, then times search for
+every filter combination, row hydration, duplicate checking, upload image
+processing, cover generation, video range streaming, backup and restore
+through the app's own handlers. The default backend is an embedded SQLite
+stand-in (benchmarks/sqlite_standin.py); ``--backend mariadb`` uses the
+DB_* database instead and wipes its catalog tables, so point it at a
+throwaway database. Results are JSON; with ``--compare`` the medians are
+checked against an earlier run and the exit status is 1 on regressions.
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+from benchmarks.dataset import TITLE_WORDS, DatasetSpec, clear_tables, encode_image, generate_dataset, render_image  # noqa: E402
+from benchmarks.sqlite_standin import SQLiteStandIn, StandInBackupService  # noqa: E402
+
+BENCHMARK_GROUPS = ('search', 'hydrate', 'duplicates', 'upload', 'cover', 'video', 'backup')
+RATING_FILTERS = ('', 'min_rating', 'dimension_rating')
+HYDRATE_PAGE_SIZES = (10, 50, 100)
+UPLOAD_SIZES = ((1280, 720), (4032, 3024))
+RESULTS_VERSION = 1
+
+
+def summarize(samples, payload_bytes=None):
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    result = {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(median * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+    if payload_bytes:
+        result['bytes'] = payload_bytes
+        result['mb_per_s'] = round(payload_bytes / (1024 * 1024) / median, 1) if median else None
+    return result
+
+
+def measure(callback, repeat, warmup=1, setup=None, payload_bytes=None):
+    """Time ``callback`` ``repeat`` times; ``setup`` runs untimed before each call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        callback()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        callback()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, payload_bytes)
+
+
+def search_filter_combinations(dataset):
+    for title, recommended, tags in itertools.product((False, True), repeat=3):
+        for rating in RATING_FILTERS:
+            data = {'page': 1, 'per_page': 20}
+            parts = []
+            if title:
+                data['title'] = TITLE_WORDS[0]
+                parts.append('title')
+            if recommended:
+                data['recommended'] = '1'
+                parts.append('recommended')
+            if tags:
+                data['tags'] = dataset.tag_names[0]
+                parts.append('tags')
+            if rating == 'min_rating':
+                data['min_rating'] = '3'
+            elif rating == 'dimension_rating':
+                data['rating_dimension'] = dataset.dimension_names[0]
+                data['min_rating'] = '4'
+            if rating:
+                parts.append(rating)
+            yield '+'.join(parts) or 'none', data
+
+
+class BenchmarkContext:
+    def __init__(self, args, app_module, handlers, connection_factory, dataset, work_dir, backup_service):
+        self.args = args
+        self.app_module = app_module
+        self.handlers = handlers
+        self.connection_factory = connection_factory
+        self.dataset = dataset
+        self.work_dir = work_dir
+        self.backup_service = backup_service
+        self.rng = random.Random(args.seed)
+
+    def in_request(self, callback):
+        def run():
+            with self.app_module.app.test_request_context('/api'):
+                response = callback()
+            if isinstance(response, tuple):
+                response = response[0]
+            if response.status_code >= 400:
+                raise RuntimeError(f'Benchmark request failed: {response.get_data(as_text=True)[:200]}')
+        return run
+
+
+def bench_search(context):
+    handlers = context.handlers
+    results = {}
+    for name, data in search_filter_combinations(context.dataset):
+        results[f'search.{name}'] = measure(
+            context.in_request(lambda data=data: handlers.search_movies_sql_handler(handlers.search_movies_filters(data))),
+            context.args.repeat
+        )
+    cached = replace(handlers.dependencies, search_response_cache=context.app_module.ResponseCache())
+    cached_handlers = type(handlers)(cached)
+    results['search.cached_hit'] = measure(
+        context.in_request(lambda: cached_handlers.search_movies_handler({'page': 1, 'per_page': 20})),
+        context.args.repeat
+    )
+    return results
+
+
+def bench_hydrate(context):
+    from video_collection.movie_metadata import hydrate_movie_rows
+
+    results = {}
+    with ExitStack() as stack:
+        conn = stack.enter_context(context.connection_factory())
+        cursor = conn.cursor(dictionary=True)
+        for page_size in HYDRATE_PAGE_SIZES:
+            cursor.execute("""
+                SELECT title, recommended, review, added_date, emby_item_id
+                FROM movies ORDER BY added_date DESC LIMIT %s
+            """, (page_size,))
+            rows = cursor.fetchall()
+            results[f'hydrate.page_{page_size}'] = measure(
+                lambda rows=rows: hydrate_movie_rows(cursor, [dict(row) for row in rows]),
+                context.args.repeat
+            )
+    return results
+
+
+def bench_duplicates(context):
+    titles = context.dataset.titles
+    rng = context.rng
+    exact = rng.sample(titles, min(40, len(titles)))
+    partial = [title.split(' ')[-1] for title in rng.sample(titles, min(30, len(titles)))]
+    missing = [f'不存在的电影 {index}' for index in range(30)]
+    candidates = exact + partial + missing
+    return {
+        f'duplicates.check_{len(candidates)}': measure(
+            context.in_request(lambda: context.handlers.check_duplicates_handler({'titles': candidates})),
+            context.args.repeat
+        )
+    }
+
+
+def bench_upload(context):
+    from video_collection.uploads import process_image_variants
+
+    results = {}
+    for width, height in UPLOAD_SIZES:
+        content = encode_image(render_image(context.rng, width, height), 'JPEG', 90)
+        results[f'upload.process_{width}x{height}'] = measure(
+            lambda content=content: process_image_variants(
+                FileStorage(stream=io.BytesIO(content), filename='upload.jpg')
+            ),
+            max(1, context.args.repeat // 4),
+            payload_bytes=len(content)
+        )
+    return results
+
+
+def bench_cover(context):
+    from video_collection.uploads import IMAGE_COVER_VARIANT, ensure_image_cover, get_image_variant_filename
+
+    upload_folder = context.dataset.upload_folder
+    filenames = itertools.cycle(context.dataset.image_filenames)
+    current = {}
+
+    def remove_cover():
+        filename = next(filenames)
+        cover_path = os.path.join(upload_folder, *get_image_variant_filename(filename, IMAGE_COVER_VARIANT).split('/'))
+        if os.path.exists(cover_path):
+            os.remove(cover_path)
+        current['filename'] = filename
+
+    def generate():
+        if not ensure_image_cover(current['filename'], upload_folder):
+            raise RuntimeError(f"Cover generation failed for {current['filename']}")
+
+    return {'cover.generate': measure(generate, context.args.repeat, setup=remove_cover)}
+
+
+def bench_video(context):
+    video_root = os.path.join(context.work_dir, 'videos')
+    os.makedirs(video_root, exist_ok=True)
+    video_size = context.args.video_mb * 1024 * 1024
+    with open(os.path.join(video_root, 'sample.mp4'), 'wb') as video_file:
+        for _ in range(context.args.video_mb):
+            video_file.write(os.urandom(1024 * 1024))
+    context.app_module.VIDEO_LIBRARY_ROOT = video_root
+    client = context.app_module.app.test_client()
+    range_bytes = min(video_size, context.args.range_kb * 1024)
+
+    def fetch(range_header=None):
+        headers = {'Range': range_header} if range_header else {}
+        response = client.get('/videos/sample.mp4', headers=headers)
+        body = response.get_data()
+        if response.status_code not in (200, 206):
+            raise RuntimeError(f'Video request failed with {response.status_code}')
+        return len(body)
+
+    def random_range():
+        start = context.rng.randrange(0, video_size - range_bytes + 1)
+        return f'bytes={start}-{start + range_bytes - 1}'
+
+    return {
+        f'video.range_{context.args.range_kb}kb': measure(
+            lambda: fetch(random_range()),
+            context.args.repeat,
+            payload_bytes=range_bytes
+        ),
+        'video.seek_probe': measure(lambda: fetch('bytes=0-1'), context.args.repeat),
+        f'video.full_{context.args.video_mb}mb': measure(
+            lambda: fetch(),
+            max(1, context.args.repeat // 4),
+            payload_bytes=video_size
+        )
+    }
+
+
+def bench_backup(context):
+    service = context.backup_service
+    created = []
+    repeat = context.args.backup_repeat
+
+    def wait_for_next_second():
+        # 备份文件名精确到秒，等到下一秒避免覆盖上一次的结果
+        time.sleep(1.0 - (time.time() % 1.0))
+
+    def backup():
+        created.append(service.run_database_backup()['filename'])
+
+    backup_stats = measure(backup, repeat, warmup=0, setup=wait_for_next_second)
+    restore_stats = measure(lambda: service.run_backup_restore(created[-1]), repeat, warmup=0)
+    archive_bytes = os.path.getsize(service.get_backup_file_path(created[-1], must_exist=True))
+    backup_stats['bytes'] = restore_stats['bytes'] = archive_bytes
+    return {
+        f'backup.full_{service.compression}': backup_stats,
+        f'restore.full_{service.compression}': restore_stats
+    }
+
+
+BENCHMARKS = {
+    'search': bench_search,
+    'hydrate': bench_hydrate,
+    'duplicates': bench_duplicates,
+    'upload': bench_upload,
+    'cover': bench_cover,
+    'video': bench_video,
+    'backup': bench_backup,
+}
+
+
+def compare_results(baseline, current, threshold):
+    """Compare medians; returns ``{name: {baseline_ms, current_ms, ratio, status}}``."""
+    comparison = {}
+    for name, result in current['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not previous.get('median_ms'):
+            continue
+        ratio = result['median_ms'] / previous['median_ms']
+        status = 'unchanged'
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        comparison[name] = {
+            'baseline_ms': previous['median_ms'],
+            'current_ms': result['median_ms'],
+            'ratio': round(ratio, 3),
+            'status': status
+        }
+    return comparison
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_environment(args, work_dir):
+    # app 在导入时读取配置，需先于导入设置
+    if args.backend == 'sqlite':
+        for name, value in (('DB_HOST', 'sqlite'), ('DB_USER', 'bench'), ('DB_PASSWORD', 'bench'), ('DB_DATABASE', 'benchmark')):
+            os.environ.setdefault(name, value)
+    os.environ['APP_ACCESS_TOKEN'] = ''
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['DB_BACKUP_DIR'] = os.path.join(work_dir, 'backups')
+    os.environ['SHARED_STATE_BACKEND'] = 'memory'
+
+
+def build_backend(args, app_module, work_dir, upload_folder):
+    from video_collection import database
+    from video_collection.backups import BackupService
+
+    service_options = {
+        'backup_dir_getter': lambda: os.path.join(work_dir, 'backups'),
+        'upload_folder_getter': lambda: upload_folder,
+        'logger': logging.getLogger('benchmarks'),
+        'image_filename_normalizer': app_module.normalize_upload_filename,
+        'include_routines_getter': lambda: False,
+        'schedule_enabled_getter': lambda: False,
+        'schedule_time_getter': lambda: '03:30',
+        'retention_count_getter': lambda: 0,
+        'compression_getter': lambda: args.backup_compression
+    }
+    if args.backend == 'sqlite':
+        standin = SQLiteStandIn(os.path.join(work_dir, 'catalog.sqlite3'))
+        standin.create_schema()
+        return standin.connection, StandInBackupService(
+            standin,
+            db_connection_factory=standin.connection,
+            **service_options
+        )
+
+    db_config = database.build_db_config()
+    connection_factory = lambda: database.get_db_connection(db_config)  # noqa: E731
+    if not app_module.init_db():
+        raise SystemExit('Database schema initialization failed')
+    clear_tables(connection_factory)
+    return connection_factory, BackupService(
+        db_config_getter=lambda: db_config,
+        db_connection_factory=connection_factory,
+        **service_options
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'mariadb'), default='sqlite')
+    parser.add_argument('--allow-writes', action='store_true', help='required for --backend mariadb')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARK_GROUPS, default=list(BENCHMARK_GROUPS))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--backup-repeat', type=int, default=3)
+    parser.add_argument('--backup-compression', default='gzip')
+    parser.add_argument('--video-mb', type=int, default=64)
+    parser.add_argument('--range-kb', type=int, default=1024)
+    parser.add_argument('--output', help='write results to this file instead of stdout')
+    parser.add_argument('--compare', help='earlier results file to compare medians against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative median change reported as a regression')
+    parser.add_argument('--keep', action='store_true', help='keep the generated work directory')
+    for field, default in asdict(DatasetSpec()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+    if args.backend == 'mariadb' and not args.allow_writes:
+        parser.error('--backend mariadb replaces the catalog tables; pass --allow-writes to confirm')
+
+    spec = DatasetSpec(**{field: getattr(args, field) for field in asdict(DatasetSpec())})
+    work_dir = tempfile.mkdtemp(prefix='vc_bench_')
+    try:
+        prepare_environment(args, work_dir)
+        import app as app_module
+        from video_collection.api_handlers import ApiHandlers
+
+        upload_folder = os.path.join(work_dir, 'uploads')
+        app_module.app.config['UPLOAD_FOLDER'] = upload_folder
+        connection_factory, backup_service = build_backend(args, app_module, work_dir, upload_folder)
+
+        started = time.perf_counter()
+        dataset = generate_dataset(connection_factory, upload_folder, spec)
+        generate_seconds = round(time.perf_counter() - started, 3)
+
+        handlers = ApiHandlers(replace(
+            app_module._api_handlers.dependencies,
+            get_db_connection=connection_factory,
+            get_upload_folder=lambda: upload_folder
+        ))
+        context = BenchmarkContext(args, app_module, handlers, connection_factory, dataset, work_dir, backup_service)
+        benchmarks = {}
+        for group in BENCHMARK_GROUPS:
+            if group in args.only:
+                benchmarks.update(BENCHMARKS[group](context))
+
+        results = {
+            'version': RESULTS_VERSION,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'dataset': {**asdict(spec), 'generate_seconds': generate_seconds},
+            'benchmarks': benchmarks
+        }
+        regressions = []
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as baseline_file:
+                results['comparison'] = compare_results(json.load(baseline_file), results, args.threshold)
+            regressions = [name for name, item in results['comparison'].items() if item['status'] == 'regression']
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as output_file:
+                output_file.write(f'{output}\n')
+        else:
+            print(output)
+        for name in regressions:
+            item = results['comparison'][name]
+            print(f"regression: {name} {item['baseline_ms']} ms -> {item['current_ms']} ms (x{item['ratio']})", file=sys.stderr)
+        return 1 if regressions else 0
+    finally:
+        if args.keep:
+            print(f'work directory kept at {work_dir}', file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const projectRoot = path.resolve(__dirname, '..');
+const staticDir = path.join(projectRoot, 'static');
+const distDir = path.join(staticDir, 'dist');
+const manifestFile = path.join(distDir, 'manifest.json');
+const assets = [
+  'main.min.js',
+  'styles.min.css',
+  'vendor/bulma.min.css'
+];
+
+function hashedName(asset, content) {
+  const hash = crypto.createHash('sha256').update(content).digest('hex').slice(0, 12);
+  const extension = path.extname(asset);
+  return `${asset.slice(0, -extension.length)}.${hash}${extension}`;
+}
+
+function writeVariants(target, content) {
+  fs.mkdirSync(path.dirname(target), { recursive: true });
+  fs.writeFileSync(target, content);
+  fs.writeFileSync(`${target}.gz`, zlib.gzipSync(content, { level: zlib.constants.Z_BEST_COMPRESSION }));
+  fs.writeFileSync(`${target}.br`, zlib.brotliCompressSync(content, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+      [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: content.length
+    }
+  }));
+}
+
+function listFiles(directory) {
+  if (!fs.existsSync(directory)) return [];
+  return fs.readdirSync(directory, { withFileTypes: true }).flatMap((entry) => {
+    const entryPath = path.join(directory, entry.name);
+    return entry.isDirectory() ? listFiles(entryPath) : [entryPath];
+  });
+}
+
+const manifest = {};
+for (const asset of assets) {
+  const content = fs.readFileSync(path.join(staticDir, asset));
+  const name = hashedName(asset, content);
+  writeVariants(path.join(distDir, name), content);
+  manifest[asset] = `dist/${name}`;
+}
+
+// 删除旧版本的哈希文件，只保留清单引用的文件及其压缩副本
+const keep = new Set([manifestFile]);
+for (const target of Object.values(manifest)) {
+  const targetPath = path.join(staticDir, target);
+  [targetPath, `${targetPath}.gz`, `${targetPath}.br`].forEach(file => keep.add(file));
+}
+for (const file of listFiles(distDir)) {
+  if (!keep.has(file)) fs.unlinkSync(file);
+}
+
+fs.writeFileSync(manifestFile, `${JSON.stringify(manifest, null, 2)}\n`);
+console.log(`Built ${assets.length} hashed assets into static/dist`);
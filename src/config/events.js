@@ -24,7 +24,13 @@ const event_map = {
     check_wtl_status: 1023,
     delete_video_file: 1024,
     resolve_movie_emby_playback: 1025,
-    link_movie_emby: 1026
+    link_movie_emby: 1026,
+    fetch_external_images: 1027,
+    get_maintenance_job: 1028,
+    cancel_maintenance_job: 1029,
+    verify_db_backup: 1030,
+    get_scheduled_tasks: 1031,
+    list_request_profiles: 1032
 };
 
 window.event_map = event_map;
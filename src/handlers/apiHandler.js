@@ -1,3 +1,9 @@
+const API_BATCH_MAX_EVENTS = 20;
+const API_RESPONSE_CACHE_LIMIT = 50;
+const apiResponseCache = new Map();
+let pendingApiCalls = [];
+let apiFlushScheduled = false;
+
 function getCsrfToken() {
   const meta = document.querySelector('meta[name="csrf-token"]');
   return meta ? meta.getAttribute('content') || '' : '';
@@ -8,29 +14,116 @@ function getCsrfHeaders() {
   return token ? { 'X-CSRF-Token': token } : {};
 }
 
-async function callApi(eventId, data = {}, method = 'POST') {
+// 服务端为可缓存事件返回 ETag，再次请求时带上 ETag，未变化则复用本地结果
+function getCachedApiResponse(key) {
+  return apiResponseCache.get(key) || null;
+}
+
+function storeApiResponse(key, etag, body) {
+  if (!etag || !body || body.success === false) return;
+  apiResponseCache.delete(key);
+  apiResponseCache.set(key, { etag, body: structuredClone(body) });
+  if (apiResponseCache.size > API_RESPONSE_CACHE_LIMIT) {
+    apiResponseCache.delete(apiResponseCache.keys().next().value);
+  }
+}
+
+async function postApi(body, etag = '') {
+  const response = await fetch('/api', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...getCsrfHeaders(),
+      ...(etag ? { 'If-None-Match': etag } : {})
+    },
+    body: JSON.stringify(body)
+  });
+  if (response.status === 304) {
+    return { notModified: true, etag };
+  }
+  return { body: await response.json(), etag: response.headers.get('ETag') || '' };
+}
+
+async function sendSingleApiCall(call) {
+  const cached = getCachedApiResponse(call.key);
+  const result = await postApi(call.event, cached ? cached.etag : '');
+  if (result.notModified && cached) {
+    call.resolve(structuredClone(cached.body));
+    return;
+  }
+  storeApiResponse(call.key, result.etag, result.body);
+  call.resolve(result.body);
+}
+
+async function sendApiCalls(calls) {
   try {
-    const response = await fetch('/api', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        ...getCsrfHeaders()
-      },
-      body: JSON.stringify({
-        e: eventId,
-        d: data,
-        m: method
-      })
+    if (calls.length === 1) {
+      await sendSingleApiCall(calls[0]);
+      return;
+    }
+    const cachedResponses = calls.map(call => getCachedApiResponse(call.key));
+    const { body: result } = await postApi({
+      b: calls.map((call, index) => (
+        cachedResponses[index] ? { ...call.event, v: cachedResponses[index].etag } : call.event
+      ))
+    });
+    if (!Array.isArray(result.results)) {
+      calls.forEach(call => call.resolve(result));
+      return;
+    }
+    calls.forEach((call, index) => {
+      const item = result.results[index];
+      if (item && item.status === 304 && cachedResponses[index]) {
+        call.resolve(structuredClone(cachedResponses[index].body));
+        return;
+      }
+      if (item && item.body) {
+        storeApiResponse(call.key, item.etag, item.body);
+        call.resolve(item.body);
+        return;
+      }
+      call.resolve({
+        success: false,
+        message: `请求失败（${item ? item.status : '无响应'}）`
+      });
     });
-    return response.json();
   } catch (error) {
-    return {
+    calls.forEach(call => call.resolve({
       success: false,
       message: error.message
-    };
+    }));
+  }
+}
+
+// 同一事件循环内发起的调用合并为一个批量请求
+function flushApiCalls() {
+  const calls = pendingApiCalls;
+  pendingApiCalls = [];
+  apiFlushScheduled = false;
+  for (let start = 0; start < calls.length; start += API_BATCH_MAX_EVENTS) {
+    sendApiCalls(calls.slice(start, start + API_BATCH_MAX_EVENTS));
   }
 }
 
+function callApi(eventId, data = {}, method = 'POST') {
+  return new Promise((resolve) => {
+    const event = {
+      e: eventId,
+      d: data,
+      m: method
+    };
+    pendingApiCalls.push({
+      event,
+      key: JSON.stringify(event),
+      resolve
+    });
+    if (!apiFlushScheduled) {
+      apiFlushScheduled = true;
+      setTimeout(flushApiCalls, 0);
+    }
+  });
+}
+
 window.getCsrfToken = getCsrfToken;
 window.getCsrfHeaders = getCsrfHeaders;
 window.callApi = callApi;
@@ -2,6 +2,7 @@ const WTL_MODAL_DEFAULT_HEIGHT_RATIO = 0.3;
 const WTL_MODAL_MAX_HEIGHT_RATIO = 0.9;
 const WTL_SEARCH_CACHE_STORAGE_KEY = 'vc-wtl-search-cache-v1';
 const WTL_SEARCH_CACHE_LIMIT = 5;
+const WTL_SCREENSHOT_IMPORT_BATCH_SIZE = 20;
 const wtlState = {
     screenshots: [],
     selectedScreenshotUrls: new Set(),
@@ -560,40 +561,42 @@ function toggleAllWtlScreenshots(container) {
     updateWtlScreenshotControls(container);
 }
 
-function wtlDataUrlToFile(dataUrl, filename) {
-    const [header, encoded] = String(dataUrl || '').split(',');
-    const match = /^data:([^;]+);base64$/.exec(header || '');
-    if (!match || !encoded) {
-        throw new Error('导入的图片数据无效。');
-    }
-    const binary = atob(encoded);
-    const bytes = new Uint8Array(binary.length);
-    for (let index = 0; index < binary.length; index += 1) {
-        bytes[index] = binary.charCodeAt(index);
-    }
-    return new File([bytes], filename || `wtl-screenshot-${Date.now()}.jpg`, { type: match[1] || 'image/jpeg' });
-}
-
 function clearWtlDragCache() {
     window.currentDraggedThumbnailFile = null;
     window.currentDraggedThumbnailFiles = [];
     window.currentDraggedThumbnailFilesPromise = null;
 }
 
-async function fetchWtlScreenshotFile(shot) {
-    const result = await callApi(event_map.fetch_external_image, { url: shot.url });
-    if (!result.success) {
-        throw new Error(result.message || 'WTL 截图导入失败');
+async function importWtlScreenshots(shots) {
+    // 服务端直接抓取并保存截图，只返回文件名，浏览器不再经手 base64 图片数据
+    const files = [];
+    const failures = [];
+    for (let start = 0; start < shots.length; start += WTL_SCREENSHOT_IMPORT_BATCH_SIZE) {
+        const batch = shots.slice(start, start + WTL_SCREENSHOT_IMPORT_BATCH_SIZE);
+        const result = await callApi(event_map.fetch_external_images, {
+            urls: batch.map(shot => shot.url),
+            store: true
+        });
+        if (!result.success) {
+            throw new Error(result.message || 'WTL 截图导入失败');
+        }
+        (result.results || []).forEach(item => {
+            if (item.success && item.filename) {
+                files.push(createStoredUploadImage(item.filename));
+            } else {
+                failures.push(item.message || item.url);
+            }
+        });
     }
-    return wtlDataUrlToFile(
-        result.data_url,
-        result.filename || `wtl-screenshot-${shot.index + 1}.jpg`
-    );
+    if (!files.length) {
+        throw new Error(failures[0] || 'WTL 截图导入失败');
+    }
+    return { files, failures };
 }
 
 function prepareWtlScreenshotDragFiles(shots) {
-    const filesPromise = Promise.all(shots.map(shot => fetchWtlScreenshotFile(shot)))
-        .then(files => {
+    const filesPromise = importWtlScreenshots(shots)
+        .then(({ files }) => {
             window.currentDraggedThumbnailFiles = files;
             window.currentDraggedThumbnailFile = files.length === 1 ? files[0] : null;
             return files;
@@ -658,15 +661,14 @@ async function addSelectedWtlScreenshotsToUploadArea(areaId, label, container) {
     wtlState.isImporting = true;
     updateWtlScreenshotControls(container);
     try {
-        const files = [];
-        for (const shot of selected) {
-            files.push(await fetchWtlScreenshotFile(shot));
-        }
+        const { files, failures } = await importWtlScreenshots(selected);
         addFiles(files);
         showAlert({
-            title: '已加入',
-            message: `已将 ${files.length} 张 WTL 截图加入${label}图片区。`,
-            type: 'success',
+            title: failures.length ? '部分已加入' : '已加入',
+            message: failures.length
+                ? `已将 ${files.length} 张 WTL 截图加入${label}图片区，${failures.length} 张导入失败。`
+                : `已将 ${files.length} 张 WTL 截图加入${label}图片区。`,
+            type: failures.length ? 'warning' : 'success',
             showCancel: false
         });
     } catch (error) {
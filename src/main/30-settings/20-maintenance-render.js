@@ -75,6 +75,12 @@ function renderScheduledBackupStatus(result = {}) {
         const resultText = schedule.last_result ? `（${schedule.last_result}）` : '';
         details.push(`最近结果：${schedule.last_run_at || '暂无'} ${resultText} ${schedule.last_message || ''}`.trim());
     }
+    if (schedule.last_verification) {
+        const verification = schedule.last_verification;
+        details.push(verification.ok
+            ? `最近校验：通过（${verification.checked_files} 个图片，${verification.verified_at}）`
+            : `最近校验：未通过（${verification.verified_at}）`);
+    }
     if (!schedule.configured) {
         details.push('设置 DB_BACKUP_SCHEDULE_ENABLED=1 后启用');
     }
@@ -92,6 +98,17 @@ function createBackupTableMessage(message) {
     ]);
 }
 
+function describeBackupMetadata(metadata = {}) {
+    const parts = [];
+    if (Number.isFinite(metadata.images_count)) parts.push(`缩略图 ${metadata.images_count} 张`);
+    if (Number.isFinite(metadata.archived_images_count) && metadata.archived_images_count !== metadata.images_count) {
+        parts.push(`本次归档 ${metadata.archived_images_count} 张`);
+    }
+    if (Number.isFinite(metadata.dump_bytes)) parts.push(`数据库 ${formatBackupSize(metadata.dump_bytes)}`);
+    if (Number.isFinite(metadata.duration_seconds)) parts.push(`耗时 ${metadata.duration_seconds.toFixed(1)} 秒`);
+    return parts.join(' · ');
+}
+
 function renderDatabaseBackups(result) {
     const list = document.getElementById('dbBackupsList');
     const notice = document.getElementById('maintenanceAuthNotice');
@@ -139,7 +156,10 @@ function renderDatabaseBackups(result) {
         list.appendChild(createEl('tr', {}, [
             createEl('td', { text: backup.filename }),
             createEl('td', { text: backup.type_label || '未知' }),
-            createEl('td', { text: formatBackupSize(backup.size_bytes) }),
+            createEl('td', {
+                text: formatBackupSize(backup.size_bytes),
+                attrs: { title: describeBackupMetadata(backup.metadata || {}) }
+            }),
             createEl('td', { text: backup.modified_at || '' }),
             createEl('td', { className: 'settings-actions-column' }, [
                 createEl('div', { className: 'settings-actions' }, [restoreButton, deleteButton])
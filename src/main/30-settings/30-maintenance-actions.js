@@ -49,9 +49,64 @@ function createDatabaseBackup() {
     });
 }
 
+const MAINTENANCE_JOB_POLL_INTERVAL_MS = 1000;
+const MAINTENANCE_JOB_FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled'];
+const MAINTENANCE_JOB_STAGE_LABELS = {
+    scan: '正在扫描缩略图',
+    dump: '正在导出数据库',
+    images: '正在处理缩略图',
+    database: '正在恢复数据库',
+    swap: '正在替换缩略图'
+};
+
+function renderMaintenanceJobProgress(job) {
+    const container = document.getElementById('maintenanceJobStatus');
+    if (!container) return;
+    if (!job || MAINTENANCE_JOB_FINISHED_STATUSES.includes(job.status)) {
+        container.hidden = true;
+        clearElement(container);
+        return;
+    }
+
+    const progress = job.progress || {};
+    const parts = [MAINTENANCE_JOB_STAGE_LABELS[job.stage] || '维护任务排队中'];
+    if (progress.files_total) parts.push(`${progress.files_done || 0}/${progress.files_total} 个文件`);
+    if (progress.bytes_done) parts.push(formatBackupSize(progress.bytes_done));
+    container.textContent = parts.join(' · ');
+    container.hidden = false;
+}
+
+function waitForMaintenanceJob(job) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            callApi(event_map.get_maintenance_job, { job_id: job.id }, 'GET')
+                .then(result => {
+                    if (!result.success || !result.job) {
+                        reject(new Error(result.message || '维护任务状态读取失败'));
+                        return;
+                    }
+                    renderMaintenanceJobProgress(result.job);
+                    if (MAINTENANCE_JOB_FINISHED_STATUSES.includes(result.job.status)) {
+                        resolve(result.job.result || { success: false, message: '维护任务执行失败' });
+                        return;
+                    }
+                    window.setTimeout(poll, MAINTENANCE_JOB_POLL_INTERVAL_MS);
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
+function runMaintenanceJob(eventId, data = {}) {
+    return callApi(eventId, { ...data, async: true })
+        .then(result => (result.success && result.job ? waitForMaintenanceJob(result.job) : result))
+        .finally(() => renderMaintenanceJobProgress(null));
+}
+
 function executeCreateDatabaseBackup() {
     setMaintenanceBusy(true);
-    callApi(event_map.create_db_backup)
+    runMaintenanceJob(event_map.create_db_backup)
         .then(result => {
             if (result.success) {
                 showAlert({
@@ -108,7 +163,7 @@ function restoreDatabaseBackup(button) {
 
 function executeDatabaseRestore(filename) {
     setMaintenanceBusy(true);
-    callApi(event_map.restore_db_backup, { filename, confirm: true })
+    runMaintenanceJob(event_map.restore_db_backup, { filename, confirm: true })
         .then(result => {
             if (result.success) {
                 const preRestoreFilename = result.pre_restore_backup?.filename;
@@ -15,6 +15,9 @@ async function updateMovie() {
         // 处理新上传的图片
         const uploadedFiles = window[`getedit-image-upload-areaFiles`]() || [];
         const uploadResults = await Promise.all(uploadedFiles.map(async file => {
+            if (file.storedFilename) {
+                return { success: true, filename: file.storedFilename };
+            }
             const formData = new FormData();
             formData.append('image', file);
             appendCaptureTimestampToUpload(formData, file);
@@ -59,18 +59,25 @@ function initUploadArea(areaId, inputId) {
         }
 
         uniqueFiles.forEach(file => {
+            if (file.storedFilename) {
+                // 已保存到服务器的图片直接用图片地址预览
+                appendFile(file, buildImageUrl(file.storedFilename, 'cover'));
+                return;
+            }
             const reader = new FileReader();
-            reader.onload = (e) => {
-                const index = uploadedFiles.length;
-                uploadedFiles.push(file);
-                addImagePreview(e.target.result, uploadArea, index);
-                updatePreviewIndexes();
-                updateUploadArea();
-            };
+            reader.onload = (e) => appendFile(file, e.target.result);
             reader.readAsDataURL(file);
         });
     }
 
+    function appendFile(file, previewUrl) {
+        const index = uploadedFiles.length;
+        uploadedFiles.push(file);
+        addImagePreview(previewUrl, uploadArea, index);
+        updatePreviewIndexes();
+        updateUploadArea();
+    }
+
     /* PC端使用的是HTML5原生拖放API(dragstart、dragover、drop等事件)。
     在uploadArea的drop事件处理中已经包含了文件数组顺序的更新逻辑。 
     而移动端使用的是触摸事件(touchstart、touchmove、touchend)来模拟拖放行为。
@@ -244,6 +251,16 @@ function initUploadArea(areaId, inputId) {
     window[`add${areaId}Files`] = (files) => handleNewFiles(Array.from(files || []));
 }
 
+// 服务端已保存的图片（如 WTL 截图导入），提交时直接使用文件名，无需再次上传
+function createStoredUploadImage(filename) {
+    return {
+        name: filename,
+        size: 0,
+        type: 'image/webp',
+        storedFilename: filename
+    };
+}
+
 // 添加预览图片
 function addImagePreview(imageData, uploadArea, index) {
     const previewContainer = uploadArea.querySelector('.image-preview-container');
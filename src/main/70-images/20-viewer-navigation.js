@@ -270,6 +270,10 @@ document.getElementById('add-movie-form').addEventListener('submit', async funct
         for(const item of previewItems) {
             const index = parseInt(item.dataset.index);
             const file = files[index];
+            if (file?.storedFilename) {
+                uploadedFiles.push(file.storedFilename);
+                continue;
+            }
 
             // 上传所有图片并收集文件名
             const imageFormData = new FormData();
@@ -0,0 +1 @@
+const VC_THEME_STORAGE_KEY="vc-theme",VC_THEME_VALUES=["light","dark"];function normalizeVcTheme(e){return VC_THEME_VALUES.includes(e)?e:"light"}function readStoredVcTheme(){try{return normalizeVcTheme(window.localStorage.getItem("vc-theme"))}catch(e){return"light"}}function syncVcThemeControls(e){document.querySelectorAll("[data-theme-choice]").forEach((t=>{const a=t.dataset.themeChoice===e;t.classList.toggle("is-info",a),t.classList.toggle("is-light",!a),t.setAttribute("aria-pressed",a?"true":"false")})),document.querySelectorAll("[data-theme-switch]").forEach((t=>{t.checked="light"===e,t.setAttribute("aria-checked",t.checked?"true":"false")}))}function applyVcTheme(e){const t=normalizeVcTheme(e);return document.documentElement.dataset.theme=t,syncVcThemeControls(t),t}function setVcTheme(e){const t=applyVcTheme(e);try{window.localStorage.setItem("vc-theme",t)}catch(e){}return t}function initializeVcTheme(){applyVcTheme(document.documentElement.dataset.theme||readStoredVcTheme()),document.addEventListener("click",(e=>{const t=e.target.closest("[data-theme-choice]");t&&(e.preventDefault(),setVcTheme(t.dataset.themeChoice))})),document.addEventListener("change",(e=>{const t=e.target.closest("[data-theme-switch]");t&&setVcTheme(t.checked?"light":"dark")}))}async function safeApiFetch(e,t={}){try{const a=await fetch(e,t);if(!a.ok)throw new Error(`HTTP error! status: ${a.status}`);return await a.json()}catch(e){throw console.error("API request failed:",e),e}}document.addEventListener("DOMContentLoaded",initializeVcTheme),window.setVcTheme=setVcTheme,window.onerror=function(e,t,a,n,i){return console.error("Error: ",e,"\nURL: ",t,"\nLine: ",a,"\nColumn: ",n,"\nError object: ",i),!1};const cache=new Map;async function cachedFetch(e,t={}){const a=e+JSON.stringify(t);if(cache.has(a))return cache.get(a);const n=await safeApiFetch(e,t);return cache.set(a,n),n}const UI_MESSAGE_TRANSLATIONS=new Map([["Request failed","请求失败。"],["Unauthorized","未授权访问。"],["Invalid CSRF token","请求验证无效，请刷新页面后重试。"],["Invalid API payload","请求数据无效。"],["Invalid event payload","操作数据无效。"],["Movie title is required","电影名称不能为空。"],["No exact Emby match. Search and select the correct movie.","未找到完全匹配的 Emby 电影，请搜索并选择正确的电影。"],["The selected Emby movie no longer exists","所选 Emby 电影已不存在。"],["Selected Emby movie is unavailable","所选 Emby 电影当前不可用。"],["Emby authentication or permission validation failed","Emby 登录或访问权限验证失败。"],["Emby service is temporarily unavailable","Emby 服务暂时不可用。"],["Movie was not found","未找到该电影记录。"],["Invalid movie link","电影关联信息无效。"],["Emby playback could not be recovered","Emby 播放恢复失败。"],["The linked Emby item is available, but playback failed","已绑定的 Emby 条目可用，但播放失败。"],["No matching Emby movie was found","未找到匹配的 Emby 电影。"],["Emby playback failed","Emby 播放失败。"],["Unable to link the Emby movie","无法绑定 Emby 电影。"],["Unable to resolve Emby playback","无法获取 Emby 播放信息。"],["Unable to start Emby playback","无法启动 Emby 播放。"],["Emby search failed","Emby 搜索失败。"],["WTL service is reachable","WTL 服务在线。"],["WTL status check failed","WTL 服务状态检测失败。"],["Search query is required","请输入搜索内容。"],["Unsupported external image URL","不支持该外部图片地址。"],["External image fetch failed","外部图片获取失败。"],["Invalid video directory","视频目录无效。"],["Video directory is not available","视频目录不可用。"],["Video deletion requires confirmation","请确认后再删除视频文件。"],["Invalid video file path","视频文件路径无效。"],["Video file was not found","未找到视频文件。"],["Unable to delete video file","无法删除视频文件。"],["Invalid capture timestamp","截图时间戳无效。"],["Invalid imported image data","导入的图片数据无效。"]]);function normalizeUiMessage(e,t="操作失败。",a={}){const{preserveUnknown:n=!1}=a,i=String(e??"").trim();if(!i)return t;const r=UI_MESSAGE_TRANSLATIONS.get(i);if(r)return r;const l=/^HTTP error! status:\s*(\d+)$/i.exec(i);if(l)return`请求失败（HTTP ${l[1]}）。`;const s=/^Uploaded file is too large\. Max size is (\d+) MB\.$/i.exec(i);if(s)return`上传文件过大，最大允许 ${s[1]} MB。`;const o=/^Emby search failed: HTTP (\d+)$/i.exec(i);if(o)return`Emby 搜索失败（HTTP ${o[1]}）。`;const c=/^WTL service returned HTTP (\d+)$/i.exec(i);if(c)return`WTL 服务状态检测失败（HTTP ${c[1]}）。`;const d=/^External image fetch failed: HTTP (\d+)$/i.exec(i);return d?`外部图片获取失败（HTTP ${d[1]}）。`:/^Method .+ is not allowed for event \d+$/i.test(i)?"当前操作不被允许。":/[A-Za-z]/.test(i)&&!/[\u4E00-\u9FFF]/.test(i)?(console.warn("未翻译的界面提示：",i),n?i:t):i}function clearElement(e){if(e)for(;e.firstChild;)e.removeChild(e.firstChild)}function appendChildren(e,t=[]){return t.forEach((t=>{null!=t&&!1!==t&&e.appendChild("string"==typeof t?document.createTextNode(t):t)})),e}function createEl(e,t={},a=[]){const n=document.createElement(e),{className:i,text:r,attrs:l={},dataset:s={},props:o={}}=t;return i&&(n.className=i),void 0!==r&&(n.textContent=r),Object.entries(l).forEach((([e,t])=>{!1!==t&&null!=t&&(!0===t?n.setAttribute(e,""):n.setAttribute(e,String(t)))})),Object.entries(s).forEach((([e,t])=>{null!=t&&(n.dataset[e]=String(t))})),Object.entries(o).forEach((([e,t])=>{n[e]=t})),appendChildren(n,a)}function createSpriteSvg(e,t={}){const a=document.createElementNS("http://www.w3.org/2000/svg","svg"),{width:n=14,height:i=14,fill:r="currentColor",ariaLabel:l=""}=t;a.setAttribute("width",String(n)),a.setAttribute("height",String(i)),a.setAttribute("fill",r),a.setAttribute("stroke","none"),l&&a.setAttribute("aria-label",l);const s=document.createElementNS("http://www.w3.org/2000/svg","use");return s.setAttribute("href",`../static/sprite.svg#${e}`),a.appendChild(s),a}function createIconSpan(e,t={}){return createEl("span",{className:"icon"},[createSpriteSvg(e,t)])}function createActionButton({className:e,text:t,action:a,dataset:n={},children:i=[]}){const r=createEl("button",{className:e,attrs:{type:"button"},dataset:{action:a,...n}});return i.length?appendChildren(r,i):r.appendChild(createEl("span",{text:t})),r}function createNotification(e,t){return createEl("div",{className:`notification is-${e}`,text:normalizeUiMessage(t,"操作提示。")})}function appendCaptureTimestampToUpload(e,t){const a=Number(t?.captureTimestamp);Number.isFinite(a)&&a>=0&&e.append("capture_timestamp",String(a))}function createResultsCountSummary(e,t,a=""){const n=Math.max(0,Number(e)||0);return createEl("div",{className:["results-count-summary",a].filter(Boolean).join(" "),attrs:{role:"status","aria-live":"polite"},text:`共 ${n} ${t}`})}function setNotification(e,t,a){e&&(clearElement(e),e.appendChild(createNotification(t,a)))}function createStarsFragment(e){const t=document.createDocumentFragment(),a=Number(e)||0;for(let e=1;e<=5;e++)t.appendChild(createSpriteSvg("rating-star-icon",{width:16,height:16,fill:e<=a?getStarColor(a):"#d3d3d3",ariaLabel:"星级"}));return t}const IMAGE_LAZY_PLACEHOLDER="data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7",imageObserver="function"==typeof IntersectionObserver?new IntersectionObserver(((e,t)=>{e.forEach((e=>{e.isIntersecting&&(loadDeferredImage(e.target),t.unobserve(e.target))}))}),{rootMargin:"240px 0px",threshold:.01}):null;function loadDeferredImage(e){e?.dataset.src&&(e.src&&e.src!==IMAGE_LAZY_PLACEHOLDER||(e.src=e.dataset.src),delete e.dataset.src)}function prepareDeferredImage(e,t,{eager:a=!1,fetchPriority:n="auto"}={}){return e&&t?(e.decoding="async",e.loading=a?"eager":"lazy",e.fetchPriority=n,a||!imageObserver?(e.src=t,e):(e.src=IMAGE_LAZY_PLACEHOLDER,e.dataset.src=t,imageObserver.observe(e),e)):e}function showAlert(e={}){const{title:t="提示",message:a="",type:n="info",confirmText:i="确认",cancelText:r="取消",showCancel:l=!0,onConfirm:s=()=>{},onCancel:o=()=>{}}=e,c=document.getElementById("alert-container"),d=c.querySelector(".alert-icon"),m=d.querySelector("svg use"),u=c.querySelector(".alert-title"),h=c.querySelector(".alert-message"),g=c.querySelector(".confirm-btn"),p=c.querySelector(".cancel-btn");d.className=`alert-icon ${n}`,m.setAttribute("href",`../static/sprite.svg#alert-${n}-icon`),g.className=`confirm-btn ${n}`,u.textContent=t,h.textContent=normalizeUiMessage(a),g.textContent=i,p.textContent=r,p.style.display=l?"block":"none",g.onclick=()=>{s(),c.style.display="none"},p.onclick=()=>{o(),c.style.display="none"},c.style.display="flex"}const ModalManager={activeModals:new Map,minimizedModals:new Set,baseZIndex:1e3,open(e){const t=document.getElementById(e);t&&requestAnimationFrame((()=>{const a=t.querySelector(".modal-card"),n=this.getToolbarButton(e);if(n&&this.minimizedModals.has(e))return void this.restoreModal(e);const i=document.querySelectorAll(".modal"),r=Math.max(this.baseZIndex,...Array.from(i).map((e=>parseInt(window.getComputedStyle(e).zIndex)||0)))+10;if(t.style.zIndex=r,t.classList.add("is-active"),a){a.style.visibility="hidden",a.style.position="absolute",a.style.transform="none",a.style.margin="0",a.style.maxHeight="90vh",a.style.overflowY="auto";const e=window.innerWidth,t=window.innerHeight,n=a.offsetWidth,i=a.offsetHeight;a.style.left=`${Math.max(0,(e-n)/2)}px`,a.style.top=`${Math.max(0,(t-i)/2)}px`,a.style.visibility="visible"}n&&n.classList.add("is-active"),this.activeModals.set(e,{isMinimized:!1,zIndex:r})}))},minimize(e){const t=document.getElementById(e),a=t.querySelector(".modal-card"),n=this.getToolbarButton(e);if(t&&n){const i=a.getBoundingClientRect();this.activeModals.set(e,{isMinimized:!0,rect:i});const r=n.getBoundingClientRect();a.style.transform="translate3d(0, 0, 0)",a.classList.add("minimizing"),requestAnimationFrame((()=>{const e=r.width/i.width,t=r.height/i.height,n=r.left-i.left,l=r.top-i.top;a.style.transform=`translate3d(${n}px, ${l}px, 0) scale(${e}, ${t})`,a.style.opacity="0"})),setTimeout((()=>{t.classList.remove("is-active"),a.classList.remove("minimizing"),this.minimizedModals.add(e)}),300)}},restoreModal(e){const t=document.getElementById(e),a=t.querySelector(".modal-card"),n=this.activeModals.get(e);if(t&&n&&n.rect){const i=document.querySelectorAll(".modal"),r=Math.max(this.baseZIndex,...Array.from(i).map((e=>parseInt(window.getComputedStyle(e).zIndex)||0)))+10;t.style.zIndex=r,t.classList.add("is-active"),a.classList.add("minimizing");const l=this.getToolbarButton(e).getBoundingClientRect();requestAnimationFrame((()=>{a.style.transform=`translate3d(${l.left-n.rect.left}px, ${l.top-n.rect.top}px, 0) scale(${l.width/n.rect.width}, ${l.height/n.rect.height})`,a.style.opacity="0",a.offsetHeight,requestAnimationFrame((()=>{a.style.transform="translate3d(0, 0, 0)",a.style.opacity="1"}))})),setTimeout((()=>{a.classList.remove("minimizing"),this.minimizedModals.delete(e),this.activeModals.set(e,{isMinimized:!1,zIndex:r,rect:n.rect})}),300)}},close(e){const t=document.getElementById(e);if(t){t.classList.remove("is-active");const a=this.getToolbarButton(e);a&&a.classList.remove("is-active")}this.activeModals.delete(e),this.minimizedModals.delete(e)},getToolbarButton:e=>document.querySelector(`[data-toolbar-modal="${e}"]`)};function minimizeModal(e){ModalManager.minimize(e)}const itemsPerPage=9;let currentPage=1,totalPages=0,searchResultTotal=0;function buildImageUrl(e,t=""){const a=String(e||"").trim().split("/").filter((e=>e));if(0===a.length)return"";const n=`../images/${a.map((e=>encodeURIComponent(e))).join("/")}`;return t?`${n}?variant=${encodeURIComponent(t)}`:n}let allMovies=[],staticDelegatesInitialized=!1,dynamicDelegatesInitialized=!1;function openStaticModalById(e){const t={duplicateModal:openDuplicateModal,jackettModal:openJackettModal,wtlModal:openWtlModal,thunderModal:openThunderModal,embyModal:openEmbyModal,thumbnailModal:openThumbnailModal,settingsModal:openSettingsModal}[e];t&&t()}function initStaticEventDelegates(){if(staticDelegatesInitialized)return;staticDelegatesInitialized=!0;const e={"close-edit-modal":closeModal,"update-movie":updateMovie,"delete-movie":deleteMovie,"edit-movie-emby":handleEditMovieEmbyAction,"close-wtl-modal":closeWtlModal,"search-wtl":searchWtl,"clear-wtl-search-cache":clearWtlSearchCache,"refresh-wtl-status":refreshWtlStatus,"close-jackett-modal":closeJackettModal,"close-thunder-modal":closeThunderModal,"close-emby-modal":closeEmbyModal,"search-emby":searchEmby,"close-emby-player-modal":closeEmbyPlayerModal,"close-thumbnail-modal":closeThumbnailModal,"close-duplicate-modal":closeDuplicateModal,"check-duplicates":checkDuplicates,"close-settings-modal":closeSettingsModal,"add-new-tag":addNewTag,"add-new-rating":addNewRating,"close-image-viewer":closeImageViewer,"play-image-timecode":playImageCaptureInEmby,"exit-image-viewer-video":exitImageViewerVideoMode,"show-prev-image":showPrevImage,"show-next-image":showNextImage};document.addEventListener("click",(t=>{const a=t.target.closest("[data-action]");if(!a)return;const n=a.dataset.action;if("open-modal"===n)return t.preventDefault(),void openStaticModalById(a.dataset.modalId);if("minimize-modal"===n)return t.preventDefault(),void minimizeModal(a.dataset.modalId);const i=e[n];i&&(t.preventDefault(),i())}))}function initDynamicEventDelegates(){if(dynamicDelegatesInitialized)return;dynamicDelegatesInitialized=!0;const e=document.getElementById("settingsModal");e&&e.addEventListener("click",(t=>{const a=t.target.closest("[data-action]");if(!a||!e.contains(a))return;const n=a.closest("tr");switch(a.dataset.action){case"start-setting-edit":startEdit(a);break;case"cancel-setting-edit":cancelEdit(a);break;case"save-tag":saveTagEdit(a,n?n.dataset.name:"");break;case"save-rating":saveRatingEdit(a,n?n.dataset.name:"");break;case"delete-tag":deleteTag(a);break;case"delete-rating-dimension":deleteRatingDimension(a);break;case"refresh-db-backups":loadDatabaseBackups();break;case"create-db-backup":createDatabaseBackup();break;case"restore-db-backup":restoreDatabaseBackup(a);break;case"delete-db-backup":deleteDatabaseBackup(a)}}));const t=document.getElementById("search-results");t&&(t.addEventListener("click",(e=>{const a=e.target.closest("[data-action]");if(a&&t.contains(a)){if("edit-movie"===a.dataset.action){const e=Number(a.dataset.movieIndex);Number.isInteger(e)&&allMovies[e]&&openModal(allMovies[e])}if("play-movie-emby"===a.dataset.action){const e=Number(a.dataset.movieIndex);Number.isInteger(e)&&allMovies[e]&&playMovieEmbyFromSearch(allMovies[e])}"open-image-viewer"===a.dataset.action&&openImageViewer(a.dataset.images||"",a.dataset.title||"")}})),t.addEventListener("keydown",(e=>{if("Enter"!==e.key&&" "!==e.key)return;const a=e.target.closest('[data-action="open-image-viewer"]');a&&t.contains(a)&&(e.preventDefault(),openImageViewer(a.dataset.images||"",a.dataset.title||""))})));const a=document.getElementById("pagination");a&&a.addEventListener("click",(e=>{const t=e.target.closest('[data-action="change-page"]');t&&a.contains(t)&&(e.preventDefault(),t.hasAttribute("disabled")||"true"===t.getAttribute("aria-disabled")||changePage(Number(t.dataset.page)))}));const n=document.getElementById("duplicate-table");n&&n.addEventListener("click",(e=>{const t=e.target.closest('[data-action="copy-extra"]');t&&n.contains(t)&&copyToClipboard(t.dataset.copyValue||"",t)}))}let serviceConfig={};callApi(event_map.get_services_config).then((e=>{e.success&&(serviceConfig=e.data)}));let zIndexCounter=1e3;function makeDraggable(e){const t=e.querySelector(".modal-card"),a=e.querySelector(".modal-card-head");let n,i,r,l,s=!1,o=null;function c(o){if(!o.target.closest(".modal-card-controls")&&(o.target===a||o.target.closest(".modal-card-head"))){s=!0;const a=t.getBoundingClientRect();r=a.left,l=a.top,n=o.clientX-r,i=o.clientY-l,t.classList.add("dragging"),document.body.style.cursor="move",zIndexCounter+=1,e.style.zIndex=zIndexCounter,t.style.zIndex=zIndexCounter}}function d(e){if(!s)return;e.preventDefault();const a=e.clientX-n,c=e.clientY-i;r=a,l=c,o&&cancelAnimationFrame(o),o=requestAnimationFrame((()=>{t.style.position="fixed",t.style.left=`${a}px`,t.style.top=`${c}px`}))}function m(){s&&(s=!1,document.body.style.cursor="",t.classList.remove("dragging"),o&&(cancelAnimationFrame(o),o=null))}return e.addEventListener("mousedown",(()=>{zIndexCounter+=1,e.style.zIndex=zIndexCounter,t.style.zIndex=zIndexCounter})),a.addEventListener("mousedown",c),document.addEventListener("mousemove",d),document.addEventListener("mouseup",m),function(){a.removeEventListener("mousedown",c),document.removeEventListener("mousemove",d),document.removeEventListener("mouseup",m),o&&cancelAnimationFrame(o)}}function openDuplicateModal(){ModalManager.minimizedModals.has("duplicateModal")?ModalManager.restoreModal("duplicateModal"):ModalManager.open("duplicateModal")}function closeDuplicateModal(){document.getElementById("duplicate-input").value="";const e=document.getElementById("check-result");clearElement(e),e.appendChild(createEl("span",{className:"has-text-grey-light",text:"等待核对..."})),clearElement(document.getElementById("duplicate-table")),ModalManager.close("duplicateModal")}function setDuplicateInlineStatus(e,t,a){clearElement(e),e.appendChild(createEl("span",{className:t,text:a}))}function renderDuplicateSummary(e,t,a){clearElement(e),e.appendChild(createEl("div",{className:"notification is-success"},[createEl("p",{text:"核对完成！"}),createEl("p",{},["发现 ",createEl("strong",{text:String(t)})," 个重复项"]),createEl("p",{},["剩余 ",createEl("strong",{text:String(a)})," 个未收录项"])]))}function createDuplicateCopyButton(e){return createEl("button",{className:"button is-small copy-btn",attrs:{type:"button"},dataset:{action:"copy-extra",copyValue:e}},[createIconSpan("copy-btn-icon",{width:20,height:20,fill:"#888888",ariaLabel:"复制"})])}function createDuplicateMovieRow(e,t=""){const a=createEl("tr",{className:t}),n=e.title||"",i=e.matchedTitle||"",r=e.extra||"";return appendChildren(a,[createEl("td",{text:n,attrs:{title:n}}),createEl("td",{text:i,attrs:{title:i}}),createEl("td",{text:r,attrs:{title:r}}),createEl("td",{},[createDuplicateCopyButton(r)])]),a}function renderDuplicateTable(e,t,a){clearElement(e);const n=createEl("table",{className:"table is-fullwidth is-striped is-hoverable"}),i=createEl("colgroup");["15%","15%","62%","8%"].forEach((e=>{i.appendChild(createEl("col",{attrs:{style:`width: ${e}`}}))}));const r=createEl("tr",{},[createEl("th",{text:"电影名称"}),createEl("th",{text:"匹配名称"}),createEl("th",{text:"磁力链接"}),createEl("th",{text:"操作"})]),l=createEl("tbody");t.forEach((e=>{l.appendChild(createDuplicateMovieRow(e))})),a.length>0&&(l.appendChild(createEl("tr",{className:"duplicate-separator"},[createEl("td",{text:"以下为重复项",attrs:{colspan:"4"}})])),a.forEach((e=>{l.appendChild(createDuplicateMovieRow(e,"is-duplicate"))}))),appendChildren(n,[i,createEl("thead",{},[r]),l]),e.appendChild(n)}function cloneButtonContents(e){return Array.from(e.childNodes).map((e=>e.cloneNode(!0)))}function restoreButtonContents(e,t){e.replaceChildren(...t.map((e=>e.cloneNode(!0))))}function checkDuplicates(){const e=document.getElementById("duplicate-input"),t=document.getElementById("check-result"),a=document.getElementById("duplicate-table"),n=e.value.split("\n").filter((e=>e.trim()));if(0===n.length)return setDuplicateInlineStatus(t,"has-text-danger","请输入电影列表"),void clearElement(a);const i=document.querySelector("#duplicateModal .dupStart-btn"),r=cloneButtonContents(i);i.disabled=!0,setDuplicateInlineStatus(t,"has-text-info","正在核对...");const l=n.map((e=>{const t=e.trim().split(" ");return{title:t[0],extra:t.slice(1).join(" ")}}));callApi(event_map.check_duplicates,{titles:l.map((e=>e.title))}).then((e=>{if(e.success){const n=e.duplicates.length,i=l.filter((t=>!e.duplicates.includes(t.title))).map((e=>({...e,matchedTitle:""}))),r=l.filter((t=>e.duplicates.includes(t.title))).map((t=>({...t,matchedTitle:e.matched_titles[t.title]||t.title})));renderDuplicateSummary(t,n,i.length),renderDuplicateTable(a,i,r)}})).catch((e=>{clearElement(t),t.appendChild(createEl("div",{className:"notification is-danger is-light",text:"核对过程出错，请重试"})),showAlert({title:"核对失败",message:e.message||"核对过程出错",type:"error",showCancel:!1})})).finally((()=>{restoreButtonContents(i,r),i.disabled=!1}))}async function copyToClipboard(e,t){const a=document.createElement("textarea");a.value=e,a.style.position="fixed",a.style.opacity="0",document.body.appendChild(a);try{a.select(),document.execCommand("copy"),t.replaceChildren(createIconSpan("copy-success-btn-icon",{width:20,height:20,fill:"#fff"})),t.classList.add("is-success")}catch(e){t.replaceChildren(createIconSpan("copy-fail-btn-icon",{width:20,height:20,fill:"#fff"})),t.classList.add("is-danger")}document.body.removeChild(a)}function openEmbyModal(){ModalManager.minimizedModals.has("embyModal")?ModalManager.restoreModal("embyModal"):ModalManager.open("embyModal")}function closeEmbyModal(){ModalManager.close("embyModal"),clearEmbyModalState()}document.addEventListener("DOMContentLoaded",(()=>{["duplicateModal","jackettModal","wtlModal","thunderModal","embyModal","thumbnailModal","embyPlayerModal","editModal","settingsModal","imageViewerModal"].forEach((e=>{makeDraggable(document.getElementById(e))}))}));const EMBY_MODAL_DEFAULT_HEIGHT_RATIO=.3,EMBY_MODAL_MAX_HEIGHT_RATIO=.9;let embySearchRequestId=0,embyLinkSelectionContext=null,currentEmbyPlaybackContext=null;function centerEmbyModal(){const e=document.getElementById("embyModal"),t=e?.querySelector(".modal-card");if(!t||!e.classList.contains("is-active"))return;const a=window.innerWidth||document.documentElement.clientWidth,n=window.innerHeight||document.documentElement.clientHeight,i=t.offsetWidth,r=t.offsetHeight;t.style.left=`${Math.max(0,(a-i)/2)}px`,t.style.top=`${Math.max(0,(n-r)/2)}px`}function resetEmbyModalHeight(){const e=document.getElementById("embyModal"),t=e?.querySelector(".modal-card"),a=e?.querySelector(".modal-card-body");if(!t)return;const n=window.innerHeight||document.documentElement.clientHeight;t.style.height=`${Math.round(.3*n)}px`,t.style.maxHeight=`${Math.round(.9*n)}px`,t.style.overflow="hidden",t.style.overflowY="hidden",a&&(a.scrollTop=0),centerEmbyModal()}function clearEmbyModalState(){embySearchRequestId+=1,embyLinkSelectionContext=null;const e=document.getElementById("emby-search-input"),t=document.getElementById("emby-results"),a=document.querySelector("#embyModal .modal-card-body");e&&(e.value=""),t&&clearElement(t),a&&(a.scrollTop=0),resetEmbyModalHeight()}function resizeEmbyModalForResults(){const e=document.getElementById("embyModal"),t=e?.querySelector(".modal-card"),a=e?.querySelector(".modal-card-head"),n=e?.querySelector(".modal-card-body");t&&a&&n&&(n.scrollTop=0,requestAnimationFrame((()=>{const e=window.innerHeight||document.documentElement.clientHeight,i=Math.round(.3*e),r=Math.round(.9*e),l=a.offsetHeight+n.scrollHeight,s=Math.min(Math.max(l,i),r);t.style.height=`${s}px`,t.style.maxHeight=`${r}px`,t.style.overflow="hidden",t.style.overflowY="hidden",centerEmbyModal()})))}function rememberMovieEmbyLink(e,t){const a=t||null,n=Array.isArray(allMovies)?allMovies.find((t=>t.title===e)):null,i=Boolean(n&&n.emby_item_id!==a);i&&(n.emby_item_id=a),"function"==typeof syncEditMovieEmbyState&&syncEditMovieEmbyState(e,a,{preserveFeedback:!0}),i&&document.getElementById("search-results")&&displayCurrentPage()}function releaseEmbyVideo(e){e&&(e.onerror=null,e.pause(),e.removeAttribute("src"),e.load())}function getEmbyPlaybackVideo(e){return"viewer"===e?document.querySelector("#imageViewerModal .image-viewer-emby-video"):document.getElementById("emby-player-video")}function startEmbyPlayback(e,t,a=0,n={}){const i="viewer"===n.target?"viewer":"modal",r=getEmbyPlaybackVideo(i);if(!r||!e)return;if(currentEmbyPlaybackContext?.video&&currentEmbyPlaybackContext.video!==r&&releaseEmbyVideo(currentEmbyPlaybackContext.video),"viewer"===i)ModalManager.close("embyPlayerModal"),enterImageViewerVideoMode();else{"viewer"===currentEmbyPlaybackContext?.target&&leaveImageViewerVideoMode();const e=document.getElementById("embyPlayerModal"),a=e?.querySelector(".modal-card-title");a&&(a.textContent=t?`Emby: ${t}`:"Emby 播放器"),ModalManager.open("embyPlayerModal")}const l={target:i,video:r,movieTitle:n.movieTitle||"",itemId:n.itemId||"",startTimestamp:Math.max(0,Number(a)||0),recoveryAttempted:Boolean(n.recoveryAttempted)};currentEmbyPlaybackContext=l,releaseEmbyVideo(r),r.src=e,r.onerror=()=>handleEmbyPlaybackError(l),r.addEventListener("loadedmetadata",(()=>{if(currentEmbyPlaybackContext===l){if(l.startTimestamp>0){const e=Number(r.duration);r.currentTime=Number.isFinite(e)?Math.min(l.startTimestamp,Math.max(0,e)):l.startTimestamp}r.play().catch((()=>{}))}}),{once:!0})}function openEmbyPlayer(e,t,a=0,n={}){startEmbyPlayback(e,t,a,{...n,target:n.target||"modal"})}function openImageViewerEmbyPlayer(e,t,a=0,n={}){startEmbyPlayback(e,t,a,{...n,target:"viewer"})}function closeEmbyPlayerModal(){releaseEmbyVideo(document.getElementById("emby-player-video")),"modal"===currentEmbyPlaybackContext?.target&&(currentEmbyPlaybackContext=null),ModalManager.close("embyPlayerModal")}async function handleEmbyPlaybackError(e){if(currentEmbyPlaybackContext===e&&e.movieTitle&&!e.recoveryAttempted){e.recoveryAttempted=!0;try{const t=await callApi(event_map.resolve_movie_emby_playback,{title:e.movieTitle,refresh:!0});if(!t.success)throw new Error(t.message||"Emby 播放恢复失败。");const a=t.data||{};if("linked"===a.status&&a.playback?.streamUrl){if(a.playback.id===e.itemId)throw new Error("已绑定的 Emby 条目可用，但播放失败。");return rememberMovieEmbyLink(e.movieTitle,a.playback.id),void startEmbyPlayback(a.playback.streamUrl,a.playback.name||e.movieTitle,e.startTimestamp,{target:e.target,movieTitle:e.movieTitle,itemId:a.playback.id,recoveryAttempted:!0})}if("candidates"===a.status)return rememberMovieEmbyLink(e.movieTitle,null),"viewer"===e.target?exitImageViewerVideoMode():closeEmbyPlayerModal(),void openEmbyLinkSelection(e.movieTitle,e.startTimestamp,a.candidates||[],{playbackTarget:e.target});throw new Error("未找到匹配的 Emby 电影。")}catch(e){showAlert({title:"Emby",message:e.message||"Emby 播放失败。",type:"warning",showCancel:!1})}}}function openEmbyLinkSelection(e,t,a=[],n={}){embyLinkSelectionContext={movieTitle:e,startTimestamp:Math.max(0,Number(t)||0),playbackTarget:"viewer"===n.playbackTarget?"viewer":"modal",linkMode:"save-only"===n.linkMode?"save-only":"play"},openEmbyModal();const i=document.getElementById("emby-search-input");i&&(i.value=e),renderEmbyLinkCandidates(a)}function renderEmbyLinkCandidates(e){const t=document.getElementById("emby-results");if(!t)return;if(!e.length)return setNotification(t,"info","未找到完全匹配的 Emby 电影，请搜索并选择正确的电影。"),void resizeEmbyModalForResults();const a=document.createDocumentFragment();a.appendChild(createResultsCountSummary(e.length,"个候选","emby-results-count"));const n=createEl("div",{className:"columns is-multiline"});e.forEach((e=>{const t=e.name||"",a=e.imageUrl||"",i=createEl("div",{className:"column emby-result-column"}),r=createEl("div",{className:"card movie-card emby-playable-card emby-link-candidate",attrs:{role:"button",tabindex:"0","aria-label":`关联 ${t}`}},[createEl("div",{className:"card-image"},[createEl("figure",{className:"image is-2by3"},[createEl("img",{attrs:{alt:t,src:IMAGE_LAZY_PLACEHOLDER},dataset:{src:a}}),createEl("div",{className:"runtime-badge",text:formatRuntime(e.runtimeTicks)})])]),createEl("div",{className:"card-content fixed-height emby-card-content"},[createEl("p",{className:"title is-6 movie-title",text:t})])]),l=()=>linkMovieEmby(e);r.addEventListener("click",l),r.addEventListener("keydown",(e=>{"Enter"!==e.key&&" "!==e.key||(e.preventDefault(),l())})),prepareDeferredImage(r.querySelector("img"),a),i.appendChild(r),n.appendChild(i)})),a.appendChild(n),clearElement(t),t.appendChild(a),resizeEmbyModalForResults()}async function linkMovieEmby(e){const t=embyLinkSelectionContext;if(t&&e?.id)try{const a=await callApi(event_map.link_movie_emby,{title:t.movieTitle,emby_item_id:e.id});if(!a.success||!a.data?.playback?.streamUrl)throw new Error(a.message||"无法绑定 Emby 电影。");const n=a.data.playback,i=t.startTimestamp,r=t.playbackTarget,l="save-only"===t.linkMode;if(rememberMovieEmbyLink(t.movieTitle,n.id),closeEmbyModal(),l)return void setEditMovieEmbyFeedback("绑定成功","success");startEmbyPlayback(n.streamUrl,n.name||t.movieTitle,i,{target:r,movieTitle:t.movieTitle,itemId:n.id})}catch(e){showAlert({title:"Emby",message:e.message||"无法绑定 Emby 电影。",type:"error",showCancel:!1})}}async function handleEditMovieEmbyAction(){const e=document.getElementById("editModal"),t=document.getElementById("edit-title")?.value.trim(),a=String(e?.dataset.embyItemId||"").trim(),n=document.querySelector("#edit-emby-link-field .edit-emby-link-action");if(t&&n)if(a)await playMovieEmbyFromSearch({title:t,emby_item_id:a});else{n.disabled=!0,n.classList.add("is-loading"),setEditMovieEmbyFeedback("正在查找 Emby 电影…","pending");try{const e=await callApi(event_map.resolve_movie_emby_playback,{title:t});if(!e.success)throw new Error(e.message||"无法查找 Emby 电影");const a=e.data||{};if("linked"===a.status&&a.playback?.id)return rememberMovieEmbyLink(t,a.playback.id),void setEditMovieEmbyFeedback("绑定成功","success");if("candidates"===a.status)return setEditMovieEmbyFeedback("请选择对应的 Emby 电影","pending"),void openEmbyLinkSelection(t,0,a.candidates||[],{playbackTarget:"modal",linkMode:"save-only"});throw new Error("未找到可绑定的 Emby 电影")}catch(e){setEditMovieEmbyFeedback("绑定失败","error"),showAlert({title:"Emby",message:e.message||"无法绑定 Emby 电影",type:"warning",showCancel:!1})}finally{n.disabled=!1,n.classList.remove("is-loading")}}}async function playMovieEmbyFromSearch(e){if(e?.title&&e.emby_item_id)try{const t=await callApi(event_map.resolve_movie_emby_playback,{title:e.title});if(!t.success)throw new Error(t.message||"无法获取 Emby 播放信息。");const a=t.data||{};if("linked"===a.status&&a.playback?.streamUrl)return rememberMovieEmbyLink(e.title,a.playback.id),void openEmbyPlayer(a.playback.streamUrl,a.playback.name||e.title,0,{movieTitle:e.title,itemId:a.playback.id});if("candidates"===a.status)return rememberMovieEmbyLink(e.title,null),void openEmbyLinkSelection(e.title,0,a.candidates||[],{playbackTarget:"modal"});throw new Error("未找到匹配的 Emby 电影。")}catch(e){showAlert({title:"Emby",message:e.message||"无法启动 Emby 播放。",type:"warning",showCancel:!1})}}function searchEmby(){const e=document.getElementById("emby-search-input").value,t=document.getElementById("emby-results"),a=++embySearchRequestId;if(!e.trim())return resetEmbyModalHeight(),void setNotification(t,"warning","请输入搜索内容");setNotification(t,"info","正在搜索..."),callApi(event_map.search_emby,{query:e}).then((e=>{if(a!==embySearchRequestId)return;if(!e.success)throw new Error(e.message||"Emby 搜索失败。");const n=e.data?.items||[];if(0===n.length)return resetEmbyModalHeight(),void setNotification(t,"info","未找到相关影片");const i=document.createDocumentFragment(),r=embyLinkSelectionContext?"个候选":"个结果";i.appendChild(createResultsCountSummary(n.length,r,"emby-results-count"));const l=createEl("div",{className:"columns is-multiline"});n.forEach((e=>{const t=e.name||"",a=e.imageUrl||"",n=e.streamUrl||"",i=createEl("div",{className:"column emby-result-column"}),r=createEl("div",{className:n?"card movie-card emby-playable-card":"card movie-card emby-unplayable-card",attrs:n?{role:"button",tabindex:"0","aria-label":`播放 ${t}`}:{"aria-disabled":"true"}},[createEl("div",{className:"card-image"},[createEl("figure",{className:"image is-2by3"},[createEl("img",{attrs:{alt:t,src:"data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"},dataset:{src:a}}),createEl("div",{className:"runtime-badge",text:formatRuntime(e.runtimeTicks)})])]),createEl("div",{className:"card-content fixed-height emby-card-content"},[createEl("p",{className:"title is-6 movie-title",text:t,dataset:{fullTitle:t}})])]);i.appendChild(r);prepareDeferredImage(i.querySelector("img"),a);const s=i.querySelector(".movie-card");if(s&&n){const a=()=>{embyLinkSelectionContext?linkMovieEmby(e):openEmbyPlayer(n,t)};s.addEventListener("click",a),s.addEventListener("keydown",(e=>{"Enter"!==e.key&&" "!==e.key||(e.preventDefault(),a())}))}l.appendChild(i)})),i.appendChild(l),clearElement(t),t.appendChild(i),resizeEmbyModalForResults()})).catch((e=>{a===embySearchRequestId&&(resetEmbyModalHeight(),setNotification(t,"danger","搜索出错，请稍后重试"),showAlert({title:"搜索出错",message:e.message||"搜索过程出错",type:"error",showCancel:!1}))}))}function formatRuntime(e){if(!e)return"";const t=Math.floor(e/6e8),a=Math.floor(t/60),n=t%60;return a>0?`${a}时${n}分`:`${n}分钟`}function openJackettModal(){if(ModalManager.minimizedModals.has("jackettModal"))ModalManager.restoreModal("jackettModal");else{ModalManager.open("jackettModal");const e=serviceConfig.service_routes?.jackett||"/services/jackett";document.querySelector("#jackettModal iframe").src=`${e}?path=${encodeURIComponent("/UI/Dashboard#search")}`}}function closeJackettModal(){ModalManager.close("jackettModal")}function openThunderModal(){if(ModalManager.minimizedModals.has("thunderModal"))ModalManager.restoreModal("thunderModal");else{ModalManager.open("thunderModal");const e=serviceConfig.service_routes?.thunder||"/services/thunder";document.querySelector("#thunderModal iframe").src=e}}function closeThunderModal(){ModalManager.close("thunderModal")}function openWtlModal(){initializeWtlSearchCache(),renderWtlRecentSearches(),ModalManager.minimizedModals.has("wtlModal")?(ModalManager.restoreModal("wtlModal"),"function"==typeof checkWtlStatus&&checkWtlStatus()):(ModalManager.open("wtlModal"),document.getElementById("wtl-input").value="",clearElement(document.getElementById("wtl-results")),"function"==typeof resetWtlSelection&&resetWtlSelection(),resetWtlModalHeight(),"function"==typeof checkWtlStatus&&checkWtlStatus())}function closeWtlModal(){ModalManager.close("wtlModal")}const WTL_MODAL_DEFAULT_HEIGHT_RATIO=.3,WTL_MODAL_MAX_HEIGHT_RATIO=.9,WTL_SEARCH_CACHE_STORAGE_KEY="vc-wtl-search-cache-v1",WTL_SEARCH_CACHE_LIMIT=5,wtlState={screenshots:[],selectedScreenshotUrls:new Set,isImporting:!1,serviceStatus:"idle",serviceMessage:"",serviceLatencyMs:null,serviceCached:!1,serviceCheckedAt:null,searchCache:[],searchCacheLoaded:!1};function resetWtlSelection(){wtlState.screenshots=[],wtlState.selectedScreenshotUrls.clear(),wtlState.isImporting=!1}function centerWtlModal(){const e=document.getElementById("wtlModal"),t=e?.querySelector(".modal-card");if(!t||!e.classList.contains("is-active"))return;const a=window.innerWidth||document.documentElement.clientWidth,n=window.innerHeight||document.documentElement.clientHeight,i=t.offsetWidth,r=t.offsetHeight;t.style.left=`${Math.max(0,(a-i)/2)}px`,t.style.top=`${Math.max(0,(n-r)/2)}px`}function resetWtlModalHeight(){const e=document.getElementById("wtlModal"),t=e?.querySelector(".modal-card"),a=e?.querySelector(".modal-card-body");if(!t)return;const n=window.innerHeight||document.documentElement.clientHeight;t.style.height=`${Math.round(n*WTL_MODAL_DEFAULT_HEIGHT_RATIO)}px`,t.style.maxHeight=`${Math.round(n*WTL_MODAL_MAX_HEIGHT_RATIO)}px`,t.style.overflow="hidden",t.style.overflowY="hidden",a&&(a.scrollTop=0),centerWtlModal()}function resizeWtlModalForResults(){const e=document.getElementById("wtlModal"),t=e?.querySelector(".modal-card"),a=e?.querySelector(".modal-card-head"),n=e?.querySelector(".modal-card-body");t&&a&&n&&requestAnimationFrame((()=>{const e=window.innerHeight||document.documentElement.clientHeight,i=Math.round(e*WTL_MODAL_DEFAULT_HEIGHT_RATIO),r=Math.round(e*WTL_MODAL_MAX_HEIGHT_RATIO),l=a.offsetHeight+n.scrollHeight,s=Math.min(Math.max(l,i),r);t.style.height=`${s}px`,t.style.maxHeight=`${r}px`,t.style.overflow="hidden",t.style.overflowY="hidden",centerWtlModal()}))}function getWtlSearchButton(){return document.querySelector('#wtlModal [data-action="search-wtl"]')}function setWtlSearchDisabled(e){const t=getWtlSearchButton();t&&(t.disabled=e,t.setAttribute("aria-disabled",e?"true":"false"))}function formatWtlStatusMeta(){return Number.isFinite(wtlState.serviceLatencyMs)?`${wtlState.serviceLatencyMs} ms`:""}function updateWtlStatusPanel(){const e=document.getElementById("wtl-status-panel");if(!e)return;const t=document.getElementById("wtl-status-text"),a=document.getElementById("wtl-status-meta");e.dataset.state=wtlState.serviceStatus,t&&(t.textContent=normalizeUiMessage(wtlState.serviceMessage,"状态未检测")),a&&(a.textContent=formatWtlStatusMeta()),e.disabled="checking"===wtlState.serviceStatus,e.setAttribute("aria-disabled","checking"===wtlState.serviceStatus?"true":"false")}function setWtlStatus(e,t={}){wtlState.serviceStatus=e,wtlState.serviceMessage=normalizeUiMessage(t.message,""),wtlState.serviceLatencyMs=Number.isFinite(t.latencyMs)?t.latencyMs:null,wtlState.serviceCached=Boolean(t.cached),wtlState.serviceCheckedAt=t.checkedAt||null,updateWtlStatusPanel(),setWtlSearchDisabled("checking"===e)}async function checkWtlStatus(e={}){setWtlStatus("checking",{message:"检测中"});try{const t=await callApi(event_map.check_wtl_status,{force:Boolean(e.force)},"GET");return setWtlStatus(t.online?"online":"offline",{message:t.online?"服务在线":t.message||"服务不可达",latencyMs:Number(t.latency_ms),cached:Boolean(t.cached),checkedAt:t.checked_at}),t}catch(e){return setWtlStatus("offline",{message:e.message||"检测失败"}),{success:!1,online:!1,message:e.message}}}function refreshWtlStatus(){return checkWtlStatus({force:!0})}function markWtlApiFailure(e,t){const a=403===e||429===e||e>=500&&e<600||!e;setWtlStatus(a?"limited":"online",{message:a?"API 受限或查询失败":t||"查询失败"})}function getWtlSearchCacheKey(e){const t=String(e||"").trim();if(!t)return"";try{const e=new URL(t);if("magnet:"===e.protocol.toLowerCase()){const t=e.searchParams.getAll("xt").find((e=>/^urn:btih:[a-z0-9]+$/i.test(e)));if(t)return`btih:${t.slice(9).toLowerCase()}`}}catch(e){}return`query:${t}`}function sanitizeWtlSearchResult(e){const t=String(e?.name||"").trim();if(!t)return null;const a=Number(e?.size),n=Number(e?.count),i=Array.isArray(e?.screenshots)?e.screenshots.map((e=>String(e?.screenshot||"").trim())).filter(Boolean).map((e=>({screenshot:e}))):[];return{file_type:String(e?.file_type||""),name:t,size:Number.isFinite(a)?a:0,count:Number.isFinite(n)?n:0,screenshots:i}}function initializeWtlSearchCache(){if(!wtlState.searchCacheLoaded){wtlState.searchCacheLoaded=!0,wtlState.searchCache=[];try{const e=window.localStorage.getItem(WTL_SEARCH_CACHE_STORAGE_KEY);if(!e)return;const t=JSON.parse(e);if(!Array.isArray(t))throw new Error("Invalid WTL cache");const a=new Set;wtlState.searchCache=t.map((e=>{const t=String(e?.query||"").trim(),a=getWtlSearchCacheKey(t),n=sanitizeWtlSearchResult(e?.data);return t&&a&&n?{query:t,cacheKey:a,data:n,lastUsedAt:Number(e?.lastUsedAt)||0}:null})).filter(Boolean).sort(((e,t)=>t.lastUsedAt-e.lastUsedAt)).filter((e=>!a.has(e.cacheKey)&&(a.add(e.cacheKey),!0))).slice(0,WTL_SEARCH_CACHE_LIMIT)}catch(e){wtlState.searchCache=[];try{window.localStorage.removeItem(WTL_SEARCH_CACHE_STORAGE_KEY)}catch(e){}}}}function persistWtlSearchCache(){try{window.localStorage.setItem(WTL_SEARCH_CACHE_STORAGE_KEY,JSON.stringify(wtlState.searchCache))}catch(e){}}function findWtlCachedSearch(e,t={}){initializeWtlSearchCache();const a=getWtlSearchCacheKey(e),n=wtlState.searchCache.findIndex((e=>e.cacheKey===a));if(n<0)return null;const i=wtlState.searchCache[n];return!1!==t.touch&&(i.lastUsedAt=Date.now(),wtlState.searchCache.splice(n,1),wtlState.searchCache.unshift(i),persistWtlSearchCache(),renderWtlRecentSearches()),i}function cacheSuccessfulWtlSearch(e,t){initializeWtlSearchCache();const a=String(e||"").trim(),n=getWtlSearchCacheKey(a),i=sanitizeWtlSearchResult(t);if(!a||!n||!i)return null;wtlState.searchCache=wtlState.searchCache.filter((e=>e.cacheKey!==n));const r={query:a,cacheKey:n,data:i,lastUsedAt:Date.now()};return wtlState.searchCache.unshift(r),wtlState.searchCache=wtlState.searchCache.slice(0,WTL_SEARCH_CACHE_LIMIT),persistWtlSearchCache(),renderWtlRecentSearches(),r}function clearWtlSearchCache(){wtlState.searchCacheLoaded=!0,wtlState.searchCache=[];try{window.localStorage.removeItem(WTL_SEARCH_CACHE_STORAGE_KEY)}catch(e){}renderWtlRecentSearches()}function loadWtlCachedRecord(e){if(!e)return;const t=document.getElementById("wtl-input");t&&(t.value=e.query);const a=findWtlCachedSearch(e.query)||e;renderWtlSearchResult(a.data,{cached:!0,query:a.query})}function refreshWtlCachedRecord(e){return loadWtlCachedRecord(e),searchWtl({force:!0,query:e.query})}function renderWtlRecentSearches(){initializeWtlSearchCache();const e=document.getElementById("wtl-recent-searches"),t=document.getElementById("wtl-recent-list");e&&t&&(clearElement(t),e.hidden=0===wtlState.searchCache.length,e.hidden||wtlState.searchCache.forEach((e=>{const a=createEl("button",{className:"wtl-recent-load",attrs:{type:"button",title:e.data.name}},[createEl("span",{className:"wtl-recent-name",text:e.data.name})]);a.addEventListener("click",(()=>loadWtlCachedRecord(e)));const n=createEl("button",{className:"wtl-recent-refresh",attrs:{type:"button",title:"重新查询","aria-label":`重新查询 ${e.data.name}`}},[createSpriteSvg("search-btn-icon",{width:13,height:13,fill:"currentColor",ariaLabel:"重新查询"})]);n.addEventListener("click",(()=>refreshWtlCachedRecord(e))),t.appendChild(createEl("div",{className:"wtl-recent-item",attrs:{role:"listitem"}},[a,n]))})))}function createWtlCacheNotice(e){const t=createEl("button",{className:"wtl-cache-refresh",attrs:{type:"button"},text:"重新查询"});return t.addEventListener("click",(()=>searchWtl({force:!0,query:e}))),createEl("div",{className:"wtl-cache-notice"},[createEl("span",{text:"缓存结果"}),t])}function renderWtlSearchResult(e,t={}){const a=document.getElementById("wtl-results");a&&(resetWtlSelection(),clearElement(a),t.cached&&a.appendChild(createWtlCacheNotice(t.query||"")),a.appendChild(createWtlResultBox(e)),a.querySelectorAll("img").forEach((e=>{e.complete||(e.addEventListener("load",resizeWtlModalForResults,{once:!0}),e.addEventListener("error",resizeWtlModalForResults,{once:!0}))})),resizeWtlModalForResults())}function searchWtl(e={}){const t=document.getElementById("wtl-input"),a=String(e.query??t?.value??"").trim(),n=document.getElementById("wtl-results"),i=!0===e.force;if(t&&(t.value=a),!a)return resetWtlModalHeight(),void setNotification(n,"warning","请输入链接");const r=findWtlCachedSearch(a,{touch:!i});if(!r||i)if("checking"!==wtlState.serviceStatus){if("offline"!==wtlState.serviceStatus&&"limited"!==wtlState.serviceStatus)return i&&r||setNotification(n,"info","正在查询..."),fetch(`https://whatslink.info/api/v1/link?url=${encodeURIComponent(a)}`).then((e=>{if(!e.ok)throw markWtlApiFailure(e.status,`WTL API HTTP ${e.status}`),new Error(`WTL API HTTP ${e.status}`);return e.json()})).then((e=>{const t=cacheSuccessfulWtlSearch(a,e);if(!t)throw new Error("WTL API 返回了无效结果");setWtlStatus("online",{message:"服务在线"}),renderWtlSearchResult(t.data)})).catch((e=>{i&&r||resetWtlModalHeight(),"limited"!==wtlState.serviceStatus&&markWtlApiFailure(0,e.message),i&&r||setNotification(n,"danger","查询失败，请检查链接是否正确"),showAlert({title:"查询失败",message:e.message||"查询过程出错",type:"error",showCancel:!1})}));i&&r||setNotification(n,"warning",wtlState.serviceMessage||"WTL 服务当前不可用，请稍后刷新状态")}else i&&r||setNotification(n,"warning","WTL 服务仍在检测中，请稍后再试");else renderWtlSearchResult(r.data,{cached:!0,query:r.query})}function formatFileSize(e){if(0===e)return"0 B";const t=Math.floor(Math.log(e)/Math.log(1024));return parseFloat((e/Math.pow(1024,t)).toFixed(2))+" "+["B","KB","MB","GB","TB"][t]}function createWtlInfoRow(e,t){return createEl("p",{},[createEl("strong",{text:`${e}:`}),` ${t??""}`])}function createWtlScreenshotsLegacy(e){if(!Array.isArray(e)||0===e.length)return null;const t=createEl("div",{className:"screenshots"});return e.forEach((e=>{const a=e?.screenshot||"";a&&t.appendChild(createEl("div",{className:"screenshot-item"},[createEl("img",{attrs:{src:a,alt:"截图"}})]))})),t}function normalizeWtlScreenshots(e){return Array.isArray(e)?e.map(((e,t)=>({url:String(e?.screenshot||"").trim(),index:t}))).filter((e=>e.url)):[]}function isWtlEditUploadAvailable(){return document.getElementById("editModal")?.classList.contains("is-active")&&"function"==typeof window["addedit-image-upload-areaFiles"]}function getSelectedWtlScreenshots(){return wtlState.screenshots.filter((e=>wtlState.selectedScreenshotUrls.has(e.url)))}function getWtlDragScreenshots(e){if(wtlState.selectedScreenshotUrls.has(e.url)){const t=getSelectedWtlScreenshots();return t.length?t:[e]}return[e]}function updateWtlScreenshotControls(e=document.getElementById("wtl-results")){const t=getSelectedWtlScreenshots().length;e?.querySelectorAll(".wtl-screenshot-item").forEach((e=>{const t=wtlState.selectedScreenshotUrls.has(e.dataset.url||"");e.classList.toggle("is-selected",t),e.setAttribute("aria-pressed",t?"true":"false")}));const a=e?.querySelector(".wtl-selected-count");a&&(a.textContent=`已选 ${t} 张`);const n=e?.querySelector('[data-wtl-action="select-all"]');if(n){const e=t>0&&t===wtlState.screenshots.length;n.textContent=e?"取消全选":"全选",n.disabled=wtlState.isImporting||0===wtlState.screenshots.length}const i=e?.querySelector('[data-wtl-action="add"]');i&&(i.disabled=wtlState.isImporting||0===t);const r=e?.querySelector('[data-wtl-action="edit"]');r&&(r.disabled=wtlState.isImporting||0===t||!isWtlEditUploadAvailable(),r.title=isWtlEditUploadAvailable()?"":"请先打开编辑电影窗口")}function toggleWtlScreenshotSelection(e,t){e&&!wtlState.isImporting&&(wtlState.selectedScreenshotUrls.has(e)?wtlState.selectedScreenshotUrls.delete(e):wtlState.selectedScreenshotUrls.add(e),updateWtlScreenshotControls(t))}function toggleAllWtlScreenshots(e){if(wtlState.isImporting||!wtlState.screenshots.length)return;const t=wtlState.selectedScreenshotUrls.size===wtlState.screenshots.length;wtlState.selectedScreenshotUrls.clear(),t||wtlState.screenshots.forEach((e=>wtlState.selectedScreenshotUrls.add(e.url))),updateWtlScreenshotControls(e)}function wtlDataUrlToFile(e,t){const[a,n]=String(e||"").split(","),i=/^data:([^;]+);base64$/.exec(a||"");if(!i||!n)throw new Error("导入的图片数据无效。");const r=atob(n),l=new Uint8Array(r.length);for(let e=0;e<r.length;e+=1)l[e]=r.charCodeAt(e);return new File([l],t||`wtl-screenshot-${Date.now()}.jpg`,{type:i[1]||"image/jpeg"})}function clearWtlDragCache(){window.currentDraggedThumbnailFile=null,window.currentDraggedThumbnailFiles=[],window.currentDraggedThumbnailFilesPromise=null}async function fetchWtlScreenshotFile(e){const t=await callApi(event_map.fetch_external_image,{url:e.url});if(!t.success)throw new Error(t.message||"WTL 截图导入失败");return wtlDataUrlToFile(t.data_url,t.filename||`wtl-screenshot-${e.index+1}.jpg`)}function prepareWtlScreenshotDragFiles(e){const t=Promise.all(e.map((e=>fetchWtlScreenshotFile(e)))).then((e=>(window.currentDraggedThumbnailFiles=e,window.currentDraggedThumbnailFile=1===e.length?e[0]:null,e)));return window.currentDraggedThumbnailFilesPromise=t,t.catch((()=>{window.currentDraggedThumbnailFile=null,window.currentDraggedThumbnailFiles=[]})),t}function setWtlScreenshotDraggingState(e,t){const a=new Set(e);document.querySelectorAll("#wtlModal .wtl-screenshot-item.dragging").forEach((e=>{e.classList.remove("dragging")})),t&&document.querySelectorAll("#wtlModal .wtl-screenshot-item").forEach((e=>{e.classList.toggle("dragging",a.has(e.dataset.url||""))}))}function startWtlScreenshotDrag(e,t,a){const n=getWtlDragScreenshots(t);setWtlScreenshotDraggingState(n.map((e=>e.url)),!0),prepareWtlScreenshotDragFiles(n),e.dataTransfer.effectAllowed="copy",e.dataTransfer.setData("text/plain",n.map((e=>e.url)).join("\n")),e.dataTransfer.setData("text/uri-list",n.map((e=>e.url)).join("\n")),a.classList.add("dragging")}async function addSelectedWtlScreenshotsToUploadArea(e,t,a){const n=getSelectedWtlScreenshots();if(!n.length||wtlState.isImporting)return;if("edit-image-upload-area"===e&&!isWtlEditUploadAvailable())return showAlert({title:"编辑窗口未打开",message:"请先打开要编辑的电影，再把 WTL 截图加入编辑电影图片区。",type:"warning",showCancel:!1}),void updateWtlScreenshotControls(a);const i=window[`add${e}Files`];if("function"==typeof i){wtlState.isImporting=!0,updateWtlScreenshotControls(a);try{const e=[];for(const t of n)e.push(await fetchWtlScreenshotFile(t));i(e),showAlert({title:"已加入",message:`已将 ${e.length} 张 WTL 截图加入${t}图片区。`,type:"success",showCancel:!1})}catch(e){showAlert({title:"WTL 截图导入失败",message:e.message||"无法导入所选截图",type:"error",showCancel:!1})}finally{wtlState.isImporting=!1,updateWtlScreenshotControls(a)}}else showAlert({title:"加入失败",message:`${t}图片区还没有准备好，请稍后再试。`,type:"error",showCancel:!1})}function createWtlScreenshotActions(e){const t=createEl("div",{className:"wtl-screenshot-actions"}),a=createEl("span",{className:"wtl-selected-count",text:"已选 0 张"}),n=createActionButton({className:"button is-small is-light wtl-screenshot-action",text:"全选",action:""});n.dataset.wtlAction="select-all",n.removeAttribute("data-action"),n.addEventListener("click",(()=>toggleAllWtlScreenshots(e)));const i=createActionButton({className:"button is-small is-info wtl-screenshot-action",text:"加入添加电影",action:""});i.dataset.wtlAction="add",i.removeAttribute("data-action"),i.addEventListener("click",(()=>addSelectedWtlScreenshotsToUploadArea("image-upload-area","添加电影",e)));const r=createActionButton({className:"button is-small is-link wtl-screenshot-action",text:"加入编辑电影",action:""});return r.dataset.wtlAction="edit",r.removeAttribute("data-action"),r.addEventListener("click",(()=>addSelectedWtlScreenshotsToUploadArea("edit-image-upload-area","编辑电影",e))),appendChildren(t,[a,n,i,r]),t}function createWtlScreenshots(e){if(wtlState.screenshots=normalizeWtlScreenshots(e),wtlState.selectedScreenshotUrls.clear(),0===wtlState.screenshots.length)return null;const t=createEl("div",{className:"wtl-screenshots-panel"});t.appendChild(createEl("div",{className:"wtl-screenshots-title",text:"截图"})),t.appendChild(createWtlScreenshotActions(t));const a=createEl("div",{className:"screenshots wtl-screenshots"});return wtlState.screenshots.forEach((e=>{const n=createEl("button",{className:"screenshot-item wtl-screenshot-item",attrs:{type:"button",draggable:"true","aria-pressed":"false"},dataset:{url:e.url}},[createEl("img",{attrs:{src:e.url,alt:"截图"}}),createEl("span",{className:"wtl-screenshot-check",text:"✓"})]);n.addEventListener("click",(()=>toggleWtlScreenshotSelection(e.url,t))),n.addEventListener("dragstart",(t=>startWtlScreenshotDrag(t,e,n))),n.addEventListener("dragend",(()=>{setWtlScreenshotDraggingState([],!1),setTimeout(clearWtlDragCache,0)})),a.appendChild(n)})),t.appendChild(a),updateWtlScreenshotControls(t),t}function createWtlResultBox(e){const t=createEl("div",{className:"box"});t.appendChild(createEl("div",{className:"content wtl-result-info"},[createWtlInfoRow("文件类型",e.file_type),createWtlInfoRow("资源名称",e.name),createWtlInfoRow("总文件大小",formatFileSize(e.size)),createWtlInfoRow("文件数量",e.count)]));const a=createWtlScreenshots(e.screenshots);return a&&t.appendChild(a),t}function formatTime(e){return`${Math.floor(e/60)}:${Math.floor(e%60).toString().padStart(2,"0")}`}let settingsNeedsMainRefresh=!1;function markSettingsChanged(){settingsNeedsMainRefresh=!0}function openSettingsModal(){ModalManager.open("settingsModal"),loadSettings()}function closeSettingsModal(){ModalManager.close("settingsModal"),settingsNeedsMainRefresh&&(settingsNeedsMainRefresh=!1,refreshMainSettingsData())}function refreshMainSettingsData(){Promise.all([loadTags(),loadRatingsDimensions(),loadFilters()]).then((()=>{hasActiveSearchState()&&searchCurrentPage()}))}function loadSettings(){return Promise.all([loadSettingsTags(),loadSettingsRatingDimensions(),loadDatabaseBackups()])}function startEdit(e){const t=e.closest("tr"),a=t.querySelector(".tag-name, .rating-name"),n=t.querySelector(".edit-form");a.style.display="none",n.style.display="flex",n.querySelector("input").focus()}function cancelEdit(e){const t=e.closest("tr"),a=t.querySelector(".tag-name, .rating-name"),n=t.querySelector(".edit-form");a.style.display="block",n.style.display="none"}function saveTagEdit(e,t){const a=e.closest("tr"),n=a.querySelector("input"),i=n.value.trim(),r=a.querySelector(".tag-name");i&&i!==t?callApi(event_map.update_tag,{old_name:t,new_name:i}).then((t=>{t.success?(markSettingsChanged(),r.textContent=i,n.value=i,a.dataset.name=i,cancelEdit(e)):showAlert({title:"更新失败",message:t.message,type:"error",showCancel:!1})})):cancelEdit(e)}function saveRatingEdit(e,t){const a=e.closest("tr"),n=a.querySelector("input"),i=n.value.trim(),r=a.querySelector(".rating-name");i&&i!==t?callApi(event_map.update_rating_dimension,{old_name:t,new_name:i}).then((t=>{t.success?(markSettingsChanged(),r.textContent=i,n.value=i,a.dataset.name=i,cancelEdit(e)):showAlert({title:"更新失败",message:t.message,type:"error",showCancel:!1})})):cancelEdit(e)}function addNewTag(){const e=document.getElementById("newTagInput"),t=e.value.trim();t?callApi(event_map.add_tag,{name:t}).then((t=>{t.success?(markSettingsChanged(),e.value="",loadSettings()):showAlert({title:"添加失败",message:t.message,type:"error",showCancel:!1})})):showAlert({title:"操作失败",message:"请输入标签名称",type:"warning",showCancel:!1})}function addNewRating(){const e=document.getElementById("newRatingInput"),t=e.value.trim();t?callApi(event_map.add_rating_dimension,{name:t}).then((t=>{t.success?(markSettingsChanged(),e.value="",loadSettings()):showAlert({title:"添加失败",message:t.message,type:"error",showCancel:!1})})):showAlert({title:"操作失败",message:"请输入评分维度名称",type:"warning",showCancel:!1})}function createSettingSaveButton(e){return createActionButton({className:"button is-success is-small save-btn-small",action:e,children:[createEl("span",{className:"icon"},[createSpriteSvg("save-btn-icon",{width:10,height:10,ariaLabel:"保存"})]),createEl("span",{text:"保存"})]})}function createSettingRow({name:e,id:t=null,type:a}){const n="tag"===a,i=createEl("tr",{dataset:{name:e}});null!=t&&(i.dataset.id=String(t));const r=n?"tag-name":"rating-name",l=n?"save-tag":"save-rating",s=n?"delete-tag":"delete-rating-dimension",o=createEl("input",{className:"input",attrs:{type:"text"},props:{value:e}}),c=createEl("div",{className:"edit-form"},[o,createSettingSaveButton(l),createActionButton({className:"button is-light is-small",text:"取消",action:"cancel-setting-edit"})]);return appendChildren(i,[createEl("td",{},[createEl("div",{className:"item-content"},[createEl("div",{className:r,text:e}),c])]),createEl("td",{className:"settings-actions-column"},[createEl("div",{className:"settings-actions"},[createActionButton({className:"button is-info is-small edit-btn settings-action-btn",text:"编辑",action:"start-setting-edit"}),createActionButton({className:"button is-danger is-small settings-action-btn settings-delete-btn",text:"删除",action:s})])])]),i}function loadSettingsTags(){return callApi(event_map.get_tags).then((e=>{if(e.success){const t=document.getElementById("tagsList"),a=e.data||[];clearElement(t),a.forEach((e=>{t.appendChild(createSettingRow({name:e,type:"tag"}))})),document.querySelector(".tag-counter").textContent=a.length}}))}function loadSettingsRatingDimensions(){return callApi(event_map.get_ratings_dimensions).then((e=>{if(e.success){const t=document.getElementById("ratingsList"),a=e.dimensions||[];clearElement(t),a.forEach((e=>{t.appendChild(createSettingRow({name:e.name,id:e.id,type:"rating"}))})),document.querySelector(".rating-counter").textContent=a.length}}))}function deleteTag(e){const t=e.closest("tr"),a=t?.dataset.name||"";a&&callApi(event_map.delete_tag,{name:a,preview:!0},"DELETE").then((e=>{if(!e.success)return void showAlert({title:"删除失败",message:e.message||"标签不存在",type:"error",showCancel:!1});const t=e.usage_count||0;showAlert({title:"删除标签",message:t>0?`标签“${a}”正在被 ${t} 部电影使用。确认删除并清除这些关联吗？`:`确认删除标签“${a}”吗？`,type:"warning",confirmText:"删除",cancelText:"取消",onConfirm:()=>confirmDeleteTag(a)})}))}function confirmDeleteTag(e){callApi(event_map.delete_tag,{name:e,confirm:!0},"DELETE").then((e=>{e.success?(markSettingsChanged(),loadSettings()):showAlert({title:"删除失败",message:e.message||"标签删除失败",type:"error",showCancel:!1})}))}function deleteRatingDimension(e){const t=e.closest("tr"),a=t?.dataset.id||"",n=t?.dataset.name||"";a&&callApi(event_map.delete_rating_dimension,{id:a,preview:!0},"DELETE").then((e=>{if(!e.success)return void showAlert({title:"删除失败",message:e.message||"评分维度不存在",type:"error",showCancel:!1});const t=e.usage_count||0;showAlert({title:"删除评分维度",message:t>0?`评分维度“${n}”正在被 ${t} 部电影使用。确认删除并清除这些评分吗？`:`确认删除评分维度“${n}”吗？`,type:"warning",confirmText:"删除",cancelText:"取消",onConfirm:()=>confirmDeleteRatingDimension(a)})}))}function confirmDeleteRatingDimension(e){callApi(event_map.delete_rating_dimension,{id:e,confirm:!0},"DELETE").then((e=>{e.success?(markSettingsChanged(),loadSettings()):showAlert({title:"删除失败",message:e.message||"评分维度删除失败",type:"error",showCancel:!1})}))}function formatBackupSize(e){const t=Number(e)||0;return t<1024?`${t} B`:t<1048576?`${(t/1024).toFixed(1)} KB`:t<1073741824?`${(t/1024/1024).toFixed(1)} MB`:`${(t/1024/1024/1024).toFixed(1)} GB`}function setMaintenanceBusy(e){const t=document.getElementById("maintenanceSettings");t&&t.querySelectorAll("button").forEach((t=>{t.disabled=e}))}function setMaintenanceStatus(e){const t=document.getElementById("maintenanceDbStatus"),a=document.querySelector(".maintenance-panel");if(!t)return;if(a&&a.classList.remove("is-ok","is-error","is-checking"),"checking"===e)return a&&a.classList.add("is-checking"),t.textContent="正在检查数据库",void(t.className="maintenance-db-status is-checking");const n="ok"===e;a&&a.classList.add(n?"is-ok":"is-error"),t.textContent=n?"数据库连接正常":"数据库连接异常",t.className="maintenance-db-status "+(n?"is-ok":"is-error")}function renderDatabaseUpgradeDiagnostic(e={}){const t=document.getElementById("maintenanceUpgradeNotice"),a=document.getElementById("maintenanceUpgradeMessage"),n=document.getElementById("maintenanceUpgradeCommand");if(!t||!a||!n)return;const i=Boolean(e.database_upgrade_required);t.hidden=!i,a.textContent=i?e.database_upgrade_message||"MariaDB 系统表需要升级。":"",n.textContent=i&&e.database_upgrade_command||"",n.hidden=!i||!e.database_upgrade_command}function renderScheduledBackupStatus(e={}){const t=document.getElementById("maintenanceScheduleStatus");if(!t)return;const a=e.scheduled_backup||{};clearElement(t),t.hidden=!1,t.classList.toggle("is-enabled",Boolean(a.enabled)),t.classList.toggle("is-disabled",!a.enabled);const n=a.enabled?"定时备份：已启用":"定时备份：未启用",i=[];if(a.configured&&!a.valid_schedule?i.push("时间配置无效，请使用 HH:MM"):i.push(`计划时间：${a.schedule_time||"03:30"}`),i.push(`保留数量：${a.retention_count??7}`),a.next_run_at&&i.push(`下次执行：${a.next_run_at}`),a.last_run_at||a.last_message){const e=a.last_result?`（${a.last_result}）`:"";i.push(`最近结果：${a.last_run_at||"暂无"} ${e} ${a.last_message||""}`.trim())}a.configured||i.push("设置 DB_BACKUP_SCHEDULE_ENABLED=1 后启用"),t.appendChild(createEl("div",{className:"maintenance-schedule-title",text:n})),t.appendChild(createEl("div",{className:"maintenance-schedule-details",text:i.join(" · ")}))}function createBackupTableMessage(e){return createEl("tr",{className:"maintenance-empty-row"},[createEl("td",{text:normalizeUiMessage(e,"备份列表读取失败。"),attrs:{colspan:"5"}})])}function renderDatabaseBackups(e){const t=document.getElementById("dbBackupsList"),a=document.getElementById("maintenanceAuthNotice"),n=document.getElementById("createDbBackupButton");if(!t)return;const i=Boolean(e.maintenance_enabled);if(a&&(a.hidden=i),n&&(n.disabled=!i),setMaintenanceStatus(e.database_status||"error"),renderDatabaseUpgradeDiagnostic(e),renderScheduledBackupStatus(e),clearElement(t),!i)return void t.appendChild(createBackupTableMessage("配置 APP_ACCESS_TOKEN 后可使用备份和恢复功能"));const r=Array.isArray(e.backups)?e.backups:[];0!==r.length?r.forEach((e=>{const a={filename:e.filename,typeLabel:e.type_label||"未知",includesImages:e.includes_images?"1":"0"},n=createActionButton({className:"button is-info is-small settings-action-btn maintenance-backup-restore-btn",text:"恢复",action:"restore-db-backup",dataset:a}),i=createActionButton({className:"button is-danger is-small settings-action-btn maintenance-backup-delete-btn",text:"删除",action:"delete-db-backup",dataset:a});t.appendChild(createEl("tr",{},[createEl("td",{text:e.filename}),createEl("td",{text:e.type_label||"未知"}),createEl("td",{text:formatBackupSize(e.size_bytes)}),createEl("td",{text:e.modified_at||""}),createEl("td",{className:"settings-actions-column"},[createEl("div",{className:"settings-actions"},[n,i])])]))})):t.appendChild(createBackupTableMessage("暂无数据库备份"))}function loadDatabaseBackups(){const e=document.getElementById("dbBackupsList");return e?(setMaintenanceStatus("checking"),clearElement(e),e.appendChild(createBackupTableMessage("正在读取备份列表...")),callApi(event_map.list_db_backups,{},"GET").then((t=>{t.success?renderDatabaseBackups(t):(setMaintenanceStatus("error"),renderDatabaseUpgradeDiagnostic(t),renderScheduledBackupStatus(t),clearElement(e),e.appendChild(createBackupTableMessage(t.message||"备份列表读取失败")))})).catch((t=>{setMaintenanceStatus("error"),renderDatabaseUpgradeDiagnostic({}),renderScheduledBackupStatus({}),clearElement(e),e.appendChild(createBackupTableMessage(normalizeUiMessage(t.message,"备份列表读取失败。")))}))):Promise.resolve()}function formatMaintenanceErrorMessage(e,t){const a=e.message||t;return e.database_upgrade_required&&e.database_upgrade_command?`${a}\n${e.database_upgrade_command}`:a}function createDatabaseBackup(){const e=document.getElementById("createDbBackupButton");e?.disabled||showAlert({title:"创建完整备份",message:"确认现在创建一份完整备份吗？备份会包含数据库和当前缩略图快照。",type:"info",confirmText:"创建",cancelText:"取消",onConfirm:executeCreateDatabaseBackup})}function executeCreateDatabaseBackup(){setMaintenanceBusy(!0),callApi(event_map.create_db_backup).then((e=>{e.success?(showAlert({title:"备份完成",message:e.backup?.filename?`已创建完整备份：${e.backup.filename}`:"完整备份已创建",type:"success",showCancel:!1}),loadDatabaseBackups()):(renderDatabaseUpgradeDiagnostic(e),showAlert({title:"备份失败",message:formatMaintenanceErrorMessage(e,"数据库备份失败"),type:"error",showCancel:!1}))})).catch((e=>{showAlert({title:"备份失败",message:e.message,type:"error",showCancel:!1})})).finally((()=>{setMaintenanceBusy(!1),loadDatabaseBackups()}))}function restoreDatabaseBackup(e){const t=e?.dataset.filename||"";if(!t||e.disabled)return;const a="1"===e.dataset.includesImages,n=e.dataset.typeLabel||"备份";showAlert({title:a?"恢复完整备份":"恢复数据库备份",message:a?`确认恢复${n}“${t}”吗？当前数据库和缩略图目录都会精确恢复到该备份时的状态，系统会先自动创建一份恢复前完整备份。`:`确认恢复${n}“${t}”吗？当前数据库会被覆盖，但此备份不包含缩略图，系统会先自动创建一份恢复前完整备份。`,type:"warning",confirmText:"恢复",cancelText:"取消",onConfirm:()=>executeDatabaseRestore(t)})}function executeDatabaseRestore(e){setMaintenanceBusy(!0),callApi(event_map.restore_db_backup,{filename:e,confirm:!0}).then((e=>{if(e.success){const t=e.pre_restore_backup?.filename,a=(e.restored_backup||{}).includes_images?"数据库和缩略图已恢复":"数据库已恢复，此备份不包含缩略图";showAlert({title:"恢复完成",message:t?`${a}。恢复前完整备份已保存为：${t}`:`${a}。`,type:"success",confirmText:"刷新页面",showCancel:!1,onConfirm:()=>window.location.reload()})}else renderDatabaseUpgradeDiagnostic(e),setMaintenanceBusy(!1),showAlert({title:"恢复失败",message:formatMaintenanceErrorMessage(e,"数据库恢复失败"),type:"error",showCancel:!1}),loadDatabaseBackups()})).catch((e=>{setMaintenanceBusy(!1),showAlert({title:"恢复失败",message:e.message,type:"error",showCancel:!1}),loadDatabaseBackups()}))}function deleteDatabaseBackup(e){const t=e?.dataset.filename||"";if(!t||e.disabled)return;showAlert({title:"删除备份",message:`确认永久删除${e.dataset.typeLabel||"备份"}“${t}”吗？此操作不能撤销。`,type:"warning",confirmText:"删除",cancelText:"取消",onConfirm:()=>executeDeleteDatabaseBackup(t)})}function executeDeleteDatabaseBackup(e){setMaintenanceBusy(!0),callApi(event_map.delete_db_backup,{filename:e,confirm:!0},"DELETE").then((e=>{e.success?(showAlert({title:"删除完成",message:e.deleted_filename?`已删除备份：${e.deleted_filename}`:"备份文件已删除",type:"success",showCancel:!1}),loadDatabaseBackups()):(showAlert({title:"删除失败",message:e.message||"备份删除失败",type:"error",showCancel:!1}),loadDatabaseBackups())})).catch((e=>{showAlert({title:"删除失败",message:e.message,type:"error",showCancel:!1}),loadDatabaseBackups()})).finally((()=>{setMaintenanceBusy(!1)}))}function loadTags(){return callApi(event_map.get_tags).then((e=>{if(e.success){const t=document.getElementById("add-tags");clearElement(t),e.data.forEach((e=>{const a=document.createElement("span");a.className="tag",a.textContent=e,a.onclick=()=>toggleTag(a),t.appendChild(a)}))}}))}function toggleTag(e){e.classList.toggle("is-selected")}function debounce(e,t){let a;function n(...n){clearTimeout(a),a=setTimeout((()=>e.apply(this,n)),t)}return n.cancel=()=>{clearTimeout(a)},n}function loadFilters(){const e=document.getElementById("rating-dimension-filter"),t=e?e.value:"",a=getSelectedTags(),n=callApi(event_map.get_ratings_dimensions).then((a=>{a.success&&(clearElement(e),e.appendChild(createEl("option",{text:"全部维度",attrs:{value:""}})),a.dimensions.forEach((t=>{const a=document.createElement("option");a.value=t.id,a.textContent=t.name,e.appendChild(a)})),[...e.options].some((e=>e.value===t))&&(e.value=t))})).catch((e=>{showAlert({title:"加载失败",message:e.message||String(e),type:"error",showCancel:!1})})),i=callApi(event_map.get_tags).then((e=>{if(e.success){const t=document.getElementById("tags-filter");clearElement(t),e.data.forEach((e=>{const n=document.createElement("span");n.className="tag",n.textContent=e,n.classList.toggle("is-selected",a.includes(e)),n.addEventListener("click",(()=>toggleFilterTag(n))),t.appendChild(n)}))}})).catch((e=>{showAlert({title:"加载失败",message:e.message||String(e),type:"error",showCancel:!1})}));return Promise.all([n,i])}function toggleFilterTag(e){e.classList.toggle("is-selected"),searchFromControls()}document.addEventListener("DOMContentLoaded",(function(){const e=document.querySelector(".settings-tabs"),t=document.querySelectorAll(".settings-content");e.addEventListener("click",(a=>{const n=a.target.closest("[data-tab]");if(!n)return;e.querySelectorAll("li").forEach((e=>e.classList.remove("is-active"))),n.classList.add("is-active");const i=n.dataset.tab+"Settings";t.forEach((e=>{e.style.display=e.id===i?"":"none"})),"maintenance"===n.dataset.tab&&loadDatabaseBackups()}))}));const SEARCH_URL_KEYS=["q","rating","min","tags","rec","page","searched"];let searchRequestSequence=0;function normalizeSearchPage(e,t=1){const a=Number(e);return Number.isFinite(a)&&a>0?Math.floor(a):t}function getSelectedTags(){const e=document.getElementById("tags-filter");return e?Array.from(e.getElementsByClassName("is-selected")).map((e=>e.textContent)):[]}function normalizeRecommendedFilter(e){const t=String(e??"").trim();return"1"===t||"0"===t?t:""}function getRecommendedFilterValue(){const e=document.querySelector("#recommended-filter .tag.is-selected");return normalizeRecommendedFilter(e?.dataset.recommendedValue)}function setRecommendedFilterValue(e){const t=normalizeRecommendedFilter(e);let a=!1;if(document.querySelectorAll("#recommended-filter .tag").forEach((e=>{const n=normalizeRecommendedFilter(e.dataset.recommendedValue)===t;e.classList.toggle("is-selected",n),a=a||n})),!a){const e=document.querySelector('#recommended-filter .tag[data-recommended-value=""]');e&&e.classList.add("is-selected")}}function toggleRecommendedFilter(e){e&&(document.querySelectorAll("#recommended-filter .tag").forEach((t=>{t.classList.toggle("is-selected",t===e)})),searchFromControls())}function getSearchControlsState(e=currentPage){return{page:normalizeSearchPage(e,1),title:document.getElementById("search-input")?.value.trim()||"",ratingDimension:document.getElementById("rating-dimension-filter")?.value||"",minRating:document.getElementById("min-rating-filter")?.value||"",recommended:getRecommendedFilterValue(),selectedTags:getSelectedTags()}}function applySearchControlsState(e={}){const t=document.getElementById("search-input"),a=document.getElementById("rating-dimension-filter"),n=document.getElementById("min-rating-filter");if(t&&(t.value=e.title||""),a){const t=String(e.ratingDimension||"");a.value=[...a.options].some((e=>e.value===t))?t:""}if(n){const t=String(e.minRating||"");n.value=[...n.options].some((e=>e.value===t))?t:""}setRecommendedFilterValue(e.recommended);const i=new Set(e.selectedTags||[]);document.querySelectorAll("#tags-filter .tag").forEach((e=>{e.classList.toggle("is-selected",i.has(e.textContent))})),currentPage=normalizeSearchPage(e.page,1)}function readSearchStateFromUrl(){const e=new URLSearchParams(window.location.search);return{page:normalizeSearchPage(e.get("page"),1),title:e.get("q")||"",ratingDimension:e.get("rating")||"",minRating:e.get("min")||"",recommended:normalizeRecommendedFilter(e.get("rec")),selectedTags:(e.get("tags")||"").split(",").map((e=>e.trim())).filter(Boolean)}}function hasSearchStateInUrl(){const e=new URLSearchParams(window.location.search);return"1"===e.get("searched")||SEARCH_URL_KEYS.filter((e=>"searched"!==e)).some((t=>e.has(t)))}function hasActiveSearchState(){return hasSearchStateInUrl()||allMovies.length>0||totalPages>0}function clearSearchView(){searchRequestSequence+=1,allMovies=[],totalPages=0,searchResultTotal=0,clearElement(document.getElementById("search-message")),clearElement(document.getElementById("search-results")),clearElement(document.getElementById("pagination"))}function syncSearchStateToUrl(e=getSearchControlsState()){if(!window.history||!window.history.replaceState)return;const t=new URL(window.location.href),a=Array.isArray(e.selectedTags)?e.selectedTags:[],n=normalizeSearchPage(e.page,1);SEARCH_URL_KEYS.forEach((e=>t.searchParams.delete(e))),e.title&&t.searchParams.set("q",e.title),e.ratingDimension&&t.searchParams.set("rating",e.ratingDimension),e.minRating&&t.searchParams.set("min",e.minRating),a.length>0&&t.searchParams.set("tags",a.join(",")),"1"!==e.recommended&&"0"!==e.recommended||t.searchParams.set("rec",e.recommended),n>1&&t.searchParams.set("page",String(n)),t.searchParams.set("searched","1");const i=`${t.pathname}${t.search}${t.hash}`;window.history.replaceState({},"",i)}function searchFromControls(){searchMovies(1)}function searchCurrentPage(e={}){searchMovies(currentPage,e)}function refreshAfterMovieDelete(){hasActiveSearchState()&&searchCurrentPage({fallbackToPreviousPage:!0})}function searchMovies(e=1,t={}){const a=normalizeSearchPage(e,1);currentPage=a;const n=getSearchControlsState(currentPage),i=document.getElementById("search-message"),r=document.getElementById("search-results"),l=document.getElementById("pagination"),s=++searchRequestSequence,o={title:n.title,rating_dimension:n.ratingDimension,min_rating:n.minRating,recommended:n.recommended,tags:n.selectedTags.join(","),page:n.page,per_page:9};!1!==t.showLoading&&(clearElement(i),renderSearchLoadingSkeleton()),callApi(event_map.search_movies,o,"GET").then((e=>{if(s===searchRequestSequence)if(e.success){const a=e.pagination||{};if(allMovies=Array.isArray(e.data)?e.data:[],currentPage=normalizeSearchPage(a.page,currentPage),totalPages=Number(a.total_pages)||0,searchResultTotal=Math.max(0,Number(a.total)||0),0===allMovies.length&&t.fallbackToPreviousPage&&n.page>1&&totalPages>0)return void searchMovies(n.page-1,{fallbackToPreviousPage:!1});if(!1!==t.syncUrl&&syncSearchStateToUrl(getSearchControlsState(currentPage)),0===allMovies.length)return setNotification(i,"info","未找到电影"),clearElement(r),clearElement(l),void(searchResultTotal=0);displayCurrentPage(),clearElement(i)}else setNotification(i,"warning",e.message||"搜索失败"),clearElement(r),clearElement(l),searchResultTotal=0})).catch((e=>{s===searchRequestSequence&&(setNotification(i,"danger",normalizeUiMessage(e.message,"搜索出错，请稍后重试。")),clearElement(r),clearElement(l),searchResultTotal=0)}))}function displayPagination(){updatePagination()}function generatePaginationItems(){return""}function changePage(e){e>=1&&e<=totalPages&&searchMovies(e)}const debouncedSearchFromInput=debounce(searchFromControls,350);function closeModal(){endEditMovieDirtyTracking(),ModalManager.close("editModal"),updateThumbnailSelectionControls()}function loadNonCriticalResources(){const e=[];0!==e.length&&e.forEach((e=>{if("script"===e.type){const t=document.createElement("script");t.src=e.src,t.async=!0,document.body.appendChild(t)}else if("style"===e.type){const t=document.createElement("link");t.rel="stylesheet",t.href=e.href,document.head.appendChild(t)}}))}document.addEventListener("DOMContentLoaded",(()=>{initStaticEventDelegates(),initDynamicEventDelegates(),loadTags(),loadNonCriticalResources(),loadRatingsDimensions(),setupDropdownPositioning(),initImageUpload()}));let ratingsDimensions=[];const DEFAULT_RATING_VALUE=3;function loadRatingsDimensions(){return callApi(event_map.get_ratings_dimensions).then((e=>{e.success&&(ratingsDimensions=e.dimensions,createRatingForms())}))}function createRatingForms(){const e=document.getElementById("add-ratings-container");e&&(e.classList.add("vc-rating-list"),clearElement(e),ratingsDimensions.forEach((t=>{const a=createRatingField(t,!1);e.appendChild(a)})),scheduleRatingNameScrollSync(e))}function createRatingNameElement(e,t="span",a=""){const n=e||"";return createEl(t,{className:"vc-rating-name"+(a?` ${a}`:""),attrs:{tabindex:"0",title:n}},[createEl("span",{className:"vc-rating-name-text",text:n})])}function syncRatingNameScrollState(e=document){(e&&"function"==typeof e.querySelectorAll?e:document).querySelectorAll(".vc-rating-name").forEach((e=>{const t=e.querySelector(".vc-rating-name-text");if(!t)return;e.removeAttribute("data-overflowing"),e.style.removeProperty("--vc-rating-name-scroll-distance"),e.style.removeProperty("--vc-rating-name-scroll-duration");const a=Math.ceil(t.scrollWidth-e.clientWidth);a>1&&(e.dataset.overflowing="true",e.style.setProperty("--vc-rating-name-scroll-distance",`-${a}px`),e.style.setProperty("--vc-rating-name-scroll-duration",`${Math.max(3.2,Math.min(8,a/18)).toFixed(2)}s`))}))}function scheduleRatingNameScrollSync(e=document){requestAnimationFrame((()=>syncRatingNameScrollState(e)))}function createRatingField(e,t){const a=t?"edit-":"",n=String(e.id),i=createEl("div",{className:"rating",dataset:{dimensionId:n}});for(let e=5;e>=1;e--)i.appendChild(createEl("input",{attrs:{type:"radio",id:`${a}rating-${n}-${e}`,name:`${a}rating-${n}`,value:String(e)}})),i.appendChild(createSpriteSvg("rating-star-icon",{width:16,height:16,fill:"currentColor",ariaLabel:5===e?"星级":"评分"}));const r=createEl("div",{className:"field vc-rating-item"},[createRatingNameElement(e.name,"label","label"),createEl("div",{className:"control vc-rating-stars"},[i])]);return r.querySelectorAll(".rating svg").forEach((e=>{e.addEventListener("click",(function(){const e=this.previousElementSibling;e&&(e.checked=!0,e.dispatchEvent(new Event("change",{bubbles:!0})))}))})),r}function collectRatings(e=!1){const t=e?"edit-":"",a=[];return ratingsDimensions.forEach((e=>{const n=document.querySelector(`input[name="${t}rating-${e.id}"]:checked`),i=n?n.value:3;a.push(`${e.id}:${i}`)})),a.join(",")}function getDragAfterElement(e,t,a){const n=[...e.querySelectorAll(".existing-image-item:not(.dragging), .preview-item:not(.dragging)")],i=e.getBoundingClientRect(),r=i.top,l=t-i.left,s=a-r,o=n[0]?.getBoundingClientRect().width||0,c=n[0]?.getBoundingClientRect().height||0,d=Math.floor(s/(c+10)),m=Math.floor(l/(o+10)),u=d*Math.floor(i.width/(o+10))+m;return u>=n.length?null:n[u]}function setEditMovieEmbyFeedback(e="",t=""){const a=document.getElementById("edit-emby-link-feedback");a&&(a.textContent=normalizeUiMessage(e,""),a.hidden=!e,a.dataset.state=t)}function syncEditMovieEmbyState(e,t,a={}){const n=document.getElementById("editModal"),i=document.getElementById("edit-title"),r=document.querySelector("#edit-emby-link-field .edit-emby-link-panel"),l=document.getElementById("edit-emby-link-status"),s=document.querySelector("#edit-emby-link-field .edit-emby-link-action"),o=s?.querySelector(".edit-emby-link-action-text");if(!(n&&r&&l&&s&&o))return;if(e&&i?.value&&e!==i.value)return;const c=String(t||"").trim(),d=Boolean(c);n.dataset.embyItemId=c,r.dataset.linked=String(d),l.textContent=d?"已绑定":"未绑定",o.textContent=d?"播放":"绑定",s.setAttribute("aria-label",d?"播放 Emby":"绑定 Emby"),s.title=d?"播放 Emby":"绑定 Emby",s.classList.toggle("is-success",d),s.classList.toggle("is-info",!d),a.preserveFeedback||setEditMovieEmbyFeedback()}function openModal(e){document.querySelector(".modal-card-title").textContent=`编辑电影：${e.title}`;const t=document.getElementById("editModal"),a=beginEditMovieDirtyTracking(),n=document.querySelector("#edit-movie-form div:has(> p.has-text-grey)");n&&n.remove(),window["resetedit-image-upload-area"](),document.getElementById("edit-title").value=e.title;const i=document.createElement("div");i.className="field",i.appendChild(createEl("p",{className:"has-text-grey",text:`添加日期: ${formatDate(e.added_date)}`}));const r=document.getElementById("edit-movie-form");r.insertBefore(i,r.firstChild);const l=document.getElementById("edit-emby-link-field");l&&i.before(l),syncEditMovieEmbyState(e.title,e.emby_item_id);const s=document.getElementById("edit-recommended").checked=1===e.recommended;s&&(s.checked=!0),document.getElementById("edit-review").value=e.review||"";const o=loadEditTags().then((()=>{const t=document.querySelectorAll("#edit-tags .tag"),a=String(e.tag_names||"").split(",").map((e=>e.trim())).filter(Boolean);t.forEach((e=>{e.classList.toggle("is-selected",a.includes(e.textContent.trim()))}))})),c=loadEditRatings().then((()=>{if(e.ratings){e.ratings.split(",").forEach((e=>{const[t,a]=e.split(":"),n=document.querySelector(`input[name="edit-rating-${t}"][value="${a}"]`);n&&(n.checked=!0)}))}})),d=t.querySelector(".existing-images");d.style.display=e.image_filename?"flex":"none",clearElement(d);const m=new Set;if(e.image_filename&&e.image_filename.trim()){function u(e){const t=e.target.closest(".existing-image-item");if(t){t.classList.remove("dragging"),d.classList.remove("dragging-over");d.querySelectorAll(".existing-image-item").forEach(((e,t)=>{e.dataset.index=t}))}}function h(e){e.preventDefault(),e.dataTransfer&&(e.dataTransfer.dropEffect="move"),d.classList.add("dragging-over");const t=d.querySelector(".dragging");if(!t)return;const a=e.clientX||e.touches?.[0].clientX,n=e.clientY||e.touches?.[0].clientY,i=getDragAfterElement(d,a,n);i?d.insertBefore(t,i):d.appendChild(t)}e.image_filename.split(",").forEach(((e,t)=>{if(e.trim()){const a=e.trim(),n=buildImageUrl(a,"cover"),i=document.createElement("div");i.className="existing-image-item",i.draggable=!0,i.dataset.index=t;const r=createEl("img",{attrs:{alt:"预览图"}});prepareDeferredImage(r,n),appendChildren(i,[r,createEl("button",{className:"delete-existing-image",attrs:{type:"button"},dataset:{filename:a}},[createSpriteSvg("close-icon",{width:12,height:12,ariaLabel:"删除"})])]),i.addEventListener("contextmenu",(e=>e.preventDefault()));i.querySelector(".delete-existing-image").addEventListener("click",(e=>{e.preventDefault(),i.remove(),m.delete(a)})),i.addEventListener("dragstart",(e=>{e.dataTransfer.setData("text/plain",t),e.dataTransfer.effectAllowed="move",e.dataTransfer.setDragImage(i,i.offsetWidth/2,i.offsetHeight/2),i.classList.add("dragging"),d.classList.add("dragging-over")})),i.addEventListener("touchstart",(()=>{i.classList.add("dragging"),d.classList.add("dragging-over")}),{passive:!0}),i.addEventListener("dragend",(()=>{i.classList.remove("dragging"),d.classList.remove("dragging-over")})),i.addEventListener("touchend",(()=>{i.classList.remove("dragging"),d.classList.remove("dragging-over")}),{passive:!0}),d.appendChild(i),m.add(a)}})),d.addEventListener("dragstart",(e=>{const t=e.target.closest(".existing-image-item");t&&(t.classList.add("dragging"),d.classList.add("dragging-over"),e.dataTransfer.setData("text/plain",t.dataset.index))})),d.addEventListener("touchstart",(e=>{const t=e.target.closest(".existing-image-item");t&&(t.classList.add("dragging"),d.classList.add("dragging-over"))}),{passive:!0}),d.addEventListener("dragend",u),d.addEventListener("touchend",u,{passive:!0}),d.addEventListener("dragenter",(e=>{e.preventDefault(),d.classList.add("dragging-over")})),d.addEventListener("dragleave",(e=>{e.preventDefault(),d.classList.remove("dragging-over")})),d.addEventListener("drop",(e=>{e.preventDefault(),d.classList.remove("dragging-over")})),d.addEventListener("dragover",h),d.addEventListener("touchmove",h)}t.dataset.currentImages=JSON.stringify(Array.from(m)),ModalManager.open("editModal"),updateThumbnailSelectionControls(),Promise.allSettled([o,c]).then((()=>{completeEditMovieDirtyTracking(a,e)}))}async function loadEditTags(){try{const e=await callApi(event_map.get_tags);if(e.success){const t=document.getElementById("edit-tags");clearElement(t),e.data.forEach((e=>{const a=document.createElement("span");a.className="tag",a.textContent=e,a.onclick=()=>toggleTag(a),t.appendChild(a)}))}}catch(e){showAlert({title:"加载失败",message:e.message||String(e),type:"error",showCancel:!1})}}async function loadEditRatings(){try{const e=await callApi(event_map.get_ratings_dimensions);if(e.success){const t=document.createElement("div");t.className="field";const a=document.createElement("div");a.className="ratings-box";const n=document.createElement("div");n.className="ratings-box-title",n.textContent="评分";const i=document.createElement("div");i.id="edit-ratings-container",i.className="vc-rating-list",e.dimensions.forEach((e=>{const t=createRatingField(e,!0);i.appendChild(t)})),a.appendChild(n),a.appendChild(i),t.appendChild(a);const r=document.querySelector("#edit-movie-form"),l=r.querySelector(".image-box").closest(".field");r.querySelectorAll(".ratings-box").forEach((e=>{const t=e.closest(".field");t&&t.remove()})),r.insertBefore(t,l),scheduleRatingNameScrollSync(i)}}catch(e){showAlert({title:"加载失败",message:e.message||String(e),type:"error",showCancel:!1})}}function deleteMovie(){showAlert({title:"确认删除",message:"确定要删除这部电影吗？此操作无法撤销。数据库中的图像文件也会被删除。",type:"warning",confirmText:"删除",cancelText:"取消",onConfirm:()=>{saveSearchState();const e=document.getElementById("edit-title").value;callApi(event_map.delete_movie,{title:e},"DELETE").then((e=>{e.success?(closeModal(),restoreSearchState(),refreshAfterMovieDelete(),showAlert({title:"删除成功",message:e.message||"电影已删除",type:"success",showCancel:!1})):showAlert({title:"删除失败",message:e.message||"删除失败",type:"error",showCancel:!1})}))}})}window.addEventListener("resize",(()=>scheduleRatingNameScrollSync()));let searchState={page:1,title:"",ratingDimension:"",minRating:"",selectedTags:[]};function saveSearchState(){searchState=getSearchControlsState(currentPage)}function restoreSearchState(){applySearchControlsState(searchState)}async function updateMovie(){if(isEditMovieDirty()){setEditMovieSavePending(!0);try{const e=document.getElementById("edit-movie-form"),t=document.getElementById("edit-title").value,a=document.getElementById("editModal");saveSearchState();const n=getEditExistingImageFilenames(),i=window["getedit-image-upload-areaFiles"]()||[],r=(await Promise.all(i.map((async e=>{const t=new FormData;t.append("image",e),appendCaptureTimestampToUpload(t,e);return await fetch("/api",{method:"POST",headers:window.getCsrfHeaders?window.getCsrfHeaders():{},body:t}).then((e=>e.json()))})))).filter((e=>e.success)).map((e=>e.filename)),l=[...n,...r].join(","),s={title:t,recommended:document.getElementById("edit-recommended").checked?1:0,review:e.querySelector('[id="edit-review"]').value,tags:Array.from(document.querySelectorAll("#edit-tags .tag.is-selected")).map((e=>e.textContent)).join(","),ratings:collectRatings(!0),image_filenames:l,original_images:a.dataset.currentImages},o=await callApi(event_map.update_movie,s,"PUT");o.message?(endEditMovieDirtyTracking(),ModalManager.close("editModal"),updateThumbnailSelectionControls(),restoreSearchState(),hasActiveSearchState()&&searchCurrentPage()):(setEditMovieSavePending(!1),showAlert({title:"更新失败",message:o.error,type:"error",showCancel:!1}))}catch(e){setEditMovieSavePending(!1),showAlert({title:"更新失败",message:e.message||String(e),type:"error",showCancel:!1})}}}let editMovieDirtySession=0,editMovieBaselineSnapshot=null,editMovieDirtyTrackingReady=!1,editMovieSavePending=!1,editMovieDirtyCheckFrame=null,editMovieDirtyObserver=null;function getEditMovieSaveButton(){return document.querySelector('#editModal [data-action="update-movie"]')}function setEditMovieSaveDisabled(e){const t=getEditMovieSaveButton();t&&(t.disabled=e,t.setAttribute("aria-disabled",String(e)))}function getEditExistingImageFilenames(){return Array.from(document.querySelectorAll("#editModal .existing-image-item")).map((e=>e.querySelector(".delete-existing-image")?.dataset.filename||"")).filter(Boolean)}function getEditUploadedFileState(){return(window["getedit-image-upload-areaFiles"]?.()||[]).map((e=>({name:e.name||"",size:Number(e.size)||0,type:e.type||"",lastModified:Number(e.lastModified)||0,captureTimestamp:Number.isFinite(Number(e.captureTimestamp))?Number(e.captureTimestamp):null})))}function getEditRatingState(){return Array.from(document.querySelectorAll("#edit-ratings-container .rating")).map((e=>{const t=String(e.dataset.dimensionId||""),a=e.querySelector('input[type="radio"]:checked');return`${t}:${a?a.value:3}`})).sort()}function getCurrentEditMovieState(){return{recommended:Boolean(document.getElementById("edit-recommended")?.checked),review:document.getElementById("edit-review")?.value||"",tags:Array.from(document.querySelectorAll("#edit-tags .tag.is-selected")).map((e=>e.textContent.trim())).sort(),ratings:getEditRatingState(),existingImages:getEditExistingImageFilenames(),uploadedFiles:getEditUploadedFileState()}}function getInitialEditMovieState(e){const t=new Map;String(e.ratings||"").split(",").forEach((e=>{const[a,n]=e.split(":");a&&n&&t.set(String(a),String(n))}));const a=Array.from(document.querySelectorAll("#edit-ratings-container .rating")).map((e=>{const a=String(e.dataset.dimensionId||"");return`${a}:${t.get(a)||3}`})).sort();return{recommended:1===e.recommended||!0===e.recommended,review:e.review||"",tags:String(e.tag_names||"").split(",").map((e=>e.trim())).filter(Boolean).sort(),ratings:a,existingImages:String(e.image_filename||"").split(",").map((e=>e.trim())).filter(Boolean),uploadedFiles:[]}}function serializeEditMovieState(e){return JSON.stringify(e)}function isEditMovieDirty(){return!(!editMovieDirtyTrackingReady||null===editMovieBaselineSnapshot)&&serializeEditMovieState(getCurrentEditMovieState())!==editMovieBaselineSnapshot}function updateEditMovieSaveState(){editMovieDirtyCheckFrame=null,setEditMovieSaveDisabled(editMovieSavePending||!isEditMovieDirty())}function scheduleEditMovieDirtyCheck(){editMovieDirtyTrackingReady&&null===editMovieDirtyCheckFrame&&(editMovieDirtyCheckFrame=requestAnimationFrame(updateEditMovieSaveState))}function beginEditMovieDirtyTracking(){return editMovieDirtySession+=1,editMovieBaselineSnapshot=null,editMovieDirtyTrackingReady=!1,editMovieSavePending=!1,null!==editMovieDirtyCheckFrame&&(cancelAnimationFrame(editMovieDirtyCheckFrame),editMovieDirtyCheckFrame=null),setEditMovieSaveDisabled(!0),editMovieDirtySession}function completeEditMovieDirtyTracking(e,t){e===editMovieDirtySession&&requestAnimationFrame((()=>{e===editMovieDirtySession&&(editMovieBaselineSnapshot=serializeEditMovieState(getInitialEditMovieState(t)),editMovieDirtyTrackingReady=!0,updateEditMovieSaveState())}))}function endEditMovieDirtyTracking(){editMovieDirtySession+=1,editMovieBaselineSnapshot=null,editMovieDirtyTrackingReady=!1,editMovieSavePending=!1,null!==editMovieDirtyCheckFrame&&(cancelAnimationFrame(editMovieDirtyCheckFrame),editMovieDirtyCheckFrame=null),setEditMovieSaveDisabled(!0)}function setEditMovieSavePending(e){editMovieSavePending=Boolean(e),updateEditMovieSaveState()}function initEditMovieDirtyTracking(){const e=document.getElementById("edit-movie-form");e&&!editMovieDirtyObserver&&(e.addEventListener("input",scheduleEditMovieDirtyCheck),e.addEventListener("change",scheduleEditMovieDirtyCheck),editMovieDirtyObserver=new MutationObserver(scheduleEditMovieDirtyCheck),editMovieDirtyObserver.observe(e,{subtree:!0,childList:!0,attributes:!0,attributeFilter:["class","data-index"]}))}function parseMovieRatings(e){return e.ratings?e.ratings.split(",").map((e=>{const[t,a]=e.split(":");return{dimensionId:String(t),value:parseInt(a,10)}})).filter((e=>e.value>0)):[]}function createRatingItem(e){const t=ratingsDimensions.find((t=>t.id.toString()===e.dimensionId));return t?createEl("div",{className:"rating-item vc-rating-item"},[createRatingNameElement(t.name,"span","dimension-name"),createEl("span",{className:"stars vc-rating-stars"},[createStarsFragment(e.value)])]):null}function appendRatingItems(e,t){t.forEach((t=>{const a=createRatingItem(t);a&&e.appendChild(a)}))}function createMovieCardTextBlock(e,t,a){const n=e||"";return createEl("section",{className:`movie-card-section ${t}${n?"":" is-empty"}`},[createEl("p",{className:"movie-card-section-text",text:n||a,attrs:n?{title:n}:{}})])}function createMovieCardTags(e){const t=(e||"").split(",").map((e=>e.trim())).filter(Boolean),a=t.length?t.map((e=>createEl("span",{className:"movie-card-tag",text:e}))):[createEl("span",{className:"movie-card-empty-text",text:"暂无标签"})];return createEl("section",{className:"movie-card-section movie-card-tags"+(t.length?"":" is-empty")},[createEl("div",{className:"movie-card-tags-list"},a)])}function createMovieCardRatings(e){const t=parseMovieRatings(e),a=createEl("div",{className:"movie-card-ratings-list vc-rating-list"+(t.length?"":" is-empty")});return t.length>0?appendRatingItems(a,t):a.appendChild(createEl("span",{className:"movie-card-empty-text",text:"暂无评分"})),createEl("section",{className:"movie-card-section movie-card-ratings"+(t.length?"":" is-empty")},[a])}function createMovieCardCover(e,t){const a=e.title||"",n=e.image_filename||"",i=n?n.split(",")[0].trim():"",r=i?buildImageUrl(i,"cover"):"";if(!r)return createEl("div",{className:"movie-card-cover is-empty"},[createSpriteSvg("thumbnail-icon",{width:34,height:34,ariaLabel:"暂无封面"}),createEl("span",{text:"暂无封面"})]);const l=createEl("button",{className:"movie-card-cover",attrs:{type:"button","aria-label":`预览 ${a}`},dataset:{action:"open-image-viewer",images:n,title:a}}),s=createEl("img",{attrs:{alt:a||"电影封面"}});return prepareDeferredImage(s,r,{eager:t<3,fetchPriority:t<3?"high":"auto"}),l.appendChild(s),l}function createMovieCardEditButton(e){return createEl("button",{className:"movie-card-edit-btn",attrs:{type:"button","aria-label":"编辑电影",title:"编辑电影"},dataset:{action:"edit-movie",movieIndex:e}},[createSpriteSvg("edit-btn-icon",{width:16,height:16,ariaLabel:"编辑电影"})])}function createMovieCardEmbyButton(e){return createEl("button",{className:"movie-card-emby-btn",attrs:{type:"button","aria-label":"Emby 播放",title:"Emby 播放"},dataset:{action:"play-movie-emby",movieIndex:e}},[createSpriteSvg("emby-icon",{width:16,height:16,ariaLabel:"Emby 播放"})])}function createMovieCardActions(e,t){const a=[];return e.emby_item_id&&a.push(createMovieCardEmbyButton(t)),a.push(createMovieCardEditButton(t)),createEl("div",{className:"movie-card-actions"},a)}function createSkeletonBlock(e){return createEl("span",{className:`skeleton-block ${e}`})}function createMovieRecommendBadge(){return createEl("div",{className:"movie-card-recommend-badge",attrs:{"aria-label":"推荐"}},[createSpriteSvg("recommend-light-icon",{width:18,height:18,ariaLabel:"推荐"})])}function createMovieCard(e,t){const a=e.title||"未命名电影",n=Boolean(e.recommended),i=createEl("article",{className:"movie-result-card"+(n?" is-recommended":""),dataset:{movieIndex:t}});return n&&i.appendChild(createMovieRecommendBadge()),appendChildren(i,[createMovieCardActions(e,t),createMovieCardCover(e,t),createEl("div",{className:"movie-card-body"},[createEl("h3",{className:"movie-card-title",text:a,attrs:{title:a}}),createMovieCardTextBlock(e.review,"movie-card-review","暂无评价"),createMovieCardTags(e.tag_names),createMovieCardRatings(e)])]),i}function createSearchSkeletonCard(){return createEl("article",{className:"movie-result-card search-skeleton-card"},[createEl("div",{className:"movie-card-actions movie-card-actions-placeholder"},[createEl("span",{className:"skeleton-button movie-card-edit-placeholder"})]),createSkeletonBlock("skeleton-cover"),createEl("div",{className:"movie-card-body"},[createSkeletonBlock("skeleton-line skeleton-line-wide"),createSkeletonBlock("skeleton-panel"),createSkeletonBlock("skeleton-panel skeleton-panel-small"),createSkeletonBlock("skeleton-panel skeleton-panel-small")])])}function renderSearchLoadingSkeleton(e=9){const t=document.getElementById("search-results"),a=document.getElementById("pagination");if(!t)return;clearElement(t),clearElement(a),searchResultTotal=0;const n=createEl("div",{className:"movie-results-grid search-skeleton"});for(let t=0;t<e;t++)n.appendChild(createSearchSkeletonCard());t.appendChild(n)}function displayCurrentPage(){const e=document.getElementById("search-results");if(clearElement(e),0===allMovies.length)return e.appendChild(createNotification("info","没有找到电影")),void clearElement(document.getElementById("pagination"));e.appendChild(createResultsCountSummary(searchResultTotal,"部电影","movie-results-count"));const t=createEl("div",{className:"movie-results-grid"});allMovies.forEach(((e,a)=>{t.appendChild(createMovieCard(e,a))})),e.appendChild(t),scheduleRatingNameScrollSync(t),updatePagination(),setupDropdownPositioning()}function setupDropdownPositioning(){document.addEventListener("mouseover",(function(e){const t=e.target.closest(".dropdown");if(!t)return;const a=t.querySelector(".dropdown-menu");if(!a)return;const n=window.innerHeight,i=t.getBoundingClientRect(),r=a.offsetHeight,l=n-i.bottom;a.style.bottom="auto",a.style.top="auto",l<r&&i.top>r?(a.style.bottom="100%",a.style.marginBottom="5px"):(a.style.top="100%",a.style.marginTop="5px"),a.style.left="0",a.style.right="auto";a.getBoundingClientRect().right>window.innerWidth&&(a.style.left="auto",a.style.right="0")}))}function formatDate(e){return new Date(e).toLocaleDateString("zh-CN",{year:"numeric",month:"2-digit",day:"2-digit",hour:"2-digit",minute:"2-digit",second:"2-digit"}).replace(/\//g,"-")}function renderStars(e){return createStarsFragment(e)}function getStarColor(e){const t=document.querySelector(".rating");return getComputedStyle(t).getPropertyValue(`--star-${e}`).trim()}function createPaginationAnchor(e,t,a={}){const{className:n="pagination-link",current:i=!1,disabled:r=!1}=a,l={},s={action:"change-page",page:t};return i&&(l["aria-current"]="page"),r&&(l.disabled=!0,l["aria-disabled"]="true"),createEl("a",{className:`${n}${i?" is-current":""}`,text:e,attrs:l,dataset:s})}function createPaginationEllipsis(){return createEl("li",{},[createEl("span",{className:"pagination-ellipsis"},["…"])])}function updatePagination(){const e=document.getElementById("pagination");if(!e)return;if(clearElement(e),totalPages<=0)return;const t=createEl("nav",{className:"pagination is-centered",attrs:{role:"navigation","aria-label":"分页导航"}});t.appendChild(createPaginationAnchor("上一页",currentPage-1,{className:"pagination-previous",disabled:currentPage<=1})),t.appendChild(createPaginationAnchor("下一页",currentPage+1,{className:"pagination-next",disabled:currentPage>=totalPages}));const a=createEl("ul",{className:"pagination-list"});currentPage>3&&(a.appendChild(createEl("li",{},[createPaginationAnchor("1",1)])),currentPage>4&&a.appendChild(createPaginationEllipsis()));for(let e=Math.max(1,currentPage-2);e<=Math.min(totalPages,currentPage+2);e++)a.appendChild(createEl("li",{},[createPaginationAnchor(String(e),e,{current:e===currentPage})]));currentPage<totalPages-2&&(currentPage<totalPages-2-1&&a.appendChild(createPaginationEllipsis()),a.appendChild(createEl("li",{},[createPaginationAnchor(String(totalPages),totalPages)]))),t.appendChild(a),e.appendChild(t)}document.addEventListener("DOMContentLoaded",initEditMovieDirtyTracking);const thumbnailState={source:"local",currentPath:"",currentListing:null,embyQuery:"",embyResults:[],selectedVideo:null,captures:[],selectedCaptureIds:new Set,initialized:!1,isBatchRunning:!1,abortBatch:!1,fpsProbeToken:0,adaptiveFps:30,directoryRequestToken:0,embyRequestToken:0,sessionToken:0,seekToken:0,stepSeekToken:0,stepSeekTimer:null,pendingStepTarget:null,pendingStepShouldResume:!1};function openThumbnailModal(){ModalManager.minimizedModals.has("thumbnailModal")?ModalManager.restoreModal("thumbnailModal"):ModalManager.open("thumbnailModal"),initThumbnailTool(),syncThumbnailSourceControls(),"emby"===thumbnailState.source?renderThumbnailEmbyResults(thumbnailState.embyResults):thumbnailState.currentListing||loadThumbnailDirectory("")}function closeThumbnailModal(){resetThumbnailToolState(),ModalManager.close("thumbnailModal")}function resetThumbnailToolState(){thumbnailState.abortBatch=!0,thumbnailState.isBatchRunning=!1,thumbnailState.directoryRequestToken+=1,thumbnailState.fpsProbeToken+=1,thumbnailState.sessionToken+=1,thumbnailState.seekToken+=1,thumbnailState.stepSeekToken+=1,thumbnailState.embyRequestToken+=1,clearTimeout(thumbnailState.stepSeekTimer),thumbnailState.stepSeekTimer=null,thumbnailState.pendingStepTarget=null,thumbnailState.pendingStepShouldResume=!1;const e=document.getElementById("thumbnail-video");e&&(e.pause(),e.removeAttribute("src"),e.load()),thumbnailState.source="local",thumbnailState.currentPath="",thumbnailState.currentListing=null,thumbnailState.embyQuery="",thumbnailState.embyResults=[],thumbnailState.selectedVideo=null,thumbnailState.adaptiveFps=30,thumbnailState.captures.forEach((e=>URL.revokeObjectURL(e.url))),thumbnailState.captures=[],thumbnailState.selectedCaptureIds.clear(),clearThumbnailDragCache();const t=document.getElementById("thumbnail-file-list");t&&clearElement(t);const a=document.getElementById("thumbnail-breadcrumbs");a&&clearElement(a);const n=document.getElementById("thumbnail-emby-search-input");n&&(n.value=""),setThumbnailStatus("请选择视频文件"),updateThumbnailProgress(0),setThumbnailBatchControls(!1);const i=document.getElementById("thumbnail-batch-summary");i&&(i.textContent=""),renderThumbnailCaptures(),syncThumbnailSourceControls(),syncThumbnailPercentPreset(),updateThumbnailBatchSummary(),updateThumbnailSelectionControls()}function initThumbnailTool(){if(thumbnailState.initialized)return;const e=document.getElementById("thumbnailModal");if(!e)return;const t=document.getElementById("thumbnail-video"),a=document.getElementById("thumbnail-source-local"),n=document.getElementById("thumbnail-source-emby"),i=document.getElementById("thumbnail-emby-search-input"),r=document.getElementById("thumbnail-emby-search-button"),l=document.getElementById("thumbnail-up-button"),s=document.getElementById("thumbnail-refresh-button"),o=document.getElementById("thumbnail-frame-back"),c=document.getElementById("thumbnail-frame-forward"),d=document.getElementById("thumbnail-second-back"),m=document.getElementById("thumbnail-second-forward"),u=document.getElementById("thumbnail-five-second-back"),h=document.getElementById("thumbnail-five-second-forward"),g=document.getElementById("thumbnail-five-minute-back"),p=document.getElementById("thumbnail-five-minute-forward"),b=document.getElementById("thumbnail-minute-back"),y=document.getElementById("thumbnail-minute-forward"),f=document.getElementById("thumbnail-capture-current"),E=document.getElementById("thumbnail-batch-capture"),S=document.getElementById("thumbnail-clear-captures"),v=document.getElementById("thumbnail-select-all"),w=document.getElementById("thumbnail-send-add"),T=document.getElementById("thumbnail-send-edit"),M=document.getElementById("thumbnail-download-selected"),C=document.getElementById("thumbnail-percent-step"),I=e.querySelectorAll(".thumbnail-percent-preset");a?.addEventListener("click",(()=>setThumbnailSource("local"))),n?.addEventListener("click",(()=>setThumbnailSource("emby"))),r?.addEventListener("click",searchThumbnailEmby),i?.addEventListener("keydown",(e=>{"Enter"===e.key&&(e.preventDefault(),searchThumbnailEmby())})),l?.addEventListener("click",(()=>{thumbnailState.currentPath&&loadThumbnailDirectory(getThumbnailParentPath(thumbnailState.currentPath))})),s?.addEventListener("click",(()=>loadThumbnailDirectory(thumbnailState.currentPath))),o?.addEventListener("click",(()=>stepThumbnailVideo(-getThumbnailFrameStep()))),c?.addEventListener("click",(()=>stepThumbnailVideo(getThumbnailFrameStep()))),d?.addEventListener("click",(()=>stepThumbnailVideo(-getThumbnailSecondStep()))),m?.addEventListener("click",(()=>stepThumbnailVideo(getThumbnailSecondStep()))),u?.addEventListener("click",(()=>stepThumbnailVideo(-5))),h?.addEventListener("click",(()=>stepThumbnailVideo(5))),g?.addEventListener("click",(()=>stepThumbnailVideo(-300))),p?.addEventListener("click",(()=>stepThumbnailVideo(300))),b?.addEventListener("click",(()=>stepThumbnailVideo(-60))),y?.addEventListener("click",(()=>stepThumbnailVideo(60))),f?.addEventListener("click",(()=>captureCurrentThumbnail())),E?.addEventListener("click",(()=>{if(thumbnailState.isBatchRunning)return thumbnailState.abortBatch=!0,void setThumbnailStatus("正在停止批量截图...");batchCaptureThumbnails()})),S?.addEventListener("click",clearThumbnailCaptures),v?.addEventListener("click",toggleAllThumbnailCaptures),w?.addEventListener("click",(()=>sendSelectedThumbnailCapturesToUploadArea("image-upload-area","添加电影"))),T?.addEventListener("click",(()=>sendSelectedThumbnailCapturesToUploadArea("edit-image-upload-area","编辑电影"))),M?.addEventListener("click",downloadSelectedThumbnailCaptures),C?.addEventListener("input",(()=>{syncThumbnailPercentPreset(),updateThumbnailBatchSummary()})),I.forEach((e=>{e.addEventListener("click",(()=>{C&&(C.value=e.dataset.thumbnailPercent||"2"),syncThumbnailPercentPreset(),updateThumbnailBatchSummary()}))})),t?.addEventListener("loadedmetadata",(()=>{resetThumbnailVideoControls(),autoDetectThumbnailFps(t),updateThumbnailStatusForVideo(),updateThumbnailBatchSummary()})),t?.addEventListener("durationchange",updateThumbnailBatchSummary),t?.addEventListener("error",(()=>{setThumbnailStatus("视频无法播放，浏览器可能不支持该编码或封装格式。")})),thumbnailState.initialized=!0,syncThumbnailSourceControls(),syncThumbnailPercentPreset(),updateThumbnailBatchSummary(),renderThumbnailCaptures()}function setThumbnailSource(e){const t="emby"===e?"emby":"local",a=thumbnailState.source!==t;if(thumbnailState.source=t,syncThumbnailSourceControls(),"local"===t)return thumbnailState.embyRequestToken+=1,void(thumbnailState.currentListing?renderThumbnailBrowser(thumbnailState.currentListing):loadThumbnailDirectory(thumbnailState.currentPath||""));thumbnailState.directoryRequestToken+=1,renderThumbnailEmbyResults(thumbnailState.embyResults),a&&document.getElementById("thumbnail-emby-search-input")?.focus()}function syncThumbnailSourceControls(){const e="emby"===thumbnailState.source,t=document.getElementById("thumbnail-source-local"),a=document.getElementById("thumbnail-source-emby"),n=document.querySelector("#thumbnailModal .thumbnail-browser-actions"),i=document.getElementById("thumbnail-breadcrumbs"),r=document.querySelector("#thumbnailModal .thumbnail-emby-search"),l=document.getElementById("thumbnail-emby-search-input");t&&(t.classList.toggle("is-info",!e),t.classList.toggle("is-light",e),t.setAttribute("aria-pressed",e?"false":"true")),a&&(a.classList.toggle("is-info",e),a.classList.toggle("is-light",!e),a.setAttribute("aria-pressed",e?"true":"false")),n&&(n.hidden=e),i&&(i.hidden=e),r&&(r.hidden=!e),l&&l.value!==thumbnailState.embyQuery&&(l.value=thumbnailState.embyQuery)}function searchThumbnailEmby(){const e=document.getElementById("thumbnail-emby-search-input"),t=(e?.value||"").trim();if(thumbnailState.source="emby",thumbnailState.embyQuery=t,syncThumbnailSourceControls(),!t)return thumbnailState.embyResults=[],renderThumbnailEmbyResults([]),void setThumbnailStatus("请输入关键词搜索 Emby 视频");const a=++thumbnailState.embyRequestToken;setThumbnailFileListLoading("正在搜索 Emby..."),callApi(event_map.search_emby,{query:t}).then((e=>{if(a!==thumbnailState.embyRequestToken)return;if(!e.success)throw new Error(e.message||"Emby 搜索失败");const t=e.data?.items||[];thumbnailState.embyResults=t,renderThumbnailEmbyResults(t),setThumbnailStatus(t.length?`找到 ${t.length} 个 Emby 视频`:"未找到匹配的 Emby 视频")})).catch((e=>{if(a!==thumbnailState.embyRequestToken)return;thumbnailState.embyResults=[];const t=e.message||"Emby 搜索失败";setThumbnailFileListLoading(t),setThumbnailStatus(t)}))}function renderThumbnailEmbyResults(e=thumbnailState.embyResults){syncThumbnailSourceControls();const t=document.getElementById("thumbnail-file-list");if(t){if(clearElement(t),!thumbnailState.embyQuery){const e=document.createElement("div");return e.className="thumbnail-empty",e.textContent="输入关键词搜索 Emby 视频",void t.appendChild(e)}if(!e.length){const e=document.createElement("div");return e.className="thumbnail-empty",e.textContent="未找到匹配的 Emby 视频",void t.appendChild(e)}e.forEach((e=>{t.appendChild(createThumbnailEmbyRow(e))}))}}function createThumbnailEmbyRow(e){const t=toThumbnailEmbyVideo(e),a=document.createElement("div");a.className="thumbnail-file-row thumbnail-emby-row has-copy",a.setAttribute("role","button"),a.tabIndex=t.url?0:-1,t.name.length>18&&a.classList.add("is-long-name"),t.url||(a.classList.add("is-disabled"),a.setAttribute("aria-disabled","true")),isThumbnailVideoSelected(t)&&a.classList.add("is-selected"),appendChildren(a,[createEl("span",{className:"thumbnail-file-name"},[createEl("span",{className:"thumbnail-file-name-text",text:t.name})]),createEl("span",{className:"thumbnail-file-meta",text:formatThumbnailEmbyMeta(e,t)}),createThumbnailCopyNameButton("复制片名")]),a.title=t.name;const n=()=>{t.url?selectThumbnailVideo(t):setThumbnailStatus("这个 Emby 条目没有可用播放地址")};return a.addEventListener("click",n),a.addEventListener("keydown",(e=>{"Enter"!==e.key&&" "!==e.key||(e.preventDefault(),n())})),a.querySelector(".thumbnail-copy-name")?.addEventListener("click",(e=>{e.preventDefault(),e.stopPropagation(),copyThumbnailVideoFileName(t.name,e.currentTarget)})),a}function toThumbnailEmbyVideo(e){const t=String(e?.id||""),a=e?.name||"Emby video";return{source:"emby",id:t,name:a,path:t?`emby:${t}`:`emby:${a}`,url:e?.streamUrl||"",runtimeTicks:e?.runtimeTicks||0,imageUrl:e?.imageUrl||""}}function formatThumbnailEmbyMeta(e,t){if(!t.url)return"Emby · 不可播放";const a=formatRuntime(e?.runtimeTicks);return a?`Emby · ${a}`:"Emby"}function isThumbnailVideoSelected(e){const t=thumbnailState.selectedVideo;if(!t||!e)return!1;const a=t.source||"local",n=e.source||"local";return a===n&&("emby"===n?Boolean(t.id&&e.id&&t.id===e.id):Boolean(t.path&&e.path&&t.path===e.path))}function renderThumbnailCurrentSourceList(){"emby"===thumbnailState.source?renderThumbnailEmbyResults(thumbnailState.embyResults):renderThumbnailBrowser(thumbnailState.currentListing||{path:thumbnailState.currentPath,directories:[],files:[]})}function loadThumbnailDirectory(e=""){const t=e||"";thumbnailState.source="local",syncThumbnailSourceControls();const a=++thumbnailState.directoryRequestToken;return setThumbnailFileListLoading(),callApi(event_map.list_video_files,{path:t}).then((e=>{if(a===thumbnailState.directoryRequestToken){if(!e.success)throw new Error(e.message||"读取视频目录失败");thumbnailState.currentPath=e.path||"",thumbnailState.currentListing=e,renderThumbnailBrowser(e),e.message&&setThumbnailStatus(e.message)}})).catch((e=>{a===thumbnailState.directoryRequestToken&&(renderThumbnailBrowser({path:t,parent:getThumbnailParentPath(t),directories:[],files:[]}),setThumbnailStatus(e.message||"读取视频目录失败"))}))}function setThumbnailFileListLoading(e="正在读取..."){const t=document.getElementById("thumbnail-file-list");if(t){const a=document.createElement("div");a.className="thumbnail-empty",a.textContent=e,t.replaceChildren(a)}}function renderThumbnailBrowser(e){syncThumbnailSourceControls(),renderThumbnailBreadcrumbs(e.path||"");const t=document.getElementById("thumbnail-up-button");t&&(t.disabled=!e.path);const a=document.getElementById("thumbnail-file-list");if(!a)return;clearElement(a);const n=e.directories||[],i=e.files||[];if(!n.length&&!i.length){const e=document.createElement("div");return e.className="thumbnail-empty",e.textContent="当前目录没有可播放的视频文件",void a.appendChild(e)}n.forEach((e=>{a.appendChild(createThumbnailDirectoryRow(e))})),i.forEach((e=>{a.appendChild(createThumbnailFileRow(e))}))}function renderThumbnailBreadcrumbs(e){const t=document.getElementById("thumbnail-breadcrumbs");if(!t)return;clearElement(t);const a=document.createElement("button");a.type="button",a.textContent="视频库",a.addEventListener("click",(()=>loadThumbnailDirectory(""))),t.appendChild(a);let n="";e.split("/").filter(Boolean).forEach((e=>{n=n?`${n}/${e}`:e;const a=document.createElement("button");a.type="button",a.textContent=e;const i=n;a.addEventListener("click",(()=>loadThumbnailDirectory(i))),t.appendChild(a)}))}function createThumbnailDirectoryRow(e){const t=document.createElement("button");return t.type="button",t.className="thumbnail-file-row",e.name.length>18&&t.classList.add("is-long-name"),appendChildren(t,[createEl("span",{className:"thumbnail-file-name"},[createEl("span",{className:"thumbnail-file-name-text",text:`/${e.name}`})]),createEl("span",{className:"thumbnail-file-meta",text:"目录"})]),t.title=e.name,t.addEventListener("click",(()=>loadThumbnailDirectory(e.path))),t}function createThumbnailFileRow(e){const t={...e,source:e.source||"local"},a=document.createElement("div");return a.className="thumbnail-file-row has-copy has-delete",a.setAttribute("role","button"),a.tabIndex=0,t.name.length>18&&a.classList.add("is-long-name"),isThumbnailVideoSelected(t)&&a.classList.add("is-selected"),appendChildren(a,[createEl("span",{className:"thumbnail-file-name"},[createEl("span",{className:"thumbnail-file-name-text",text:t.name})]),createEl("span",{className:"thumbnail-file-meta",text:formatThumbnailBytes(t.size)}),createThumbnailCopyNameButton("复制文件名"),createThumbnailDeleteFileButton()]),a.title=t.name,a.addEventListener("click",(()=>selectThumbnailVideo(t))),a.addEventListener("keydown",(e=>{"Enter"!==e.key&&" "!==e.key||(e.preventDefault(),selectThumbnailVideo(t))})),a.querySelector(".thumbnail-copy-name")?.addEventListener("click",(e=>{e.preventDefault(),e.stopPropagation(),copyThumbnailVideoFileName(t.name,e.currentTarget)})),a.querySelector(".thumbnail-delete-file")?.addEventListener("click",(e=>{e.preventDefault(),e.stopPropagation(),confirmDeleteThumbnailVideoFile(t)})),a}function createThumbnailCopyNameButton(e){return createEl("button",{className:"thumbnail-copy-name",attrs:{type:"button","aria-label":e}},[createSpriteSvg("copy-btn-icon",{fill:"currentColor",ariaLabel:"复制"})])}function createThumbnailDeleteFileButton(){return createEl("button",{className:"thumbnail-delete-file",attrs:{type:"button","aria-label":"删除视频文件",title:"删除视频文件"}},[createEl("span",{className:"thumbnail-delete-file-icon",attrs:{"aria-hidden":"true"}},[createSpriteSvg("delete-btn-top-icon",{fill:"currentColor"}),createSpriteSvg("delete-btn-bottom-icon",{fill:"currentColor"})])])}function confirmDeleteThumbnailVideoFile(e){showAlert({title:"删除视频文件",message:`确认永久删除“${e.name}”吗？此操作无法恢复。`,type:"warning",confirmText:"删除",cancelText:"取消",onConfirm:()=>deleteThumbnailVideoFile(e)})}async function deleteThumbnailVideoFile(e){setThumbnailStatus(`正在删除：${e.name}`);try{const t=await callApi(event_map.delete_video_file,{path:e.path,confirm:!0},"DELETE");if(!t.success)throw new Error(t.message||"删除视频文件失败");clearDeletedThumbnailVideo(e),await loadThumbnailDirectory(t.next_path??thumbnailState.currentPath),setThumbnailStatus(`已删除视频文件：${e.name}`)}catch(e){setThumbnailStatus(e.message||"删除视频文件失败"),showAlert({title:"删除失败",message:e.message||"删除视频文件失败，请稍后重试。",type:"error",showCancel:!1})}}function clearDeletedThumbnailVideo(e){if(!thumbnailState.selectedVideo||"local"!==thumbnailState.selectedVideo.source||thumbnailState.selectedVideo.path!==e.path)return;thumbnailState.abortBatch=!0,thumbnailState.isBatchRunning=!1,thumbnailState.sessionToken+=1,thumbnailState.seekToken+=1,thumbnailState.stepSeekToken+=1,clearTimeout(thumbnailState.stepSeekTimer),thumbnailState.stepSeekTimer=null,thumbnailState.pendingStepTarget=null,thumbnailState.pendingStepShouldResume=!1,thumbnailState.selectedVideo=null;const t=document.getElementById("thumbnail-video");t&&(t.pause(),t.removeAttribute("src"),t.load()),updateThumbnailProgress(0),setThumbnailBatchControls(!1),updateThumbnailBatchSummary()}async function copyThumbnailVideoFileName(e,t){const a=getThumbnailVideoNameWithoutExtension(e),n=(e,a)=>{t&&(t.classList.remove("is-success","is-danger"),a&&t.classList.add(a),t.replaceChildren(createSpriteSvg(e,{fill:"currentColor",ariaLabel:"复制"})))};try{if(navigator.clipboard?.writeText)await navigator.clipboard.writeText(a);else{const e=document.createElement("textarea");e.value=a,e.style.position="fixed",e.style.opacity="0",document.body.appendChild(e),e.select(),document.execCommand("copy"),document.body.removeChild(e)}n("copy-success-btn-icon","is-success"),setThumbnailStatus(`已复制文件名：${a}`)}catch(e){n("copy-fail-btn-icon","is-danger"),setThumbnailStatus("复制文件名失败")}finally{setTimeout((()=>n("copy-btn-icon","")),1200)}}function getThumbnailVideoNameWithoutExtension(e){const t=String(e||""),a=t.lastIndexOf(".");return a>0?t.slice(0,a):t}function selectThumbnailVideo(e){const t={...e,source:e.source||"local"};thumbnailState.selectedVideo=t;const a=document.getElementById("thumbnail-video");a&&(thumbnailState.seekToken+=1,thumbnailState.stepSeekToken+=1,clearTimeout(thumbnailState.stepSeekTimer),thumbnailState.stepSeekTimer=null,thumbnailState.pendingStepTarget=null,thumbnailState.pendingStepShouldResume=!1,a.pause(),a.preload="metadata",a.src=t.url,a.load(),setThumbnailStatus(`已选择：${t.name}`),renderThumbnailCurrentSourceList())}function updateThumbnailStatusForVideo(){const e=document.getElementById("thumbnail-video");e&&thumbnailState.selectedVideo&&setThumbnailStatus(`${thumbnailState.selectedVideo.name} · ${formatThumbnailTime(e.duration)}`,{preserveUnknown:!0})}function setThumbnailStatus(e,t={}){const a=document.getElementById("thumbnail-status");a&&(a.textContent=normalizeUiMessage(e,t.fallback||"操作失败。",{preserveUnknown:Boolean(t.preserveUnknown)}))}function getThumbnailParentPath(e){const t=(e||"").split("/").filter(Boolean);return t.pop(),t.join("/")}function getThumbnailSecondStep(){return 1}function getThumbnailFrameStep(){const e=thumbnailState.adaptiveFps||30;return Number.isFinite(e)&&e>0?1/e:1/30}function getThumbnailPercentStep(){const e=parseFloat(document.getElementById("thumbnail-percent-step")?.value||"2");return Number.isFinite(e)&&e>0&&e<=100?e:2}function resetThumbnailVideoControls(){thumbnailState.adaptiveFps=30,syncThumbnailPercentPreset()}function autoDetectThumbnailFps(e){thumbnailState.fpsProbeToken+=1;const t=thumbnailState.fpsProbeToken;if(thumbnailState.adaptiveFps=30,!e||"function"!=typeof e.requestVideoFrameCallback)return;const a=[];let n=null,i=!1;const r=()=>{if(i||t!==thumbnailState.fpsProbeToken)return;if(i=!0,a.length<2)return void(thumbnailState.adaptiveFps=30);const e=a.reduce(((e,t)=>e+t),0)/a.length;e>0&&(thumbnailState.adaptiveFps=Math.max(1,Math.round(1/e)))},l=(s,o)=>{if(t===thumbnailState.fpsProbeToken&&!i){if(null!==n){const e=o.mediaTime-n;e>0&&e<1&&a.push(e)}n=o.mediaTime,a.length>=6?r():e.requestVideoFrameCallback(l)}};e.requestVideoFrameCallback(l),setTimeout(r,1200)}function getThumbnailBatchTargets(){const e=document.getElementById("thumbnail-video");if(!isThumbnailVideoReady(e))return[];const t=getThumbnailPercentStep(),a=[];for(let n=t;n<=100.0001;n+=t)a.push(clampThumbnailTime(e.duration*Math.min(n,100)/100,e.duration));return a}function updateThumbnailBatchSummary(){const e=document.getElementById("thumbnail-batch-summary");e&&(e.textContent=""),updateThumbnailBatchButtonLabel()}function getThumbnailBatchCount(){return isThumbnailVideoReady(document.getElementById("thumbnail-video"))?getThumbnailBatchTargets().length:0}function updateThumbnailBatchButtonLabel(){if(thumbnailState.isBatchRunning)return;const e=document.getElementById("thumbnail-batch-capture");if(!e)return;const t=getThumbnailBatchCount();e.textContent=t>0?`批量截图 ${t} 张`:"批量截图"}function syncThumbnailPercentPreset(){const e=getThumbnailPercentStep();document.querySelectorAll(".thumbnail-percent-preset").forEach((t=>{const a=parseFloat(t.dataset.thumbnailPercent||"0");t.classList.toggle("is-info",Math.abs(a-e)<1e-4)}))}async function stepThumbnailVideo(e){const t=document.getElementById("thumbnail-video");if(!isThumbnailVideoReady(t))return void setThumbnailStatus("请先选择可播放的视频");const a=thumbnailState.pendingStepShouldResume||!t.paused&&!t.ended,n=clampThumbnailTime((Number.isFinite(thumbnailState.pendingStepTarget)?thumbnailState.pendingStepTarget:t.currentTime)+e,t.duration),i=++thumbnailState.stepSeekToken;thumbnailState.pendingStepTarget=n,thumbnailState.pendingStepShouldResume=a,clearTimeout(thumbnailState.stepSeekTimer),setThumbnailStatus(`准备定位：${formatThumbnailTime(n)} / ${formatThumbnailTime(t.duration)}`),thumbnailState.stepSeekTimer=setTimeout((()=>{flushThumbnailStepSeek(i)}),60)}async function flushThumbnailStepSeek(e){if(e!==thumbnailState.stepSeekToken)return;const t=document.getElementById("thumbnail-video");if(!isThumbnailVideoReady(t)||!Number.isFinite(thumbnailState.pendingStepTarget))return;const a=thumbnailState.pendingStepTarget,n=thumbnailState.pendingStepShouldResume;thumbnailState.stepSeekTimer=null;try{const i=await seekThumbnailVideo(a);if(e!==thumbnailState.stepSeekToken)return;thumbnailState.pendingStepTarget===a&&(thumbnailState.pendingStepTarget=null),thumbnailState.pendingStepShouldResume=!1,n&&i&&t.play().catch((()=>{})),setThumbnailStatus(`当前时间：${formatThumbnailTime(t.currentTime)} / ${formatThumbnailTime(t.duration)}`)}catch(t){e===thumbnailState.stepSeekToken&&(thumbnailState.pendingStepTarget=null,thumbnailState.pendingStepShouldResume=!1,setThumbnailStatus(t.message||"视频定位失败"))}}function isThumbnailVideoReady(e){return Boolean(e&&e.src&&Number.isFinite(e.duration)&&e.duration>0)}function clampThumbnailTime(e,t){const a=Math.max(0,t-.1);return Math.min(Math.max(0,e),a)}function seekThumbnailVideo(e){const t=document.getElementById("thumbnail-video"),a=++thumbnailState.seekToken;return new Promise(((n,i)=>{if(!t)return void i(new Error("视频元素不存在"));if(Math.abs(t.currentTime-e)<.03)return void n(!0);let r;const l=()=>a!==thumbnailState.seekToken,s=()=>{clearTimeout(r),t.removeEventListener("seeked",o),t.removeEventListener("error",c)},o=()=>{s(),n(!l())},c=()=>{s(),l()?n(!1):i(new Error("视频定位失败"))};if(r=setTimeout((()=>{s(),l()?n(!1):i(new Error("视频定位超时"))}),8e3),t.addEventListener("seeked",o,{once:!0}),t.addEventListener("error",c,{once:!0}),"function"==typeof t.fastSeek)try{t.fastSeek(e)}catch(a){t.currentTime=e}else t.currentTime=e}))}function captureCurrentThumbnail(e={}){const t=document.getElementById("thumbnail-video");if(!isThumbnailVideoReady(t)||!t.videoWidth||!t.videoHeight)return e.silent||setThumbnailStatus("请先选择并加载可截图的视频"),Promise.resolve(null);const a=thumbnailState.sessionToken;return new Promise((e=>{const n=document.createElement("canvas");n.width=t.videoWidth,n.height=t.videoHeight;n.getContext("2d").drawImage(t,0,0,n.width,n.height),n.toBlob((n=>{if(a!==thumbnailState.sessionToken)return void e(null);if(!n)return setThumbnailStatus("截图失败"),void e(null);const i=t.currentTime,r=createThumbnailFileName(i),l=new File([n],r,{type:"image/jpeg",lastModified:Date.now()});l.captureTimestamp=i;const s={id:`${Date.now()}-${Math.random().toString(16).slice(2)}`,file:l,url:URL.createObjectURL(l),time:i,name:r};thumbnailState.captures.push(s),renderThumbnailCaptures(),setThumbnailStatus(`已截图：${formatThumbnailTime(i)}`),e(s)}),"image/jpeg",.9)}))}async function batchCaptureThumbnails(){const e=document.getElementById("thumbnail-video");if(!isThumbnailVideoReady(e))return void setThumbnailStatus("请先选择可播放的视频");if(thumbnailState.isBatchRunning)return;const t=getThumbnailBatchTargets();if(!t.length)return;const a=thumbnailState.sessionToken;thumbnailState.isBatchRunning=!0,thumbnailState.abortBatch=!1,setThumbnailBatchControls(!0),e.pause();try{for(let e=0;e<t.length&&(!thumbnailState.abortBatch&&a===thumbnailState.sessionToken)&&(await seekThumbnailVideo(t[e]),!thumbnailState.abortBatch&&a===thumbnailState.sessionToken)&&(await captureCurrentThumbnail({silent:!0}),!thumbnailState.abortBatch&&a===thumbnailState.sessionToken);e++)updateThumbnailProgress((e+1)/t.length*100),setThumbnailStatus(`批量截图 ${e+1} / ${t.length}`)}catch(e){a===thumbnailState.sessionToken&&setThumbnailStatus(e.message||"批量截图失败")}finally{thumbnailState.isBatchRunning=!1,thumbnailState.abortBatch=!1,a===thumbnailState.sessionToken&&setThumbnailBatchControls(!1)}}function setThumbnailBatchControls(e){const t=document.getElementById("thumbnail-batch-capture"),a=document.getElementById("thumbnail-batch-progress");t&&(t.disabled=!1,t.classList.toggle("is-primary",!e),t.classList.toggle("is-warning",e),e?t.textContent="停止截图":updateThumbnailBatchButtonLabel()),a&&(a.style.display=e?"block":"none",a.value=0)}function updateThumbnailProgress(e){const t=document.getElementById("thumbnail-batch-progress");t&&(t.value=Math.max(0,Math.min(100,e)))}function renderThumbnailCaptures(){const e=document.getElementById("thumbnail-grid");if(e){if(clearElement(e),!thumbnailState.captures.length){const t=document.createElement("div");return t.className="thumbnail-empty",t.textContent="截图将显示在这里",e.appendChild(t),void updateThumbnailSelectionControls()}thumbnailState.captures.forEach((t=>{const a=thumbnailState.selectedCaptureIds.has(t.id),n=document.createElement("div");n.className="thumbnail-item"+(a?" is-selected":""),n.draggable=!0,n.dataset.id=t.id;const i=document.createElement("img");i.src=t.url,i.alt=t.name;const r=document.createElement("span");r.className="thumbnail-item-time",r.textContent=formatThumbnailTime(t.time);const l=document.createElement("button");l.className="thumbnail-select-toggle",l.type="button",l.setAttribute("aria-label",a?"取消选择":"选择缩略图"),l.setAttribute("aria-pressed",a?"true":"false"),l.textContent="✓",l.addEventListener("click",(e=>{e.preventDefault(),e.stopPropagation(),toggleThumbnailCaptureSelection(t.id)}));const s=document.createElement("button");s.className="thumbnail-delete",s.type="button",s.setAttribute("aria-label","删除"),s.appendChild(createSpriteSvg("close-icon",{width:12,height:12,fill:"currentColor",ariaLabel:"删除"})),s.addEventListener("click",(e=>{e.preventDefault(),e.stopPropagation(),deleteThumbnailCapture(t.id)})),n.append(i,l,r,s),n.addEventListener("click",(()=>jumpThumbnailVideoToCapture(t))),n.addEventListener("dragstart",(e=>startThumbnailDrag(e,t,n))),n.addEventListener("dragend",(()=>{setThumbnailDraggingState([],!1),setTimeout(clearThumbnailDragCache,0)})),e.appendChild(n)})),updateThumbnailSelectionControls()}}function startThumbnailDrag(e,t,a){const n=getThumbnailDragCaptures(t);setThumbnailDraggingState(n.map((e=>e.id)),!0),window.currentDraggedThumbnailFiles=n.map((e=>e.file)),window.currentDraggedThumbnailFile=1===n.length?n[0].file:null,e.dataTransfer.effectAllowed="copy",n.forEach((t=>{try{e.dataTransfer.items.add(t.file)}catch(e){}})),e.dataTransfer.setData("text/plain",n.map((e=>e.name)).join("\n")),e.dataTransfer.setData("text/uri-list",n.map((e=>e.url)).join("\n")),e.dataTransfer.setData("DownloadURL",`${n[0].file.type}:${n[0].name}:${n[0].url}`)}function toggleThumbnailCaptureSelection(e){thumbnailState.selectedCaptureIds.has(e)?thumbnailState.selectedCaptureIds.delete(e):thumbnailState.selectedCaptureIds.add(e),renderThumbnailCaptures()}function toggleAllThumbnailCaptures(){if(!thumbnailState.captures.length)return;const e=thumbnailState.captures.every((e=>thumbnailState.selectedCaptureIds.has(e.id)));thumbnailState.selectedCaptureIds.clear(),e||thumbnailState.captures.forEach((e=>thumbnailState.selectedCaptureIds.add(e.id))),renderThumbnailCaptures()}function updateThumbnailSelectionControls(){const e=document.getElementById("thumbnail-clear-captures"),t=document.getElementById("thumbnail-select-all"),a=document.getElementById("thumbnail-selected-count"),n=document.getElementById("thumbnail-send-add"),i=document.getElementById("thumbnail-send-edit"),r=document.getElementById("thumbnail-download-selected"),l=thumbnailState.captures.length,s=new Set(thumbnailState.captures.map((e=>e.id)));thumbnailState.selectedCaptureIds.forEach((e=>{s.has(e)||thumbnailState.selectedCaptureIds.delete(e)}));const o=thumbnailState.selectedCaptureIds.size,c=o>0,d=l>0&&o===l;if(e&&(e.disabled=0===l),t&&(t.disabled=0===l,t.textContent=d?"取消全选":"全选",t.classList.toggle("is-light",!d)),a&&(a.textContent=`已选 ${o} 张`),n&&(n.disabled=!c||"function"!=typeof window["addimage-upload-areaFiles"]),i){const e=isThumbnailEditModalOpen();i.disabled=!c||!e||"function"!=typeof window["addedit-image-upload-areaFiles"],i.title=e?"":"请先打开编辑电影窗口"}r&&(r.disabled=!c)}function getSelectedThumbnailCaptures(){return thumbnailState.captures.filter((e=>thumbnailState.selectedCaptureIds.has(e.id)))}function isThumbnailEditModalOpen(){return document.getElementById("editModal")?.classList.contains("is-active")||!1}function sendSelectedThumbnailCapturesToUploadArea(e,t){const a=getSelectedThumbnailCaptures();if(!a.length)return void showAlert({title:"请选择缩略图",message:"请先选中需要复用的缩略图。",type:"warning",showCancel:!1});if("edit-image-upload-area"===e&&!isThumbnailEditModalOpen())return showAlert({title:"编辑窗口未打开",message:"请先打开要编辑的电影，再把缩略图加入编辑电影图片区。",type:"warning",showCancel:!1}),void updateThumbnailSelectionControls();const n=window[`add${e}Files`];if("function"!=typeof n)return showAlert({title:"加入失败",message:`${t}图片区还没有准备好，请稍后再试。`,type:"error",showCancel:!1}),void updateThumbnailSelectionControls();n(a.map((e=>e.file))),setThumbnailStatus(`已加入 ${a.length} 张缩略图到${t}图片区`),showAlert({title:"已加入",message:`已将 ${a.length} 张缩略图加入${t}图片区。`,type:"success",showCancel:!1})}function downloadSelectedThumbnailCaptures(){const e=getSelectedThumbnailCaptures();e.length?(e.forEach((e=>{const t=document.createElement("a");t.href=e.url,t.download=e.name,document.body.appendChild(t),t.click(),t.remove()})),setThumbnailStatus(`已开始下载 ${e.length} 张缩略图`),showAlert({title:"开始下载",message:`已触发 ${e.length} 张缩略图下载，移动端浏览器可能会逐个确认或保存。`,type:"success",showCancel:!1})):showAlert({title:"请选择缩略图",message:"请先选中需要下载的缩略图。",type:"warning",showCancel:!1})}function getThumbnailDragCaptures(e){if(thumbnailState.selectedCaptureIds.has(e.id)){const t=thumbnailState.captures.filter((e=>thumbnailState.selectedCaptureIds.has(e.id)));return t.length?t:[e]}return[e]}function setThumbnailDraggingState(e,t){if(document.querySelectorAll(".thumbnail-item.dragging").forEach((e=>{e.classList.remove("dragging")})),!t)return;const a=new Set(e);document.querySelectorAll(".thumbnail-item").forEach((e=>{e.classList.toggle("dragging",a.has(e.dataset.id))}))}function clearThumbnailDragCache(){window.currentDraggedThumbnailFile=null,window.currentDraggedThumbnailFiles=[],window.currentDraggedThumbnailFilesPromise=null}async function jumpThumbnailVideoToCapture(e){const t=document.getElementById("thumbnail-video");if(e&&isThumbnailVideoReady(t)){t.pause();try{await seekThumbnailVideo(clampThumbnailTime(e.time,t.duration)),setThumbnailStatus(`已跳转：${formatThumbnailTime(t.currentTime)} / ${formatThumbnailTime(t.duration)}`)}catch(e){setThumbnailStatus(e.message||"视频定位失败")}}}function deleteThumbnailCapture(e){const t=thumbnailState.captures.findIndex((t=>t.id===e));-1!==t&&(URL.revokeObjectURL(thumbnailState.captures[t].url),thumbnailState.captures.splice(t,1),thumbnailState.selectedCaptureIds.delete(e),renderThumbnailCaptures())}function clearThumbnailCaptures(){thumbnailState.captures.forEach((e=>URL.revokeObjectURL(e.url))),thumbnailState.captures=[],thumbnailState.selectedCaptureIds.clear(),clearThumbnailDragCache(),renderThumbnailCaptures()}function createThumbnailFileName(e){return`${(thumbnailState.selectedVideo?.name||"video").replace(/\.[^.]+$/,"").replace(/[\\/:*?"<>|]+/g,"_")}_${e.toFixed(2)}s.jpg`}function formatThumbnailBytes(e){return Number.isFinite(e)?e<1024?`${e} B`:e<1048576?`${(e/1024).toFixed(1)} KB`:e<1073741824?`${(e/1024/1024).toFixed(1)} MB`:`${(e/1024/1024/1024).toFixed(1)} GB`:""}function formatThumbnailTime(e){if(!Number.isFinite(e))return"00:00";const t=Math.max(0,e),a=Math.floor(t/3600),n=Math.floor(t%3600/60),i=Math.floor(t%60),r=Math.floor(t%1*100);return`${a>0?`${String(a).padStart(2,"0")}:${String(n).padStart(2,"0")}:${String(i).padStart(2,"0")}`:`${String(n).padStart(2,"0")}:${String(i).padStart(2,"0")}`}.${String(r).padStart(2,"0")}`}function initImageUpload(){initUploadArea("image-upload-area","image-input"),initUploadArea("edit-image-upload-area","edit-image-input")}function initUploadArea(e,t){const a=document.getElementById(e);if(!a)return;const n=document.getElementById(t),i=a.querySelector(".image-preview-container"),r=a.querySelector(".upload-placeholder");let l=[],s=!1;function o(){r.style.display=l.length>0?"none":"block"}function c(){i.querySelectorAll(".preview-item").forEach(((e,t)=>{e.dataset.index=t}))}function d(e){const t=e.filter((e=>e.type.startsWith("image/")));if(0===t.length)return void showAlert({title:"操作失败",message:"请选择图片文件",type:"warning",showCancel:!1});const n=l.map((e=>`${e.name}-${e.size}-${e.type}`)),i=t.filter((e=>!n.includes(`${e.name}-${e.size}-${e.type}`)));0!==i.length?i.forEach((e=>{const t=new FileReader;t.onload=t=>{const n=l.length;l.push(e),addImagePreview(t.target.result,a,n),c(),o()},t.readAsDataURL(e)})):showAlert({title:"操作失败",message:"所选图片已存在",type:"warning",showCancel:!1})}function m(e){if(e.preventDefault(),!s)return;const t=e.clientX||e.touches[0].clientX,a=e.clientY||e.touches[0].clientY,n=i.querySelector(".dragging");if(!n)return;const r=getDragAfterElement(i,t,a);r?i.insertBefore(n,r):i.appendChild(n)}i.addEventListener("dragstart",(e=>{e.target.closest(".preview-item")&&(s=!0,e.target.closest(".preview-item").classList.add("dragging"))})),i.addEventListener("touchstart",(e=>{e.target.closest(".preview-item")&&(s=!0,e.target.closest(".preview-item").classList.add("dragging"))}),{passive:!0}),i.addEventListener("dragend",(()=>{s=!1;const e=i.querySelector(".dragging");e&&e.classList.remove("dragging")})),i.addEventListener("touchend",(()=>{s=!1;const e=i.querySelector(".dragging");if(e){e.classList.remove("dragging");const t=[...i.querySelectorAll(".preview-item")],a=[];t.forEach((e=>{const t=parseInt(e.dataset.index);l[t]&&a.push(l[t])})),l=a,c()}}),{passive:!0}),i.addEventListener("dragover",m),i.addEventListener("touchmove",m),i.addEventListener("click",(e=>{const t=e.target.closest(".delete-image");if(!t)return;e.preventDefault(),e.stopPropagation();const a=t.closest(".preview-item");if(a){const e=Array.from(i.children).indexOf(a);l.splice(e,1),a.remove(),c(),o()}})),a.addEventListener("click",(()=>{n.click()})),a.addEventListener("dragover",(e=>{e.preventDefault(),s||a.classList.add("dragover")})),a.addEventListener("dragleave",(()=>{s||a.classList.remove("dragover")})),a.addEventListener("drop",(async e=>{if(e.preventDefault(),s){const e=i.querySelector(".dragging");if(!e)return;const t=parseInt(e.dataset.index),a=[...i.querySelectorAll(".preview-item")],n=a.indexOf(e);if(t!==n){const[e]=l.splice(t,1);l.splice(n,0,e),a.forEach(((e,t)=>{e.dataset.index=t}))}}else{if(a.classList.remove("dragover"),window.currentDraggedThumbnailFilesPromise&&"function"==typeof window.currentDraggedThumbnailFilesPromise.then){try{const e=await window.currentDraggedThumbnailFilesPromise;Array.isArray(e)&&e.length&&d(e)}catch(e){showAlert({title:"加入失败",message:e.message||"无法导入拖放图片",type:"error",showCancel:!1})}return}if(Array.isArray(window.currentDraggedThumbnailFiles)&&window.currentDraggedThumbnailFiles.length)return void d(window.currentDraggedThumbnailFiles);if(window.currentDraggedThumbnailFile)return void d([window.currentDraggedThumbnailFile]);d(Array.from(e.dataTransfer.files))}})),n.addEventListener("change",(()=>{d(Array.from(n.files))})),window[`reset${e}`]=()=>{l=[],clearElement(i),r.style.display="block",n.value=""},window[`get${e}Files`]=()=>l,window[`add${e}Files`]=e=>d(Array.from(e||[]))}function addImagePreview(e,t,a){const n=t.querySelector(".image-preview-container"),i=document.createElement("div");i.className="preview-item",i.dataset.index=a,i.draggable=!0,appendChildren(i,[createEl("img",{attrs:{src:e,alt:"预览图"}}),createEl("button",{className:"delete-image",attrs:{type:"button"}},[createSpriteSvg("close-icon",{width:12,height:12,fill:"currentColor",ariaLabel:"删除"})])]),i.addEventListener("dragstart",(e=>{e.dataTransfer.setData("text/plain",a),i.classList.add("dragging")})),i.addEventListener("dragend",(()=>{i.classList.remove("dragging")})),n.appendChild(i)}let currentImageIndex=0,currentImages=[],currentImageMovieTitle="";const IMAGE_VIEWER_WIDTH_RATIO=.6,IMAGE_VIEWER_MAX_HEIGHT_RATIO=.9,IMAGE_VIEWER_MOBILE_BREAKPOINT=768;function setImageViewerModalWidth(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".modal-card");if(!t)return;const a=window.innerWidth||document.documentElement.clientWidth,n=window.innerHeight||document.documentElement.clientHeight;t.style.width=a<=768?"90%":`${Math.round(.6*a)}px`,t.style.height="auto",t.style.maxHeight=`${Math.round(.9*n)}px`,t.style.overflow="hidden",t.style.overflowY="hidden"}function centerImageViewerModal(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".modal-card");if(!t||!e.classList.contains("is-active"))return;const a=window.innerWidth||document.documentElement.clientWidth,n=window.innerHeight||document.documentElement.clientHeight,i=t.offsetWidth,r=t.offsetHeight;t.style.left=`${Math.max(0,(a-i)/2)}px`,t.style.top=`${Math.max(0,(n-r)/2)}px`}function getImageViewerMaxBodyHeight(e,t){const a=e.querySelector(".modal-card-head"),n=window.innerHeight||document.documentElement.clientHeight,i=Math.round(.9*n),r=a?a.offsetHeight:0;return t.style.maxHeight=`${i}px`,t.style.overflow="hidden",t.style.overflowY="hidden",Math.max(1,i-r)}function resizeImageViewerImage(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".modal-card"),a=e?.querySelector(".modal-card-body"),n=e?.querySelector(".viewer-image"),i=e?.querySelector(".image-viewer-emby-video"),r=e?.querySelector(".image-viewer-container"),l=e?.querySelector(".image-viewer-scroll"),s=e?.querySelector(".image-viewer-strip");if(!(t&&a&&n&&i&&r&&l))return;const o=r.classList.contains("is-video-mode");if(!(o||n.naturalWidth&&n.naturalHeight))return;const c=l.clientWidth||r.clientWidth||t.clientWidth;if(!c)return;const d=o?Math.round(9*c/16):Math.round(c*n.naturalHeight/n.naturalWidth),m=s&&!s.hidden?s.offsetHeight:0,u=Math.min(d,Math.max(1,getImageViewerMaxBodyHeight(e,t)-m)),h=u+m;a.style.height=`${h}px`,a.style.maxHeight=`${h}px`,r.style.height=`${u}px`,l.style.height="100%",n.style.width="100%",n.style.height=`${d}px`,i.style.width="100%",i.style.height=`${u}px`,centerImageViewerModal()}function resetImageViewerScroll(){const e=document.getElementById("imageViewerModal")?.querySelector(".image-viewer-scroll");e&&(e.scrollTop=0,e.scrollLeft=0)}function scheduleImageViewerResize(){requestAnimationFrame((()=>{resizeImageViewerImage(),requestAnimationFrame(resizeImageViewerImage)}))}function openImageViewer(e,t){stopImageViewerEmbyPlayback(),currentImageIndex=0,currentImages=[],currentImageMovieTitle=t||"",currentImages=e.split(",").filter((e=>e.trim()));const a=document.getElementById("imageViewerModal");setImageViewerModalWidth(),a.querySelector(".modal-card-title").textContent=`查看图片：${t}`,updateViewerImage(),ModalManager.open("imageViewerModal"),scheduleImageViewerResize()}function parseImageCaptureTimestamp(e){const t=String(e||"").match(/__at-(\d+(?:\.\d{1,2})?)s\.webp$/i);if(!t)return null;const a=Number(t[1]);return Number.isFinite(a)&&a>=0?a:null}function formatImageCaptureTimestamp(e){const t=Math.max(0,Math.floor(Number(e)||0));return[Math.floor(t/3600),Math.floor(t%3600/60),t%60].map((e=>String(e).padStart(2,"0"))).join(":")}function isImageViewerVideoMode(){return document.querySelector("#imageViewerModal .image-viewer-container")?.classList.contains("is-video-mode")||!1}function enterImageViewerVideoMode(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".image-viewer-container"),a=e?.querySelector(".viewer-image"),n=e?.querySelector(".image-viewer-emby-video"),i=e?.querySelector(".image-viewer-timecode"),r=e?.querySelector(".image-viewer-video-return");t&&a&&n&&(t.classList.add("is-video-mode"),a.hidden=!0,n.hidden=!1,i&&(i.hidden=!0),r&&(r.hidden=!1),scheduleImageViewerResize())}function leaveImageViewerVideoMode(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".image-viewer-container"),a=e?.querySelector(".viewer-image"),n=e?.querySelector(".image-viewer-emby-video"),i=e?.querySelector(".image-viewer-video-return");t?.classList.remove("is-video-mode"),a&&(a.hidden=!1),n&&(n.hidden=!0),i&&(i.hidden=!0)}function stopImageViewerEmbyPlayback(){releaseEmbyVideo(document.querySelector("#imageViewerModal .image-viewer-emby-video")),"viewer"===currentEmbyPlaybackContext?.target&&(currentEmbyPlaybackContext=null),leaveImageViewerVideoMode()}function exitImageViewerVideoMode(){stopImageViewerEmbyPlayback(),updateViewerImage()}function seekImageViewerEmbyPlayback(e){const t=currentEmbyPlaybackContext;if(!t||"viewer"!==t.target||!t.video)return!1;t.startTimestamp=Math.max(0,Number(e)||0);const a=Number(t.video.duration);return t.video.currentTime=Number.isFinite(a)?Math.min(t.startTimestamp,Math.max(0,a)):t.startTimestamp,t.video.play().catch((()=>{})),!0}async function playImageCaptureInEmby(){const e=document.querySelector("#imageViewerModal .image-viewer-timecode"),t=Number(e?.dataset.timestamp);if(currentImageMovieTitle&&Number.isFinite(t)&&!(t<0)&&e){e.disabled=!0;try{const e=await callApi(event_map.resolve_movie_emby_playback,{title:currentImageMovieTitle});if(!e.success)throw new Error(e.message||"无法获取 Emby 播放信息。");const a=e.data||{};if("linked"===a.status&&a.playback?.streamUrl)return rememberMovieEmbyLink(currentImageMovieTitle,a.playback.id),void openImageViewerEmbyPlayer(a.playback.streamUrl,a.playback.name||currentImageMovieTitle,t,{movieTitle:currentImageMovieTitle,itemId:a.playback.id});if("candidates"===a.status)return rememberMovieEmbyLink(currentImageMovieTitle,null),void openEmbyLinkSelection(currentImageMovieTitle,t,a.candidates||[],{playbackTarget:"viewer"});throw new Error("未找到匹配的 Emby 电影。")}catch(e){showAlert({title:"Emby",message:e.message||"无法启动 Emby 播放。",type:"warning",showCancel:!1})}finally{e.disabled=!1}}}function updateViewerImage(){const e=document.getElementById("imageViewerModal"),t=e.querySelector(".viewer-image"),a=e.querySelector(".nav-button.prev"),n=e.querySelector(".nav-button.next"),i=e.querySelector(".image-counter"),r=e.querySelector(".image-viewer-timecode");t.onload=scheduleImageViewerResize,resetImageViewerScroll(),t.style.height="auto",t.src=buildImageUrl(currentImages[currentImageIndex]),t.complete&&scheduleImageViewerResize();const l=parseImageCaptureTimestamp(currentImages[currentImageIndex]);r&&(r.hidden=null===l,r.disabled=!1,null!==l?(r.dataset.timestamp=String(l),r.textContent=formatImageCaptureTimestamp(l)):(delete r.dataset.timestamp,clearElement(r))),i.style.display=currentImages.length>1?"block":"none",a.style.display=currentImages.length>1&&currentImageIndex>0?"flex":"none",n.style.display=currentImages.length>1&&currentImageIndex<currentImages.length-1?"flex":"none",renderImageViewerStrip(),currentImages.length>1&&updateImageCounter()}function updateImageViewerNavigationState(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".nav-button.prev"),a=e?.querySelector(".nav-button.next"),n=e?.querySelector(".image-counter");t&&a&&n&&(n.style.display=currentImages.length>1?"block":"none",t.style.display=currentImages.length>1&&currentImageIndex>0?"flex":"none",a.style.display=currentImages.length>1&&currentImageIndex<currentImages.length-1?"flex":"none",currentImages.length>1&&updateImageCounter())}function setImageViewerIndex(e){const t=Number(e);if(!Number.isInteger(t)||t<0||t>=currentImages.length||t===currentImageIndex)return;currentImageIndex=t;const a=parseImageCaptureTimestamp(currentImages[currentImageIndex]);if(isImageViewerVideoMode()&&null!==a&&seekImageViewerEmbyPlayback(a))return renderImageViewerStrip(),void updateImageViewerNavigationState();isImageViewerVideoMode()&&stopImageViewerEmbyPlayback(),updateViewerImage()}function renderImageViewerStrip(){const e=document.getElementById("imageViewerModal"),t=e?.querySelector(".image-viewer-strip");if(!t)return;clearElement(t);const a=currentImages.length>1;t.hidden=!a,a&&(currentImages.forEach(((e,a)=>{const n=a===currentImageIndex,i=createEl("img",{attrs:{alt:`图片 ${a+1}`}});prepareDeferredImage(i,buildImageUrl(e,"cover"));const r=createEl("button",{className:"image-viewer-thumb"+(n?" is-active":""),attrs:{type:"button","aria-label":`查看图片 ${a+1}`,"aria-current":n?"true":"false"},dataset:{index:String(a)}},[i]);r.addEventListener("click",(()=>setImageViewerIndex(a))),t.appendChild(r)})),requestAnimationFrame((()=>{t.querySelector(".image-viewer-thumb.is-active")?.scrollIntoView({block:"nearest",inline:"center"})})))}function updateImageCounter(){document.getElementById("imageViewerModal").querySelector(".image-counter").textContent=`${currentImageIndex+1} / ${currentImages.length}`}function closeImageViewer(){stopImageViewerEmbyPlayback(),currentImageMovieTitle="",ModalManager.close("imageViewerModal")}function showPrevImage(){currentImageIndex>0&&setImageViewerIndex(currentImageIndex-1)}function showNextImage(){currentImageIndex<currentImages.length-1&&setImageViewerIndex(currentImageIndex+1)}document.getElementById("add-movie-form").addEventListener("submit",(async function(e){e.preventDefault();const t=new FormData(this),a=document.getElementById("add-movie-message");try{const e=window["getimage-upload-areaFiles"]()||[],n=[],i=document.querySelectorAll("#image-upload-area .preview-item");for(const a of i){const i=e[parseInt(a.dataset.index)],r=new FormData;r.append("image",i),r.append("title",t.get("title")),appendCaptureTimestampToUpload(r,i);const l=await fetch("/api",{method:"POST",headers:window.getCsrfHeaders?window.getCsrfHeaders():{},body:r}).then((e=>e.json()));l.success?n.push(l.filename):showAlert({title:"上传失败",message:l.message||"图片上传失败",type:"error",showCancel:!1})}const r={title:t.get("title"),recommended:"1"===t.get("recommended"),review:t.get("review"),tags:Array.from(document.querySelectorAll("#add-tags .tag.is-selected")).map((e=>e.textContent)).join(","),ratings:collectRatings(),image_filenames:n.join(",")},l=await callApi(event_map.add_movie,r);l.message?(setNotification(a,"success",l.message),this.reset(),document.querySelectorAll("#add-tags .tag").forEach((e=>e.classList.remove("is-selected"))),window["resetimage-upload-area"](),setTimeout((()=>{clearElement(a)}),3e3)):setNotification(a,"danger",l.error||"添加失败")}catch(e){setNotification(a,"danger",normalizeUiMessage(e.message,"添加失败，请稍后重试。"))}})),document.addEventListener("DOMContentLoaded",(function(){const e=document.getElementById("search-input"),t=document.getElementById("rating-dimension-filter"),a=document.getElementById("min-rating-filter"),n=document.getElementById("search-button");t.addEventListener("change",searchFromControls),a.addEventListener("change",searchFromControls),document.querySelectorAll("#recommended-filter .tag").forEach((e=>{e.addEventListener("click",(()=>toggleRecommendedFilter(e)))})),n.addEventListener("click",(()=>{debouncedSearchFromInput.cancel(),searchFromControls()})),e.addEventListener("input",debouncedSearchFromInput),loadFilters().then((()=>{applySearchControlsState(readSearchStateFromUrl()),hasSearchStateInUrl()?searchCurrentPage():clearSearchView()})),e.addEventListener("keydown",(function(e){"Enter"===e.key&&(e.preventDefault(),debouncedSearchFromInput.cancel(),searchFromControls())})),document.getElementById("wtl-input").addEventListener("keypress",(function(e){"Enter"===e.key&&searchWtl()})),document.getElementById("emby-search-input").addEventListener("keypress",(function(e){"Enter"===e.key&&searchEmby()})),document.getElementById("duplicate-input").addEventListener("keydown",(function(e){e.ctrlKey&&"Enter"===e.key&&checkDuplicates()}));const i=document.querySelector("#add-movie-form"),r=i.querySelector('input[name="title"]'),l=i.querySelectorAll(".collapsible-box");l.forEach((e=>{e.querySelector(".box-header").addEventListener("click",(()=>{const t=e.querySelector(".box-content"),a=e.querySelector(".collapse-icon");t.classList.toggle("expanded"),a.classList.toggle("collapsed")}))})),r&&r.addEventListener("input",(function(){const e=""!==this.value.trim();l.forEach((t=>{const a=t.querySelector(".box-content"),n=t.querySelector(".collapse-icon");e?(a.classList.add("expanded"),n.classList.remove("collapsed")):(a.classList.remove("expanded"),n.classList.add("collapsed"))}))}))}));
\ No newline at end of file
@@ -1717,6 +1717,7 @@ const WTL_MODAL_DEFAULT_HEIGHT_RATIO = 0.3;
 const WTL_MODAL_MAX_HEIGHT_RATIO = 0.9;
 const WTL_SEARCH_CACHE_STORAGE_KEY = 'vc-wtl-search-cache-v1';
 const WTL_SEARCH_CACHE_LIMIT = 5;
+const WTL_SCREENSHOT_IMPORT_BATCH_SIZE = 20;
 const wtlState = {
     screenshots: [],
     selectedScreenshotUrls: new Set(),
@@ -2275,40 +2276,42 @@ function toggleAllWtlScreenshots(container) {
     updateWtlScreenshotControls(container);
 }
 
-function wtlDataUrlToFile(dataUrl, filename) {
-    const [header, encoded] = String(dataUrl || '').split(',');
-    const match = /^data:([^;]+);base64$/.exec(header || '');
-    if (!match || !encoded) {
-        throw new Error('导入的图片数据无效。');
-    }
-    const binary = atob(encoded);
-    const bytes = new Uint8Array(binary.length);
-    for (let index = 0; index < binary.length; index += 1) {
-        bytes[index] = binary.charCodeAt(index);
-    }
-    return new File([bytes], filename || `wtl-screenshot-${Date.now()}.jpg`, { type: match[1] || 'image/jpeg' });
-}
-
 function clearWtlDragCache() {
     window.currentDraggedThumbnailFile = null;
     window.currentDraggedThumbnailFiles = [];
     window.currentDraggedThumbnailFilesPromise = null;
 }
 
-async function fetchWtlScreenshotFile(shot) {
-    const result = await callApi(event_map.fetch_external_image, { url: shot.url });
-    if (!result.success) {
-        throw new Error(result.message || 'WTL 截图导入失败');
+async function importWtlScreenshots(shots) {
+    // 服务端直接抓取并保存截图，只返回文件名，浏览器不再经手 base64 图片数据
+    const files = [];
+    const failures = [];
+    for (let start = 0; start < shots.length; start += WTL_SCREENSHOT_IMPORT_BATCH_SIZE) {
+        const batch = shots.slice(start, start + WTL_SCREENSHOT_IMPORT_BATCH_SIZE);
+        const result = await callApi(event_map.fetch_external_images, {
+            urls: batch.map(shot => shot.url),
+            store: true
+        });
+        if (!result.success) {
+            throw new Error(result.message || 'WTL 截图导入失败');
+        }
+        (result.results || []).forEach(item => {
+            if (item.success && item.filename) {
+                files.push(createStoredUploadImage(item.filename));
+            } else {
+                failures.push(item.message || item.url);
+            }
+        });
     }
-    return wtlDataUrlToFile(
-        result.data_url,
-        result.filename || `wtl-screenshot-${shot.index + 1}.jpg`
-    );
+    if (!files.length) {
+        throw new Error(failures[0] || 'WTL 截图导入失败');
+    }
+    return { files, failures };
 }
 
 function prepareWtlScreenshotDragFiles(shots) {
-    const filesPromise = Promise.all(shots.map(shot => fetchWtlScreenshotFile(shot)))
-        .then(files => {
+    const filesPromise = importWtlScreenshots(shots)
+        .then(({ files }) => {
             window.currentDraggedThumbnailFiles = files;
             window.currentDraggedThumbnailFile = files.length === 1 ? files[0] : null;
             return files;
@@ -2373,15 +2376,14 @@ async function addSelectedWtlScreenshotsToUploadArea(areaId, label, container) {
     wtlState.isImporting = true;
     updateWtlScreenshotControls(container);
     try {
-        const files = [];
-        for (const shot of selected) {
-            files.push(await fetchWtlScreenshotFile(shot));
-        }
+        const { files, failures } = await importWtlScreenshots(selected);
         addFiles(files);
         showAlert({
-            title: '已加入',
-            message: `已将 ${files.length} 张 WTL 截图加入${label}图片区。`,
-            type: 'success',
+            title: failures.length ? '部分已加入' : '已加入',
+            message: failures.length
+                ? `已将 ${files.length} 张 WTL 截图加入${label}图片区，${failures.length} 张导入失败。`
+                : `已将 ${files.length} 张 WTL 截图加入${label}图片区。`,
+            type: failures.length ? 'warning' : 'success',
             showCancel: false
         });
     } catch (error) {
@@ -2987,6 +2989,12 @@ function renderScheduledBackupStatus(result = {}) {
         const resultText = schedule.last_result ? `（${schedule.last_result}）` : '';
         details.push(`最近结果：${schedule.last_run_at || '暂无'} ${resultText} ${schedule.last_message || ''}`.trim());
     }
+    if (schedule.last_verification) {
+        const verification = schedule.last_verification;
+        details.push(verification.ok
+            ? `最近校验：通过（${verification.checked_files} 个图片，${verification.verified_at}）`
+            : `最近校验：未通过（${verification.verified_at}）`);
+    }
     if (!schedule.configured) {
         details.push('设置 DB_BACKUP_SCHEDULE_ENABLED=1 后启用');
     }
@@ -3004,6 +3012,17 @@ function createBackupTableMessage(message) {
     ]);
 }
 
+function describeBackupMetadata(metadata = {}) {
+    const parts = [];
+    if (Number.isFinite(metadata.images_count)) parts.push(`缩略图 ${metadata.images_count} 张`);
+    if (Number.isFinite(metadata.archived_images_count) && metadata.archived_images_count !== metadata.images_count) {
+        parts.push(`本次归档 ${metadata.archived_images_count} 张`);
+    }
+    if (Number.isFinite(metadata.dump_bytes)) parts.push(`数据库 ${formatBackupSize(metadata.dump_bytes)}`);
+    if (Number.isFinite(metadata.duration_seconds)) parts.push(`耗时 ${metadata.duration_seconds.toFixed(1)} 秒`);
+    return parts.join(' · ');
+}
+
 function renderDatabaseBackups(result) {
     const list = document.getElementById('dbBackupsList');
     const notice = document.getElementById('maintenanceAuthNotice');
@@ -3051,7 +3070,10 @@ function renderDatabaseBackups(result) {
         list.appendChild(createEl('tr', {}, [
             createEl('td', { text: backup.filename }),
             createEl('td', { text: backup.type_label || '未知' }),
-            createEl('td', { text: formatBackupSize(backup.size_bytes) }),
+            createEl('td', {
+                text: formatBackupSize(backup.size_bytes),
+                attrs: { title: describeBackupMetadata(backup.metadata || {}) }
+            }),
             createEl('td', { text: backup.modified_at || '' }),
             createEl('td', { className: 'settings-actions-column' }, [
                 createEl('div', { className: 'settings-actions' }, [restoreButton, deleteButton])
@@ -3110,9 +3132,64 @@ function createDatabaseBackup() {
     });
 }
 
+const MAINTENANCE_JOB_POLL_INTERVAL_MS = 1000;
+const MAINTENANCE_JOB_FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled'];
+const MAINTENANCE_JOB_STAGE_LABELS = {
+    scan: '正在扫描缩略图',
+    dump: '正在导出数据库',
+    images: '正在处理缩略图',
+    database: '正在恢复数据库',
+    swap: '正在替换缩略图'
+};
+
+function renderMaintenanceJobProgress(job) {
+    const container = document.getElementById('maintenanceJobStatus');
+    if (!container) return;
+    if (!job || MAINTENANCE_JOB_FINISHED_STATUSES.includes(job.status)) {
+        container.hidden = true;
+        clearElement(container);
+        return;
+    }
+
+    const progress = job.progress || {};
+    const parts = [MAINTENANCE_JOB_STAGE_LABELS[job.stage] || '维护任务排队中'];
+    if (progress.files_total) parts.push(`${progress.files_done || 0}/${progress.files_total} 个文件`);
+    if (progress.bytes_done) parts.push(formatBackupSize(progress.bytes_done));
+    container.textContent = parts.join(' · ');
+    container.hidden = false;
+}
+
+function waitForMaintenanceJob(job) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            callApi(event_map.get_maintenance_job, { job_id: job.id }, 'GET')
+                .then(result => {
+                    if (!result.success || !result.job) {
+                        reject(new Error(result.message || '维护任务状态读取失败'));
+                        return;
+                    }
+                    renderMaintenanceJobProgress(result.job);
+                    if (MAINTENANCE_JOB_FINISHED_STATUSES.includes(result.job.status)) {
+                        resolve(result.job.result || { success: false, message: '维护任务执行失败' });
+                        return;
+                    }
+                    window.setTimeout(poll, MAINTENANCE_JOB_POLL_INTERVAL_MS);
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
+function runMaintenanceJob(eventId, data = {}) {
+    return callApi(eventId, { ...data, async: true })
+        .then(result => (result.success && result.job ? waitForMaintenanceJob(result.job) : result))
+        .finally(() => renderMaintenanceJobProgress(null));
+}
+
 function executeCreateDatabaseBackup() {
     setMaintenanceBusy(true);
-    callApi(event_map.create_db_backup)
+    runMaintenanceJob(event_map.create_db_backup)
         .then(result => {
             if (result.success) {
                 showAlert({
@@ -3169,7 +3246,7 @@ function restoreDatabaseBackup(button) {
 
 function executeDatabaseRestore(filename) {
     setMaintenanceBusy(true);
-    callApi(event_map.restore_db_backup, { filename, confirm: true })
+    runMaintenanceJob(event_map.restore_db_backup, { filename, confirm: true })
         .then(result => {
             if (result.success) {
                 const preRestoreFilename = result.pre_restore_backup?.filename;
@@ -4253,6 +4330,9 @@ async function updateMovie() {
         // 处理新上传的图片
         const uploadedFiles = window[`getedit-image-upload-areaFiles`]() || [];
         const uploadResults = await Promise.all(uploadedFiles.map(async file => {
+            if (file.storedFilename) {
+                return { success: true, filename: file.storedFilename };
+            }
             const formData = new FormData();
             formData.append('image', file);
             appendCaptureTimestampToUpload(formData, file);
@@ -6304,18 +6384,25 @@ function initUploadArea(areaId, inputId) {
         }
 
         uniqueFiles.forEach(file => {
+            if (file.storedFilename) {
+                // 已保存到服务器的图片直接用图片地址预览
+                appendFile(file, buildImageUrl(file.storedFilename, 'cover'));
+                return;
+            }
             const reader = new FileReader();
-            reader.onload = (e) => {
-                const index = uploadedFiles.length;
-                uploadedFiles.push(file);
-                addImagePreview(e.target.result, uploadArea, index);
-                updatePreviewIndexes();
-                updateUploadArea();
-            };
+            reader.onload = (e) => appendFile(file, e.target.result);
             reader.readAsDataURL(file);
         });
     }
 
+    function appendFile(file, previewUrl) {
+        const index = uploadedFiles.length;
+        uploadedFiles.push(file);
+        addImagePreview(previewUrl, uploadArea, index);
+        updatePreviewIndexes();
+        updateUploadArea();
+    }
+
     /* PC端使用的是HTML5原生拖放API(dragstart、dragover、drop等事件)。
     在uploadArea的drop事件处理中已经包含了文件数组顺序的更新逻辑。 
     而移动端使用的是触摸事件(touchstart、touchmove、touchend)来模拟拖放行为。
@@ -6489,6 +6576,16 @@ function initUploadArea(areaId, inputId) {
     window[`add${areaId}Files`] = (files) => handleNewFiles(Array.from(files || []));
 }
 
+// 服务端已保存的图片（如 WTL 截图导入），提交时直接使用文件名，无需再次上传
+function createStoredUploadImage(filename) {
+    return {
+        name: filename,
+        size: 0,
+        type: 'image/webp',
+        storedFilename: filename
+    };
+}
+
 // 添加预览图片
 function addImagePreview(imageData, uploadArea, index) {
     const previewContainer = uploadArea.querySelector('.image-preview-container');
@@ -6900,6 +6997,10 @@ document.getElementById('add-movie-form').addEventListener('submit', async funct
         for(const item of previewItems) {
             const index = parseInt(item.dataset.index);
             const file = files[index];
+            if (file?.storedFilename) {
+                uploadedFiles.push(file.storedFilename);
+                continue;
+            }
 
             // 上传所有图片并收集文件名
             const imageFormData = new FormData();
@@ -2,18 +2,28 @@ import ast
 import io
 import re
 import socket
+import threading
+import time
 from dataclasses import replace
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import app as app_module
+import pytest
+import requests
 from PIL import Image
 from video_collection import api_handlers_integrations as integrations_module
+from video_collection import maintenance_jobs as maintenance_jobs_module
 from video_collection.api_handlers import ApiHandlerDependencies, ApiHandlers
 from video_collection.api_handlers_catalog import ApiCatalogHandlersMixin
 from video_collection.api_handlers_integrations import ApiIntegrationHandlersMixin
 from video_collection.api_handlers_maintenance import ApiMaintenanceHandlersMixin
 from video_collection.api_handlers_media import ApiMediaHandlersMixin
 from video_collection.api_handlers_movies import ApiMovieHandlersMixin
+from video_collection.pinned_http import PinnedHostAdapter, pinned_url
+from video_collection.response_cache import ResponseCache
+from video_collection.maintenance_jobs import MaintenanceJobManager, report_maintenance_progress
+from video_collection.shared_state import SQLiteSharedState
 
 
 API_HANDLER_MODULES = [
@@ -64,7 +74,7 @@ def test_backend_api_events_match_frontend_event_map():
     backend_events = {
         event_id: event['name']
         for event_id, event in app_module.API_EVENTS.items()
-        if 1001 <= event_id <= 1026
+        if 1001 <= event_id < 9000
     }
 
     assert backend_events == frontend_events
@@ -159,6 +169,41 @@ def test_resolve_movie_emby_playback_auto_links_one_exact_normalized_title():
     assert search_response.closed is True
 
 
+def test_resolve_movie_emby_playback_returns_signed_direct_url_when_mode_allows():
+    cursor = FakeEmbyLinkCursor('cached-id')
+    requested_modes = []
+    handlers = ApiHandlers(replace(
+        make_emby_link_handlers(cursor, lambda *args, **kwargs: None).dependencies,
+        get_emby_playback_mode=lambda requested_mode=None: requested_modes.append(requested_mode) or 'direct',
+        sign_emby_direct_url=lambda item_id: f'/emby/direct/{item_id}?expires=1&signature=abc'
+    ))
+
+    with app_module.app.test_request_context('/api'):
+        response, status = unpack_response(handlers.resolve_movie_emby_playback_handler({
+            'title': 'Demo',
+            'playback_mode': 'auto'
+        }))
+
+    playback = response.get_json()['data']['playback']
+    assert status == 200
+    assert playback['mode'] == 'direct'
+    assert playback['streamUrl'] == '/emby/direct/cached-id?expires=1&signature=abc'
+    assert requested_modes == ['auto']
+
+
+def test_emby_playback_mode_defaults_to_proxy_stream_url():
+    with app_module.app.test_request_context('/api', environ_base={'REMOTE_ADDR': '192.168.1.5'}):
+        payload = app_module._api_handlers.emby_playback_payload('item 1', 'Demo')
+
+    assert app_module.EMBY_PLAYBACK_MODE == 'proxy'
+    assert payload == {
+        'id': 'item 1',
+        'name': 'Demo',
+        'mode': 'proxy',
+        'streamUrl': '/emby/stream/item%201'
+    }
+
+
 def test_resolve_movie_emby_refresh_keeps_valid_cached_link():
     cursor = FakeEmbyLinkCursor('cached-id')
     item_response = FakeEmbyResponse({'Id': 'cached-id', 'Name': 'Demo', 'Type': 'Movie'})
@@ -300,6 +345,7 @@ def make_png_bytes():
 
 
 def allow_public_external_image_host(monkeypatch):
+    monkeypatch.setattr(integrations_module, 'EXTERNAL_IMAGE_DNS_CACHE', {})
     monkeypatch.setattr(
         integrations_module.socket,
         'getaddrinfo',
@@ -312,7 +358,7 @@ def allow_public_external_image_host(monkeypatch):
 def test_fetch_external_image_wrapper_rejects_unsafe_urls(monkeypatch):
     monkeypatch.setenv('APP_ACCESS_TOKEN', '')
     calls = []
-    monkeypatch.setattr(app_module.requests, 'get', lambda *args, **kwargs: calls.append((args, kwargs)))
+    monkeypatch.setattr(app_module.EXTERNAL_IMAGE_SESSION, 'get', lambda *args, **kwargs: calls.append((args, kwargs)))
 
     unsafe_urls = [
         'http://cdn.example/image.jpg',
@@ -337,7 +383,7 @@ def test_fetch_external_image_wrapper_rejects_non_image_and_oversize(monkeypatch
         b'<html></html>',
         headers={'Content-Type': 'text/html', 'Content-Length': '13'}
     )
-    monkeypatch.setattr(app_module.requests, 'get', lambda *args, **kwargs: non_image)
+    monkeypatch.setattr(app_module.EXTERNAL_IMAGE_SESSION, 'get', lambda *args, **kwargs: non_image)
     with app_module.app.test_request_context('/api'):
         response, status = unpack_response(app_module.fetch_external_image_handler({'url': 'https://cdn.example/page'}, 'POST'))
     assert status == 400
@@ -351,7 +397,7 @@ def test_fetch_external_image_wrapper_rejects_non_image_and_oversize(monkeypatch
             'Content-Length': str(app_module.MAX_IMAGE_UPLOAD_BYTES + 1)
         }
     )
-    monkeypatch.setattr(app_module.requests, 'get', lambda *args, **kwargs: oversize)
+    monkeypatch.setattr(app_module.EXTERNAL_IMAGE_SESSION, 'get', lambda *args, **kwargs: oversize)
     with app_module.app.test_request_context('/api'):
         response, status = unpack_response(app_module.fetch_external_image_handler({'url': 'https://cdn.example/large.jpg'}, 'POST'))
     assert status == 413
@@ -374,7 +420,7 @@ def test_fetch_external_image_wrapper_returns_jpeg_data_url(monkeypatch):
         captured['kwargs'] = kwargs
         return external_response
 
-    monkeypatch.setattr(app_module.requests, 'get', fake_get)
+    monkeypatch.setattr(app_module.EXTERNAL_IMAGE_SESSION, 'get', fake_get)
 
     with app_module.app.test_request_context('/api'):
         response, status = unpack_response(app_module.fetch_external_image_handler({'url': 'https://cdn.example/covers/demo.png'}, 'POST'))
@@ -385,15 +431,189 @@ def test_fetch_external_image_wrapper_returns_jpeg_data_url(monkeypatch):
     assert payload['data_url'].startswith('data:image/jpeg;base64,')
     assert payload['filename'] == 'demo.jpg'
     assert payload['content_type'] == 'image/jpeg'
-    assert captured['args'] == ('https://cdn.example/covers/demo.png',)
+    assert captured['args'] == ('https://93.184.216.34/covers/demo.png',)
+    assert captured['kwargs']['headers']['Host'] == 'cdn.example'
     assert captured['kwargs']['allow_redirects'] is False
     assert captured['kwargs']['stream'] is True
     assert external_response.closed is True
 
 
+class CountingExternalImageResponse(FakeExternalImageResponse):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunks_read = 0
+
+    def iter_content(self, chunk_size):
+        for chunk in super().iter_content(chunk_size):
+            self.chunks_read += 1
+            yield chunk
+
+
+def test_external_image_decode_rejects_huge_dimensions_from_header(monkeypatch):
+    header_source = io.BytesIO()
+    Image.new('L', (2000, 2000)).save(header_source, format='PNG')
+    body = header_source.getvalue() + b'\0' * (integrations_module.EXTERNAL_IMAGE_CHUNK_BYTES * 8)
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000 * 1000)
+    response = CountingExternalImageResponse(body, headers={'Content-Type': 'image/png'})
+
+    image, status, message = app_module._api_handlers.decode_external_image_response(response, len(body))
+
+    assert image is None
+    assert status == 413
+    assert message == 'External image dimensions are too large'
+    assert response.chunks_read == 1
+
+
+def test_external_image_decode_rejects_invalid_data_and_decodes_valid_png():
+    handlers = app_module._api_handlers
+    garbage = FakeExternalImageResponse(b'not an image' * 100, headers={'Content-Type': 'image/png'})
+
+    assert handlers.decode_external_image_response(garbage, 1024 * 1024) == (
+        None,
+        400,
+        'External image is invalid or unsupported'
+    )
+
+    body = make_png_bytes()
+    image, status, message = handlers.decode_external_image_response(
+        FakeExternalImageResponse(body, headers={'Content-Type': 'image/png'}),
+        len(body)
+    )
+    assert (status, message) == (None, None)
+    assert image.size == (4, 4)
+    variants = app_module.process_pil_image_variants(image)
+    assert variants['primary'].startswith(b'RIFF')
+    assert variants['cover'].startswith(b'RIFF')
+
+
+def test_fetch_external_images_batch_downloads_concurrently_and_stores_variants(monkeypatch, tmp_path):
+    allow_public_external_image_host(monkeypatch)
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    body = make_png_bytes()
+    image_urls = [f'https://cdn.example/shots/{index}.png' for index in range(3)]
+    all_requests_in_flight = threading.Barrier(len(image_urls), timeout=5)
+    responses = []
+
+    def fake_session_get(url, **kwargs):
+        all_requests_in_flight.wait()
+        response = FakeExternalImageResponse(body, headers={'Content-Type': 'image/png'})
+        responses.append(response)
+        return response
+
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        external_image_session_get=fake_session_get,
+        external_image_get=lambda *args, **kwargs: pytest.fail('batch import must use the pooled session')
+    ))
+
+    with app_module.app.test_request_context('/api'):
+        response, status = unpack_response(handlers.fetch_external_images_handler({
+            'urls': image_urls + ['https://192.168.0.10/private.png'],
+            'store': True
+        }))
+
+    payload = response.get_json()
+    assert status == 200
+    assert payload['imported'] == 3
+    assert [result['url'] for result in payload['results']] == image_urls + ['https://192.168.0.10/private.png']
+    assert payload['results'][-1] == {
+        'url': 'https://192.168.0.10/private.png',
+        'success': False,
+        'status': 400,
+        'message': 'Unsupported external image URL'
+    }
+    for result in payload['results'][:3]:
+        assert 'data_url' not in result
+        assert (tmp_path / result['filename']).is_file()
+        assert (tmp_path / result['filename'].replace('.webp', '.cover.webp')).is_file()
+    assert all(response.closed for response in responses)
+
+
+def test_fetch_external_images_batch_rejects_invalid_url_lists():
+    for payload in ({}, {'urls': []}, {'urls': 'https://cdn.example/a.png'}, {'urls': [1]}, {
+        'urls': ['https://cdn.example/a.png'] * (integrations_module.EXTERNAL_IMAGE_BATCH_LIMIT + 1)
+    }):
+        with app_module.app.test_request_context('/api'):
+            response, status = unpack_response(app_module.fetch_external_images_handler(payload, 'POST'))
+        assert status == 400
+        assert response.get_json()['success'] is False
+
+
+def test_external_image_host_check_caches_dns_and_still_rejects_private_addresses(monkeypatch):
+    monkeypatch.setattr(integrations_module, 'EXTERNAL_IMAGE_DNS_CACHE', {})
+    lookups = []
+
+    def fake_getaddrinfo(host, port, **kwargs):
+        lookups.append(host)
+        address = '10.0.0.8' if host == 'internal.example' else '93.184.216.34'
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port))]
+
+    monkeypatch.setattr(integrations_module.socket, 'getaddrinfo', fake_getaddrinfo)
+    handlers = app_module._api_handlers
+
+    assert handlers.external_image_host_is_public('cdn.example') is True
+    assert handlers.external_image_host_is_public('CDN.example') is True
+    assert handlers.external_image_host_is_public('internal.example') is False
+    assert handlers.external_image_host_is_public('internal.example') is False
+    assert lookups == ['cdn.example', 'internal.example']
+
+    monkeypatch.setattr(integrations_module, 'EXTERNAL_IMAGE_DNS_CACHE_SECONDS', 0)
+    assert handlers.external_image_host_is_public('cdn.example') is True
+    assert lookups[-1] == 'cdn.example'
+
+
+def test_external_image_download_connects_to_the_validated_address(monkeypatch):
+    monkeypatch.setattr(integrations_module, 'EXTERNAL_IMAGE_DNS_CACHE', {})
+    answers = iter(['93.184.216.34', '10.0.0.8'])
+    monkeypatch.setattr(
+        integrations_module.socket,
+        'getaddrinfo',
+        lambda host, port, **kwargs: [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (next(answers), port))]
+    )
+    body = make_png_bytes()
+    requested = []
+
+    def fake_session_get(url, **kwargs):
+        requested.append((url, kwargs['headers'].get('Host')))
+        return FakeExternalImageResponse(body, headers={'Content-Type': 'image/png'})
+
+    handlers = app_module._api_handlers
+    for _ in range(2):
+        _, image, status, _ = handlers.download_external_image(
+            'https://rebind.example/shot.png',
+            len(body) * 2,
+            fake_session_get
+        )
+        assert status is None and image.size == (4, 4)
+
+    # The second call is served from the DNS cache, and both connect to the
+    # address that passed the check instead of resolving the name again.
+    assert requested == [('https://93.184.216.34/shot.png', 'rebind.example')] * 2
+
+
+def test_pinned_host_adapter_uses_host_header_for_sni_and_certificate_check():
+    adapter = PinnedHostAdapter()
+    pinned = requests.Request(
+        'GET',
+        pinned_url(urlsplit('https://cdn.example/a.png'), '2001:db8::1'),
+        headers={'Host': 'cdn.example'}
+    ).prepare()
+    plain = requests.Request('GET', 'https://cdn.example/a.png').prepare()
+
+    host_params, pool_kwargs = adapter.build_connection_pool_key_attributes(pinned, True)
+    assert pinned.url == 'https://[2001:db8::1]/a.png'
+    assert host_params['host'] == '2001:db8::1'
+    assert pool_kwargs['server_hostname'] == 'cdn.example'
+    assert pool_kwargs['assert_hostname'] == 'cdn.example'
+
+    _, pool_kwargs = adapter.build_connection_pool_key_attributes(plain, True)
+    assert 'server_hostname' not in pool_kwargs
+    assert 'assert_hostname' not in pool_kwargs
+
+
 def test_check_wtl_status_wrapper_pings_homepage_and_closes_response(monkeypatch):
     monkeypatch.setenv('APP_ACCESS_TOKEN', '')
-    integrations_module.WTL_STATUS_CACHE.clear()
+    app_module.WTL_STATUS_CACHE.clear()
     external_response = FakeWtlStatusResponse(200)
     captured = {}
 
@@ -422,7 +642,7 @@ def test_check_wtl_status_wrapper_pings_homepage_and_closes_response(monkeypatch
 
 def test_check_wtl_status_wrapper_caches_and_force_refreshes(monkeypatch):
     monkeypatch.setenv('APP_ACCESS_TOKEN', '')
-    integrations_module.WTL_STATUS_CACHE.clear()
+    app_module.WTL_STATUS_CACHE.clear()
     calls = []
 
     def fake_get(*args, **kwargs):
@@ -446,7 +666,7 @@ def test_check_wtl_status_wrapper_caches_and_force_refreshes(monkeypatch):
 
 def test_check_wtl_status_wrapper_reports_offline_for_5xx_and_exceptions(monkeypatch):
     monkeypatch.setenv('APP_ACCESS_TOKEN', '')
-    integrations_module.WTL_STATUS_CACHE.clear()
+    app_module.WTL_STATUS_CACHE.clear()
     server_error = FakeWtlStatusResponse(503)
     monkeypatch.setattr(app_module.requests, 'get', lambda *args, **kwargs: server_error)
 
@@ -460,7 +680,7 @@ def test_check_wtl_status_wrapper_reports_offline_for_5xx_and_exceptions(monkeyp
     assert payload['status_code'] == 503
     assert server_error.closed is True
 
-    integrations_module.WTL_STATUS_CACHE.clear()
+    app_module.WTL_STATUS_CACHE.clear()
 
     def raise_timeout(*args, **kwargs):
         raise TimeoutError('timeout')
@@ -485,6 +705,85 @@ def test_search_movies_wrapper_rejects_invalid_recommended_filter(monkeypatch):
     assert response.get_json()['message'] == 'Invalid recommended filter'
 
 
+class FakeSearchCursor:
+    def __init__(self, queries):
+        self.queries = queries
+        self.result = None
+
+    def execute(self, sql, params=None):
+        normalized = ' '.join(sql.split()).casefold()
+        self.queries.append(normalized)
+        if normalized.startswith('select count(*)'):
+            self.result = [{'total': 1}]
+        else:
+            self.result = [{'title': 'Demo', 'recommended': 1, 'review': '', 'added_date': None, 'emby_item_id': None}]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeSearchConnection(FakeEmbyLinkConnection):
+    def cursor(self, dictionary=False):
+        return self.cursor_value
+
+
+def test_search_movies_serves_repeated_queries_from_versioned_cache():
+    queries = []
+    version = [1]
+    cache = ResponseCache(max_entries=2)
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        get_db_connection=lambda: FakeSearchConnection(FakeSearchCursor(queries)),
+        hydrate_movie_rows=lambda cursor, movies: movies,
+        resolve_tag_ids=lambda cursor, names: list(range(len(names))),
+        search_response_cache=cache,
+        get_search_data_version=lambda: version[0]
+    ))
+
+    with app_module.app.test_request_context('/api'):
+        first, _ = unpack_response(handlers.search_movies_handler({'tags': 'B,A', 'page': '1'}, 'GET'))
+        cached, _ = unpack_response(handlers.search_movies_handler({'tags': 'A, B', 'page': 1}, 'GET'))
+        query_count = len(queries)
+        handlers.search_movies_handler({'recommended': 'bad'}, 'GET')
+        version[0] = 2
+        refreshed, _ = unpack_response(handlers.search_movies_handler({'tags': 'A,B'}, 'GET'))
+
+    assert first.get_json()['data'][0]['title'] == 'Demo'
+    assert cached.get_data() == first.get_data()
+    assert cached.mimetype == 'application/json'
+    assert query_count == 2
+    assert len(queries) == 4
+    assert refreshed.get_json() == first.get_json()
+    assert cache.stats() == {
+        'entries': 1,
+        'size_bytes': len(first.get_data()),
+        'max_entries': 2,
+        'max_bytes': 32 * 1024 * 1024,
+        'hits': 1,
+        'misses': 3,
+        'hit_ratio': 0.25,
+        'evictions': 0,
+        'invalidations': 1
+    }
+
+
+def test_response_cache_evicts_least_recently_used_within_memory_cap():
+    cache = ResponseCache(max_entries=10, max_bytes=10)
+    cache.put('a', 1, b'1234')
+    cache.put('b', 1, b'1234')
+    assert cache.get('a', 1) == b'1234'
+    cache.put('c', 1, b'1234')
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == b'1234'
+    assert cache.put('huge', 1, b'x' * 11) is False
+    assert cache.stats()['size_bytes'] == 8
+    assert cache.stats()['evictions'] == 1
+
+
 def test_video_files_wrapper_rejects_traversal_path():
     with app_module.app.test_request_context('/api'):
         response, status = unpack_response(app_module.list_video_files_handler({'path': '../bad'}, 'POST'))
@@ -560,3 +859,300 @@ def test_backup_create_wrapper_requires_enabled_backup_feature(monkeypatch):
 
     assert status == 403
     assert response.get_json()['success'] is False
+
+
+def test_backup_restore_dry_run_reports_differential_changes_without_restoring(monkeypatch):
+    restores = []
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        backup_feature_enabled=lambda: True,
+        get_backup_file_path=lambda filename, must_exist=False: f'/backups/{filename}',
+        preview_backup_restore=lambda filename: {'mode': 'differential', 'write_count': 3},
+        run_backup_restore=lambda *args, **kwargs: restores.append((args, kwargs))
+    ))
+    payload = {'filename': 'movies_20260101_000000.full.tar.gz', 'mode': 'differential', 'dry_run': True}
+
+    with app_module.app.test_request_context('/api'):
+        response = handlers.restore_db_backup_handler(payload, 'POST')
+
+    assert response.get_json() == {
+        'success': True,
+        'dry_run': True,
+        'image_changes': {'mode': 'differential', 'write_count': 3}
+    }
+    assert restores == []
+
+
+def test_verify_backup_handler_reports_verification_result():
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        backup_feature_enabled=lambda: True,
+        db_maintenance_lock=threading.Lock(),
+        get_backup_file_path=lambda filename, must_exist=False: f'/backups/{filename}',
+        verify_backup=lambda filename: {'filename': filename, 'ok': False, 'errors': ['Database dump is corrupt']}
+    ))
+
+    with app_module.app.test_request_context('/api'):
+        response, status = handlers.verify_db_backup_handler({'filename': 'movies_20260101_000000.full.tar.gz'}, 'POST')
+        invalid_response, invalid_status = handlers.verify_db_backup_handler({'filename': '../x.tar.gz'}, 'POST')
+
+    assert status == 200
+    assert response.get_json()['message'] == '备份校验未通过'
+    assert response.get_json()['verification']['errors'] == ['Database dump is corrupt']
+    assert invalid_status == 400
+
+
+def test_check_wtl_status_cache_is_shared_between_workers(monkeypatch, tmp_path):
+    path = str(tmp_path / 'shared-state.sqlite3')
+    calls = []
+
+    def fake_get(*args, **kwargs):
+        response = FakeWtlStatusResponse(200)
+        calls.append(response)
+        return response
+
+    def make_worker_handlers():
+        state = SQLiteSharedState(path)
+        return ApiHandlers(replace(
+            app_module._api_handlers.dependencies,
+            external_image_get=fake_get,
+            wtl_status_cache=state.namespace('wtl_status'),
+            wtl_status_lock=state.lock('wtl_status')
+        ))
+
+    first_worker = make_worker_handlers()
+    second_worker = make_worker_handlers()
+
+    with app_module.app.test_request_context('/api'):
+        first_response, _ = unpack_response(first_worker.check_wtl_status_handler({}, 'GET'))
+        second_response, _ = unpack_response(second_worker.check_wtl_status_handler({}, 'GET'))
+
+    assert first_response.get_json()['cached'] is False
+    assert second_response.get_json()['cached'] is True
+    assert second_response.get_json()['online'] is True
+    assert len(calls) == 1
+
+
+def test_check_wtl_status_runs_one_probe_for_concurrent_cache_misses(monkeypatch):
+    calls = []
+    probe_started = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        calls.append(args)
+        probe_started.set()
+        time.sleep(0.3)
+        return FakeWtlStatusResponse(200)
+
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        external_image_get=slow_get,
+        wtl_status_cache={},
+        wtl_status_lock=threading.Lock()
+    ))
+    payloads = []
+
+    def check():
+        with app_module.app.test_request_context('/api'):
+            payloads.append(unpack_response(handlers.check_wtl_status_handler({}, 'GET'))[0].get_json())
+
+    threads = [threading.Thread(target=check) for _ in range(4)]
+    threads[0].start()
+    assert probe_started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(payload['cached'] for payload in payloads) == [False, True, True, True]
+    assert all(payload['online'] is True for payload in payloads)
+
+
+def wait_for_maintenance_job(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_async_backup_runs_as_job_with_progress_and_releases_lock():
+    lock = threading.Lock()
+    jobs = MaintenanceJobManager(lock, app_module.logger)
+    release_backup = threading.Event()
+
+    def run_database_backup(incremental=False, prefix=''):
+        report_maintenance_progress(stage='images', files_total=2)
+        report_maintenance_progress(add_files=1, add_bytes=1024)
+        release_backup.wait(5)
+        return {'filename': 'movies_20260101_000000.full.tar.gz', 'type': 'full'}
+
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        backup_feature_enabled=lambda: True,
+        db_maintenance_lock=lock,
+        maintenance_jobs=jobs,
+        run_database_backup=run_database_backup,
+        list_database_backups=lambda: []
+    ))
+
+    with app_module.app.test_request_context('/api'):
+        response, status = unpack_response(handlers.create_db_backup_handler({'async': True}, 'POST'))
+        job_id = response.get_json()['job']['id']
+        busy_response, busy_status = unpack_response(handlers.create_db_backup_handler({}, 'POST'))
+        job = jobs.get(job_id)
+        while job.progress['files_done'] < 1:
+            time.sleep(0.01)
+        running = handlers.get_maintenance_job_handler({'job_id': job_id}, 'GET').get_json()['job']
+        release_backup.set()
+        wait_for_maintenance_job(job)
+        finished = handlers.get_maintenance_job_handler({}, 'GET').get_json()
+
+    assert status == 202
+    assert busy_status == 409
+    assert running['status'] == 'running'
+    assert running['progress'] == {'files_done': 1, 'files_total': 2, 'bytes_done': 1024}
+    assert finished['job'] is None
+    assert finished['jobs'][0]['status'] == 'succeeded'
+    assert finished['jobs'][0]['result']['backup']['filename'] == 'movies_20260101_000000.full.tar.gz'
+    assert not lock.locked()
+
+
+def test_maintenance_job_cancellation_stops_at_next_checkpoint_until_database_restore():
+    lock = threading.Lock()
+    jobs = MaintenanceJobManager(lock, app_module.logger)
+    reached = threading.Event()
+    proceed = threading.Event()
+
+    def cancellable_work():
+        reached.set()
+        proceed.wait(5)
+        report_maintenance_progress(stage='images')
+        return {'success': True}
+
+    job = jobs.start('backup', cancellable_work)
+    reached.wait(5)
+    assert jobs.cancel(job.id) is True
+    proceed.set()
+    wait_for_maintenance_job(job)
+    assert job.status == 'cancelled'
+
+    reached.clear()
+    proceed.clear()
+
+    def restore_work():
+        report_maintenance_progress(stage='database', cancellable=False)
+        reached.set()
+        proceed.wait(5)
+        report_maintenance_progress(add_bytes=10)
+        return {'success': True}
+
+    job = jobs.start('restore', restore_work)
+    reached.wait(5)
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        backup_feature_enabled=lambda: True,
+        maintenance_jobs=jobs
+    ))
+    with app_module.app.test_request_context('/api'):
+        _, cancel_status = unpack_response(handlers.cancel_maintenance_job_handler({'job_id': job.id}, 'POST'))
+    proceed.set()
+    wait_for_maintenance_job(job)
+
+    assert cancel_status == 409
+    assert job.status == 'succeeded'
+    assert not lock.locked()
+
+
+def test_maintenance_jobs_are_visible_and_cancellable_from_another_worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(maintenance_jobs_module, 'MAINTENANCE_JOB_PUBLISH_INTERVAL_SECONDS', 0)
+    path = str(tmp_path / 'shared-state.sqlite3')
+
+    def make_worker_jobs():
+        state = SQLiteSharedState(path)
+        return MaintenanceJobManager(
+            threading.Lock(),
+            app_module.logger,
+            state=state.namespace('maintenance_jobs'),
+            state_lock=state.lock('maintenance_jobs')
+        )
+
+    first_worker = make_worker_jobs()
+    second_worker = make_worker_jobs()
+    reached = threading.Event()
+    proceed = threading.Event()
+
+    def backup_work():
+        report_maintenance_progress(stage='images', files_total=3)
+        reached.set()
+        proceed.wait(5)
+        report_maintenance_progress(add_files=1)
+        return {'success': True}
+
+    job = first_worker.start('backup', backup_work)
+    assert reached.wait(5)
+    polled = second_worker.get(job.id).to_dict()
+
+    assert polled['status'] == 'running'
+    assert polled['progress']['files_total'] == 3
+    assert second_worker.active_job().id == job.id
+    assert second_worker.start('restore', lambda: {'success': True}) is None
+    assert second_worker.cancel(job.id) is True
+
+    proceed.set()
+    wait_for_maintenance_job(job)
+
+    assert job.status == 'cancelled'
+    assert second_worker.get(job.id).to_dict()['status'] == 'cancelled'
+    assert second_worker.active_job() is None
+
+
+def test_maintenance_job_left_running_by_an_exited_worker_is_reported_failed(monkeypatch):
+    jobs = MaintenanceJobManager(threading.Lock(), app_module.logger)
+    jobs.store.state['orphan'] = {
+        'id': 'orphan',
+        'kind': 'restore',
+        'params': {},
+        'status': 'running',
+        'cancellable': True,
+        'created_at': time.time() - 600,
+        'updated_at': time.time() - maintenance_jobs_module.MAINTENANCE_JOB_STALE_SECONDS - 1
+    }
+
+    orphan = jobs.get('orphan').to_dict()
+
+    assert orphan['status'] == 'failed'
+    assert orphan['cancellable'] is False
+    assert jobs.active_job() is None
+    assert jobs.cancel('orphan') is False
+    job = jobs.start('backup', lambda: {'success': True})
+    assert job is not None
+    wait_for_maintenance_job(job)
+
+
+def test_list_request_profiles_handler_lists_and_reads_profiles():
+    reads = []
+
+    def list_request_profiles(filename=None):
+        reads.append(filename)
+        if filename == 'bad':
+            raise ValueError('Invalid profile filename')
+        if filename:
+            return 'app.py:api_handler 2\n'
+        return [{'filename': 'a.folded', 'size': 22, 'created_at': '2026-01-01T00:00:00+00:00'}]
+
+    handlers = ApiHandlers(replace(
+        app_module._api_handlers.dependencies,
+        backup_feature_enabled=lambda: True,
+        list_request_profiles=list_request_profiles,
+        get_request_profiling_status=lambda: {'token_enabled': True, 'sample_rate': 0}
+    ))
+    with app_module.app.test_request_context('/api'):
+        listing, _ = unpack_response(handlers.list_request_profiles_handler({}, 'GET'))
+        profile, _ = unpack_response(handlers.list_request_profiles_handler({'filename': 'a.folded'}, 'GET'))
+        _, invalid_status = unpack_response(handlers.list_request_profiles_handler({'filename': 'bad'}, 'GET'))
+
+    assert listing.get_json()['profiles'][0]['filename'] == 'a.folded'
+    assert listing.get_json()['profiling']['token_enabled'] is True
+    assert profile.get_json()['content'] == 'app.py:api_handler 2\n'
+    assert invalid_status == 400
+    assert reads == [None, 'a.folded', 'bad']
@@ -1,4 +1,9 @@
-from video_collection.emby import EmbyClient
+from video_collection.emby import (
+    EmbyClient,
+    normalize_emby_playback_mode,
+    parse_network_list,
+    resolve_emby_playback_mode,
+)
 
 
 class FakeResponse:
@@ -74,3 +79,35 @@ def test_emby_client_refreshes_token_once_after_401():
     assert fake_requests.request_calls[1]['headers']['X-Emby-Token'] == 'token-2'
     assert fake_requests.request_calls[1]['headers']['X-Test'] == 'yes'
     assert client.token_cache == {'access_token': 'token-2', 'user_id': 'user-2'}
+
+
+def test_emby_client_builds_tokenized_direct_stream_url():
+    fake_requests = FakeRequests()
+    client = EmbyClient(
+        environ={
+            'EMBY_SERVER_URL': 'http://emby.local/',
+            'EMBY_USERNAME': 'demo',
+            'EMBY_PASSWORD': 'secret'
+        },
+        requests_module=fake_requests
+    )
+
+    url = client.build_stream_url('item/1')
+
+    assert url == 'http://emby.local/emby/Videos/item%2F1/stream?Static=true&api_key=token-1'
+    assert len(fake_requests.post_calls) == 1
+
+
+def test_emby_playback_mode_only_goes_direct_for_allowed_clients():
+    networks = parse_network_list('10.0.0.0/8, not-a-network, 192.168.1.0/24')
+
+    assert normalize_emby_playback_mode('DIRECT') == 'direct'
+    assert normalize_emby_playback_mode('unknown') == 'proxy'
+    assert resolve_emby_playback_mode('proxy', '192.168.1.5') == 'proxy'
+    assert resolve_emby_playback_mode('direct', '203.0.113.7') == 'direct'
+    assert resolve_emby_playback_mode('direct', '192.168.1.5', requested_mode='proxy') == 'proxy'
+    assert resolve_emby_playback_mode('auto', '192.168.1.5') == 'direct'
+    assert resolve_emby_playback_mode('auto', '8.8.8.8') == 'proxy'
+    assert resolve_emby_playback_mode('auto', '192.168.1.5', networks) == 'direct'
+    assert resolve_emby_playback_mode('auto', '172.16.0.5', networks) == 'proxy'
+    assert resolve_emby_playback_mode('auto', None) == 'proxy'
@@ -537,8 +537,10 @@ def test_edit_movie_save_tracks_actual_content_changes():
 
 def test_wtl_screenshot_import_uses_safe_api_event():
     content = (FRONTEND_SOURCE_DIR / "20-tools" / "30-wtl-search-results.js").read_text(encoding="utf-8")
-    assert "event_map.fetch_external_image" in content
-    assert "wtlDataUrlToFile" in content
+    assert "event_map.fetch_external_images" in content
+    assert "store: true" in content
+    assert "data_url" not in content
+    assert "createStoredUploadImage(item.filename)" in content
     assert "addSelectedWtlScreenshotsToUploadArea" in content
     assert "startWtlScreenshotDrag" in content
     assert "currentDraggedThumbnailFilesPromise" in content
@@ -552,6 +554,17 @@ def test_upload_area_accepts_async_dragged_files():
     assert "await window.currentDraggedThumbnailFilesPromise" in content
 
 
+def test_server_stored_upload_images_are_not_uploaded_again():
+    upload = (FRONTEND_SOURCE_DIR / "70-images" / "00-upload.js").read_text(encoding="utf-8")
+    add_submit = (FRONTEND_SOURCE_DIR / "70-images" / "20-viewer-navigation.js").read_text(encoding="utf-8")
+    edit_submit = (FRONTEND_SOURCE_DIR / "50-movies" / "13-edit-update-submit.js").read_text(encoding="utf-8")
+
+    assert "function createStoredUploadImage(filename)" in upload
+    assert "buildImageUrl(file.storedFilename, 'cover')" in upload
+    assert "uploadedFiles.push(file.storedFilename)" in add_submit
+    assert "return { success: true, filename: file.storedFilename }" in edit_submit
+
+
 def test_wtl_screenshot_actions_share_thumbnail_button_tokens():
     content = (STYLE_SOURCE_DIR / "10-services-tools.css").read_text(encoding="utf-8")
     assert "#wtlModal .wtl-screenshot-action" in content
@@ -957,3 +970,21 @@ def test_user_facing_messages_are_normalized_to_simplified_chinese():
     assert 'aria-label="应用标志"' in template
     assert 'aria-label="最小化窗口"' in template
     assert 'aria-label="关闭窗口"' in template
+
+
+def test_api_handler_coalesces_same_tick_calls_into_a_batch():
+    api_handler = (Path(__file__).resolve().parents[1] / "src" / "handlers" / "apiHandler.js").read_text(encoding="utf-8")
+
+    assert "setTimeout(flushApiCalls, 0)" in api_handler
+    assert "b: calls.map((call, index) => (" in api_handler
+    assert "result.results[index]" in api_handler
+    assert "API_BATCH_MAX_EVENTS = 20" in api_handler
+
+
+def test_api_handler_revalidates_cached_responses_with_etags():
+    api_handler = (Path(__file__).resolve().parents[1] / "src" / "handlers" / "apiHandler.js").read_text(encoding="utf-8")
+
+    assert "'If-None-Match': etag" in api_handler
+    assert "response.status === 304" in api_handler
+    assert "v: cachedResponses[index].etag" in api_handler
+    assert "structuredClone(cached.body)" in api_handler
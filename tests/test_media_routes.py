@@ -1,8 +1,25 @@
 import app as app_module
 from PIL import Image
+import hashlib
 import io
+import json
 import os
+import re
 import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+from video_collection.emby import EmbyClient
+from video_collection.stream_proxy import StreamProxyEngine
+from video_collection.videos import parse_byte_range
+
+
+STANDIN_VIDEO_BYTES = bytes(range(256)) * 4096 * 8
 
 
 def assert_shared_image_mode(path):
@@ -26,6 +43,88 @@ class FakeUpstream:
         self.closed = True
 
 
+class EndlessUpstream:
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.closed = False
+        self.chunk_sizes = []
+
+    def iter_content(self, chunk_size):
+        sent = 0
+        while not self.closed:
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise ConnectionError('upstream reset')
+            self.chunk_sizes.append(chunk_size)
+            sent += 1
+            yield b'x' * chunk_size
+
+    def close(self):
+        self.closed = True
+
+
+class EmbyStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    stream_path_pattern = re.compile(r'^/emby/Videos/([^/]+)/stream$')
+
+    def log_message(self, format, *args):
+        return
+
+    def do_POST(self):
+        if self.path != '/emby/Users/AuthenticateByName':
+            self.send_error(404)
+            return
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        body = json.dumps({'AccessToken': 'standin-token', 'User': {'Id': 'standin-user'}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self.stream_path_pattern.match(self.path.split('?', 1)[0]):
+            self.send_error(404)
+            return
+        file_size = len(STANDIN_VIDEO_BYTES)
+        byte_range = parse_byte_range(self.headers.get('Range'), file_size)
+        start, end = byte_range or (0, file_size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{file_size}')
+        self.end_headers()
+        view = memoryview(STANDIN_VIDEO_BYTES)[start:end + 1]
+        try:
+            for offset in range(0, len(view), 256 * 1024):
+                self.wfile.write(view[offset:offset + 256 * 1024])
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+@pytest.fixture
+def emby_standin(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EmbyStandInHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = EmbyClient(
+        environ={
+            'EMBY_SERVER_URL': f'http://127.0.0.1:{server.server_address[1]}',
+            'EMBY_USERNAME': 'demo',
+            'EMBY_PASSWORD': 'secret'
+        },
+        requests_module=requests
+    )
+    monkeypatch.setattr(app_module, 'emby_request', client.request)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 def make_client():
     app_module.app.config.update(TESTING=True)
     return app_module.app.test_client()
@@ -48,6 +147,59 @@ def test_image_route_serves_valid_file_and_rejects_unsafe_path(monkeypatch, tmp_
     assert client.get('/images/cover.webp?variant=unknown').status_code == 404
 
 
+def test_hashed_static_asset_route_serves_precompressed_siblings(monkeypatch, tmp_path):
+    dist_dir = tmp_path / 'dist'
+    dist_dir.mkdir()
+    (dist_dir / 'main.min.abc123.js').write_bytes(b'console.log(1);' * 100)
+    (dist_dir / 'main.min.abc123.js.br').write_bytes(b'brotli-bytes')
+    (dist_dir / 'main.min.abc123.js.gz').write_bytes(b'gzip-bytes')
+    monkeypatch.setattr(app_module.app, 'static_folder', str(tmp_path))
+    client = make_client()
+
+    brotli_response = client.get('/static/dist/main.min.abc123.js', headers={'Accept-Encoding': 'gzip, br'})
+    gzip_response = client.get('/static/dist/main.min.abc123.js', headers={'Accept-Encoding': 'gzip'})
+    plain_response = client.get('/static/dist/main.min.abc123.js', headers={'Accept-Encoding': 'identity'})
+
+    assert brotli_response.headers['Content-Encoding'] == 'br'
+    assert brotli_response.data == b'brotli-bytes'
+    assert brotli_response.mimetype == 'text/javascript'
+    assert brotli_response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Accept-Encoding' in brotli_response.headers['Vary']
+    assert gzip_response.headers['Content-Encoding'] == 'gzip'
+    assert gzip_response.data == b'gzip-bytes'
+    assert 'Content-Encoding' not in plain_response.headers
+    assert plain_response.data == b'console.log(1);' * 100
+    assert client.get('/static/dist/../main.js').status_code == 404
+    assert client.get('/static/dist/missing.js').status_code == 404
+
+
+def test_index_links_content_hashed_assets_from_manifest(monkeypatch, tmp_path):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    (tmp_path / 'dist').mkdir()
+    (tmp_path / 'dist' / 'manifest.json').write_text(json.dumps({'main.min.js': 'dist/main.min.abc123.js'}))
+    monkeypatch.setattr(app_module, 'STATIC_ASSET_MANIFEST', app_module.StaticAssetManifest(str(tmp_path)))
+
+    html = make_client().get('/').get_data(as_text=True)
+
+    assert '<script src="/static/dist/main.min.abc123.js"></script>' in html
+    assert 'href="/static/styles.min.css"' in html
+
+
+def test_committed_asset_manifest_points_at_built_files():
+    static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    with open(os.path.join(static_dir, 'dist', 'manifest.json'), encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    assert set(manifest) == {'main.min.js', 'styles.min.css', 'vendor/bulma.min.css'}
+    for asset, target in manifest.items():
+        for suffix in ('', '.br', '.gz'):
+            assert os.path.isfile(os.path.join(static_dir, target + suffix))
+        # 哈希文件需由当前的构建产物生成，否则旧代码会以 immutable 缓存下发
+        with open(os.path.join(static_dir, asset), 'rb') as source_file:
+            digest = hashlib.sha256(source_file.read()).hexdigest()[:12]
+        assert target.endswith(f'.{digest}{os.path.splitext(asset)[1]}')
+
+
 def test_image_cover_variant_is_generated_on_demand_and_cached(monkeypatch, tmp_path):
     image_dir = tmp_path / 'images'
     image_dir.mkdir()
@@ -158,3 +310,115 @@ def test_service_redirect_accepts_known_service_and_rejects_unknown_or_traversal
     assert response.headers['Location'] == 'http://jackett.local/base/UI/Dashboard'
     assert client.get('/services/missing?path=/UI/Dashboard').status_code == 404
     assert client.get('/services/jackett?path=../secret').status_code == 404
+
+
+def test_stream_proxy_closes_upstream_promptly_when_client_disconnects():
+    for readahead_chunks in (0, 2):
+        engine = StreamProxyEngine(chunk_bytes=1024, readahead_chunks=readahead_chunks)
+        upstream = EndlessUpstream()
+
+        generator = engine.stream(upstream, 'disconnect')
+        assert next(generator) == b'x' * 1024
+        generator.close()
+
+        assert upstream.closed is True
+        assert set(upstream.chunk_sizes) == {1024}
+        assert engine.active_streams() == []
+        assert engine.totals()['disconnected'] == 1
+        assert engine.recent_streams()[-1]['bytes'] == 1024
+        assert engine.recent_streams()[-1]['ttfb_ms'] is not None
+
+
+def test_stream_proxy_reraises_upstream_failure_after_recording_it():
+    for readahead_chunks in (0, 4):
+        engine = StreamProxyEngine(chunk_bytes=16, readahead_chunks=readahead_chunks)
+        upstream = EndlessUpstream(fail_after=3)
+        received = []
+
+        # 响应头已承诺长度，必须让服务器中断连接而不是返回被截断的正文
+        with pytest.raises(ConnectionError, match='upstream reset'):
+            for chunk in engine.stream(upstream, 'failure'):
+                received.append(chunk)
+
+        assert b''.join(received) == b'x' * 48
+        assert upstream.closed is True
+        assert engine.active_streams() == []
+        assert engine.totals()['failed'] == 1
+        assert engine.recent_streams()[-1]['status'] == 'failed'
+
+
+def test_emby_stream_sustained_throughput_against_standin_server(emby_standin, record_property):
+    client = make_client()
+
+    response = client.get('/emby/stream/item-1')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == str(len(STANDIN_VIDEO_BYTES))
+    assert response.data == STANDIN_VIDEO_BYTES
+    stats = app_module.emby_stream_proxy.recent_streams()[-1]
+    assert stats['label'] == 'emby:item-1'
+    assert stats['status'] == 'completed'
+    assert stats['bytes'] == len(STANDIN_VIDEO_BYTES)
+    assert stats['throughput_bytes_per_second'] > 0
+    record_property('emby_stream_throughput_bytes_per_second', stats['throughput_bytes_per_second'])
+
+
+def test_emby_stream_seek_time_to_first_byte_against_standin_server(emby_standin, record_property):
+    client = make_client()
+    file_size = len(STANDIN_VIDEO_BYTES)
+    seek_ttfb_ms = []
+
+    for start in (0, file_size // 3, file_size - 4096):
+        end = min(start + 256 * 1024, file_size) - 1
+        response = client.get('/emby/stream/item-1', headers={'Range': f'bytes={start}-{end}'})
+
+        assert response.status_code == 206
+        assert response.headers['Content-Range'] == f'bytes {start}-{end}/{file_size}'
+        assert response.data == STANDIN_VIDEO_BYTES[start:end + 1]
+        stats = app_module.emby_stream_proxy.recent_streams()[-1]
+        assert stats['status'] == 'completed'
+        seek_ttfb_ms.append(stats['ttfb_ms'])
+
+    assert all(value is not None for value in seek_ttfb_ms)
+    record_property('emby_stream_seek_ttfb_ms', seek_ttfb_ms)
+
+
+def test_emby_direct_route_redirects_only_with_valid_unexpired_signature(monkeypatch):
+    monkeypatch.setattr(app_module.emby_client, 'build_stream_url', lambda item_id: f'http://emby.local/{item_id}?api_key=t')
+    client = make_client()
+
+    signed_url = app_module.sign_emby_direct_url('item-1')
+    response = client.get(signed_url)
+
+    assert response.status_code == 302
+    assert response.headers['Location'] == 'http://emby.local/item-1?api_key=t'
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert client.get(signed_url.replace('item-1', 'item-2')).status_code == 403
+    assert client.get('/emby/direct/item-1?expires=9999999999&signature=bad').status_code == 403
+
+    expired_url = app_module.sign_emby_direct_url('item-1', now=time.time() - 2 * app_module.EMBY_DIRECT_PLAY_TTL_SECONDS)
+    assert client.get(expired_url).status_code == 403
+
+
+def test_emby_direct_play_redirects_without_proxying_bytes(emby_standin, monkeypatch):
+    standin_url = f'http://127.0.0.1:{emby_standin.server_address[1]}'
+    engine = StreamProxyEngine(readahead_chunks=0)
+    monkeypatch.setattr(app_module, 'emby_stream_proxy', engine)
+    monkeypatch.setattr(app_module.emby_client, 'build_stream_url', lambda item_id: f'{standin_url}/emby/Videos/{item_id}/stream')
+    client = make_client()
+
+    proxied = client.get('/emby/stream/item-1')
+    assert proxied.status_code == 200
+    assert proxied.data == STANDIN_VIDEO_BYTES
+    assert engine.totals()['streams'] == 1
+
+    now = time.time()
+    signed_url = app_module.sign_emby_direct_url('item-1', now=now)
+    expires_at = int(parse_qs(urlsplit(signed_url).query)['expires'][0])
+    direct = client.get(signed_url)
+
+    # 直连只返回跳转，视频字节不经过应用
+    assert direct.status_code == 302
+    assert direct.headers['Location'] == f'{standin_url}/emby/Videos/item-1/stream'
+    assert engine.totals()['streams'] == 1
+    assert expires_at == int(now + app_module.EMBY_DIRECT_PLAY_TTL_SECONDS)
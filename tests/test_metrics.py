@@ -0,0 +1,138 @@
+import pytest
+
+from video_collection import database
+from video_collection.metrics import AppMetrics, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests_total = registry.counter('test_requests_total', 'Requests.', ('path',))
+    in_flight = registry.gauge('test_in_flight', 'In flight.')
+    latency = registry.histogram('test_latency_seconds', 'Latency.', ('path',), buckets=(0.1, 1.0))
+
+    requests_total.inc(path='/a')
+    requests_total.inc(2, path='say "hi"\n')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    latency.observe(0.05, path='/a')
+    latency.observe(0.5, path='/a')
+    latency.observe(3, path='/a')
+
+    assert registry.render().splitlines() == [
+        '# HELP test_requests_total Requests.',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{path="/a"} 1',
+        'test_requests_total{path="say \\"hi\\"\\n"} 2',
+        '# HELP test_in_flight In flight.',
+        '# TYPE test_in_flight gauge',
+        'test_in_flight 1',
+        '# HELP test_latency_seconds Latency.',
+        '# TYPE test_latency_seconds histogram',
+        'test_latency_seconds_bucket{path="/a",le="0.1"} 1',
+        'test_latency_seconds_bucket{path="/a",le="1"} 2',
+        'test_latency_seconds_bucket{path="/a",le="+Inf"} 3',
+        'test_latency_seconds_sum{path="/a"} 3.55',
+        'test_latency_seconds_count{path="/a"} 3',
+    ]
+    with pytest.raises(ValueError):
+        requests_total.inc(method='GET')
+
+
+def test_app_metrics_count_streamed_bytes_and_close_the_source():
+    metrics = AppMetrics()
+    closed = []
+
+    def chunks():
+        try:
+            yield b'abc'
+            yield b'de'
+            yield b'never sent'
+        finally:
+            closed.append(True)
+
+    stream = metrics.count_streamed_bytes('video', chunks())
+    assert next(stream) == b'abc'
+    assert next(stream) == b'de'
+    stream.close()
+
+    assert closed == [True]
+    assert 'vc_streamed_bytes_total{source="video"} 5' in metrics.render()
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        self.rowcount = -1
+        self.rows = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement)
+        self.rowcount = -1 if statement.startswith('SELECT') else 2
+        self.rows = [(1,), (2,), (3,)]
+
+    def executemany(self, statement, rows):
+        self.statements.append(statement)
+        self.rowcount = len(rows)
+
+    def fetchall(self):
+        self.rowcount = len(self.rows)
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        cursor = FakeCursor()
+        self.cursors.append(cursor)
+        return cursor
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def test_instrumented_connection_reports_each_statement(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(database.mysql.connector, 'connect', lambda **config: conn)
+    trace = database.QueryTrace()
+
+    with database.get_db_connection({}, observer=trace.add) as wrapped:
+        cursor = wrapped.cursor(dictionary=True)
+        cursor.execute("SELECT id FROM movies WHERE title = 'Alien' AND year > 1979")
+        assert cursor.fetchall() == [(1,), (2,), (3,)]
+        cursor.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,)])
+        cursor.execute("SELECT id FROM movies WHERE title = %s AND year > %s", ('Heat', 1995))
+        assert wrapped.is_connected()
+
+    assert [(record.statement, record.rows) for record in trace.records] == [
+        ("SELECT id FROM movies WHERE title = ? AND year > ?", 3),
+        ("INSERT INTO t VALUES (%s)", 2),
+        ("SELECT id FROM movies WHERE title = %s AND year > %s", None),
+    ]
+    assert trace.count == 3
+    assert trace.seconds == sum(record.duration for record in trace.records)
+    assert conn.cursors[0].statements[0].startswith("SELECT id FROM movies WHERE title = 'Alien'")
+    assert conn.closed
+
+
+def test_normalize_sql_statement_collapses_literals_and_in_lists():
+    assert database.normalize_sql_statement(
+        "SELECT  COUNT(*)\n FROM movie_images WHERE filename = 'it''s.jpg' AND movie_id IN (%s, %s, %s) AND t2.id = 3"
+    ) == "SELECT COUNT(*) FROM movie_images WHERE filename = ? AND movie_id IN (...) AND t2.id = ?"
+
+
+def test_query_trace_groups_repeated_statements_by_total_time():
+    trace = database.QueryTrace(max_statements=3)
+    for duration in (0.01, 0.02, 0.03):
+        trace.add(database.QueryRecord("SELECT COUNT(*) FROM movie_images WHERE filename = %s", duration))
+    trace.add(database.QueryRecord("DELETE FROM movie_images", 0.5))
+
+    assert trace.count == 4
+    assert len(trace.records) == 3
+    assert trace.summary() == [("SELECT COUNT(*) FROM movie_images WHERE filename = %s", 3, pytest.approx(0.06))]
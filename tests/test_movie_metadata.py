@@ -40,7 +40,7 @@ def test_metadata_parsers_filter_invalid_and_duplicate_values():
     ) == ['cover.webp', '2026/still.jpg']
 
 
-def test_hydrate_movie_rows_adds_tags_ratings_images_and_formatted_date():
+def test_hydrate_movie_rows_adds_tags_ratings_and_images():
     cursor = HydrateCursor()
     movies = [{
         'title': 'Movie A',
@@ -56,5 +56,6 @@ def test_hydrate_movie_rows_adds_tags_ratings_images_and_formatted_date():
     assert movies[0]['ratings'] == '1:5'
     assert movies[0]['ratings_display'] == {'Story': 5}
     assert movies[0]['image_filename'] == 'cover.webp,2026/still.jpg'
-    assert movies[0]['formatted_added_date'] == '2026-07-02 10:30:00'
+    assert movies[0]['added_date'] == datetime(2026, 7, 2, 10, 30, 0)
+    assert 'formatted_added_date' not in movies[0]
     assert len(cursor.executed) == 3
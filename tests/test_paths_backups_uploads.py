@@ -1,27 +1,44 @@
+import gzip
 import io
+import json
 import os
 import stat
 import tarfile
 import ast
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
 from pathlib import Path
-from types import SimpleNamespace
+from types import MethodType, SimpleNamespace
 
+import pytest
 from PIL import Image
 
 import app as app_module
+import video_collection.backup_catalog as backup_catalog
+import video_collection.backup_codecs as backup_codecs
 import video_collection.backups as backups_module
+import video_collection.logical_backup as logical_backup
 import video_collection.videos as video_helpers
 import video_collection.uploads as uploads_module
 from video_collection.backup_archive_ops import BackupArchiveOpsMixin
 from video_collection.backup_database_ops import BackupDatabaseOpsMixin
+from video_collection.backup_incremental import BackupInUseError
 from video_collection.backup_scheduler import BackupSchedulerMixin
 
 
 BACKUP_MODULES = [
+    "backup_catalog.py",
+    "backup_codecs.py",
     "backup_validation.py",
     "backup_database_ops.py",
     "backup_archive_ops.py",
+    "backup_incremental.py",
     "backup_scheduler.py",
+    "backup_verify.py",
+    "logical_backup.py",
 ]
 
 
@@ -198,6 +215,8 @@ def test_video_route_rejects_traversal(monkeypatch, tmp_path):
 
 def test_backup_filename_validation():
     assert app_module.safe_backup_filename('movies_20260630_120000.full.tar.gz')
+    assert app_module.safe_backup_filename('movies_20260630_120000.incr.tar.gz')
+    assert app_module.classify_backup_filename('scheduled_movies_1.incr.tar.gz')['type'] == 'scheduled_incremental'
     assert app_module.safe_backup_filename('movies.sql.gz')
     assert app_module.safe_backup_filename('../movies.sql.gz') is None
     assert app_module.safe_backup_filename('movies.zip') is None
@@ -359,6 +378,25 @@ def test_image_variants_limit_cover_size_and_cleanup_together(monkeypatch, tmp_p
     assert not (tmp_path / cover_filename).exists()
 
 
+def test_prewarm_image_covers_generates_only_missing_covers(tmp_path):
+    (tmp_path / '2026').mkdir()
+    for filename in ('2026/a.webp', '2026/b.webp', 'loose.png'):
+        Image.new('RGB', (1200, 600), color='blue').save(tmp_path / filename)
+    uploads_module.ensure_image_cover('2026/a.webp', str(tmp_path))
+    (tmp_path / '.restore-tmp').mkdir()
+    Image.new('RGB', (10, 10)).save(tmp_path / '.restore-tmp' / 'staged.webp')
+    old_mtime = time.time() - 3600
+    os.utime(tmp_path / 'loose.png', (old_mtime, old_mtime))
+
+    assert uploads_module.prewarm_image_covers(str(tmp_path)) == 2
+    assert (tmp_path / '2026/b.cover.webp').is_file()
+    assert (tmp_path / 'loose.cover.webp').is_file()
+    assert uploads_module.prewarm_image_covers(str(tmp_path)) == 0
+    assert [filename for filename, _ in uploads_module.iter_uploaded_images(str(tmp_path), min_age_seconds=60)] == [
+        'loose.png'
+    ]
+
+
 def test_normalize_uploaded_image_permissions_repairs_only_valid_regular_images(monkeypatch, tmp_path):
     primary_path = tmp_path / 'cover.webp'
     primary_path.write_bytes(b'primary')
@@ -420,6 +458,611 @@ def test_initialize_application_normalizes_uploaded_image_permissions(monkeypatc
     monkeypatch.setattr(app_module, 'APP_INITIALIZED', False)
     monkeypatch.setattr(app_module, 'init_db', lambda: True)
     monkeypatch.setattr(app_module, 'normalize_upload_image_permissions', lambda: 2)
-    monkeypatch.setattr(app_module, 'start_scheduled_backup_thread', lambda enabled: None)
+    monkeypatch.setattr(app_module, 'start_task_scheduler', lambda enabled: None)
 
     assert app_module.initialize_application(startup_debug_enabled=False) is True
+
+
+class FakeBackupService(backups_module.BackupService):
+    def __init__(self, tmp_path, retention_count=7, full_interval=7, compression='gzip'):
+        self.restored_dumps = []
+        self.dump_counter = 0
+        super().__init__(
+            db_config_getter=lambda: {'database': 'movies', 'host': 'db', 'user': 'u', 'password': 'p'},
+            backup_dir_getter=lambda: str(tmp_path / 'backups'),
+            upload_folder_getter=lambda: str(tmp_path / 'images'),
+            db_connection_factory=lambda: None,
+            logger=app_module.logger,
+            image_filename_normalizer=app_module.normalize_upload_filename,
+            include_routines_getter=lambda: False,
+            schedule_enabled_getter=lambda: True,
+            schedule_time_getter=lambda: '03:30',
+            retention_count_getter=lambda: retention_count,
+            incremental_getter=lambda: True,
+            full_interval_getter=lambda: full_interval,
+            compression_getter=lambda: compression
+        )
+
+    def stream_database_dump(self, output, compression):
+        self.dump_counter += 1
+        with backup_codecs.open_dump_writer(output, compression) as writer:
+            writer.write(f'-- dump {self.dump_counter}\n'.encode('utf-8'))
+
+    def stream_database_restore(self, input_file):
+        self.restored_dumps.append(input_file.read().decode('utf-8'))
+
+
+def write_backup_image(root, relative_path, content, mtime=1_700_000_000):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def backup_archive_members(service, filename):
+    with tarfile.open(os.path.join(service.backup_dir, filename), 'r:*') as tar:
+        return tar.getnames()
+
+
+def backup_dir_files(service):
+    return sorted(name for name in os.listdir(service.backup_dir) if name != backups_module.BACKUP_CATALOG_FILENAME)
+
+
+def age_backup_files(service):
+    for index, entry in enumerate(sorted(os.scandir(service.backup_dir), key=lambda item: item.name)):
+        os.utime(entry.path, (1_700_000_000 + index, 1_700_000_000 + index))
+
+
+def run_backups(service, monkeypatch, count, prefix='', incremental=True):
+    filenames = []
+    for index in range(count):
+        monkeypatch.setattr(time, 'strftime', lambda fmt, *args, index=index: (
+            f'20260101_0000{index:02d}' if fmt == '%Y%m%d_%H%M%S' else '2026-01-01 00:00:00'
+        ))
+        filenames.append(service.run_database_backup(prefix=prefix, incremental=incremental)['filename'])
+        age_backup_files(service)
+    monkeypatch.undo()
+    return filenames
+
+
+def test_incremental_backup_archives_only_changed_images_and_restores_chain(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    images_root = tmp_path / 'images'
+    write_backup_image(images_root, '2026/a.webp', b'first-a')
+    write_backup_image(images_root, '2026/b.webp', b'first-b')
+    base_filename = run_backups(service, monkeypatch, 1)[0]
+
+    write_backup_image(images_root, '2026/b.webp', b'second-b', mtime=1_700_000_100)
+    write_backup_image(images_root, '2026/c.webp', b'new-c')
+    (images_root / '2026/a.webp').touch()
+    os.utime(images_root / '2026/a.webp', (1_700_000_050, 1_700_000_050))
+    monkeypatch.setattr(time, 'strftime', lambda fmt, *args: '20260102_000000' if fmt == '%Y%m%d_%H%M%S' else 'x')
+    incremental = service.run_database_backup(incremental=True)
+    monkeypatch.undo()
+
+    assert base_filename.endswith('.full.tar.gz')
+    assert incremental['type'] == 'incremental'
+    members = backup_archive_members(service, incremental['filename'])
+    assert members[0] == 'manifest.json'
+    assert sorted(members[1:]) == ['database.sql.gz', 'images/2026/b.webp', 'images/2026/c.webp']
+
+    manifest = service.read_backup_manifest(os.path.join(service.backup_dir, incremental['filename']))
+    assert manifest['parent'] == base_filename
+    assert manifest['base'] == base_filename
+    assert manifest['files']['2026/a.webp']['archive'] == base_filename
+    assert manifest['files']['2026/a.webp']['mtime'] == 1_700_000_050
+    assert manifest['files']['2026/b.webp']['archive'] == incremental['filename']
+
+    (images_root / '2026/c.webp').unlink()
+    write_backup_image(images_root, '2026/stray.webp', b'stray')
+    result = service.run_backup_restore(incremental['filename'])
+
+    assert result['backup_type'] == 'incremental'
+    assert 'files' not in result['manifest']
+    assert service.restored_dumps == ['-- dump 2\n']
+    assert sorted(
+        path.relative_to(images_root).as_posix() for path in images_root.rglob('*') if path.is_file()
+    ) == ['2026/a.webp', '2026/b.webp', '2026/c.webp']
+    assert (images_root / '2026/a.webp').read_bytes() == b'first-a'
+    assert (images_root / '2026/b.webp').read_bytes() == b'second-b'
+    assert int(os.stat(images_root / '2026/a.webp').st_mtime) == 1_700_000_050
+
+
+def test_incremental_backup_restore_rejects_tampered_chain(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'first-a')
+    base_filename, incremental_filename = run_backups(service, monkeypatch, 2)
+    base_path = os.path.join(service.backup_dir, base_filename)
+
+    with tarfile.open(base_path, 'r:gz') as tar:
+        manifest = tar.extractfile('manifest.json').read()
+        dump = tar.extractfile('database.sql.gz').read()
+    with tarfile.open(base_path, 'w:gz') as tar:
+        backups_module.add_bytes_to_tar(tar, 'manifest.json', manifest)
+        backups_module.add_bytes_to_tar(tar, 'database.sql.gz', dump)
+        backups_module.add_bytes_to_tar(tar, 'images/2026/a.webp', b'evil-a')
+
+    with pytest.raises(ValueError, match='does not match manifest'):
+        service.run_backup_restore(incremental_filename)
+    assert service.restored_dumps == []
+
+    os.remove(base_path)
+    with pytest.raises(FileNotFoundError):
+        service.run_backup_restore(incremental_filename)
+
+
+def test_incremental_backups_start_new_full_after_interval(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path, full_interval=3)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+
+    filenames = run_backups(service, monkeypatch, 5)
+
+    assert [name.rsplit('.', 3)[1] for name in filenames] == ['full', 'incr', 'incr', 'full', 'incr']
+
+
+def test_scheduled_retention_keeps_bases_referenced_by_kept_increments(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path, retention_count=2, full_interval=10)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+    filenames = run_backups(service, monkeypatch, 4, prefix=service.scheduled_prefix)
+
+    deleted = service.cleanup_scheduled_backups()
+
+    assert deleted == [filenames[1]]
+    assert backup_dir_files(service) == sorted([filenames[0], filenames[2], filenames[3]])
+    with pytest.raises(BackupInUseError):
+        service.delete_database_backup_file(filenames[0])
+
+    service.delete_database_backup_file(filenames[3])
+    service.delete_database_backup_file(filenames[2])
+    assert service.delete_database_backup_file(filenames[0]) == filenames[0]
+
+
+def test_parallel_gzip_writer_output_is_standard_multi_member_gzip():
+    payload = os.urandom(300_000) + b'INSERT INTO movies VALUES (1);\n' * 20_000
+    output = io.BytesIO()
+
+    with backup_codecs.ParallelGzipWriter(output, block_bytes=64 * 1024, workers=3) as writer:
+        for offset in range(0, len(payload), 10_000):
+            writer.write(payload[offset:offset + 10_000])
+
+    assert gzip.decompress(output.getvalue()) == payload
+    assert output.getvalue().count(b'\x1f\x8b\x08') >= len(payload) // (64 * 1024)
+
+    empty = io.BytesIO()
+    backup_codecs.ParallelGzipWriter(empty).close()
+    assert gzip.decompress(empty.getvalue()) == b''
+
+
+def test_backup_compression_setting_falls_back_when_codec_is_unavailable(monkeypatch):
+    assert backup_codecs.normalize_backup_compression(' STORE ') == 'store'
+    assert backup_codecs.normalize_backup_compression('brotli') == 'gzip'
+    monkeypatch.setattr(backup_codecs, 'zstandard', None)
+    assert backup_codecs.normalize_backup_compression('zstd') == 'store'
+
+
+def test_store_compression_backup_skips_tar_gzip_and_restores(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path, compression='store')
+    images_root = tmp_path / 'images'
+    write_backup_image(images_root, '2026/a.webp', b'first-a')
+    base_filename, incremental_filename = run_backups(service, monkeypatch, 2)
+
+    assert base_filename.endswith('.full.tar')
+    assert incremental_filename.endswith('.incr.tar')
+    assert backups_module.classify_backup_filename(incremental_filename)['type'] == 'incremental'
+    with tarfile.open(os.path.join(service.backup_dir, base_filename), 'r:') as tar:
+        assert tar.getnames() == ['manifest.json', 'database.sql.gz', 'images/2026/a.webp']
+
+    write_backup_image(images_root, '2026/a.webp', b'changed')
+    result = service.run_backup_restore(incremental_filename)
+
+    assert result['manifest']['compression'] == 'store'
+    assert service.restored_dumps == ['-- dump 2\n']
+    assert (images_root / '2026/a.webp').read_bytes() == b'first-a'
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'store'])
+def test_backup_archive_writer_patches_streamed_member_size(tmp_path, compression):
+    payload = os.urandom(70_000) + b'tail'
+    archive_path = tmp_path / 'stream.tar'
+
+    def produce(output):
+        for offset in range(0, len(payload), 4096):
+            output.write(payload[offset:offset + 4096])
+
+    with open(archive_path, 'wb') as raw, backup_codecs.BackupArchiveWriter(raw, compression) as archive:
+        archive.add_bytes('manifest.json', b'{}')
+        archive.add_stream('database.sql.gz', produce, compresslevel=0)
+        archive.add_bytes('images/2026/a.webp', b'image')
+
+    with tarfile.open(archive_path, 'r:gz' if compression == 'gzip' else 'r:') as tar:
+        assert tar.getnames() == ['manifest.json', 'database.sql.gz', 'images/2026/a.webp']
+        assert tar.getmember('database.sql.gz').size == len(payload)
+        assert tar.extractfile('database.sql.gz').read() == payload
+        assert tar.extractfile('images/2026/a.webp').read() == b'image'
+
+
+def test_gzip_backup_stores_image_members_without_deflating(tmp_path):
+    service = FakeBackupService(tmp_path)
+    image = b'webp-payload' * 20_000
+    write_backup_image(tmp_path / 'images', '2026/a.webp', image)
+
+    filename = service.run_database_backup(incremental=False)['filename']
+    archive_path = os.path.join(service.backup_dir, filename)
+
+    assert filename.endswith('.full.tar.gz')
+    assert os.path.getsize(archive_path) > len(image)
+    with tarfile.open(archive_path, 'r:gz') as tar:
+        assert tar.extractfile('images/2026/a.webp').read() == image
+        assert json.loads(tar.extractfile('manifest.json').read())['images_count'] == 1
+
+
+def test_backup_streams_database_dump_into_archive_without_temp_files(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    service.stream_database_dump = MethodType(backups_module.BackupService.stream_database_dump, service)
+    script = "import sys; sys.stdout.write('-- streamed\\n' * 50000)"
+    service.build_database_dump_command = lambda: [sys.executable, '-c', script]
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+
+    filename = run_backups(service, monkeypatch, 1)[0]
+
+    assert backup_dir_files(service) == [filename]
+    service.run_backup_restore(filename)
+    assert service.restored_dumps == ['-- streamed\n' * 50000]
+
+    service.build_database_dump_command = lambda: [sys.executable, '-c', 'import sys; sys.exit(3)']
+    with pytest.raises(RuntimeError, match='Database backup command failed'):
+        service.run_database_backup()
+    assert backup_dir_files(service) == [filename]
+
+
+def write_legacy_full_backup(service, filename, images, extra_members=()):
+    os.makedirs(service.backup_dir, exist_ok=True)
+    manifest = {'type': 'full', 'database': 'movies', 'database_dump': 'database.sql.gz'}
+    with tarfile.open(os.path.join(service.backup_dir, filename), 'w:gz') as tar:
+        backups_module.add_bytes_to_tar(tar, 'manifest.json', json.dumps(manifest))
+        backups_module.add_bytes_to_tar(tar, 'database.sql.gz', gzip.compress(b'-- legacy dump\n'))
+        for relative_path, content in images.items():
+            backups_module.add_bytes_to_tar(tar, f'images/{relative_path}', content, mtime=1_700_000_000)
+        for arcname, content in extra_members:
+            backups_module.add_bytes_to_tar(tar, arcname, content)
+
+
+def test_legacy_full_backup_restore_streams_dump_and_swaps_images(tmp_path):
+    service = FakeBackupService(tmp_path)
+    images_root = tmp_path / 'images'
+    write_backup_image(images_root, '2025/stale.webp', b'stale')
+    write_backup_image(images_root, '2026/a.webp', b'live-a')
+    write_legacy_full_backup(service, 'movies_20260101_000000.full.tar.gz', {'2026/a.webp': b'backup-a'})
+
+    result = service.run_backup_restore('movies_20260101_000000.full.tar.gz')
+
+    assert result['backup_type'] == 'full'
+    assert service.restored_dumps == ['-- legacy dump\n']
+    assert sorted(os.listdir(images_root)) == ['2026']
+    assert (images_root / '2026/a.webp').read_bytes() == b'backup-a'
+    assert int(os.stat(images_root / '2026/a.webp').st_mtime) == 1_700_000_000
+
+
+def test_streaming_restore_validates_every_member_before_touching_database(tmp_path):
+    service = FakeBackupService(tmp_path)
+    images_root = tmp_path / 'images'
+    write_backup_image(images_root, '2026/a.webp', b'live-a')
+    write_legacy_full_backup(
+        service,
+        'movies_20260101_000000.full.tar.gz',
+        {'2026/a.webp': b'backup-a'},
+        extra_members=[('images/../../escape.webp', b'evil')]
+    )
+
+    with pytest.raises(ValueError, match='Unsafe or unsupported backup entry'):
+        service.run_backup_restore('movies_20260101_000000.full.tar.gz')
+
+    assert service.restored_dumps == []
+    assert os.listdir(images_root) == ['2026']
+    assert (images_root / '2026/a.webp').read_bytes() == b'live-a'
+
+
+def test_differential_restore_only_touches_changed_images(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    images_root = tmp_path / 'images'
+    for name in ('a', 'b', 'c', 'keep'):
+        write_backup_image(images_root, f'2026/{name}.webp', f'backup-{name}'.encode('utf-8'))
+    filename = run_backups(service, monkeypatch, 1)[0]
+
+    os.utime(images_root / '2026/a.webp', (1_700_000_500, 1_700_000_500))
+    write_backup_image(images_root, '2026/b.webp', b'edited-b', mtime=1_700_000_500)
+    (images_root / '2026/c.webp').unlink()
+    write_backup_image(images_root, '2025/stray.webp', b'stray')
+    keep_inode = os.stat(images_root / '2026/keep.webp').st_ino
+
+    report = service.preview_backup_restore(filename)
+
+    assert report['write'] == ['2026/b.webp', '2026/c.webp']
+    assert report['retime'] == ['2026/a.webp']
+    assert report['delete'] == ['2025/stray.webp']
+    assert report['unchanged_count'] == 1
+    assert service.restored_dumps == []
+
+    result = service.run_backup_restore(filename, differential=True)
+
+    assert result['image_changes']['write_count'] == 2
+    assert service.restored_dumps == ['-- dump 1\n']
+    assert sorted(os.listdir(images_root)) == ['2026']
+    assert (images_root / '2026/b.webp').read_bytes() == b'backup-b'
+    assert (images_root / '2026/c.webp').read_bytes() == b'backup-c'
+    assert int(os.stat(images_root / '2026/a.webp').st_mtime) == 1_700_000_000
+    assert os.stat(images_root / '2026/keep.webp').st_ino == keep_inode
+    assert service.preview_backup_restore(filename)['unchanged_count'] == 4
+
+
+def test_differential_restore_requires_manifest_backup(tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_legacy_full_backup(service, 'movies_20260101_000000.full.tar.gz', {'2026/a.webp': b'backup-a'})
+
+    with pytest.raises(ValueError, match='image manifest'):
+        service.run_backup_restore('movies_20260101_000000.full.tar.gz', differential=True)
+    assert service.restored_dumps == []
+
+
+def test_backup_catalog_reads_archive_metadata_once_and_tracks_directory_changes(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+    write_backup_image(tmp_path / 'images', '2026/b.webp', b'b')
+    filename = run_backups(service, monkeypatch, 1)[0]
+    service.invalidate_backup_catalog()
+    service.list_database_backups()
+    reads = []
+    original_read = backup_catalog.read_archive_catalog_metadata
+    monkeypatch.setattr(
+        backup_catalog,
+        'read_archive_catalog_metadata',
+        lambda *args: reads.append(args[1]) or original_read(*args)
+    )
+
+    first = service.list_database_backups()
+    second = service.list_database_backups()
+
+    assert reads == []
+    assert first == second
+    assert first[0]['filename'] == filename
+    assert first[0]['metadata']['images_count'] == 2
+    assert first[0]['metadata']['dump_bytes'] > 0
+    assert first[0]['metadata']['duration_seconds'] >= 0
+
+    (tmp_path / 'backups' / 'movies_manual.sql.gz').write_bytes(gzip.compress(b'-- manual'))
+    os.utime(tmp_path / 'backups', ns=(1, time.time_ns() + 5_000_000_000))
+    listed = {backup['filename']: backup for backup in service.list_database_backups()}
+
+    assert reads == []
+    assert listed['movies_manual.sql.gz']['metadata']['dump_bytes'] == listed['movies_manual.sql.gz']['size_bytes']
+
+    fresh_service = FakeBackupService(tmp_path)
+    assert fresh_service.list_database_backups()[-1]['metadata']['duration_seconds'] >= 0
+    assert reads == []
+
+
+def rewrite_backup_archive(path, replacements):
+    with tarfile.open(path, 'r:gz') as tar:
+        members = [(member.name, tar.extractfile(member).read()) for member in tar if member.isfile()]
+    with tarfile.open(path, 'w:gz') as tar:
+        for name, content in members:
+            backups_module.add_bytes_to_tar(tar, name, replacements.get(name, content))
+
+
+def test_verify_backup_checks_images_and_dump_against_manifest(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'first-a')
+    write_backup_image(tmp_path / 'images', '2026/b.webp', b'first-b')
+    base_filename, incremental_filename = run_backups(service, monkeypatch, 2)
+
+    base_result = service.verify_backup(base_filename, workers=2)
+    incremental_result = service.verify_backup(incremental_filename)
+
+    assert base_result['ok'] is True
+    assert base_result['errors'] == []
+    assert base_result['checked_files'] == 2
+    assert incremental_result['ok'] is True
+    assert incremental_result['checked_files'] == 0
+    assert service.backup_catalog()[base_filename]['metadata']['verification']['ok'] is True
+
+    base_path = os.path.join(service.backup_dir, base_filename)
+    rewrite_backup_archive(base_path, {'images/2026/a.webp': b'evil-a'})
+    tampered = service.verify_backup(base_filename)
+
+    assert tampered['ok'] is False
+    assert tampered['errors'] == ['Image does not match manifest: images/2026/a.webp']
+    assert service.backup_catalog()[base_filename]['metadata']['verification']['ok'] is False
+
+    os.remove(base_path)
+    service.invalidate_backup_catalog()
+    assert service.verify_backup(incremental_filename)['errors'] == [
+        f'Referenced backup is missing: {base_filename}'
+    ]
+
+
+def test_verify_backup_detects_corrupt_database_dump(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+    filename = run_backups(service, monkeypatch, 1)[0]
+    backup_path = os.path.join(service.backup_dir, filename)
+    with tarfile.open(backup_path, 'r:gz') as tar:
+        dump = tar.extractfile('database.sql.gz').read()
+
+    rewrite_backup_archive(backup_path, {'database.sql.gz': dump[:-6]})
+    truncated = service.verify_backup(filename)
+    rewrite_backup_archive(backup_path, {'database.sql.gz': gzip.compress(b'-- other dump\n')})
+    replaced = service.verify_backup(filename)
+
+    assert truncated['ok'] is False
+    assert truncated['errors'][0].startswith('Database dump is corrupt')
+    assert replaced['errors'] == ['Database dump does not match recorded checksum']
+
+
+def test_scheduled_backup_verifies_archive_and_reports_status(tmp_path):
+    service = FakeBackupService(tmp_path)
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+
+    service.run_scheduled_backup_once()
+    status = service.get_scheduled_backup_status()
+
+    assert status['last_result'] == 'success'
+    assert status['last_verification']['ok'] is True
+    assert status['last_verification']['filename'].startswith(service.scheduled_prefix)
+    assert status['last_verification']['checked_files'] == 1
+
+
+class FakeLogicalDatabase:
+    """Just enough of a MariaDB connection for the logical exporter and loader."""
+
+    def __init__(self, tables, lock_error=None):
+        self.tables = tables
+        self.lock_error = lock_error
+        self.statements = []
+        self.connections = 0
+
+    @contextmanager
+    def connect(self):
+        self.connections += 1
+        yield FakeLogicalConnection(self)
+
+
+class FakeLogicalConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return FakeLogicalCursor(self.database)
+
+    def commit(self):
+        pass
+
+
+class FakeLogicalCursor:
+    def __init__(self, database):
+        self.database = database
+        self.description = None
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        tables = self.database.tables
+        statement = ' '.join(sql.split())
+        self.database.statements.append(statement)
+        self.rows = []
+        if 'information_schema.TABLES' in statement:
+            self.rows = [(name,) for name in tables]
+        elif statement.startswith('SHOW CREATE TABLE'):
+            name = statement.split('`')[1]
+            self.rows = [(name, tables[name]['create'])]
+        elif statement.startswith('SELECT * FROM'):
+            name = statement.split('`')[1]
+            self.description = [(column,) for column in tables[name]['columns']]
+            self.rows = list(tables[name]['rows'])
+        elif statement.startswith('LOCK TABLES') and self.database.lock_error:
+            raise self.database.lock_error
+        elif statement.startswith('DROP TABLE IF EXISTS'):
+            tables.pop(statement.split('`')[1], None)
+        elif statement.startswith('CREATE TABLE'):
+            name, *columns = statement.split('`')[1::2]
+            tables[name] = {'create': sql, 'columns': columns, 'rows': []}
+
+    def executemany(self, sql, rows):
+        self.database.tables[sql.split('`')[1]]['rows'].extend(rows)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+def logical_test_tables():
+    return {
+        'movies': {
+            'create': 'CREATE TABLE `movies` (`title` VARCHAR(255), `added_date` DATETIME, `cover` BLOB, `score` DECIMAL(4,1))',
+            'columns': ['title', 'added_date', 'cover', 'score'],
+            'rows': [
+                (f'电影 {index}', datetime(2026, 1, 1, 8, index % 60), bytes([index % 256]) * 3, Decimal('4.5'))
+                for index in range(2500)
+            ] + [('empty', None, None, None)]
+        },
+        'tags': {
+            'create': 'CREATE TABLE `tags` (`id` INT, `name` VARCHAR(50))',
+            'columns': ['id', 'name'],
+            'rows': [(1, '精品'), (2, '剧情')]
+        },
+        'movie_tags': {
+            'create': 'CREATE TABLE `movie_tags` (`movie_title` VARCHAR(255), `tag_id` INT)',
+            'columns': ['movie_title', 'tag_id'],
+            'rows': []
+        }
+    }
+
+
+def expected_logical_rows(tables):
+    return {
+        name: [
+            tuple(
+                value.isoformat(sep=' ') if isinstance(value, datetime)
+                else str(value) if isinstance(value, Decimal)
+                else value
+                for value in row
+            )
+            for row in table['rows']
+        ]
+        for name, table in tables.items()
+    }
+
+
+def test_logical_backup_exports_tables_in_parallel_and_restores_them(monkeypatch, tmp_path):
+    service = FakeBackupService(tmp_path)
+    database = FakeLogicalDatabase(logical_test_tables())
+    service.db_connection_factory = database.connect
+    service.dump_format_getter = lambda: 'logical'
+    write_backup_image(tmp_path / 'images', '2026/a.webp', b'a')
+    expected = expected_logical_rows(database.tables)
+
+    filename = run_backups(service, monkeypatch, 1)[0]
+    manifest = service.read_backup_manifest(os.path.join(service.backup_dir, filename))
+
+    assert manifest['database_dump'] == 'database.ndjson.gz'
+    assert manifest['database_format'] == 'logical'
+    assert database.connections == 4
+    assert 'LOCK TABLES `movies` READ, `tags` READ, `movie_tags` READ' in database.statements
+    assert database.statements.count('START TRANSACTION WITH CONSISTENT SNAPSHOT') == 3
+    assert not [name for name in os.listdir(service.backup_dir) if name.startswith('.logical-')]
+    assert service.verify_backup(filename)['ok'] is True
+
+    database.tables.clear()
+    service.run_backup_restore(filename)
+
+    assert list(database.tables) == ['movies', 'tags', 'movie_tags']
+    assert {name: table['rows'] for name, table in database.tables.items()} == expected
+    assert service.restored_dumps == []
+
+
+def test_logical_export_falls_back_to_one_connection_without_lock_privilege(tmp_path):
+    service = FakeBackupService(tmp_path)
+    database = FakeLogicalDatabase(logical_test_tables(), lock_error=RuntimeError('LOCK TABLES denied'))
+    service.db_connection_factory = database.connect
+    output = io.BytesIO()
+
+    service.stream_logical_dump(output)
+
+    assert database.statements.count('START TRANSACTION WITH CONSISTENT SNAPSHOT') == 1
+    lines = gzip.decompress(output.getvalue()).decode('utf-8').splitlines()
+    assert json.loads(lines[0])['tables'] == ['movies', 'tags', 'movie_tags']
+    assert json.loads(lines[-1]) == {'table_end': 'movie_tags', 'rows': 0}
+
+
+def test_logical_restore_rejects_truncated_dump():
+    database = FakeLogicalDatabase({})
+    header = {'format': 'video-collection-logical', 'version': 1, 'tables': ['tags']}
+    table = {'table': 'tags', 'columns': ['id', 'name'], 'create_table': 'CREATE TABLE `tags` (`id` INT, `name` TEXT)'}
+    payload = b''.join(logical_backup.encode_logical_line(record) for record in (header, table, [1, 'a']))
+
+    with database.connect() as conn, pytest.raises(logical_backup.LogicalDumpError, match='truncated'):
+        logical_backup.load_logical_dump(conn, io.BytesIO(payload))
+    assert database.statements[-1] == 'SET FOREIGN_KEY_CHECKS = 1'
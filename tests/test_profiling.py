@@ -0,0 +1,48 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from video_collection.profiling import ProfileStore, SamplingProfiler
+
+
+def busy_request_work(until):
+    total = 0
+    while time.perf_counter() < until:
+        total += 1
+    return total
+
+
+def test_sampling_profiler_collects_collapsed_stacks_of_the_target_thread():
+    profiler = SamplingProfiler(threading.get_ident(), interval=0.001).start()
+    busy_request_work(time.perf_counter() + 0.05)
+    stacks = profiler.stop()
+
+    assert sum(stacks.values()) > 0
+    assert any(stack.endswith('test_profiling.py:busy_request_work') for stack in stacks)
+    assert profiler.duration >= 0.05
+    line = profiler.collapsed().splitlines()[0]
+    stack, count = line.rsplit(' ', 1)
+    assert ';' in stack and int(count) > 0
+    assert profiler.stop() is stacks
+
+
+def test_profile_store_saves_lists_reads_and_prunes(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles'), retention_count=2)
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.stacks.update({'app.py:api_handler;movies.py:search': 3})
+    profiler.duration = 0.125
+
+    names = [
+        store.save(label, profiler, now=datetime(2026, 1, day, tzinfo=timezone.utc))
+        for day, label in ((1, 'api_handler-search_movies'), (2, 'serve image/../x'), (3, 'metrics'))
+    ]
+
+    assert names[0] == '20260101T000000000000Z-api_handler-search_movies-125ms.folded'
+    assert names[1] == '20260102T000000000000Z-serve-image-..-x-125ms.folded'
+    assert [profile['filename'] for profile in store.list_profiles()] == [names[2], names[1]]
+    assert store.read_profile(names[2]) == 'app.py:api_handler;movies.py:search 3\n'
+    with pytest.raises(ValueError):
+        store.read_profile('../secret.folded')
+    assert ProfileStore(str(tmp_path / 'missing')).list_profiles() == []
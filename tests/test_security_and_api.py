@@ -1,7 +1,14 @@
 import re
 import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
 
 import app as app_module
+from video_collection import json_provider as json_provider_module
+from video_collection.shared_state import MemorySharedState, SQLiteSharedState, create_shared_state
 
 
 def make_client():
@@ -202,3 +209,356 @@ def test_api_requires_csrf_for_authenticated_session(monkeypatch):
     )
     assert response.status_code == 200
     assert response.get_json()['success'] is True
+
+
+class FakeBatchConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def is_connected(self):
+        return True
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+
+def test_api_batch_dispatches_events_in_order_with_one_connection(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    client = make_client()
+    opened = []
+    readers = threading.Barrier(2, timeout=5)
+    writes = []
+
+    @contextmanager
+    def fake_connection():
+        conn = FakeBatchConnection()
+        opened.append(conn)
+        yield conn
+
+    def read_handler(data, method):
+        readers.wait()
+        return app_module.jsonify({'success': True, 'value': data['value'], 'thread': threading.current_thread().name})
+
+    def write_handler(data, method):
+        with app_module.get_api_db_connection() as conn:
+            conn.in_transaction = True
+            writes.append((data['value'], conn))
+        return app_module.jsonify({'success': True, 'value': data['value']}), 201
+
+    monkeypatch.setattr(app_module, 'get_db_connection', fake_connection)
+    monkeypatch.setattr(app_module, 'API_BATCH_WORKERS', 2)
+    monkeypatch.setitem(app_module.API_EVENTS, 9101, app_module.api_event('test_read', read_handler, methods=('GET',), read_only=True))
+    monkeypatch.setitem(app_module.API_EVENTS, 9102, app_module.api_event('test_write', write_handler))
+
+    response = client.post('/api', json={'b': [
+        {'e': 9101, 'd': {'value': 1}, 'm': 'GET'},
+        {'e': 9101, 'd': {'value': 2}, 'm': 'GET'},
+        {'e': 9102, 'd': {'value': 3}},
+        {'e': 9102, 'd': {'value': 4}},
+        {'e': 9999},
+        {'e': 9102, 'd': ['bad']},
+        'not an event'
+    ]})
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [200, 200, 201, 201, 400, 400, 400]
+    assert [result['body'].get('value') for result in results[:4]] == [1, 2, 3, 4]
+    assert all(result['body']['thread'].startswith('api-batch') for result in results[:2])
+    assert results[4]['body']['message'] == '无效的事件ID'
+    assert len(opened) == 1
+    assert [value for value, _ in writes] == [3, 4]
+    assert all(conn is opened[0] for _, conn in writes)
+    assert opened[0].rollbacks == 2
+
+
+def test_api_batch_rejects_empty_or_oversized_batches(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'API_BATCH_MAX_EVENTS', 2)
+    client = make_client()
+
+    assert client.post('/api', json={'b': []}).status_code == 400
+    assert client.post('/api', json={'b': {'e': 1002}}).status_code == 400
+    response = client.post('/api', json={'b': [{'e': 1002}] * 3})
+    assert response.status_code == 413
+    assert response.get_json()['message'] == 'API batch exceeds 2 events'
+
+
+def test_api_read_events_revalidate_with_etag_until_a_write_bumps_the_version(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'API_DATA_VERSIONS', app_module.DataVersions({}, threading.Lock()))
+    client = make_client()
+    calls = []
+
+    def read_handler(data, method):
+        calls.append(data)
+        return app_module.jsonify({'success': True, 'tags': ['Action']})
+
+    def write_handler(data, method):
+        if data.get('fail'):
+            return app_module.jsonify({'success': False}), 400
+        return app_module.jsonify({'success': True})
+
+    monkeypatch.setitem(app_module.API_EVENTS, 9201, app_module.api_event('test_tags', read_handler, methods=('GET',), cache_scopes=('catalog',)))
+    monkeypatch.setitem(app_module.API_EVENTS, 9202, app_module.api_event('test_add_tag', write_handler, invalidates=('catalog',)))
+    monkeypatch.setitem(app_module.API_EVENTS, 9203, app_module.api_event('test_add_movie', write_handler, invalidates=('movies',)))
+    read_event = {'e': 9201, 'd': {'q': 1}, 'm': 'GET'}
+
+    first = client.post('/api', json=read_event)
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = client.post('/api', json=read_event, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert client.post('/api', json={**read_event, 'd': {'q': 2}}, headers={'If-None-Match': etag}).status_code == 200
+
+    client.post('/api', json={'e': 9203})
+    client.post('/api', json={'e': 9202, 'd': {'fail': True}})
+    assert client.post('/api', json=read_event, headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api', json={'e': 9202})
+    refreshed = client.post('/api', json=read_event, headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != etag
+
+    batch = client.post('/api', json={'b': [
+        {**read_event, 'v': refreshed.headers['ETag']},
+        {**read_event, 'v': etag}
+    ]}).get_json()['results']
+    assert batch[0] == {'status': 304, 'body': None, 'etag': refreshed.headers['ETag']}
+    assert batch[1]['status'] == 200
+    assert batch[1]['body']['tags'] == ['Action']
+    assert len(calls) == 4
+
+
+def test_data_version_epoch_changes_on_start():
+    versions = app_module.DataVersions({}, threading.Lock())
+    versions.bump('movies')
+    before = versions.snapshot(('catalog', 'movies'))
+
+    versions.start_epoch()
+    after = versions.snapshot(('catalog', 'movies'))
+
+    assert before[1:] == after[1:] == [0, 1]
+    assert before[0] != after[0]
+
+
+def test_sqlite_shared_state_rate_limits_across_worker_instances(tmp_path):
+    path = tmp_path / 'shared-state.sqlite3'
+    workers = [SQLiteSharedState(str(path)), SQLiteSharedState(str(path))]
+    now = workers[0].now()
+
+    for index in range(4):
+        state = workers[index % 2]
+        app_module.security.record_auth_failure(
+            state.namespace('auth_rate_limit'),
+            state.lock('auth_rate_limit'),
+            4,
+            60,
+            120,
+            'spread-client',
+            now + index
+        )
+
+    other_state = workers[1]
+    assert app_module.security.auth_rate_limit_retry_after(
+        other_state.namespace('auth_rate_limit'),
+        other_state.lock('auth_rate_limit'),
+        4,
+        60,
+        120,
+        'spread-client',
+        now + 4
+    ) == 119
+    assert 'spread-client' in workers[0].namespace('auth_rate_limit')
+
+    workers[0].namespace('auth_rate_limit').clear()
+    assert 'spread-client' not in other_state.namespace('auth_rate_limit')
+
+
+def test_sqlite_shared_state_lock_serialises_read_modify_write(tmp_path):
+    path = str(tmp_path / 'shared-state.sqlite3')
+    SQLiteSharedState(path).namespace('counters')['hits'] = 0
+
+    def increment():
+        state = SQLiteSharedState(path)
+        counters = state.namespace('counters')
+        for _ in range(25):
+            with state.lock('counters'):
+                counters['hits'] = counters['hits'] + 1
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SQLiteSharedState(path).namespace('counters')['hits'] == 100
+
+
+def test_shared_state_defaults_to_in_process_backend():
+    assert app_module.SHARED_STATE_BACKEND == 'memory'
+    assert isinstance(app_module.shared_state, MemorySharedState)
+    assert app_module.AUTH_RATE_LIMIT_FAILURES is app_module.shared_state.namespace('auth_rate_limit')
+    assert isinstance(create_shared_state('sqlite', ':memory:'), SQLiteSharedState)
+    with pytest.raises(ValueError):
+        create_shared_state('redis')
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_provider_serialises_dates_and_decimals_the_same_on_both_encoders(monkeypatch, use_orjson):
+    if use_orjson and json_provider_module.orjson is None:
+        pytest.skip('orjson is not installed')
+    monkeypatch.setattr(app_module.app.json, 'use_orjson', use_orjson)
+    payload = {
+        'title': '电影',
+        'added_date': datetime(2026, 7, 2, 10, 30, 0),
+        'score': Decimal('8.5'),
+        'ratings_display': {'Story': 5},
+        'huge': 2 ** 70
+    }
+
+    with app_module.app.test_request_context('/api'):
+        response = app_module.jsonify(payload)
+
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == (
+        '{"added_date":"2026-07-02T10:30:00+00:00","huge":1180591620717411303424,'
+        '"ratings_display":{"Story":5},"score":"8.5","title":"电影"}\n'
+    ).encode('utf-8')
+    assert app_module.app.json.loads(response.get_data()) == response.get_json()
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_provider_sends_datetimes_with_an_explicit_utc_offset(monkeypatch, use_orjson):
+    if use_orjson and json_provider_module.orjson is None:
+        pytest.skip('orjson is not installed')
+    monkeypatch.setattr(app_module.app.json, 'use_orjson', use_orjson)
+    payload = {
+        'naive': datetime(2026, 7, 2, 10, 30, 0),
+        'aware': datetime(2026, 7, 2, 18, 30, 0, tzinfo=timezone(timedelta(hours=8))),
+        'day': date(2026, 7, 2)
+    }
+
+    with app_module.app.test_request_context('/api'):
+        body = app_module.jsonify(payload).get_data()
+
+    # Naive values are UTC, the same instant Flask's HTTP-date format sent.
+    assert body == (
+        b'{"aware":"2026-07-02T18:30:00+08:00","day":"2026-07-02",'
+        b'"naive":"2026-07-02T10:30:00+00:00"}\n'
+    )
+
+
+def test_metrics_endpoint_reports_api_events_and_requires_token(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'APP_METRICS', app_module.AppMetrics())
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-token')
+    client = make_client()
+
+    def handler(data, method):
+        if data.get('fail'):
+            return app_module.json_error('bad input', 400)
+        return app_module.jsonify({'success': True})
+
+    monkeypatch.setitem(app_module.API_EVENTS, 9301, app_module.api_event('test_metrics', handler))
+
+    # A WSGI server closes every response; the in-flight gauge drops on close.
+    client.post('/api', json={'e': 9301}).close()
+    client.post('/api', json={'e': 9301, 'd': {'fail': True}}).close()
+    client.post('/api', json={'b': [{'e': 9301}, {'e': 9999}]}).close()
+
+    for headers in ({}, {'Authorization': 'Bearer wrong'}):
+        with client.get('/metrics', headers=headers) as rejected:
+            assert rejected.status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'vc_api_events_total{event="test_metrics",status="200"} 2' in body
+    assert 'vc_api_events_total{event="test_metrics",status="400"} 1' in body
+    assert 'vc_api_events_total{event="unknown",status="400"} 1' in body
+    assert 'vc_api_event_duration_seconds_count{event="test_metrics"} 3' in body
+    assert 'vc_http_requests_total{endpoint="api_handler",method="POST",status="200"} 2' in body
+    assert 'vc_http_requests_in_flight 1' in body
+    assert 'vc_db_queries_per_request_count{endpoint="api_handler"} 3' in body
+
+
+def test_in_flight_gauge_covers_generator_bodies_until_the_response_closes(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    metrics = app_module.AppMetrics()
+    monkeypatch.setattr(app_module, 'APP_METRICS', metrics)
+    observed = []
+
+    def body():
+        observed.append(metrics.http_in_flight.samples[()])
+        yield b'chunk'
+
+    def handler(data, method):
+        return app_module.app.response_class(body(), mimetype='text/plain')
+
+    monkeypatch.setitem(app_module.API_EVENTS, 9302, app_module.api_event('test_stream', handler))
+    response = make_client().post('/api', json={'e': 9302})
+
+    assert response.get_data() == b'chunk'
+    assert observed == [1]
+    response.close()
+    assert metrics.http_in_flight.samples[()] == 0
+
+
+def test_metrics_endpoint_can_be_disabled(monkeypatch):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'METRICS_ENABLED', False)
+
+    assert make_client().get('/metrics').status_code == 404
+
+
+def test_server_timing_reports_request_queries_and_slow_queries_are_logged(monkeypatch, caplog):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'DB_SERVER_TIMING', True)
+    monkeypatch.setattr(app_module, 'DB_SLOW_QUERY_MS', 1)
+    client = make_client()
+
+    def handler(data, method):
+        app_module.record_db_query(app_module.database.QueryRecord('SELECT ?', 0.0005, 1))
+        app_module.record_db_query(app_module.database.QueryRecord('SELECT * FROM movies', 0.002, 40))
+        return app_module.jsonify({'success': True})
+
+    monkeypatch.setitem(app_module.API_EVENTS, 9302, app_module.api_event('test_server_timing', handler))
+
+    with caplog.at_level('WARNING', logger=app_module.logger.name):
+        response = client.post('/api', json={'e': 9302})
+
+    assert response.headers['Server-Timing'] == 'db;dur=2.5;desc="2 queries"'
+    slow_logs = [record.getMessage() for record in caplog.records if record.getMessage().startswith('Slow query')]
+    assert slow_logs == ['Slow query (2.0 ms, 40 rows): SELECT * FROM movies']
+
+    monkeypatch.setattr(app_module, 'DB_SERVER_TIMING', False)
+    assert 'Server-Timing' not in client.post('/api', json={'e': 9302}).headers
+
+
+def test_request_profiling_requires_the_profile_token(monkeypatch, tmp_path):
+    monkeypatch.setenv('APP_ACCESS_TOKEN', '')
+    monkeypatch.setattr(app_module, 'PROFILE_TOKEN', 'profile-secret')
+    monkeypatch.setattr(app_module, 'PROFILE_STORE', app_module.ProfileStore(str(tmp_path)))
+    client = make_client()
+
+    monkeypatch.setitem(
+        app_module.API_EVENTS,
+        9303,
+        app_module.api_event('test_profile', lambda data, method: app_module.jsonify({'success': True}))
+    )
+
+    assert 'X-Profile' not in client.post('/api', json={'e': 9303}, headers={'X-Profile-Token': 'wrong'}).headers
+    assert list(tmp_path.iterdir()) == []
+
+    response = client.post('/api', json={'e': 9303}, headers={'X-Profile-Token': 'profile-secret'})
+
+    filename = response.headers['X-Profile']
+    assert '-api_handler-test_profile-' in filename
+    assert [path.name for path in tmp_path.iterdir()] == [filename]
@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from video_collection.task_scheduler import CronExpression, TaskScheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(clock, state=None, lock_factory=None):
+    options = {'lock_factory': lock_factory} if lock_factory else {}
+    return TaskScheduler(app_module.logger, state=state, clock=clock, **options)
+
+
+def test_cron_expression_finds_next_matching_minute():
+    now = datetime(2026, 7, 1, 3, 30, 15)  # Wednesday
+
+    assert CronExpression('30 3 * * *').next_after(now) == datetime(2026, 7, 2, 3, 30)
+    assert CronExpression('*/15 * * * *').next_after(now) == datetime(2026, 7, 1, 3, 45)
+    assert CronExpression('0 9 * * mon-fri').next_after(datetime(2026, 7, 3, 10, 0)) == datetime(2026, 7, 6, 9, 0)
+    assert CronExpression('@weekly').next_after(now) == datetime(2026, 7, 5, 0, 0)
+    assert CronExpression('0 0 31 feb,mar *').next_after(now) == datetime(2027, 3, 31, 0, 0)
+    # Both day fields restricted: either one matching is enough.
+    assert CronExpression('0 0 15 * 1').next_after(now) == datetime(2026, 7, 6, 0, 0)
+
+
+@pytest.mark.parametrize('expression', ['', '* * * *', '61 * * * *', '0 0 30 2 *', '*/0 * * * *', 'x * * * *'])
+def test_cron_expression_rejects_invalid_schedules(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression).next_after(datetime(2026, 1, 1))
+
+
+def test_scheduler_runs_due_tasks_and_records_outcome():
+    clock = FakeClock(datetime(2026, 7, 1, 3, 0))
+    scheduler = make_scheduler(clock)
+    calls = []
+    scheduler.add_task('hourly', '0 * * * *', lambda: calls.append(clock.now) or 'done')
+    scheduler.add_task('broken', '30 4 * * *', lambda: 1 / 0)
+
+    assert scheduler.run_pending() == []
+    clock.now = datetime(2026, 7, 1, 4, 0, 1)
+    assert scheduler.run_pending() == ['hourly']
+    assert scheduler.run_pending() == []
+    clock.now = datetime(2026, 7, 1, 4, 30)
+    assert scheduler.run_pending() == ['broken']
+
+    status = {task['name']: task for task in scheduler.status()}
+    assert calls == [datetime(2026, 7, 1, 4, 0, 1)]
+    assert status['hourly']['last_result'] == 'success'
+    assert status['hourly']['last_message'] == 'done'
+    assert status['hourly']['last_duration_seconds'] >= 0
+    assert status['hourly']['next_run_at'] == '2026-07-01 05:00:00'
+    assert status['broken']['last_result'] == 'failed'
+    assert status['broken']['last_message'] == 'division by zero'
+    assert status['broken']['next_run_at'] == '2026-07-02 04:30:00'
+
+
+def test_scheduler_catches_up_missed_run_once():
+    clock = FakeClock(datetime(2026, 7, 3, 12, 0))
+    state = {'nightly': {'last_slot': datetime(2026, 7, 1, 3, 30).isoformat()}}
+    scheduler = make_scheduler(clock, state=state)
+    calls = []
+    scheduler.add_task('nightly', '30 3 * * *', lambda: calls.append(clock.now))
+    scheduler.add_task('fresh', '30 3 * * *', lambda: calls.append('fresh'))
+
+    assert scheduler.run_pending() == ['nightly']
+    assert scheduler.run_pending() == []
+    assert calls == [clock.now]
+    assert state['nightly']['last_slot'] == datetime(2026, 7, 2, 3, 30).isoformat()
+    assert scheduler.tasks['nightly'].next_run_at >= datetime(2026, 7, 4, 3, 30)
+
+
+def test_scheduler_jitter_is_bounded_and_identical_across_workers():
+    clock = FakeClock(datetime(2026, 7, 1, 0, 0))
+    first = make_scheduler(clock).add_task('backup', '30 3 * * *', lambda: None, jitter_seconds=120)
+    second = make_scheduler(clock).add_task('backup', '30 3 * * *', lambda: None, jitter_seconds=120)
+    slot = datetime(2026, 7, 1, 3, 30)
+
+    first.plan(slot)
+    second.plan(slot)
+
+    assert first.next_run_at == second.next_run_at
+    assert slot <= first.next_run_at <= slot + timedelta(seconds=120)
+
+
+def test_scheduler_runs_each_slot_in_only_one_worker():
+    clock = FakeClock(datetime(2026, 7, 1, 3, 29))
+    state = {}
+    held = set()
+    calls = []
+
+    @contextmanager
+    def advisory_lock(name):
+        acquired = name not in held
+        held.add(name)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                held.discard(name)
+
+    workers = [make_scheduler(clock, state=state, lock_factory=advisory_lock) for _ in range(2)]
+    for index, worker in enumerate(workers):
+        worker.add_task('backup', '30 3 * * *', lambda index=index: calls.append(index))
+        worker.run_pending()
+
+    clock.now = datetime(2026, 7, 1, 3, 30)
+    held.add('backup')
+    workers[0].run_pending()
+    held.clear()
+    workers[1].run_pending()
+    workers[0].run_pending()
+
+    assert calls == [1]
+    assert state['backup']['run_count'] == 1
+
+
+def test_app_registers_configured_maintenance_tasks(monkeypatch):
+    scheduler = make_scheduler(FakeClock(datetime(2026, 7, 1)))
+    monkeypatch.setattr(app_module, 'task_scheduler', scheduler)
+    monkeypatch.setattr(app_module, 'SCHEDULER_ORPHAN_CLEANUP_CRON', '')
+    monkeypatch.setattr(app_module, 'SCHEDULER_CACHE_REFRESH_CRON', 'not a cron')
+    monkeypatch.setattr(app_module.backup_service, 'schedule_enabled_getter', lambda: True)
+    monkeypatch.setattr(app_module.backup_service, 'schedule_cron_getter', lambda: '0 */6 * * *')
+
+    app_module.register_scheduled_tasks()
+
+    assert list(scheduler.tasks) == ['backup', 'verify_backups', 'prewarm_covers']
+    assert str(scheduler.tasks['backup'].schedule) == '0 */6 * * *'
+    assert app_module.get_scheduled_backup_status()['schedule_cron'] == '0 */6 * * *'
+
+
+def test_scheduler_backs_off_when_task_lock_cannot_be_taken():
+    clock = FakeClock(datetime(2026, 7, 1, 3, 30))
+    attempts = []
+    lock_available = [False]
+    calls = []
+
+    @contextmanager
+    def flaky_lock(name):
+        attempts.append(clock.now)
+        if not lock_available[0]:
+            raise ConnectionError('database unavailable')
+        yield True
+
+    scheduler = make_scheduler(clock, lock_factory=flaky_lock)
+    task = scheduler.add_task('backup', '30 3 * * *', lambda: calls.append(clock.now))
+    task.plan(datetime(2026, 7, 1, 3, 30))
+
+    assert scheduler.run_pending() == []
+    assert scheduler.run_pending() == []
+    assert len(attempts) == 1
+    assert task.next_run_at == datetime(2026, 7, 1, 3, 30, 30)
+    assert scheduler.seconds_until_next_run() == 30
+    status = scheduler.status()[0]
+    assert status['last_result'] == 'failed'
+    assert status['last_message'] == 'database unavailable'
+
+    clock.now = task.next_run_at
+    assert scheduler.run_pending() == []
+    assert task.next_run_at == clock.now + timedelta(seconds=60)
+
+    lock_available[0] = True
+    clock.now = task.next_run_at
+    assert scheduler.run_pending() == ['backup']
+    assert calls == [clock.now]
+    assert task.failures == 0
+    assert task.next_run_at == datetime(2026, 7, 2, 3, 30)
+    assert scheduler.status()[0]['last_result'] == 'success'
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import secrets
+
+
+DATA_VERSION_EPOCH_KEY = 'epoch'
+DATA_VERSION_SCOPES = ('catalog', 'movies')
+API_CACHE_CONTROL = 'private, no-cache'
+
+
+class DataVersions:
+    """Monotonic per-scope data versions kept in shared state.
+
+    Write events bump the scopes they touch; read events fold the versions
+    of the scopes they read into their ETag. The epoch changes on every
+    application start so ETags never survive a restart, when the database
+    may have been changed behind the app's back.
+    """
+
+    def __init__(self, store, lock):
+        self.store = store
+        self.lock = lock
+
+    def start_epoch(self):
+        with self.lock:
+            self.store[DATA_VERSION_EPOCH_KEY] = secrets.token_hex(8)
+
+    def bump(self, *scopes):
+        with self.lock:
+            for scope in scopes:
+                self.store[scope] = int(self.store.get(scope, 0)) + 1
+
+    def snapshot(self, scopes):
+        with self.lock:
+            epoch = self.store.get(DATA_VERSION_EPOCH_KEY)
+            if epoch is None:
+                epoch = self.store[DATA_VERSION_EPOCH_KEY] = secrets.token_hex(8)
+            return [epoch] + [int(self.store.get(scope, 0)) for scope in scopes]
+
+
+def api_response_etag(event_id, method, data, versions, vary=()):
+    """Opaque validator for one event call; sent as a weak ETag."""
+    key = json.dumps([event_id, method, data, versions, list(vary)], sort_keys=True, default=str)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+__all__ = [
+    'API_CACHE_CONTROL',
+    'DATA_VERSION_SCOPES',
+    'DataVersions',
+    'api_response_etag',
+]
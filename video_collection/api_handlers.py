@@ -25,12 +25,17 @@ class ApiHandlerDependencies:
     resolve_tag_ids: Any
     resolve_rating_dimension_id: Any
     hydrate_movie_rows: Any
+    search_response_cache: Any
+    get_search_data_version: Any
+    json_body_response: Any
     access_token_required: Any
     get_csrf_token: Any
     api_event_metadata: Any
     get_service_url: Any
     emby_request: Any
     get_emby_user_id: Any
+    get_emby_playback_mode: Any
+    sign_emby_direct_url: Any
     get_movie_image_filenames: Any
     get_database_upgrade_diagnostics: Any
     check_database_connection: Any
@@ -39,12 +44,20 @@ class ApiHandlerDependencies:
     list_database_backups: Any
     backup_feature_enabled: Any
     db_maintenance_lock: Any
+    maintenance_jobs: Any
+    maintenance_job_cancelled_error: Any
     run_database_backup: Any
     database_upgrade_command_hint: Any
     database_upgrade_required_error: Any
+    backup_in_use_error: Any
     safe_backup_filename: Any
     get_backup_file_path: Any
     run_backup_restore: Any
+    preview_backup_restore: Any
+    verify_backup: Any
+    get_scheduled_task_status: Any
+    list_request_profiles: Any
+    get_request_profiling_status: Any
     delete_database_backup_file: Any
     normalize_video_relative_path: Any
     get_video_library_abs_path: Any
@@ -54,10 +67,14 @@ class ApiHandlerDependencies:
     allowed_file: Any
     process_image: Any
     process_image_variants: Any
+    process_pil_image_variants: Any
     save_image_variants: Any
     get_upload_file_path: Any
     get_upload_folder: Any
     external_image_get: Any
+    external_image_session_get: Any
+    wtl_status_cache: Any
+    wtl_status_lock: Any
     get_max_image_upload_bytes: Any
 
 
@@ -7,22 +7,31 @@ import socket
 import threading
 import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 from urllib.parse import unquote
 from urllib.parse import urlsplit
 
-from PIL import Image, UnidentifiedImageError
+from PIL import Image, ImageFile
+
+from video_collection.pinned_http import pinned_url
 
 
 EXTERNAL_IMAGE_CHUNK_BYTES = 64 * 1024
 EXTERNAL_IMAGE_USER_AGENT = 'video-collection-image-import/1.0'
 EXTERNAL_IMAGE_SAFE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9._-]+')
+EXTERNAL_IMAGE_BATCH_LIMIT = 20
+EXTERNAL_IMAGE_FETCH_WORKERS = 4
+EXTERNAL_IMAGE_DNS_CACHE_SECONDS = 60
+EXTERNAL_IMAGE_DNS_CACHE_MAX_ENTRIES = 256
+EXTERNAL_IMAGE_DNS_CACHE = {}
+EXTERNAL_IMAGE_DNS_LOCK = threading.Lock()
 WTL_STATUS_URL = 'https://whatslink.info/'
 WTL_STATUS_CACHE_SECONDS = 60
 WTL_STATUS_TIMEOUT_SECONDS = 3
 WTL_STATUS_USER_AGENT = 'video-collection-wtl-status/1.0'
-WTL_STATUS_CACHE = {}
-WTL_STATUS_LOCK = threading.Lock()
+WTL_STATUS_PROBE_CLAIM_SECONDS = WTL_STATUS_TIMEOUT_SECONDS + 2
+WTL_STATUS_PROBE_POLL_SECONDS = 0.1
 EMBY_ITEM_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
 EMBY_CANDIDATE_LIMIT = 8
 
@@ -50,12 +59,17 @@ class ApiIntegrationHandlersMixin:
             'streamUrl': f'/emby/stream/{quote(item_id, safe="")}'
         }
 
-    def emby_playback_payload(self, item_id, name=''):
+    def emby_playback_payload(self, item_id, name='', requested_mode=None):
         safe_id = quote(str(item_id), safe='')
+        mode = self.dependencies.get_emby_playback_mode(requested_mode)
+        stream_url = f'/emby/stream/{safe_id}'
+        if mode == 'direct':
+            stream_url = self.dependencies.sign_emby_direct_url(str(item_id))
         return {
             'id': str(item_id),
             'name': name or '',
-            'streamUrl': f'/emby/stream/{safe_id}'
+            'mode': mode,
+            'streamUrl': stream_url
         }
 
     def get_movie_emby_item_id(self, title):
@@ -137,6 +151,7 @@ class ApiIntegrationHandlersMixin:
     def resolve_movie_emby_playback_handler(self, data, method='POST'):
         title = str((data or {}).get('title', '')).strip()
         refresh = bool((data or {}).get('refresh'))
+        playback_mode = (data or {}).get('playback_mode')
         if not title:
             return self.dependencies.jsonify({'success': False, 'message': 'Movie title is required'}), 400
 
@@ -145,7 +160,10 @@ class ApiIntegrationHandlersMixin:
             if cached_item_id and not refresh:
                 return self.dependencies.jsonify({
                     'success': True,
-                    'data': {'status': 'linked', 'playback': self.emby_playback_payload(cached_item_id, title)}
+                    'data': {
+                        'status': 'linked',
+                        'playback': self.emby_playback_payload(cached_item_id, title, playback_mode)
+                    }
                 })
 
             if cached_item_id:
@@ -155,7 +173,7 @@ class ApiIntegrationHandlersMixin:
                         'success': True,
                         'data': {
                             'status': 'linked',
-                            'playback': self.emby_playback_payload(cached_item_id, cached_item.get('Name', title))
+                            'playback': self.emby_playback_payload(cached_item_id, cached_item.get('Name', title), playback_mode)
                         }
                     })
                 if status_code != 404:
@@ -183,7 +201,10 @@ class ApiIntegrationHandlersMixin:
                     return self.dependencies.jsonify({'success': False, 'message': 'Movie was not found'}), 404
                 return self.dependencies.jsonify({
                     'success': True,
-                    'data': {'status': 'linked', 'playback': self.emby_playback_payload(matched['id'], matched['name'])}
+                    'data': {
+                        'status': 'linked',
+                        'playback': self.emby_playback_payload(matched['id'], matched['name'], playback_mode)
+                    }
                 })
 
             return self.dependencies.jsonify({
@@ -200,6 +221,7 @@ class ApiIntegrationHandlersMixin:
     def link_movie_emby_handler(self, data, method='POST'):
         title = str((data or {}).get('title', '')).strip()
         item_id = str((data or {}).get('emby_item_id', '')).strip()
+        playback_mode = (data or {}).get('playback_mode')
         if not title or not EMBY_ITEM_ID_PATTERN.fullmatch(item_id):
             return self.dependencies.jsonify({'success': False, 'message': 'Invalid movie link'}), 400
 
@@ -214,7 +236,7 @@ class ApiIntegrationHandlersMixin:
                 return self.dependencies.jsonify({'success': False, 'message': 'Movie was not found'}), 404
             return self.dependencies.jsonify({
                 'success': True,
-                'data': {'playback': self.emby_playback_payload(item_id, item.get('Name', title))}
+                'data': {'playback': self.emby_playback_payload(item_id, item.get('Name', title), playback_mode)}
             })
         except Exception as error:
             self.dependencies.log_exception('Link movie Emby', error)
@@ -245,17 +267,37 @@ class ApiIntegrationHandlersMixin:
         except Exception as e:
                 return self.dependencies.json_exception('Get services config', e)
 
+    def claim_wtl_status_probe(self, force):
+        """Return a cached status payload, or ``None`` once this caller owns the probe.
+
+        The ``probing_until`` marker in the shared cache keeps one probe in
+        flight across threads and workers; other callers wait for its result.
+        A marker left by a crashed worker expires after the probe timeout.
+        """
+        status_cache = self.dependencies.wtl_status_cache
+        requested_at = time.time()
+        wait_deadline = time.monotonic() + WTL_STATUS_PROBE_CLAIM_SECONDS
+        while True:
+            with self.dependencies.wtl_status_lock:
+                now = time.time()
+                cached_result = status_cache.get('result')
+                cached_at = status_cache.get('cached_at', 0)
+                fresh = cached_result and 0 <= now - cached_at < WTL_STATUS_CACHE_SECONDS
+                if fresh and (not force or cached_at >= requested_at):
+                    payload = dict(cached_result)
+                    payload['cached'] = True
+                    return payload
+                if status_cache.get('probing_until', 0) <= now or time.monotonic() >= wait_deadline:
+                    status_cache['probing_until'] = now + WTL_STATUS_PROBE_CLAIM_SECONDS
+                    return None
+            time.sleep(WTL_STATUS_PROBE_POLL_SECONDS)
+
     def check_wtl_status_handler(self, data, method='GET'):
         force = bool((data or {}).get('force'))
-        now = time.monotonic()
-
-        with WTL_STATUS_LOCK:
-            cached_result = WTL_STATUS_CACHE.get('result')
-            cached_at = WTL_STATUS_CACHE.get('checked_monotonic', 0)
-            if cached_result and not force and now - cached_at < WTL_STATUS_CACHE_SECONDS:
-                payload = dict(cached_result)
-                payload['cached'] = True
-                return self.dependencies.jsonify(payload)
+        status_cache = self.dependencies.wtl_status_cache
+        cached_payload = self.claim_wtl_status_probe(force)
+        if cached_payload is not None:
+            return self.dependencies.jsonify(cached_payload)
 
         response = None
         started_at = time.monotonic()
@@ -304,9 +346,10 @@ class ApiIntegrationHandlersMixin:
             if callable(close):
                 close()
 
-        with WTL_STATUS_LOCK:
-            WTL_STATUS_CACHE['result'] = dict(payload)
-            WTL_STATUS_CACHE['checked_monotonic'] = time.monotonic()
+        with self.dependencies.wtl_status_lock:
+            status_cache['result'] = dict(payload)
+            status_cache['cached_at'] = time.time()
+            status_cache.pop('probing_until', None)
         return self.dependencies.jsonify(payload)
 
     # 相似度计算相关代码
@@ -366,53 +409,87 @@ class ApiIntegrationHandlersMixin:
             return self.dependencies.json_exception('Emby search', e, 'Emby search failed')
 
     def external_image_host_is_public(self, hostname, port=443):
+        return self.external_image_public_address(hostname, port) is not None
+
+    def external_image_public_address(self, hostname, port=443):
+        """Return the address to connect to for ``hostname``, or ``None`` if it is not public.
+
+        Every resolved address must be global. The caller connects to the
+        returned address rather than resolving the name again, so a cached
+        answer cannot be swapped for an internal one between check and
+        connect.
+        """
         normalized_host = (hostname or '').strip().strip('[]')
         if not normalized_host:
-            return False
+            return None
         if normalized_host.lower() in {'localhost'} or normalized_host.lower().endswith('.localhost'):
-            return False
+            return None
 
         try:
             candidate_ip = ipaddress.ip_address(normalized_host)
-            return candidate_ip.is_global
+            return str(candidate_ip) if candidate_ip.is_global else None
         except ValueError:
             pass
 
         try:
             idna_host = normalized_host.encode('idna').decode('ascii')
-            address_infos = socket.getaddrinfo(idna_host, port or 443, type=socket.SOCK_STREAM)
+            resolved_addresses = self.resolve_external_image_host(idna_host, port or 443)
         except (OSError, UnicodeError):
-            return False
+            return None
 
-        resolved_addresses = {
-            info[4][0].split('%', 1)[0]
-            for info in address_infos
-            if info and len(info) > 4 and info[4]
-        }
         if not resolved_addresses:
-            return False
+            return None
 
         try:
-            return all(ipaddress.ip_address(address).is_global for address in resolved_addresses)
+            if not all(ipaddress.ip_address(address).is_global for address in resolved_addresses):
+                return None
         except ValueError:
-            return False
+            return None
+        return resolved_addresses[0]
+
+    def resolve_external_image_host(self, idna_host, port):
+        cache_key = (idna_host.lower(), port)
+        now = time.monotonic()
+        with EXTERNAL_IMAGE_DNS_LOCK:
+            cached = EXTERNAL_IMAGE_DNS_CACHE.get(cache_key)
+            if cached and now - cached[0] < EXTERNAL_IMAGE_DNS_CACHE_SECONDS:
+                return cached[1]
+
+        address_infos = socket.getaddrinfo(idna_host, port, type=socket.SOCK_STREAM)
+        resolved_addresses = tuple(dict.fromkeys(
+            info[4][0].split('%', 1)[0]
+            for info in address_infos
+            if info and len(info) > 4 and info[4]
+        ))
+
+        with EXTERNAL_IMAGE_DNS_LOCK:
+            if len(EXTERNAL_IMAGE_DNS_CACHE) >= EXTERNAL_IMAGE_DNS_CACHE_MAX_ENTRIES:
+                for key, (cached_at, _) in list(EXTERNAL_IMAGE_DNS_CACHE.items()):
+                    if now - cached_at >= EXTERNAL_IMAGE_DNS_CACHE_SECONDS:
+                        EXTERNAL_IMAGE_DNS_CACHE.pop(key, None)
+                if len(EXTERNAL_IMAGE_DNS_CACHE) >= EXTERNAL_IMAGE_DNS_CACHE_MAX_ENTRIES:
+                    EXTERNAL_IMAGE_DNS_CACHE.clear()
+            EXTERNAL_IMAGE_DNS_CACHE[cache_key] = (now, resolved_addresses)
+        return resolved_addresses
 
     def validate_external_image_url(self, url):
+        """Return ``(parsed_url, address)`` for a safe HTTPS image URL, or ``(None, None)``."""
         try:
             parsed = urlsplit(url)
             port = parsed.port
         except ValueError:
-            return None
+            return None, None
 
         if parsed.scheme.lower() != 'https':
-            return None
+            return None, None
         if not parsed.hostname or parsed.username or parsed.password:
-            return None
+            return None, None
         if port not in (None, 443):
-            return None
-        if not self.external_image_host_is_public(parsed.hostname, port or 443):
-            return None
-        return parsed
+            return None, None
+        address = self.external_image_public_address(parsed.hostname, port or 443)
+        if not address:
+            return None, None
+        return parsed, address
 
     def external_image_filename(self, parsed_url):
         basename = os.path.basename(unquote(parsed_url.path or '')) or 'wtl-screenshot'
@@ -420,7 +497,22 @@ class ApiIntegrationHandlersMixin:
         safe_stem = EXTERNAL_IMAGE_SAFE_NAME_PATTERN.sub('_', stem).strip('._-') or 'wtl-screenshot'
         return f'{safe_stem[:80]}.jpg'
 
-    def read_external_image_response(self, response, max_bytes):
+    def external_image_dimensions_error(self, image):
+        width, height = image.size
+        if not width or not height:
+            return 400, 'External image is invalid or unsupported'
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        if max_pixels and width * height > max_pixels:
+            return 413, 'External image dimensions are too large'
+        return None, None
+
+    def decode_external_image_response(self, response, max_bytes):
+        """Feed the response body into an incremental parser and return the decoded image.
+
+        The declared size, content type and (as soon as the header has been
+        parsed) the pixel dimensions are checked before any further body is
+        read, so oversized images are rejected without being buffered.
+        """
         content_length = response.headers.get('Content-Length', '')
         if content_length:
             try:
@@ -433,93 +525,118 @@ class ApiIntegrationHandlersMixin:
         if not content_type.startswith('image/') or content_type == 'image/svg+xml':
             return None, 400, 'External URL did not return a supported image'
 
-        image_bytes = bytearray()
-        for chunk in response.iter_content(EXTERNAL_IMAGE_CHUNK_BYTES):
-            if not chunk:
-                continue
-            image_bytes.extend(chunk)
-            if len(image_bytes) > max_bytes:
-                return None, 413, 'External image is too large'
-
-        if not image_bytes:
-            return None, 400, 'External image was empty'
-        return bytes(image_bytes), None, None
+        parser = ImageFile.Parser()
+        received_bytes = 0
+        header_checked = False
+        try:
+            for chunk in response.iter_content(EXTERNAL_IMAGE_CHUNK_BYTES):
+                if not chunk:
+                    continue
+                received_bytes += len(chunk)
+                if received_bytes > max_bytes:
+                    return None, 413, 'External image is too large'
+                parser.feed(chunk)
+                if not header_checked and parser.image is not None:
+                    header_checked = True
+                    error_status, error_message = self.external_image_dimensions_error(parser.image)
+                    if error_status:
+                        return None, error_status, error_message
+
+            if not received_bytes:
+                return None, 400, 'External image was empty'
+            image = parser.close()
+            if not header_checked:
+                error_status, error_message = self.external_image_dimensions_error(image)
+                if error_status:
+                    return None, error_status, error_message
+            image.load()
+        except Image.DecompressionBombError:
+            return None, 413, 'External image dimensions are too large'
+        except (OSError, ValueError, SyntaxError):
+            return None, 400, 'External image is invalid or unsupported'
+        return image, None, None
 
-    def external_image_bytes_to_jpeg_data_url(self, image_bytes, max_bytes):
+    def external_image_to_jpeg_data_url(self, image, max_bytes):
         try:
-            with Image.open(io.BytesIO(image_bytes)) as image:
-                image.load()
-                if image.mode not in {'RGB', 'L'}:
-                    image = image.convert('RGB')
-                elif image.mode == 'L':
-                    image = image.convert('RGB')
-
-                output = io.BytesIO()
-                image.save(output, format='JPEG', quality=90, optimize=True)
-        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            output = io.BytesIO()
+            image.save(output, format='JPEG', quality=90, optimize=True)
+        except (OSError, ValueError):
             return None, 400, 'External image is invalid or unsupported'
 
-        encoded_bytes = output.getvalue()
-        if len(encoded_bytes) > max_bytes:
+        if output.tell() > max_bytes:
             return None, 413, 'External image is too large'
 
-        encoded = base64.b64encode(encoded_bytes).decode('ascii')
+        encoded = base64.b64encode(output.getbuffer()).decode('ascii')
         return f'data:image/jpeg;base64,{encoded}', None, None
 
+    def download_external_image(self, image_url, max_bytes, http_get):
+        parsed_url, address = self.validate_external_image_url(image_url)
+        if not parsed_url:
+            return None, None, 400, 'Unsupported external image URL'
+
+        headers = {
+            'Accept': 'image/avif,image/webp,image/jpeg,image/png,image/*;q=0.8',
+            'User-Agent': EXTERNAL_IMAGE_USER_AGENT
+        }
+        request_url = image_url
+        try:
+            ipaddress.ip_address(parsed_url.hostname)
+        except ValueError:
+            # 连接已校验过的地址，不再重新解析域名；原主机名用于 Host、SNI 和证书校验
+            request_url = pinned_url(parsed_url, address)
+            headers['Host'] = parsed_url.hostname.encode('idna').decode('ascii')
+
+        response = http_get(
+            request_url,
+            stream=True,
+            timeout=(5, 15),
+            allow_redirects=False,
+            headers=headers
+        )
+
+        try:
+            status_code = getattr(response, 'status_code', 0)
+            if status_code < 200 or status_code >= 300:
+                return parsed_url, None, 502, f'External image fetch failed: HTTP {status_code}'
+
+            image, error_status, error_message = self.decode_external_image_response(response, max_bytes)
+            return parsed_url, image, error_status, error_message
+        finally:
+            close = getattr(response, 'close', None)
+            if callable(close):
+                close()
+
     def fetch_external_image_handler(self, data, method='POST'):
         try:
             image_url = (data or {}).get('url', '').strip()
-            parsed_url = self.validate_external_image_url(image_url)
-            if not parsed_url:
-                return self.dependencies.jsonify({
-                    'success': False,
-                    'message': 'Unsupported external image URL'
-                }), 400
-
             max_bytes = int(self.dependencies.get_max_image_upload_bytes())
-            response = self.dependencies.external_image_get(
+            parsed_url, image, error_status, error_message = self.download_external_image(
                 image_url,
-                stream=True,
-                timeout=(5, 15),
-                allow_redirects=False,
-                headers={
-                    'Accept': 'image/avif,image/webp,image/jpeg,image/png,image/*;q=0.8',
-                    'User-Agent': EXTERNAL_IMAGE_USER_AGENT
-                }
+                max_bytes,
+                self.dependencies.external_image_session_get
             )
+            if error_status:
+                return self.dependencies.jsonify({
+                    'success': False,
+                    'message': error_message
+                }), error_status
 
-            try:
-                status_code = getattr(response, 'status_code', 0)
-                if status_code < 200 or status_code >= 300:
-                    return self.dependencies.jsonify({
-                        'success': False,
-                        'message': f'External image fetch failed: HTTP {status_code}'
-                    }), 502
-
-                image_bytes, error_status, error_message = self.read_external_image_response(response, max_bytes)
-                if error_status:
-                    return self.dependencies.jsonify({
-                        'success': False,
-                        'message': error_message
-                    }), error_status
-
-                data_url, error_status, error_message = self.external_image_bytes_to_jpeg_data_url(image_bytes, max_bytes)
-                if error_status:
-                    return self.dependencies.jsonify({
-                        'success': False,
-                        'message': error_message
-                    }), error_status
-
+            data_url, error_status, error_message = self.external_image_to_jpeg_data_url(image, max_bytes)
+            if error_status:
                 return self.dependencies.jsonify({
-                    'success': True,
-                    'data_url': data_url,
-                    'filename': self.external_image_filename(parsed_url),
-                    'content_type': 'image/jpeg'
-                })
-            finally:
-                close = getattr(response, 'close', None)
-                if callable(close):
-                    close()
+                    'success': False,
+                    'message': error_message
+                }), error_status
+
+            return self.dependencies.jsonify({
+                'success': True,
+                'data_url': data_url,
+                'filename': self.external_image_filename(parsed_url),
+                'content_type': 'image/jpeg'
+            })
         except Exception as e:
             self.dependencies.logger.warning("External image import failed: %s", e)
             return self.dependencies.jsonify({
@@ -527,6 +644,79 @@ class ApiIntegrationHandlersMixin:
                 'message': 'External image fetch failed'
             }), 502
 
+    def store_external_image(self, image):
+        try:
+            processed_images = self.dependencies.process_pil_image_variants(image)
+        except (OSError, ValueError):
+            return None, 400, 'External image is invalid or unsupported'
+
+        filename = self.new_upload_image_filename()
+        return self.dependencies.save_image_variants(filename, processed_images), None, None
+
+    def import_external_image(self, image_url, max_bytes, store):
+        result = {'url': image_url, 'success': False}
+        try:
+            parsed_url, image, error_status, error_message = self.download_external_image(
+                image_url,
+                max_bytes,
+                self.dependencies.external_image_session_get
+            )
+            if not error_status:
+                if store:
+                    filename, error_status, error_message = self.store_external_image(image)
+                    if not error_status:
+                        result.update({'success': True, 'filename': filename})
+                        return result
+                else:
+                    data_url, error_status, error_message = self.external_image_to_jpeg_data_url(image, max_bytes)
+                    if not error_status:
+                        result.update({
+                            'success': True,
+                            'data_url': data_url,
+                            'filename': self.external_image_filename(parsed_url),
+                            'content_type': 'image/jpeg'
+                        })
+                        return result
+        except Exception as e:
+            self.dependencies.logger.warning("External image import failed for %s: %s", image_url, e)
+            error_status, error_message = 502, 'External image fetch failed'
+
+        result.update({'status': error_status, 'message': error_message})
+        return result
+
+    def fetch_external_images_handler(self, data, method='POST'):
+        image_urls = (data or {}).get('urls')
+        if (
+            not isinstance(image_urls, list)
+            or not image_urls
+            or len(image_urls) > EXTERNAL_IMAGE_BATCH_LIMIT
+            or not all(isinstance(url, str) for url in image_urls)
+        ):
+            return self.dependencies.jsonify({
+                'success': False,
+                'message': f'Provide between 1 and {EXTERNAL_IMAGE_BATCH_LIMIT} image URLs'
+            }), 400
+
+        store = (data or {}).get('store') is True
+        max_bytes = int(self.dependencies.get_max_image_upload_bytes())
+        if store:
+            os.makedirs(self.dependencies.get_upload_folder(), exist_ok=True)
+
+        image_urls = [url.strip() for url in image_urls]
+        worker_count = min(EXTERNAL_IMAGE_FETCH_WORKERS, len(image_urls))
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='external-image') as executor:
+            results = list(executor.map(
+                lambda image_url: self.import_external_image(image_url, max_bytes, store),
+                image_urls
+            ))
+
+        return self.dependencies.jsonify({
+            'success': True,
+            'stored': store,
+            'imported': sum(1 for result in results if result['success']),
+            'results': results
+        })
+
     def check_title_match(self, title1, title2):
         # 转换为小写进行比较
         t1 = title1.lower()
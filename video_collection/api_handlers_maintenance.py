@@ -30,36 +30,85 @@ class ApiMaintenanceHandlersMixin:
         except Exception as e:
             return self.dependencies.json_exception('List database backups', e, '备份列表读取失败')
 
-    def create_db_backup_handler(self, data, method='POST'):
-        if not self.dependencies.backup_feature_enabled():
-            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用备份功能"}), 403
+    def run_maintenance_request(self, data, kind, target, params=None):
+        """Run ``target`` inline, or as a background job when ``data.async`` is set."""
+        if (data or {}).get('async'):
+            job = self.dependencies.maintenance_jobs.start(kind, lambda: target()[0], params)
+            if job is None:
+                return self.dependencies.jsonify({"success": False, "message": "已有数据库维护任务正在执行，请稍后再试"}), 409
+            return self.dependencies.jsonify({"success": True, "job": job.to_dict()}), 202
 
         if not self.dependencies.db_maintenance_lock.acquire(blocking=False):
             return self.dependencies.jsonify({"success": False, "message": "已有数据库维护任务正在执行，请稍后再试"}), 409
 
         try:
-            backup = self.dependencies.run_database_backup()
-            return self.dependencies.jsonify({
+            payload, status = target()
+            return self.dependencies.jsonify(payload), status
+        finally:
+            self.dependencies.db_maintenance_lock.release()
+
+    def database_upgrade_required_payload(self, error):
+        return {
+            "success": False,
+            "message": str(error),
+            "database_upgrade_required": True,
+            "database_upgrade_command": self.dependencies.database_upgrade_command_hint()
+        }
+
+    def perform_db_backup(self, incremental=False):
+        try:
+            backup = self.dependencies.run_database_backup(incremental=incremental)
+            return {
                 "success": True,
-                "message": "完整备份已创建",
+                "message": "增量备份已创建" if backup.get('type') == 'incremental' else "完整备份已创建",
                 "backup": backup,
                 "backups": self.dependencies.list_database_backups()
-            })
+            }, 200
+        except self.dependencies.maintenance_job_cancelled_error:
+            raise
         except FileNotFoundError as e:
             self.dependencies.log_exception('Create database backup', e)
-            return self.dependencies.json_error('数据库备份工具不可用，请确认容器已安装 mariadb-client', 500)
+            return {"success": False, "message": "数据库备份工具不可用，请确认容器已安装 mariadb-client"}, 500
         except self.dependencies.database_upgrade_required_error as e:
             self.dependencies.logger.warning("Create database backup requires MariaDB upgrade: %s", e)
-            return self.dependencies.jsonify({
-                "success": False,
-                "message": str(e),
-                "database_upgrade_required": True,
-                "database_upgrade_command": self.dependencies.database_upgrade_command_hint()
-            }), 500
+            return self.database_upgrade_required_payload(e), 500
         except Exception as e:
-            return self.dependencies.json_exception('Create database backup', e, '数据库备份失败')
-        finally:
-            self.dependencies.db_maintenance_lock.release()
+            self.dependencies.log_exception('Create database backup', e)
+            return {"success": False, "message": "数据库备份失败"}, 500
+
+    def perform_db_restore(self, filename, differential=False):
+        try:
+            pre_restore_backup = self.dependencies.run_database_backup(prefix='pre_restore_')
+            restore_result = self.dependencies.run_backup_restore(filename, differential=differential)
+            return {
+                "success": True,
+                "message": "备份恢复已完成",
+                "pre_restore_backup": pre_restore_backup,
+                "restored_backup": restore_result
+            }, 200
+        except self.dependencies.maintenance_job_cancelled_error:
+            raise
+        except FileNotFoundError as e:
+            self.dependencies.log_exception('Restore database backup', e)
+            return {"success": False, "message": "数据库恢复工具或备份文件不可用"}, 500
+        except self.dependencies.database_upgrade_required_error as e:
+            self.dependencies.logger.warning("Restore pre-backup requires MariaDB upgrade: %s", e)
+            return self.database_upgrade_required_payload(e), 500
+        except Exception as e:
+            self.dependencies.log_exception('Restore database backup', e)
+            return {"success": False, "message": "数据库恢复失败"}, 500
+
+    def create_db_backup_handler(self, data, method='POST'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用备份功能"}), 403
+
+        incremental = bool((data or {}).get('incremental'))
+        return self.run_maintenance_request(
+            data,
+            'backup',
+            lambda: self.perform_db_backup(incremental=incremental),
+            {'incremental': incremental}
+        )
 
     def restore_db_backup_handler(self, data, method='POST'):
         if not self.dependencies.backup_feature_enabled():
@@ -68,40 +117,137 @@ class ApiMaintenanceHandlersMixin:
         data = data or {}
         filename = self.dependencies.safe_backup_filename(data.get('filename', ''))
         confirm = bool(data.get('confirm'))
+        differential = data.get('mode') == 'differential'
+        dry_run = differential and bool(data.get('dry_run'))
         if not filename:
             return self.dependencies.jsonify({"success": False, "message": "备份文件名无效"}), 400
-        if not confirm:
+        if not confirm and not dry_run:
             return self.dependencies.jsonify({"success": False, "message": "请确认后再执行恢复"}), 400
         if not self.dependencies.get_backup_file_path(filename, must_exist=True):
             return self.dependencies.jsonify({"success": False, "message": "备份文件不存在"}), 404
+        if dry_run:
+            try:
+                return self.dependencies.jsonify({
+                    "success": True,
+                    "dry_run": True,
+                    "image_changes": self.dependencies.preview_backup_restore(filename)
+                })
+            except ValueError:
+                return self.dependencies.jsonify({"success": False, "message": "该备份不包含图片清单，无法差异恢复"}), 400
+            except Exception as e:
+                return self.dependencies.json_exception('Preview backup restore', e, '差异恢复预览失败')
 
-        if not self.dependencies.db_maintenance_lock.acquire(blocking=False):
-            return self.dependencies.jsonify({"success": False, "message": "已有数据库维护任务正在执行，请稍后再试"}), 409
+        return self.run_maintenance_request(
+            data,
+            'restore',
+            lambda: self.perform_db_restore(filename, differential=differential),
+            {'filename': filename, 'mode': 'differential' if differential else 'full'}
+        )
+
+    def perform_db_verify(self, filename):
+        try:
+            verification = self.dependencies.verify_backup(filename)
+            return {
+                "success": True,
+                "message": "备份校验通过" if verification['ok'] else "备份校验未通过",
+                "verification": verification
+            }, 200
+        except self.dependencies.maintenance_job_cancelled_error:
+            raise
+        except FileNotFoundError:
+            return {"success": False, "message": "备份文件不存在"}, 404
+        except Exception as e:
+            self.dependencies.log_exception('Verify database backup', e)
+            return {"success": False, "message": "备份校验失败"}, 500
+
+    def verify_db_backup_handler(self, data, method='POST'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用备份校验功能"}), 403
+
+        data = data or {}
+        filename = self.dependencies.safe_backup_filename(data.get('filename', ''))
+        if not filename:
+            return self.dependencies.jsonify({"success": False, "message": "备份文件名无效"}), 400
+        if not self.dependencies.get_backup_file_path(filename, must_exist=True):
+            return self.dependencies.jsonify({"success": False, "message": "备份文件不存在"}), 404
+
+        return self.run_maintenance_request(
+            data,
+            'verify',
+            lambda: self.perform_db_verify(filename),
+            {'filename': filename}
+        )
+
+    def get_scheduled_tasks_handler(self, data, method='GET'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用维护功能"}), 403
 
         try:
-            pre_restore_backup = self.dependencies.run_database_backup(prefix='pre_restore_')
-            restore_result = self.dependencies.run_backup_restore(filename)
             return self.dependencies.jsonify({
                 "success": True,
-                "message": "备份恢复已完成",
-                "pre_restore_backup": pre_restore_backup,
-                "restored_backup": restore_result
+                "tasks": self.dependencies.get_scheduled_task_status()
             })
-        except FileNotFoundError as e:
-            self.dependencies.log_exception('Restore database backup', e)
-            return self.dependencies.json_error('数据库恢复工具或备份文件不可用', 500)
-        except self.dependencies.database_upgrade_required_error as e:
-            self.dependencies.logger.warning("Restore pre-backup requires MariaDB upgrade: %s", e)
+        except Exception as e:
+            return self.dependencies.json_exception('List scheduled tasks', e, '定时任务状态读取失败')
+
+    def list_request_profiles_handler(self, data, method='GET'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用维护功能"}), 403
+
+        filename = str((data or {}).get('filename') or '').strip()
+        try:
+            if filename:
+                return self.dependencies.jsonify({
+                    "success": True,
+                    "filename": filename,
+                    "content": self.dependencies.list_request_profiles(filename)
+                })
             return self.dependencies.jsonify({
-                "success": False,
-                "message": str(e),
-                "database_upgrade_required": True,
-                "database_upgrade_command": self.dependencies.database_upgrade_command_hint()
-            }), 500
+                "success": True,
+                "profiling": self.dependencies.get_request_profiling_status(),
+                "profiles": self.dependencies.list_request_profiles()
+            })
+        except ValueError:
+            return self.dependencies.jsonify({"success": False, "message": "性能分析文件名无效"}), 400
+        except FileNotFoundError:
+            return self.dependencies.jsonify({"success": False, "message": "性能分析文件不存在"}), 404
         except Exception as e:
-            return self.dependencies.json_exception('Restore database backup', e, '数据库恢复失败')
-        finally:
-            self.dependencies.db_maintenance_lock.release()
+            return self.dependencies.json_exception('List request profiles', e, '性能分析记录读取失败')
+
+    def get_maintenance_job_handler(self, data, method='GET'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用维护功能"}), 403
+
+        job_id = str((data or {}).get('job_id') or '').strip()
+        jobs = self.dependencies.maintenance_jobs
+        if job_id:
+            job = jobs.get(job_id)
+            if not job:
+                return self.dependencies.jsonify({"success": False, "message": "维护任务不存在"}), 404
+            return self.dependencies.jsonify({"success": True, "job": job.to_dict()})
+
+        active_job = jobs.active_job()
+        return self.dependencies.jsonify({
+            "success": True,
+            "job": active_job.to_dict() if active_job else None,
+            "jobs": [job.to_dict() for job in jobs.list_jobs()]
+        })
+
+    def cancel_maintenance_job_handler(self, data, method='POST'):
+        if not self.dependencies.backup_feature_enabled():
+            return self.dependencies.jsonify({"success": False, "message": "请先配置 APP_ACCESS_TOKEN 后再使用维护功能"}), 403
+
+        job_id = str((data or {}).get('job_id') or '').strip()
+        job = self.dependencies.maintenance_jobs.get(job_id) if job_id else None
+        if not job:
+            return self.dependencies.jsonify({"success": False, "message": "维护任务不存在"}), 404
+        if not self.dependencies.maintenance_jobs.cancel(job_id):
+            return self.dependencies.jsonify({
+                "success": False,
+                "message": "任务已结束或正在恢复数据库，无法取消",
+                "job": job.to_dict()
+            }), 409
+        return self.dependencies.jsonify({"success": True, "message": "已请求取消任务", "job": job.to_dict()})
 
     def delete_db_backup_handler(self, data, method='DELETE'):
         if not self.dependencies.backup_feature_enabled():
@@ -128,6 +274,8 @@ class ApiMaintenanceHandlersMixin:
             })
         except FileNotFoundError:
             return self.dependencies.jsonify({"success": False, "message": "备份文件不存在"}), 404
+        except self.dependencies.backup_in_use_error:
+            return self.dependencies.jsonify({"success": False, "message": "该备份仍被增量备份引用，请先删除依赖它的增量备份"}), 409
         except ValueError:
             return self.dependencies.jsonify({"success": False, "message": "备份文件名无效"}), 400
         except Exception as e:
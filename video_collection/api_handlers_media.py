@@ -107,6 +107,12 @@ class ApiMediaHandlersMixin:
             **delete_result
         })
 
+    def new_upload_image_filename(self, suffix=''):
+        timestamp = int(time.time())
+        unique_id = str(uuid.uuid4())[:8]
+        image_year = time.strftime('%Y', time.localtime(timestamp))
+        return f"{image_year}/{timestamp}_{unique_id}{suffix}.webp"
+
     def upload_image_handler(self, data, method='POST'):
         if 'image' not in request.files:
             return self.dependencies.jsonify({'success': False, 'message': '没有文件'}), 400
@@ -124,11 +130,8 @@ class ApiMediaHandlersMixin:
                 'message': 'Invalid capture timestamp'
             }), 400
 
-        timestamp = int(time.time())
-        unique_id = str(uuid.uuid4())[:8]
-        image_year = time.strftime('%Y', time.localtime(timestamp))
         capture_suffix = format_capture_timestamp_suffix(capture_timestamp) if capture_timestamp is not None else ''
-        filename = f"{image_year}/{timestamp}_{unique_id}{capture_suffix}.webp"
+        filename = self.new_upload_image_filename(capture_suffix)
         os.makedirs(self.dependencies.get_upload_folder(), exist_ok=True)
 
         try:
@@ -64,16 +64,28 @@ class ApiMovieHandlersMixin:
             return self.dependencies.json_exception('Update movie', e, '电影更新失败')
 
 
-    def search_movies_sql_handler(self, data):
+    def search_movies_filters(self, data):
         data = data or {}
-        search_term = str(data.get('title') or '').strip()
-        rating_dimension = str(data.get('rating_dimension') or '').strip()
-        min_rating_raw = str(data.get('min_rating') or '').strip()
         recommended_raw = data.get('recommended')
-        recommended_filter = '' if recommended_raw is None else str(recommended_raw).strip()
-        selected_tag_names = self.dependencies.parse_tag_names(data.get('tags', ''))
-        page = self.dependencies.parse_positive_int(data.get('page'), 1, 1)
-        per_page = self.dependencies.parse_positive_int(data.get('per_page'), 10, 1, 100)
+        return {
+            'title': str(data.get('title') or '').strip(),
+            'rating_dimension': str(data.get('rating_dimension') or '').strip(),
+            'min_rating': str(data.get('min_rating') or '').strip(),
+            'recommended': '' if recommended_raw is None else str(recommended_raw).strip(),
+            # 标签条件之间是 AND 关系，排序后相同的筛选共用一个缓存键
+            'tags': sorted(self.dependencies.parse_tag_names(data.get('tags', ''))),
+            'page': self.dependencies.parse_positive_int(data.get('page'), 1, 1),
+            'per_page': self.dependencies.parse_positive_int(data.get('per_page'), 10, 1, 100)
+        }
+
+    def search_movies_sql_handler(self, filters):
+        search_term = filters['title']
+        rating_dimension = filters['rating_dimension']
+        min_rating_raw = filters['min_rating']
+        recommended_filter = filters['recommended']
+        selected_tag_names = filters['tags']
+        page = filters['page']
+        per_page = filters['per_page']
 
         if recommended_filter and recommended_filter not in ('0', '1'):
             return self.dependencies.json_error('Invalid recommended filter', 400)
@@ -191,7 +203,21 @@ class ApiMovieHandlersMixin:
 
     def search_movies_handler(self, data, method='GET'):
         try:
-            return self.search_movies_sql_handler(data)
+            filters = self.search_movies_filters(data)
+            cache = self.dependencies.search_response_cache
+            if not cache.enabled:
+                return self.search_movies_sql_handler(filters)
+
+            cache_key = json.dumps(filters, sort_keys=True, ensure_ascii=False)
+            version = self.dependencies.get_search_data_version()
+            body = cache.get(cache_key, version)
+            if body is not None:
+                return self.dependencies.json_body_response(body)
+
+            result = self.search_movies_sql_handler(filters)
+            if not isinstance(result, tuple) and result.status_code == 200:
+                cache.put(cache_key, version, result.get_data())
+            return result
         except Exception as e:
             return self.dependencies.json_exception('Search movies', e, '搜索失败')
 
@@ -1,12 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
 API_EVENTS = {}
+API_BATCH_KEY = 'b'
+
 
+def api_event(
+    name,
+    handler,
+    methods=('POST',),
+    require_csrf=True,
+    read_only=False,
+    cache_scopes=None,
+    invalidates=()
+):
+    """Describe one API event.
 
-def api_event(name, handler, methods=('POST',), require_csrf=True):
+    ``cache_scopes`` makes a read-only event revalidatable: its ETag follows
+    the data versions of those scopes (an empty tuple means it only changes
+    on restart). ``invalidates`` lists the scopes a successful call bumps.
+    """
     return {
         'name': name,
         'handler': handler,
         'methods': {method.upper() for method in methods},
-        'require_csrf': require_csrf
+        'require_csrf': require_csrf,
+        'read_only': read_only,
+        'cache_scopes': tuple(cache_scopes) if cache_scopes is not None else None,
+        'invalidates': tuple(invalidates)
     }
 
 
@@ -31,3 +52,55 @@ def api_event_metadata():
         for event_id, event in sorted(API_EVENTS.items())
     }
 
+
+def api_event_name(payload):
+    if not isinstance(payload, dict):
+        return 'invalid'
+    event = API_EVENTS.get(normalize_api_event_id(payload.get('e')))
+    return event['name'] if event else 'unknown'
+
+
+def api_event_is_read_only(payload):
+    if not isinstance(payload, dict):
+        return False
+    event = API_EVENTS.get(normalize_api_event_id(payload.get('e')))
+    return bool(event and event['read_only'])
+
+
+def group_api_batch(entries, can_run_concurrently):
+    """Split a batch into ordered groups of ``(index, entry)`` pairs.
+
+    Consecutive read-only events share a group so they can run together;
+    every other event gets a group of its own, which keeps a read that
+    follows a write in the batch behind that write.
+    """
+    groups = []
+    for index, entry in enumerate(entries):
+        concurrent = can_run_concurrently(entry)
+        if concurrent and groups and groups[-1][0]:
+            groups[-1][1].append((index, entry))
+        else:
+            groups.append((concurrent, [(index, entry)]))
+    return [group for _, group in groups]
+
+
+def run_api_batch(entries, dispatch, can_run_concurrently=api_event_is_read_only, workers=1, wrap=None):
+    """Dispatch every batch entry and return the results in request order.
+
+    ``wrap`` is applied to ``dispatch`` for each entry handed to a worker
+    thread (Flask's ``copy_current_request_context`` in the app).
+    """
+    results = [None] * len(entries)
+    for group in group_api_batch(entries, can_run_concurrently):
+        if workers > 1 and len(group) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(group)), thread_name_prefix='api-batch') as executor:
+                futures = [
+                    (index, executor.submit(wrap(dispatch) if wrap else dispatch, entry))
+                    for index, entry in group
+                ]
+                for index, future in futures:
+                    results[index] = future.result()
+        else:
+            for index, entry in group:
+                results[index] = dispatch(entry)
+    return results
@@ -7,15 +7,27 @@ import tarfile
 import tempfile
 import time
 
+from .backup_codecs import (
+    ARCHIVE_IMAGE_GZIP_LEVEL,
+    BackupArchiveWriter,
+    archive_suffix,
+    dump_member_name,
+    wrap_dump_reader,
+)
+from .backup_incremental import BACKUP_MANIFEST_VERSION, manifest_supports_chain_restore
 from .backup_validation import (
+    LOGICAL_DUMP_MEMBER,
     classify_backup_filename,
     safe_backup_filename,
     safe_tar_member_name,
     validate_full_backup_member,
 )
+from .maintenance_jobs import report_maintenance_progress
 from .paths import is_path_inside
 
 
+IMAGE_RESTORE_STAGING_PREFIX = '.restore-'
+
 def add_bytes_to_tar(tar, arcname, data, mtime=None):
     payload = data if isinstance(data, bytes) else data.encode('utf-8')
     info = tarfile.TarInfo(arcname)
@@ -55,6 +67,7 @@ class BackupArchiveOpsMixin:
             dirnames[:] = [
                 dirname for dirname in dirnames
                 if not os.path.islink(os.path.join(dirpath, dirname))
+                and not (dirpath == root_path and dirname.startswith(IMAGE_RESTORE_STAGING_PREFIX))
             ]
             for filename in filenames:
                 abs_path = os.path.join(dirpath, filename)
@@ -73,84 +86,93 @@ class BackupArchiveOpsMixin:
         image_files.sort(key=lambda item: item[1].lower())
         return image_files
 
-    def run_database_backup(self, prefix=''):
+    def run_database_backup(self, prefix='', incremental=False):
+        started_at = time.monotonic()
         os.makedirs(self.backup_dir, exist_ok=True)
         timestamp = time.strftime('%Y%m%d_%H%M%S')
-        filename = f"{prefix}{self.sanitized_database_name()}_{timestamp}.full.tar.gz"
+        parent_filename, parent_manifest = self.latest_backup_manifest(prefix)
+        chain_length = int((parent_manifest or {}).get('chain_length', 0)) + 1
+        if incremental and (not parent_manifest or chain_length >= self.full_backup_interval):
+            incremental = False
+        compression = self.compression
+        backup_kind = 'incr' if incremental else 'full'
+        filename = f"{prefix}{self.sanitized_database_name()}_{timestamp}.{backup_kind}{archive_suffix(compression)}"
+        dump_format = self.dump_format
+        dump_member = dump_member_name(compression, dump_format)
         target_path = self.get_backup_file_path(filename)
         if not target_path:
             raise ValueError('Invalid backup filename')
 
-        temp_archive_path = f'{target_path}.tmp'
-        with tempfile.TemporaryDirectory(prefix='backup_build_', dir=self.backup_dir) as temp_dir:
-            dump_path = os.path.join(temp_dir, 'database.sql.gz')
-            self.run_database_dump_to_file(dump_path)
-
-            image_files = self.iter_safe_image_files()
-            manifest = {
-                'version': 1,
-                'type': 'full',
-                'database': self.db_config['database'],
-                'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'include_routines': self.include_routines,
-                'database_dump': 'database.sql.gz',
-                'images_root': 'images',
-                'images_count': len(image_files)
-            }
+        report_maintenance_progress(stage='scan')
+        image_files = self.iter_safe_image_files()
+        files, archived_files = self.build_image_manifest(
+            image_files,
+            filename,
+            parent_manifest,
+            incremental=incremental
+        )
+        manifest = {
+            'version': BACKUP_MANIFEST_VERSION,
+            'type': 'incremental' if incremental else 'full',
+            'database': self.db_config['database'],
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'include_routines': self.include_routines,
+            'compression': compression,
+            'database_dump': dump_member,
+            'database_format': dump_format,
+            'images_root': 'images',
+            'images_count': len(files),
+            'archived_images_count': len(archived_files),
+            'chain_length': chain_length if incremental else 0,
+            'parent': parent_filename if incremental else None,
+            'base': ((parent_manifest.get('base') or parent_filename) if incremental else None),
+            'files': files
+        }
 
-            try:
-                with tarfile.open(temp_archive_path, 'w:gz') as tar:
-                    tar.add(dump_path, arcname='database.sql.gz', recursive=False)
-                    for abs_path, relative_path in image_files:
-                        tar.add(abs_path, arcname=f'images/{relative_path}', recursive=False)
-                    add_bytes_to_tar(
-                        tar,
-                        'manifest.json',
-                        json.dumps(manifest, ensure_ascii=False, indent=2)
-                    )
-                os.replace(temp_archive_path, target_path)
-            finally:
-                try:
-                    if os.path.exists(temp_archive_path):
-                        os.remove(temp_archive_path)
-                except OSError:
-                    self.logger.warning("Unable to remove temporary full backup file: %s", temp_archive_path)
+        if dump_format == 'logical':
+            produce_dump = self.stream_logical_dump
+        else:
+            produce_dump = lambda output: self.stream_database_dump(output, compression)
 
+        # The dump is streamed straight from the exporter into the archive,
+        # so the only temporary file is the archive itself.
+        temp_archive_path = f'{target_path}.tmp'
+        try:
+            with open(temp_archive_path, 'wb') as raw_archive, BackupArchiveWriter(raw_archive, compression) as archive:
+                archive.add_bytes(
+                    'manifest.json',
+                    json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+                )
+                report_maintenance_progress(stage='dump', files_total=len(archived_files))
+                dump_bytes, dump_sha256 = archive.add_stream(
+                    dump_member,
+                    produce_dump,
+                    compresslevel=0
+                )
+                report_maintenance_progress(stage='images')
+                for abs_path, relative_path in archived_files:
+                    archive.add_file(abs_path, f'images/{relative_path}', compresslevel=ARCHIVE_IMAGE_GZIP_LEVEL)
+                    report_maintenance_progress(add_files=1, add_bytes=files[relative_path]['size'])
+            os.replace(temp_archive_path, target_path)
+        finally:
+            try:
+                if os.path.exists(temp_archive_path):
+                    os.remove(temp_archive_path)
+            except OSError:
+                self.logger.warning("Unable to remove temporary full backup file: %s", temp_archive_path)
+
+        self.invalidate_backup_catalog()
+        self.record_backup_catalog_metadata(
+            filename,
+            dump_bytes=dump_bytes,
+            dump_sha256=dump_sha256,
+            duration_seconds=round(time.monotonic() - started_at, 3)
+        )
         return self.format_backup_file(filename, target_path)
 
     def validate_full_backup_member(self, member):
         return validate_full_backup_member(member, self.image_filename_normalizer)
 
-    def extract_full_backup_to_temp(self, backup_path):
-        temp_dir = tempfile.mkdtemp(prefix='backup_restore_')
-        try:
-            with tarfile.open(backup_path, 'r:gz') as tar:
-                members = tar.getmembers()
-                for member in members:
-                    if not self.validate_full_backup_member(member):
-                        raise ValueError(f'Unsafe or unsupported backup entry: {member.name}')
-                    target_path = os.path.realpath(os.path.join(temp_dir, safe_tar_member_name(member.name)))
-                    if not is_path_inside(temp_dir, target_path):
-                        raise ValueError(f'Unsafe backup entry path: {member.name}')
-                tar.extractall(temp_dir, members=members)
-
-            manifest_path = os.path.join(temp_dir, 'manifest.json')
-            dump_path = os.path.join(temp_dir, 'database.sql.gz')
-            images_path = os.path.join(temp_dir, 'images')
-            if not os.path.isfile(manifest_path) or not os.path.isfile(dump_path):
-                raise ValueError('Full backup is missing manifest or database dump')
-
-            with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
-                manifest = json.load(manifest_file)
-            if manifest.get('type') != 'full' or manifest.get('database_dump') != 'database.sql.gz':
-                raise ValueError('Full backup manifest is invalid')
-
-            self.validate_extracted_images(images_path)
-            return temp_dir, dump_path, images_path, manifest
-        except Exception:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            raise
-
     def validate_extracted_images(self, images_path):
         if not os.path.exists(images_path):
             return
@@ -174,69 +196,158 @@ class BackupArchiveOpsMixin:
                 if self.image_filename_normalizer(relative_path) != relative_path:
                     raise ValueError(f'Unsupported image path in backup: {relative_path}')
 
-    def clear_directory_contents(self, directory_path):
-        os.makedirs(directory_path, exist_ok=True)
-        root_path = os.path.realpath(directory_path)
-        for entry in os.scandir(root_path):
-            entry_path = os.path.realpath(entry.path)
-            if not is_path_inside(root_path, entry_path):
-                raise ValueError(f'Unsafe path while clearing directory: {entry.name}')
-            if entry.is_dir(follow_symlinks=False):
-                shutil.rmtree(entry_path)
-            else:
-                os.remove(entry_path)
-
-    def copy_directory_contents(self, source_dir, target_dir):
-        os.makedirs(target_dir, exist_ok=True)
-        if not os.path.isdir(source_dir):
-            return
-        for dirpath, dirnames, filenames in os.walk(source_dir, followlinks=False):
-            relative_dir = os.path.relpath(dirpath, source_dir)
-            target_current_dir = target_dir if relative_dir == '.' else os.path.join(target_dir, relative_dir)
-            os.makedirs(target_current_dir, exist_ok=True)
-            for dirname in dirnames:
-                os.makedirs(os.path.join(target_current_dir, dirname), exist_ok=True)
-            for filename in filenames:
-                shutil.copy2(os.path.join(dirpath, filename), os.path.join(target_current_dir, filename))
-
-    def restore_images_snapshot(self, images_path):
+    def upload_root_path(self):
         upload_root = os.path.realpath(self.upload_folder)
         if not is_path_inside(os.path.dirname(upload_root), upload_root):
             raise ValueError('Upload directory is unsafe')
-        self.validate_extracted_images(images_path)
-        self.clear_directory_contents(upload_root)
-        self.copy_directory_contents(images_path, upload_root)
-
-    def run_full_backup_restore(self, filename):
+        return upload_root
+
+    def create_image_restore_staging(self):
+        # Staging lives inside the upload folder so the final swap is a
+        # same-filesystem rename, even when the folder is a volume mount.
+        upload_root = self.upload_root_path()
+        os.makedirs(upload_root, exist_ok=True)
+        return tempfile.mkdtemp(prefix=IMAGE_RESTORE_STAGING_PREFIX, dir=upload_root)
+
+    def swap_images_snapshot(self, staging_path):
+        """Replace the upload folder contents with ``staging_path`` by renaming entries.
+
+        The upload folder itself may be a mountpoint, so each top-level entry
+        (the year directories) is swapped individually instead.
+        """
+        upload_root = self.upload_root_path()
+        retired_path = tempfile.mkdtemp(prefix=IMAGE_RESTORE_STAGING_PREFIX, dir=upload_root)
+        staged_names = sorted(os.listdir(staging_path))
+        try:
+            for name in staged_names:
+                live_path = os.path.join(upload_root, name)
+                if os.path.lexists(live_path):
+                    os.rename(live_path, os.path.join(retired_path, name))
+                os.rename(os.path.join(staging_path, name), live_path)
+            for entry in os.scandir(upload_root):
+                if entry.name in staged_names or entry.name.startswith(IMAGE_RESTORE_STAGING_PREFIX):
+                    continue
+                os.rename(entry.path, os.path.join(retired_path, entry.name))
+        except OSError:
+            for entry in os.scandir(retired_path):
+                live_path = os.path.join(upload_root, entry.name)
+                if not os.path.lexists(live_path):
+                    os.rename(entry.path, live_path)
+            if os.listdir(retired_path):
+                self.logger.error("Image restore was interrupted; replaced files were kept in %s", retired_path)
+            else:
+                os.rmdir(retired_path)
+            raise
+        shutil.rmtree(retired_path, ignore_errors=True)
+
+    def extract_legacy_backup_images(self, backup_path, images_path):
+        """Validate a version 1 archive in one pass, extracting only its images."""
+        manifest = None
+        has_dump = False
+        images_root = os.path.realpath(images_path)
+        with tarfile.open(backup_path, 'r:*') as tar:
+            for member in tar:
+                if not self.validate_full_backup_member(member):
+                    raise ValueError(f'Unsafe or unsupported backup entry: {member.name}')
+                member_name = safe_tar_member_name(member.name)
+                if member_name == 'manifest.json':
+                    manifest_file = tar.extractfile(member)
+                    manifest = json.load(manifest_file) if manifest_file else None
+                elif member_name == 'database.sql.gz':
+                    has_dump = member.isfile()
+                elif member.isfile():
+                    target_path = os.path.realpath(os.path.join(images_root, *member_name.split('/')[1:]))
+                    if not is_path_inside(images_root, target_path):
+                        raise ValueError(f'Unsafe backup entry path: {member.name}')
+                    self.copy_tar_member_to_path(tar, member, target_path)
+                    os.utime(target_path, (member.mtime, member.mtime))
+                    report_maintenance_progress(add_files=1, add_bytes=member.size)
+
+        if not manifest or not has_dump:
+            raise ValueError('Full backup is missing manifest or database dump')
+        if manifest.get('type') != 'full' or manifest.get('database_dump') != 'database.sql.gz':
+            raise ValueError('Full backup manifest is invalid')
+        return manifest
+
+    def stream_backup_dump(self, backup_path, dump_member):
+        """Pipe the dump member of an archive into ``mariadb`` without extracting it."""
+        with tarfile.open(backup_path, 'r:*') as tar:
+            for member in tar:
+                if safe_tar_member_name(member.name) != dump_member:
+                    continue
+                if not self.validate_full_backup_member(member) or not member.isfile():
+                    raise ValueError(f'Unsafe or unsupported backup entry: {member.name}')
+                # Once mariadb starts applying the dump, stopping halfway would
+                # leave the database partially restored.
+                report_maintenance_progress(stage='database', cancellable=False)
+                with wrap_dump_reader(tar.extractfile(member), dump_member) as dump:
+                    if dump_member == LOGICAL_DUMP_MEMBER:
+                        self.stream_logical_restore(dump)
+                    else:
+                        self.stream_database_restore(dump)
+                return
+        raise ValueError('Full backup is missing manifest or database dump')
+
+    def run_full_backup_restore(self, filename, differential=False):
         backup_path = self.get_backup_file_path(filename, must_exist=True)
         if not backup_path:
             raise FileNotFoundError('Backup file not found')
 
-        temp_dir, dump_path, images_path, manifest = self.extract_full_backup_to_temp(backup_path)
+        manifest = self.read_backup_manifest(backup_path)
+        if differential and not manifest_supports_chain_restore(manifest):
+            raise ValueError('Differential restore requires a backup with an image manifest')
+
+        # Images are staged and every member is validated before the database
+        # is touched; the dump is then streamed from the archive a second time.
+        report_maintenance_progress(stage='images')
+        staging_path = self.create_image_restore_staging()
         try:
-            self.run_database_restore_from_path(dump_path)
-            self.restore_images_snapshot(images_path)
-            return {
-                'backup_type': 'full',
-                'type_label': '完整备份',
+            image_changes = None
+            if differential:
+                plan = self.plan_differential_image_restore(manifest)
+                changed_files = {relative_path: manifest['files'][relative_path] for relative_path in plan['write']}
+                dump_member = self.extract_manifest_images(filename, {**manifest, 'files': changed_files}, staging_path)
+                image_changes = self.differential_restore_report(plan, manifest)
+            elif manifest_supports_chain_restore(manifest):
+                dump_member = self.extract_manifest_images(filename, manifest, staging_path)
+            else:
+                manifest = self.extract_legacy_backup_images(backup_path, staging_path)
+                dump_member = manifest['database_dump']
+            self.validate_extracted_images(staging_path)
+            self.stream_backup_dump(backup_path, dump_member)
+            report_maintenance_progress(stage='swap')
+            if differential:
+                self.apply_differential_image_restore(plan, manifest, staging_path)
+            else:
+                self.swap_images_snapshot(staging_path)
+            backup_info = self.classify_backup_filename(filename) or {}
+            result = {
+                'backup_type': 'incremental' if manifest.get('type') == 'incremental' else 'full',
+                'type_label': backup_info.get('type_label', '完整备份'),
                 'includes_images': True,
-                'manifest': manifest
+                'manifest': {key: value for key, value in manifest.items() if key != 'files'}
             }
+            if image_changes is not None:
+                result['image_changes'] = image_changes
+            return result
         finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            shutil.rmtree(staging_path, ignore_errors=True)
 
-    def run_backup_restore(self, filename):
+    def run_backup_restore(self, filename, differential=False):
         backup_info = self.classify_backup_filename(filename)
         if not backup_info:
             raise ValueError('Invalid backup filename')
-        if backup_info['type'] == 'full':
-            return self.run_full_backup_restore(filename)
-
-        backup_path = self.get_backup_file_path(filename, must_exist=True)
-        if not backup_path:
-            raise FileNotFoundError('Backup file not found')
-        self.run_database_restore_from_path(backup_path)
-        return backup_info
+        try:
+            if backup_info['includes_images']:
+                return self.run_full_backup_restore(filename, differential=differential)
+
+            backup_path = self.get_backup_file_path(filename, must_exist=True)
+            if not backup_path:
+                raise FileNotFoundError('Backup file not found')
+            self.run_database_restore_from_path(backup_path)
+            return backup_info
+        finally:
+            self.invalidate_backup_catalog()
 
     def format_backup_file(self, filename, path):
         stat = os.stat(path)
@@ -254,15 +365,10 @@ class BackupArchiveOpsMixin:
         }
 
     def list_database_backups(self):
-        os.makedirs(self.backup_dir, exist_ok=True)
-        backups = []
-        for entry in os.scandir(self.backup_dir):
-            if not entry.is_file():
-                continue
-            filename = safe_backup_filename(entry.name)
-            if not filename:
-                continue
-            backups.append(self.format_backup_file(filename, entry.path))
+        backups = [
+            {key: value for key, value in entry.items() if key != 'mtime_ns'}
+            for entry in self.backup_catalog().values()
+        ]
         backups.sort(key=lambda item: item['modified_at'], reverse=True)
         return backups
 
@@ -275,5 +381,7 @@ class BackupArchiveOpsMixin:
         if not backup_path:
             raise FileNotFoundError('Backup file not found')
 
+        self.ensure_backup_not_referenced(safe_filename)
         os.remove(backup_path)
+        self.invalidate_backup_catalog()
         return safe_filename
@@ -0,0 +1,183 @@
+import json
+import os
+import tarfile
+import time
+
+from .backup_incremental import backup_manifest_archives
+from .backup_validation import (
+    BACKUP_ARCHIVE_SUFFIXES,
+    BACKUP_DUMP_MEMBERS,
+    safe_backup_filename,
+    safe_tar_member_name,
+)
+
+
+BACKUP_CATALOG_FILENAME = '.backup-catalog.json'
+BACKUP_CATALOG_VERSION = 1
+BACKUP_RECORDED_METADATA_KEYS = ('duration_seconds', 'dump_sha256', 'verification')
+
+
+def read_archive_catalog_metadata(backup_path, filename):
+    """Read the manifest and dump size of an archive.
+
+    Version 2 archives keep both in their first two members, so this stops
+    after reading a few kilobytes.
+    """
+    manifest = None
+    dump_bytes = None
+    with tarfile.open(backup_path, 'r:*') as tar:
+        for member in tar:
+            member_name = safe_tar_member_name(member.name)
+            if member_name == 'manifest.json' and member.isfile():
+                manifest_file = tar.extractfile(member)
+                manifest = json.load(manifest_file) if manifest_file else None
+            elif member_name in BACKUP_DUMP_MEMBERS and member.isfile():
+                dump_bytes = member.size
+            if manifest is not None and dump_bytes is not None:
+                break
+
+    manifest = manifest or {}
+    images_count = manifest.get('images_count')
+    return {
+        'manifest_version': manifest.get('version', 1),
+        'created_at': manifest.get('created_at', ''),
+        'images_count': images_count,
+        'archived_images_count': manifest.get('archived_images_count', images_count),
+        'dump_bytes': dump_bytes,
+        'compression': manifest.get('compression', 'gzip'),
+        'chain_length': manifest.get('chain_length', 0),
+        'parent': manifest.get('parent'),
+        'base': manifest.get('base'),
+        'references': sorted(backup_manifest_archives(manifest) - {filename})
+    }
+
+
+class BackupCatalogMixin:
+    """Cached listing of the backup directory.
+
+    The catalog is rebuilt only when the directory mtime changes (or it is
+    invalidated explicitly), and even then only new or modified archives are
+    opened. Entries are persisted next to the backups so recorded metadata
+    such as the backup duration survives restarts.
+    """
+
+    def backup_catalog_path(self):
+        return os.path.join(self.backup_dir, BACKUP_CATALOG_FILENAME)
+
+    def load_backup_catalog_index(self):
+        try:
+            with open(self.backup_catalog_path(), 'r', encoding='utf-8') as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable backup catalog: %s", e)
+            return {}
+        if not isinstance(index, dict) or index.get('version') != BACKUP_CATALOG_VERSION:
+            return {}
+        entries = index.get('entries')
+        return entries if isinstance(entries, dict) else {}
+
+    def save_backup_catalog_index(self, entries):
+        index_path = self.backup_catalog_path()
+        temp_path = f'{index_path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as index_file:
+                json.dump({'version': BACKUP_CATALOG_VERSION, 'entries': entries}, index_file, ensure_ascii=False)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            self.logger.warning("Unable to save backup catalog: %s", e)
+
+    def build_backup_catalog_entry(self, filename, path, stat, previous_metadata=None):
+        backup_info = self.classify_backup_filename(filename) or {
+            'type': 'unknown',
+            'type_label': '未知',
+            'includes_images': False,
+            'scheduled': False
+        }
+        metadata = {}
+        if filename.endswith(BACKUP_ARCHIVE_SUFFIXES):
+            try:
+                metadata = read_archive_catalog_metadata(path, filename)
+            except (OSError, tarfile.TarError, ValueError) as e:
+                self.logger.warning("Unable to read backup metadata %s: %s", filename, e)
+        else:
+            metadata = {'dump_bytes': stat.st_size, 'references': []}
+        for key in BACKUP_RECORDED_METADATA_KEYS:
+            if (previous_metadata or {}).get(key) is not None:
+                metadata[key] = previous_metadata[key]
+
+        return {
+            'filename': filename,
+            **backup_info,
+            'size_bytes': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'modified_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat.st_mtime)),
+            'metadata': metadata
+        }
+
+    def backup_catalog(self):
+        """Return ``{filename: entry}`` for every backup file."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with self.catalog_lock:
+            dir_mtime = os.stat(self.backup_dir).st_mtime_ns
+            cache = self.catalog_cache
+            if cache and cache['backup_dir'] == self.backup_dir and cache['dir_mtime'] == dir_mtime:
+                return cache['entries']
+
+            previous = cache['entries'] if cache and cache['backup_dir'] == self.backup_dir else self.load_backup_catalog_index()
+            entries = {}
+            changed = False
+            for entry in os.scandir(self.backup_dir):
+                if not entry.is_file():
+                    continue
+                filename = safe_backup_filename(entry.name)
+                if not filename:
+                    continue
+                stat = entry.stat()
+                known = previous.get(filename)
+                if known and known.get('size_bytes') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+                    entries[filename] = known
+                    continue
+                entries[filename] = self.build_backup_catalog_entry(
+                    filename,
+                    entry.path,
+                    stat,
+                    (known or {}).get('metadata')
+                )
+                changed = True
+
+            if changed or entries.keys() != previous.keys():
+                self.save_backup_catalog_index(entries)
+            self.catalog_cache = {
+                'backup_dir': self.backup_dir,
+                'dir_mtime': os.stat(self.backup_dir).st_mtime_ns,
+                'entries': entries
+            }
+            return entries
+
+    def invalidate_backup_catalog(self):
+        with self.catalog_lock:
+            self.catalog_cache = None
+
+    def refresh_backup_catalog(self):
+        """Rebuild the catalog off the request path; returns the number of backups."""
+        self.invalidate_backup_catalog()
+        return len(self.backup_catalog())
+
+    def record_backup_catalog_metadata(self, filename, **metadata):
+        entries = self.backup_catalog()
+        with self.catalog_lock:
+            entry = entries.get(filename)
+            if not entry:
+                return
+            entry['metadata'].update(metadata)
+            self.save_backup_catalog_index(entries)
+            if self.catalog_cache and self.catalog_cache['entries'] is entries:
+                self.catalog_cache['dir_mtime'] = os.stat(self.backup_dir).st_mtime_ns
+
+    def catalog_backup_references(self, filename):
+        entry = self.backup_catalog().get(filename)
+        if not entry or 'references' not in entry['metadata']:
+            return None
+        return set(entry['metadata']['references'])
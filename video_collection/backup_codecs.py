@@ -0,0 +1,295 @@
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+BACKUP_COMPRESSION_MODES = ('gzip', 'store', 'zstd')
+DEFAULT_BACKUP_COMPRESSION = 'gzip'
+DUMP_MEMBER_NAMES = ('database.sql.gz', 'database.sql.zst')
+PARALLEL_GZIP_BLOCK_BYTES = 1024 * 1024
+PARALLEL_GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+ARCHIVE_GZIP_LEVEL = 6
+# Uploaded images are WebP/JPEG already; deflating them again costs CPU and
+# saves next to nothing, so they go into stored gzip members.
+ARCHIVE_IMAGE_GZIP_LEVEL = 0
+
+
+def zstd_available():
+    return zstandard is not None
+
+
+def normalize_backup_compression(value, logger=None):
+    compression = str(value or '').strip().lower() or DEFAULT_BACKUP_COMPRESSION
+    if compression not in BACKUP_COMPRESSION_MODES:
+        if logger:
+            logger.warning("Unsupported backup compression %r, using %s", value, DEFAULT_BACKUP_COMPRESSION)
+        return DEFAULT_BACKUP_COMPRESSION
+    if compression == 'zstd' and not zstd_available():
+        if logger:
+            logger.warning("Backup compression zstd requires the zstandard package, using store")
+        return 'store'
+    return compression
+
+
+def archive_suffix(compression):
+    """``gzip`` compresses the whole tar; the other modes store members as-is."""
+    return '.tar.gz' if compression == 'gzip' else '.tar'
+
+
+def dump_member_name(compression, dump_format='sql'):
+    if dump_format == 'logical':
+        # Logical dumps are gzip members written by the export workers.
+        return 'database.ndjson.gz'
+    return 'database.sql.zst' if compression == 'zstd' else 'database.sql.gz'
+
+
+def dump_compression_for_path(path):
+    return 'zstd' if str(path).endswith('.zst') else 'gzip'
+
+
+def default_compression_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+class ParallelGzipWriter:
+    """Write a multi-member gzip stream, compressing fixed-size blocks on a thread pool.
+
+    Each block becomes an independent gzip member, which standard gzip
+    readers (including ``gzip.open`` and ``gunzip``) concatenate transparently.
+    zlib releases the GIL, so blocks compress on all cores.
+    """
+
+    def __init__(
+        self,
+        fileobj,
+        level=PARALLEL_GZIP_LEVEL,
+        block_bytes=PARALLEL_GZIP_BLOCK_BYTES,
+        workers=None
+    ):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_bytes = max(64 * 1024, int(block_bytes))
+        self.workers = workers or default_compression_workers()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backup-gzip')
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._closed = False
+
+    def _compress_block(self, block):
+        return gzip.compress(block, compresslevel=self.level, mtime=0)
+
+    def _drain(self, keep):
+        while len(self._pending) > keep:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(self._compress_block, bytes(block)))
+        self._drain(self.workers * 2)
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError('write to closed ParallelGzipWriter')
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.block_bytes:
+            self._submit(self._buffer[:self.block_bytes])
+            del self._buffer[:self.block_bytes]
+        return len(data)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._buffer or not self._pending:
+                self._submit(self._buffer)
+                self._buffer = bytearray()
+            self._drain(0)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type:
+            self._closed = True
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            return False
+        self.close()
+        return False
+
+
+class _ZstdWriter:
+    def __init__(self, fileobj, workers=None):
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=workers or -1)
+        self._writer = compressor.stream_writer(fileobj, closefd=False)
+
+    def write(self, data):
+        return self._writer.write(data)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+
+class BackupArchiveWriter:
+    """Tar writer that can stream a member whose size is unknown up front.
+
+    ``add_stream`` writes a placeholder header, streams the payload and then
+    seeks back to patch the real size in, so producers such as
+    ``mariadb-dump`` never need a temporary file. In ``gzip`` mode the archive
+    is a chain of gzip members and the placeholder header gets a stored
+    (level 0) member of its own, which keeps its compressed length fixed and
+    lets it be rewritten in place. ``gzip.open`` and ``tar -xz`` read the
+    result as one ordinary ``.tar.gz``. The same chaining lets members that
+    do not compress (images) be stored at level 0 next to deflated ones.
+    """
+
+    def __init__(self, raw, compression):
+        self.raw = raw
+        self.gzip_members = compression == 'gzip'
+        self._member = None
+        self._member_level = ARCHIVE_GZIP_LEVEL
+        self._stream_digest = None
+        self._position = 0
+        self.tar = tarfile.open(fileobj=self, mode='w', format=tarfile.GNU_FORMAT)
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        if self._stream_digest is not None:
+            self._stream_digest.update(data)
+        if self.gzip_members:
+            if self._member is None:
+                self._member = gzip.GzipFile(fileobj=self.raw, mode='wb', compresslevel=self._member_level, mtime=0)
+            self._member.write(data)
+        else:
+            self.raw.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def _end_member(self):
+        if self._member is not None:
+            self._member.close()
+            self._member = None
+
+    def _write_header(self, header):
+        self.raw.write(gzip.compress(header, compresslevel=0, mtime=0) if self.gzip_members else header)
+
+    def _use_member_level(self, compresslevel):
+        if compresslevel != self._member_level:
+            self._end_member()
+            self._member_level = compresslevel
+
+    def add_bytes(self, arcname, data, mtime=None, compresslevel=ARCHIVE_GZIP_LEVEL):
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        info.mtime = int(mtime or time.time())
+        self._use_member_level(compresslevel)
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def add_file(self, path, arcname, compresslevel=ARCHIVE_GZIP_LEVEL):
+        """Add ``path`` as ``arcname``; ``compresslevel`` only applies in ``gzip`` mode."""
+        self._use_member_level(compresslevel)
+        self.tar.add(path, arcname=arcname, recursive=False)
+
+    def add_stream(self, arcname, producer, mtime=None, compresslevel=ARCHIVE_GZIP_LEVEL):
+        """Call ``producer(fileobj)`` and store everything it writes as ``arcname``.
+
+        Pass ``compresslevel=0`` for payloads that are already compressed.
+        Returns the payload size and its SHA-256 hex digest.
+        """
+        info = tarfile.TarInfo(arcname)
+        info.mtime = int(mtime or time.time())
+        info.mode = 0o644
+        header = info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors)
+        if len(header) != tarfile.BLOCKSIZE:
+            raise ValueError(f'Unsupported streamed archive member name: {arcname}')
+        self._end_member()
+        header_offset = self.raw.tell()
+        self._write_header(header)
+        self._position += tarfile.BLOCKSIZE
+        data_start = self._position
+
+        self._member_level = compresslevel
+        self._stream_digest = hashlib.sha256()
+        try:
+            producer(self)
+            sha256 = self._stream_digest.hexdigest()
+            self._stream_digest = None
+            info.size = self._position - data_start
+            remainder = info.size % tarfile.BLOCKSIZE
+            if remainder:
+                self.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            self._end_member()
+        finally:
+            self._member_level = ARCHIVE_GZIP_LEVEL
+            self._stream_digest = None
+
+        end_offset = self.raw.tell()
+        header = info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors)
+        self.raw.seek(header_offset)
+        self._write_header(header)
+        self.raw.seek(end_offset)
+        self.tar.offset = self._position
+        self.tar.members.append(info)
+        return info.size, sha256
+
+    def close(self):
+        self.tar.close()
+        self._end_member()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type:
+            self._end_member()
+            return False
+        self.close()
+        return False
+
+
+def open_dump_writer(fileobj, compression, workers=None):
+    if compression == 'zstd':
+        if not zstd_available():
+            raise RuntimeError('zstandard is not installed')
+        return _ZstdWriter(fileobj, workers)
+    return ParallelGzipWriter(fileobj, workers=workers)
+
+
+def wrap_dump_reader(fileobj, member_name):
+    """Decompress a dump read from ``fileobj`` (for example a tar member)."""
+    if member_name.endswith('.zst'):
+        if not zstd_available():
+            raise RuntimeError('zstandard is required to restore this backup')
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=True)
+    if member_name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    return fileobj
+
+
+def open_dump_reader(path):
+    if path.endswith('.zst'):
+        return wrap_dump_reader(open(path, 'rb'), path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
@@ -1,6 +1,9 @@
-import gzip
 import os
 import subprocess
+import threading
+
+from .backup_codecs import dump_compression_for_path, open_dump_reader, open_dump_writer
+from .maintenance_jobs import report_maintenance_progress
 
 
 class DatabaseUpgradeRequiredError(RuntimeError):
@@ -84,9 +87,10 @@ class BackupDatabaseOpsMixin:
             cmd.insert(2, '--routines')
         return cmd
 
-    def run_database_dump_to_file(self, target_path):
-        temp_path = f'{target_path}.tmp'
-        error_path = f'{target_path}.err'
+    def stream_database_dump(self, output, compression):
+        """Pipe ``mariadb-dump`` through the dump compressor into ``output``."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        error_path = os.path.join(self.backup_dir, f'.dump-{os.getpid()}-{threading.get_ident()}.err')
         cmd = self.build_database_dump_command()
 
         try:
@@ -97,12 +101,18 @@ class BackupDatabaseOpsMixin:
                     stderr=error_file,
                     env=self.backup_command_env()
                 )
-                with gzip.open(temp_path, 'wb') as output:
-                    while True:
-                        chunk = process.stdout.read(1024 * 1024)
-                        if not chunk:
-                            break
-                        output.write(chunk)
+                try:
+                    with open_dump_writer(output, compression) as writer:
+                        while True:
+                            chunk = process.stdout.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            writer.write(chunk)
+                            report_maintenance_progress(add_bytes=len(chunk))
+                except Exception:
+                    process.kill()
+                    process.wait()
+                    raise
                 return_code = process.wait()
 
             if return_code != 0:
@@ -111,21 +121,30 @@ class BackupDatabaseOpsMixin:
                 if is_database_upgrade_error(error_text):
                     raise DatabaseUpgradeRequiredError(database_upgrade_message())
                 raise RuntimeError('Database backup command failed')
+        finally:
+            try:
+                if os.path.exists(error_path):
+                    os.remove(error_path)
+            except OSError:
+                self.logger.warning("Unable to remove temporary backup file: %s", error_path)
 
+    def run_database_dump_to_file(self, target_path):
+        temp_path = f'{target_path}.tmp'
+        try:
+            with open(temp_path, 'wb') as output_file:
+                self.stream_database_dump(output_file, dump_compression_for_path(target_path))
             os.replace(temp_path, target_path)
         finally:
-            for cleanup_path in (temp_path, error_path):
-                try:
-                    if os.path.exists(cleanup_path):
-                        os.remove(cleanup_path)
-                except OSError:
-                    self.logger.warning("Unable to remove temporary backup file: %s", cleanup_path)
-
-    def run_database_restore_from_path(self, backup_path):
-        if not backup_path or not os.path.isfile(backup_path):
-            raise FileNotFoundError('Backup file not found')
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except OSError:
+                self.logger.warning("Unable to remove temporary backup file: %s", temp_path)
 
-        error_path = f'{backup_path}.restore.err'
+    def stream_database_restore(self, input_file):
+        """Feed an uncompressed SQL stream into the ``mariadb`` client."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        error_path = os.path.join(self.backup_dir, f'.restore-{os.getpid()}-{threading.get_ident()}.err')
         cmd = [
             'mariadb',
             '--default-character-set=utf8mb4',
@@ -133,10 +152,8 @@ class BackupDatabaseOpsMixin:
             '-u', self.db_config['user'],
             self.db_config['database']
         ]
-        opener = gzip.open if backup_path.endswith('.gz') else open
-
         try:
-            with opener(backup_path, 'rb') as input_file, open(error_path, 'wb') as error_file:
+            with open(error_path, 'wb') as error_file:
                 process = subprocess.Popen(
                     cmd,
                     stdin=subprocess.PIPE,
@@ -150,9 +167,11 @@ class BackupDatabaseOpsMixin:
                         if not chunk:
                             break
                         process.stdin.write(chunk)
+                        report_maintenance_progress(add_bytes=len(chunk))
                     process.stdin.close()
-                except OSError:
+                except Exception:
                     process.kill()
+                    process.wait()
                     raise
 
                 return_code = process.wait()
@@ -167,3 +186,10 @@ class BackupDatabaseOpsMixin:
                     os.remove(error_path)
             except OSError:
                 self.logger.warning("Unable to remove temporary restore error file: %s", error_path)
+
+    def run_database_restore_from_path(self, backup_path):
+        if not backup_path or not os.path.isfile(backup_path):
+            raise FileNotFoundError('Backup file not found')
+
+        with open_dump_reader(backup_path) as input_file:
+            self.stream_database_restore(input_file)
@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import tarfile
+
+from .backup_validation import (
+    BACKUP_ARCHIVE_SUFFIXES,
+    BACKUP_DUMP_MEMBERS,
+    INCREMENTAL_BACKUP_SUFFIXES,
+    safe_backup_filename,
+    safe_tar_member_name,
+)
+from .maintenance_jobs import report_maintenance_progress
+from .paths import is_path_inside
+
+
+BACKUP_MANIFEST_VERSION = 2
+BACKUP_HASH_CHUNK_BYTES = 1024 * 1024
+DIFFERENTIAL_RESTORE_REPORT_LIMIT = 200
+
+
+class BackupInUseError(ValueError):
+    pass
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            chunk = source.read(BACKUP_HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backup_manifest_archives(manifest):
+    """Return every archive a manifest needs for a restore (including its own)."""
+    return {
+        entry.get('archive')
+        for entry in ((manifest or {}).get('files') or {}).values()
+        if entry.get('archive')
+    }
+
+
+def manifest_supports_chain_restore(manifest):
+    return bool(manifest) and manifest.get('version', 1) >= BACKUP_MANIFEST_VERSION and 'files' in manifest
+
+
+class BackupIncrementalMixin:
+    def read_backup_manifest(self, backup_path):
+        # Version 2 archives store the manifest as the first member, so this
+        # normally reads only the first few kilobytes of the archive.
+        with tarfile.open(backup_path, 'r:*') as tar:
+            for member in tar:
+                if safe_tar_member_name(member.name) != 'manifest.json':
+                    continue
+                if not member.isfile():
+                    break
+                manifest_file = tar.extractfile(member)
+                return json.load(manifest_file) if manifest_file else None
+        return None
+
+    def backup_group_prefix(self, prefix=''):
+        return f'{prefix}{self.sanitized_database_name()}_'
+
+    def list_backup_archives(self, prefix=''):
+        os.makedirs(self.backup_dir, exist_ok=True)
+        group_prefix = self.backup_group_prefix(prefix)
+        archives = []
+        for entry in os.scandir(self.backup_dir):
+            if not entry.is_file():
+                continue
+            filename = safe_backup_filename(entry.name)
+            if not filename or not filename.startswith(group_prefix):
+                continue
+            if not filename.endswith(BACKUP_ARCHIVE_SUFFIXES):
+                continue
+            archives.append({
+                'filename': filename,
+                'path': entry.path,
+                'mtime': entry.stat().st_mtime
+            })
+        archives.sort(key=lambda item: (item['mtime'], item['filename']), reverse=True)
+        return archives
+
+    def latest_backup_manifest(self, prefix=''):
+        for archive in self.list_backup_archives(prefix):
+            try:
+                manifest = self.read_backup_manifest(archive['path'])
+            except (OSError, tarfile.TarError, ValueError) as e:
+                self.logger.warning("Unable to read backup manifest %s: %s", archive['filename'], e)
+                continue
+            if manifest_supports_chain_restore(manifest):
+                return archive['filename'], manifest
+        return None, None
+
+    def build_image_manifest(self, image_files, archive_name, previous_manifest=None, incremental=False):
+        """Describe every live image and pick the ones this archive has to carry.
+
+        Hashes are reused from the previous manifest when size and mtime are
+        unchanged. An incremental archive only stores files whose content
+        differs from the previous snapshot; the rest keep pointing at the
+        archive that already holds them.
+        """
+        previous_files = (previous_manifest or {}).get('files') or {}
+        files = {}
+        archived_files = []
+        for abs_path, relative_path in image_files:
+            stat = os.stat(abs_path)
+            size = stat.st_size
+            mtime = int(stat.st_mtime)
+            previous = previous_files.get(relative_path) or {}
+            if previous.get('size') == size and previous.get('mtime') == mtime and previous.get('sha256'):
+                sha256 = previous['sha256']
+            else:
+                sha256 = hash_file(abs_path)
+
+            archive = archive_name
+            if incremental and previous.get('sha256') == sha256 and previous.get('archive'):
+                archive = previous['archive']
+            else:
+                archived_files.append((abs_path, relative_path))
+
+            files[relative_path] = {
+                'size': size,
+                'mtime': mtime,
+                'sha256': sha256,
+                'archive': archive
+            }
+        return files, archived_files
+
+    def backup_references(self, filename):
+        references = self.catalog_backup_references(filename)
+        if references is not None:
+            return references
+        backup_path = self.get_backup_file_path(filename, must_exist=True)
+        if not backup_path:
+            return set()
+        try:
+            manifest = self.read_backup_manifest(backup_path)
+        except (OSError, tarfile.TarError, ValueError) as e:
+            self.logger.warning("Unable to read backup manifest %s: %s", filename, e)
+            return set()
+        return backup_manifest_archives(manifest) - {filename}
+
+    def find_backup_referrers(self, filename):
+        referrers = []
+        for candidate in list(self.backup_catalog()):
+            if candidate == filename or not candidate.endswith(INCREMENTAL_BACKUP_SUFFIXES):
+                continue
+            if filename in self.backup_references(candidate):
+                referrers.append(candidate)
+        return sorted(referrers)
+
+    def ensure_backup_not_referenced(self, filename):
+        referrers = self.find_backup_referrers(filename)
+        if referrers:
+            raise BackupInUseError(f'Backup is still referenced by incremental backup: {referrers[0]}')
+
+    def copy_tar_member_to_path(self, tar, member, target_path):
+        source = tar.extractfile(member)
+        if source is None:
+            raise ValueError(f'Unable to read backup entry: {member.name}')
+        digest = hashlib.sha256()
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with source, open(target_path, 'wb') as output:
+            while True:
+                chunk = source.read(BACKUP_HASH_CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                output.write(chunk)
+        return digest.hexdigest()
+
+    def extract_manifest_images(self, filename, manifest, images_path):
+        """Rebuild the image snapshot of ``manifest`` from every archive in its chain.
+
+        The database dump member is only validated here and its name is
+        returned; the restore streams it straight from the archive later.
+        """
+        dump_member = manifest.get('database_dump')
+        if dump_member not in BACKUP_DUMP_MEMBERS:
+            raise ValueError('Full backup manifest is invalid')
+        wanted_by_archive = {filename: {}}
+        for relative_path, entry in (manifest.get('files') or {}).items():
+            if self.image_filename_normalizer(relative_path) != relative_path:
+                raise ValueError(f'Unsupported image path in backup: {relative_path}')
+            archive_name = safe_backup_filename(entry.get('archive'))
+            if not archive_name or not archive_name.endswith(BACKUP_ARCHIVE_SUFFIXES):
+                raise ValueError(f'Invalid backup archive reference: {entry.get("archive")}')
+            wanted_by_archive.setdefault(archive_name, {})[f'images/{relative_path}'] = (relative_path, entry)
+
+        os.makedirs(images_path, exist_ok=True)
+        images_root = os.path.realpath(images_path)
+        report_maintenance_progress(files_total=len(manifest.get('files') or {}))
+        for archive_name, wanted in wanted_by_archive.items():
+            archive_path = self.get_backup_file_path(archive_name, must_exist=True)
+            if not archive_path:
+                raise FileNotFoundError(f'Backup chain is missing archive: {archive_name}')
+
+            needs_dump = archive_name == filename
+            with tarfile.open(archive_path, 'r:*') as tar:
+                for member in tar:
+                    member_name = safe_tar_member_name(member.name)
+                    if needs_dump and member_name == dump_member:
+                        if not self.validate_full_backup_member(member) or not member.isfile():
+                            raise ValueError(f'Unsafe or unsupported backup entry: {member.name}')
+                        needs_dump = False
+                        continue
+                    if member_name not in wanted:
+                        continue
+                    if not self.validate_full_backup_member(member) or not member.isfile():
+                        raise ValueError(f'Unsafe or unsupported backup entry: {member.name}')
+
+                    relative_path, entry = wanted.pop(member_name)
+                    target_path = os.path.realpath(os.path.join(images_root, *relative_path.split('/')))
+                    if not is_path_inside(images_root, target_path):
+                        raise ValueError(f'Unsafe backup entry path: {member.name}')
+                    sha256 = self.copy_tar_member_to_path(tar, member, target_path)
+                    if sha256 != entry.get('sha256') or os.path.getsize(target_path) != entry.get('size'):
+                        raise ValueError(f'Backup image does not match manifest: {relative_path}')
+                    mtime = entry.get('mtime')
+                    if isinstance(mtime, int):
+                        os.utime(target_path, (mtime, mtime))
+                    report_maintenance_progress(add_files=1, add_bytes=entry.get('size') or 0)
+
+            if needs_dump:
+                raise ValueError('Full backup is missing manifest or database dump')
+            if wanted:
+                missing = sorted(relative_path for relative_path, _ in wanted.values())
+                raise ValueError(f'Backup archive {archive_name} is missing image: {missing[0]}')
+
+        return dump_member
+
+    def plan_differential_image_restore(self, manifest):
+        """Compare a backup manifest with the live upload folder.
+
+        Files whose size and mtime match the manifest are trusted as
+        unchanged; when only the mtime differs the content hash decides.
+        """
+        backup_files = manifest.get('files') or {}
+        live_files = {relative_path: abs_path for abs_path, relative_path in self.iter_safe_image_files()}
+        write = []
+        retime = []
+        unchanged_count = 0
+        for relative_path, entry in sorted(backup_files.items()):
+            abs_path = live_files.get(relative_path)
+            if abs_path is None:
+                write.append(relative_path)
+                continue
+            stat = os.stat(abs_path)
+            if stat.st_size != entry.get('size'):
+                write.append(relative_path)
+            elif int(stat.st_mtime) == entry.get('mtime'):
+                unchanged_count += 1
+            elif hash_file(abs_path) == entry.get('sha256'):
+                retime.append(relative_path)
+            else:
+                write.append(relative_path)
+
+        return {
+            'write': write,
+            'retime': retime,
+            'delete': sorted(set(live_files) - set(backup_files)),
+            'unchanged_count': unchanged_count
+        }
+
+    def differential_restore_report(self, plan, manifest):
+        files = manifest.get('files') or {}
+        lists = {key: plan[key] for key in ('write', 'retime', 'delete')}
+        return {
+            'mode': 'differential',
+            'write_count': len(plan['write']),
+            'write_bytes': sum(files[relative_path].get('size') or 0 for relative_path in plan['write']),
+            'retime_count': len(plan['retime']),
+            'delete_count': len(plan['delete']),
+            'unchanged_count': plan['unchanged_count'],
+            'truncated': any(len(items) > DIFFERENTIAL_RESTORE_REPORT_LIMIT for items in lists.values()),
+            **{key: items[:DIFFERENTIAL_RESTORE_REPORT_LIMIT] for key, items in lists.items()}
+        }
+
+    def apply_differential_image_restore(self, plan, manifest, staging_path):
+        upload_root = self.upload_root_path()
+        files = manifest.get('files') or {}
+        for relative_path in plan['write']:
+            parts = relative_path.split('/')
+            target_path = os.path.join(upload_root, *parts)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            os.replace(os.path.join(staging_path, *parts), target_path)
+        for relative_path in plan['retime']:
+            mtime = files[relative_path].get('mtime')
+            if isinstance(mtime, int):
+                os.utime(os.path.join(upload_root, *relative_path.split('/')), (mtime, mtime))
+        for relative_path in plan['delete']:
+            target_path = os.path.join(upload_root, *relative_path.split('/'))
+            try:
+                os.remove(target_path)
+            except FileNotFoundError:
+                pass
+            parent_path = os.path.dirname(target_path)
+            if parent_path != upload_root:
+                try:
+                    os.rmdir(parent_path)
+                except OSError:
+                    pass
+
+    def preview_backup_restore(self, filename):
+        backup_path = self.get_backup_file_path(filename, must_exist=True)
+        if not backup_path:
+            raise FileNotFoundError('Backup file not found')
+        manifest = self.read_backup_manifest(backup_path)
+        if not manifest_supports_chain_restore(manifest):
+            raise ValueError('Differential restore requires a backup with an image manifest')
+        return self.differential_restore_report(self.plan_differential_image_restore(manifest), manifest)
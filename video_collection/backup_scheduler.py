@@ -1,40 +1,61 @@
 import os
-import threading
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from .backup_incremental import BackupInUseError
 from .backup_validation import (
+    BACKUP_ARCHIVE_SUFFIXES,
     format_local_datetime,
     parse_backup_schedule_time,
-    safe_backup_filename,
 )
+from .task_scheduler import TASK_RESULT_FAILED, TASK_RESULT_SKIPPED, TASK_RESULT_SUCCESS, CronExpression
+
+
+SCHEDULED_BACKUP_TASK = 'backup'
 
 
 class BackupSchedulerMixin:
     def scheduled_backup_time_parts(self):
         return parse_backup_schedule_time(self.schedule_time)
 
-    def scheduled_backup_is_enabled(self):
-        return self.schedule_enabled and self.scheduled_backup_time_parts() is not None
+    def scheduled_backup_cron(self):
+        """Return the backup schedule as a cron expression, or ``None`` if invalid.
 
-    def calculate_next_scheduled_backup_time(self, now=None):
+        ``DB_BACKUP_SCHEDULE_CRON`` wins when set; otherwise the daily
+        ``HH:MM`` time is translated.
+        """
+        if self.schedule_cron:
+            try:
+                return CronExpression(self.schedule_cron)
+            except ValueError:
+                return None
         parts = self.scheduled_backup_time_parts()
         if not parts:
             return None
-
-        now = now or datetime.now()
         hour, minute = parts
-        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if next_run <= now:
-            next_run += timedelta(days=1)
-        return next_run
+        return CronExpression(f'{minute} {hour} * * *')
+
+    def scheduled_backup_is_enabled(self):
+        return self.schedule_enabled and self.scheduled_backup_cron() is not None
+
+    def calculate_next_scheduled_backup_time(self, now=None):
+        schedule = self.scheduled_backup_cron()
+        if not schedule:
+            return None
+        return schedule.next_after(now or datetime.now())
+
+    def last_scheduled_backup_time(self):
+        scheduled_backups = self.list_scheduled_backup_files()
+        if not scheduled_backups:
+            return None
+        return datetime.fromtimestamp(scheduled_backups[0]['mtime'])
 
     def update_scheduled_backup_state(self, **updates):
         with self.state_lock:
             self.state.update(updates)
 
     def get_scheduled_backup_status(self):
-        valid_schedule = self.scheduled_backup_time_parts() is not None
+        schedule = self.scheduled_backup_cron()
+        valid_schedule = schedule is not None
         with self.state_lock:
             state = dict(self.state)
 
@@ -48,26 +69,24 @@ class BackupSchedulerMixin:
             'enabled': self.schedule_enabled and valid_schedule,
             'valid_schedule': valid_schedule,
             'schedule_time': self.schedule_time,
-            'retention_count': self.retention_count
+            'schedule_cron': str(schedule) if schedule else self.schedule_cron,
+            'retention_count': self.retention_count,
+            'incremental': self.incremental_backups_enabled,
+            'full_backup_interval': self.full_backup_interval,
+            'compression': self.compression,
+            'dump_format': self.dump_format
         })
         return state
 
     def list_scheduled_backup_files(self):
-        os.makedirs(self.backup_dir, exist_ok=True)
         scheduled_backups = []
-        for entry in os.scandir(self.backup_dir):
-            if not entry.is_file():
-                continue
-            filename = safe_backup_filename(entry.name)
-            if not filename:
+        for filename, entry in self.backup_catalog().items():
+            if not filename.startswith(self.scheduled_prefix) or not filename.endswith(BACKUP_ARCHIVE_SUFFIXES):
                 continue
-            if not filename.startswith(self.scheduled_prefix) or not filename.endswith('.full.tar.gz'):
-                continue
-            stat = entry.stat()
             scheduled_backups.append({
                 'filename': filename,
-                'path': entry.path,
-                'mtime': stat.st_mtime
+                'path': os.path.join(self.backup_dir, filename),
+                'mtime': entry['mtime_ns'] / 1_000_000_000
             })
         scheduled_backups.sort(key=lambda item: item['mtime'], reverse=True)
         return scheduled_backups
@@ -77,16 +96,27 @@ class BackupSchedulerMixin:
             return []
 
         scheduled_backups = self.list_scheduled_backup_files()
+        kept_backups = scheduled_backups[:self.retention_count]
         expired_backups = scheduled_backups[self.retention_count:]
+        referenced = set()
+        for backup in kept_backups:
+            referenced.update(self.backup_references(backup['filename']))
+
         deleted = []
         for backup in expired_backups:
+            if backup['filename'] in referenced:
+                continue
             try:
                 deleted.append(self.delete_database_backup_file(backup['filename']))
-            except FileNotFoundError:
+            except (FileNotFoundError, BackupInUseError):
                 continue
         return deleted
 
     def run_scheduled_backup_once(self):
+        """Create, prune and verify one scheduled backup.
+
+        Returns the task outcome as ``{'result': ..., 'message': ...}``.
+        """
         run_at = format_local_datetime(datetime.now())
         if not self.maintenance_lock.acquire(blocking=False):
             message = '已有数据库维护任务正在执行，已跳过本次定时备份'
@@ -96,86 +126,74 @@ class BackupSchedulerMixin:
                 last_result='skipped',
                 last_message=message
             )
-            return
+            return {'result': TASK_RESULT_SKIPPED, 'message': message}
 
         try:
-            backup = self.run_database_backup(prefix=self.scheduled_prefix)
+            backup = self.run_database_backup(
+                prefix=self.scheduled_prefix,
+                incremental=self.incremental_backups_enabled
+            )
             deleted = self.cleanup_scheduled_backups()
+            verification = self.verify_backup(backup['filename'])
             message = f"已创建定时备份：{backup['filename']}"
             if deleted:
                 message = f"{message}；已清理 {len(deleted)} 个过期定时备份"
+            if not verification['ok']:
+                message = f"{message}；备份校验失败：{verification['errors'][0]}"
+                self.logger.error("Scheduled backup %s failed verification: %s", backup['filename'], verification['errors'])
             self.logger.info("Scheduled backup created: %s; removed %s expired backup(s)", backup['filename'], len(deleted))
+            result = TASK_RESULT_SUCCESS if verification['ok'] else TASK_RESULT_FAILED
             self.update_scheduled_backup_state(
                 last_run_at=run_at,
-                last_result='success',
-                last_message=message
+                last_result=result,
+                last_message=message,
+                last_verification=verification
             )
         except Exception as e:
             self.logger.exception("Scheduled backup failed")
+            result, message = TASK_RESULT_FAILED, str(e) or '定时备份失败'
             self.update_scheduled_backup_state(
                 last_run_at=run_at,
-                last_result='failed',
-                last_message=str(e) or '定时备份失败'
+                last_result=result,
+                last_message=message
             )
         finally:
             self.maintenance_lock.release()
+        return {'result': result, 'message': message}
 
-    def scheduled_backup_worker(self):
-        while self.scheduled_backup_is_enabled():
-            next_run = self.calculate_next_scheduled_backup_time()
-            if not next_run:
-                self.update_scheduled_backup_state(
-                    next_run_at='',
-                    last_result='disabled',
-                    last_message='定时备份时间配置无效'
-                )
-                return
-
-            self.update_scheduled_backup_state(next_run_at=format_local_datetime(next_run))
-            while True:
-                remaining_seconds = (next_run - datetime.now()).total_seconds()
-                if remaining_seconds <= 0:
-                    break
-                time.sleep(min(remaining_seconds, 60))
-
-            self.run_scheduled_backup_once()
-
-        self.update_scheduled_backup_state(next_run_at='')
-
-    def start_scheduled_backup_thread(self, debug_enabled=False):
+    def register_scheduled_backup_task(self, scheduler, jitter_seconds=0):
+        """Add the backup job to ``scheduler`` when scheduled backups are configured."""
         if not self.schedule_enabled:
             self.update_scheduled_backup_state(
                 next_run_at='',
                 last_result='disabled',
                 last_message='定时备份未启用'
             )
-            return
+            return None
 
-        if self.scheduled_backup_time_parts() is None:
-            self.logger.warning("DB_BACKUP_SCHEDULE_TIME is invalid: %s", self.schedule_time)
+        schedule = self.scheduled_backup_cron()
+        if schedule is None:
+            self.logger.warning(
+                "Backup schedule is invalid: DB_BACKUP_SCHEDULE_CRON=%r DB_BACKUP_SCHEDULE_TIME=%r",
+                self.schedule_cron,
+                self.schedule_time
+            )
             self.update_scheduled_backup_state(
                 next_run_at='',
                 last_result='disabled',
-                last_message='定时备份时间配置无效，请使用 HH:MM'
+                last_message='定时备份时间配置无效，请使用 HH:MM 或 cron 表达式'
             )
-            return
-
-        if debug_enabled and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
-            return
-
-        with self.thread_lock:
-            if self.thread_started:
-                return
-            self.thread_started = True
+            return None
 
-        thread = threading.Thread(
-            target=self.scheduled_backup_worker,
-            name='scheduled-backup',
-            daemon=True
-        )
-        thread.start()
         self.logger.info(
-            "Scheduled backup enabled at %s, retention count=%s",
-            self.schedule_time,
+            "Scheduled backup enabled (%s), retention count=%s",
+            schedule,
             self.retention_count
         )
+        return scheduler.add_task(
+            SCHEDULED_BACKUP_TASK,
+            schedule,
+            self.run_scheduled_backup_once,
+            jitter_seconds=jitter_seconds,
+            last_run_getter=self.last_scheduled_backup_time
+        )
@@ -2,7 +2,12 @@ import re
 
 
 SCHEDULED_BACKUP_PREFIX = 'scheduled_'
-BACKUP_FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+(?:\.full\.tar\.gz|\.sql(?:\.gz)?)$')
+FULL_BACKUP_SUFFIXES = ('.full.tar.gz', '.full.tar')
+INCREMENTAL_BACKUP_SUFFIXES = ('.incr.tar.gz', '.incr.tar')
+BACKUP_ARCHIVE_SUFFIXES = FULL_BACKUP_SUFFIXES + INCREMENTAL_BACKUP_SUFFIXES
+LOGICAL_DUMP_MEMBER = 'database.ndjson.gz'
+BACKUP_DUMP_MEMBERS = {'database.sql.gz', 'database.sql.zst', LOGICAL_DUMP_MEMBER}
+BACKUP_FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+(?:\.(?:full|incr)\.tar(?:\.gz)?|\.sql(?:\.gz)?)$')
 
 
 def safe_backup_filename(filename):
@@ -20,20 +25,34 @@ def classify_backup_filename(filename, scheduled_prefix=SCHEDULED_BACKUP_PREFIX)
     safe_filename = safe_backup_filename(filename)
     if not safe_filename:
         return None
-    if safe_filename.startswith(scheduled_prefix) and safe_filename.endswith('.full.tar.gz'):
+    if safe_filename.startswith(scheduled_prefix) and safe_filename.endswith(FULL_BACKUP_SUFFIXES):
         return {
             'type': 'scheduled_full',
             'type_label': '定时备份',
             'includes_images': True,
             'scheduled': True
         }
-    if safe_filename.endswith('.full.tar.gz'):
+    if safe_filename.startswith(scheduled_prefix) and safe_filename.endswith(INCREMENTAL_BACKUP_SUFFIXES):
+        return {
+            'type': 'scheduled_incremental',
+            'type_label': '定时增量备份',
+            'includes_images': True,
+            'scheduled': True
+        }
+    if safe_filename.endswith(FULL_BACKUP_SUFFIXES):
         return {
             'type': 'full',
             'type_label': '完整备份',
             'includes_images': True,
             'scheduled': False
         }
+    if safe_filename.endswith(INCREMENTAL_BACKUP_SUFFIXES):
+        return {
+            'type': 'incremental',
+            'type_label': '增量备份',
+            'includes_images': True,
+            'scheduled': False
+        }
     if safe_filename.endswith('.sql') or safe_filename.endswith('.sql.gz'):
         return {
             'type': 'database',
@@ -63,7 +82,7 @@ def validate_full_backup_member(member, image_filename_normalizer):
     safe_name = safe_tar_member_name(member.name)
     if not safe_name:
         return False
-    if safe_name in {'manifest.json', 'database.sql.gz', 'images'}:
+    if safe_name in {'manifest.json', 'images'} or safe_name in BACKUP_DUMP_MEMBERS:
         return True
     if safe_name.startswith('images/'):
         relative_path = safe_name[len('images/'):]
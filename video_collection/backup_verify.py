@@ -0,0 +1,204 @@
+import hashlib
+import tarfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .backup_codecs import default_compression_workers, wrap_dump_reader
+from .backup_incremental import BACKUP_HASH_CHUNK_BYTES, manifest_supports_chain_restore
+from .backup_validation import BACKUP_ARCHIVE_SUFFIXES, BACKUP_DUMP_MEMBERS, safe_tar_member_name
+from .maintenance_jobs import report_maintenance_progress
+from .task_scheduler import TASK_RESULT_FAILED, TASK_RESULT_SKIPPED, TASK_RESULT_SUCCESS
+
+
+BACKUP_VERIFY_ERROR_LIMIT = 20
+BACKUP_VERIFY_INLINE_HASH_BYTES = 8 * 1024 * 1024
+BACKUP_VERIFY_SCHEDULED_COUNT = 3
+
+
+class HashingReader:
+    """Pass-through reader that hashes and counts every byte read."""
+
+    def __init__(self, source):
+        self.source = source
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+
+def sha256_stream(source):
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = source.read(BACKUP_HASH_CHUNK_BYTES)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class BackupVerifyMixin:
+    def verify_backup(self, filename, workers=None):
+        """Stream through an archive and check it could be restored.
+
+        Image members are hashed on a thread pool while the archive is
+        decompressed, then compared with the SHA-256 manifest written at backup
+        time. The dump member is fully decompressed (which checks the gzip or
+        zstd CRCs) and compared with the digest recorded in the catalog.
+        Archives this one references must still exist.
+        """
+        started_at = time.monotonic()
+        errors = []
+        checked_files = 0
+
+        def add_error(message):
+            if len(errors) < BACKUP_VERIFY_ERROR_LIMIT:
+                errors.append(message)
+
+        backup_path = self.get_backup_file_path(filename, must_exist=True)
+        if not backup_path:
+            raise FileNotFoundError('Backup file not found')
+
+        catalog_entry = self.backup_catalog().get(filename) or {}
+        recorded = catalog_entry.get('metadata') or {}
+        try:
+            manifest = self.read_backup_manifest(backup_path) or {}
+        except (OSError, tarfile.TarError, ValueError, EOFError, zlib.error) as e:
+            manifest = {}
+            add_error(f'Unable to read manifest: {e}')
+
+        expected = {}
+        if manifest_supports_chain_restore(manifest):
+            for relative_path, entry in manifest['files'].items():
+                if entry.get('archive') == filename:
+                    expected[f'images/{relative_path}'] = entry
+            known_archives = set(self.backup_catalog())
+            for archive_name in sorted(set(recorded.get('references') or []) - known_archives):
+                add_error(f'Referenced backup is missing: {archive_name}')
+        dump_member = manifest.get('database_dump') or 'database.sql.gz'
+        report_maintenance_progress(stage='verify', files_total=len(expected))
+
+        workers = workers or default_compression_workers()
+        pending = deque()
+        dump_seen = False
+
+        def check_image(member_name, entry, digest):
+            nonlocal checked_files
+            sha256, size = digest
+            checked_files += 1
+            report_maintenance_progress(add_files=1, add_bytes=size)
+            if sha256 != entry.get('sha256') or size != entry.get('size'):
+                add_error(f'Image does not match manifest: {member_name}')
+
+        def collect(keep):
+            while len(pending) > keep:
+                member_name, entry, future = pending.popleft()
+                check_image(member_name, entry, future.result())
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup-verify') as executor, \
+                    tarfile.open(backup_path, 'r:*') as tar:
+                for member in tar:
+                    member_name = safe_tar_member_name(member.name)
+                    if not self.validate_full_backup_member(member):
+                        add_error(f'Unsafe or unsupported entry: {member.name}')
+                        continue
+                    if not member.isfile() or member_name == 'manifest.json':
+                        continue
+                    if member_name in BACKUP_DUMP_MEMBERS:
+                        dump_seen = member_name == dump_member
+                        self.verify_backup_dump(tar, member, recorded.get('dump_sha256'), add_error)
+                        continue
+
+                    entry = expected.pop(member_name, None)
+                    if entry is None:
+                        if manifest_supports_chain_restore(manifest):
+                            add_error(f'Unexpected image in archive: {member_name}')
+                        else:
+                            sha256_stream(tar.extractfile(member))
+                            checked_files += 1
+                        continue
+                    source = tar.extractfile(member)
+                    if member.size > BACKUP_VERIFY_INLINE_HASH_BYTES:
+                        # Too large to buffer; hash while streaming instead.
+                        check_image(member_name, entry, sha256_stream(source))
+                        continue
+                    pending.append((member_name, entry, executor.submit(sha256_bytes, source.read())))
+                    collect(workers * 2)
+                collect(0)
+        except (OSError, tarfile.TarError, EOFError, zlib.error) as e:
+            add_error(f'Archive is unreadable: {e}')
+
+        if not dump_seen:
+            add_error(f'Database dump is missing: {dump_member}')
+        for member_name in sorted(expected):
+            add_error(f'Image is missing from archive: {member_name}')
+
+        result = {
+            'filename': filename,
+            'ok': not errors,
+            'checked_files': checked_files,
+            'errors': errors,
+            'duration_seconds': round(time.monotonic() - started_at, 3),
+            'verified_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self.record_backup_catalog_metadata(
+            filename,
+            verification={key: result[key] for key in ('ok', 'verified_at', 'checked_files')}
+        )
+        return result
+
+    def verify_backup_dump(self, tar, member, expected_sha256, add_error):
+        source = HashingReader(tar.extractfile(member))
+        try:
+            with wrap_dump_reader(source, member.name) as dump:
+                while dump.read(BACKUP_HASH_CHUNK_BYTES):
+                    report_maintenance_progress()
+            while source.read(BACKUP_HASH_CHUNK_BYTES):
+                pass
+        except (OSError, EOFError, zlib.error, RuntimeError) as e:
+            add_error(f'Database dump is corrupt: {e}')
+            return
+        if expected_sha256 and source.digest.hexdigest() != expected_sha256:
+            add_error('Database dump does not match recorded checksum')
+
+    def run_scheduled_verification(self, count=BACKUP_VERIFY_SCHEDULED_COUNT):
+        """Re-verify the newest ``count`` archives to catch bit rot on the backup disk."""
+        if not self.maintenance_lock.acquire(blocking=False):
+            return {'result': TASK_RESULT_SKIPPED, 'message': '已有数据库维护任务正在执行，已跳过本次备份校验'}
+
+        try:
+            archives = [
+                entry for filename, entry in self.backup_catalog().items()
+                if filename.endswith(BACKUP_ARCHIVE_SUFFIXES)
+            ]
+            archives.sort(key=lambda entry: entry['mtime_ns'], reverse=True)
+            failed = []
+            for entry in archives[:count]:
+                if not self.verify_backup(entry['filename'])['ok']:
+                    failed.append(entry['filename'])
+        finally:
+            self.maintenance_lock.release()
+
+        checked = min(count, len(archives))
+        if failed:
+            self.logger.error("Backup verification failed for: %s", ', '.join(failed))
+            return {'result': TASK_RESULT_FAILED, 'message': f"备份校验未通过：{', '.join(failed)}"}
+        return {'result': TASK_RESULT_SUCCESS, 'message': f'已校验 {checked} 个备份'}
@@ -1,6 +1,13 @@
 import threading
 
 from .backup_archive_ops import BackupArchiveOpsMixin, add_bytes_to_tar
+from .backup_catalog import BACKUP_CATALOG_FILENAME, BackupCatalogMixin
+from .backup_codecs import (
+    BACKUP_COMPRESSION_MODES,
+    ParallelGzipWriter,
+    normalize_backup_compression,
+    zstd_available,
+)
 from .backup_database_ops import (
     BackupDatabaseOpsMixin,
     DatabaseUpgradeRequiredError,
@@ -9,9 +16,22 @@ from .backup_database_ops import (
     is_database_upgrade_error,
     read_process_error,
 )
+from .backup_incremental import (
+    BACKUP_MANIFEST_VERSION,
+    BackupIncrementalMixin,
+    BackupInUseError,
+    backup_manifest_archives,
+    hash_file,
+    manifest_supports_chain_restore,
+)
 from .backup_scheduler import BackupSchedulerMixin
 from .backup_validation import (
+    BACKUP_ARCHIVE_SUFFIXES,
+    BACKUP_DUMP_MEMBERS,
     BACKUP_FILENAME_PATTERN,
+    LOGICAL_DUMP_MEMBER,
+    FULL_BACKUP_SUFFIXES,
+    INCREMENTAL_BACKUP_SUFFIXES,
     SCHEDULED_BACKUP_PREFIX,
     classify_backup_filename,
     format_local_datetime,
@@ -20,9 +40,24 @@ from .backup_validation import (
     safe_tar_member_name,
     validate_full_backup_member,
 )
+from .backup_verify import BACKUP_VERIFY_ERROR_LIMIT, BackupVerifyMixin
+from .logical_backup import (
+    BACKUP_DUMP_FORMATS,
+    BackupLogicalDumpMixin,
+    LogicalDumpError,
+    normalize_backup_dump_format,
+)
 
 
-class BackupService(BackupArchiveOpsMixin, BackupDatabaseOpsMixin, BackupSchedulerMixin):
+class BackupService(
+    BackupArchiveOpsMixin,
+    BackupCatalogMixin,
+    BackupIncrementalMixin,
+    BackupDatabaseOpsMixin,
+    BackupSchedulerMixin,
+    BackupVerifyMixin,
+    BackupLogicalDumpMixin
+):
     def __init__(
         self,
         *,
@@ -36,6 +71,11 @@ class BackupService(BackupArchiveOpsMixin, BackupDatabaseOpsMixin, BackupSchedul
         schedule_enabled_getter,
         schedule_time_getter,
         retention_count_getter,
+        incremental_getter=lambda: False,
+        full_interval_getter=lambda: 7,
+        compression_getter=lambda: 'gzip',
+        dump_format_getter=lambda: 'sql',
+        schedule_cron_getter=lambda: '',
         scheduled_prefix=SCHEDULED_BACKUP_PREFIX
     ):
         self.db_config_getter = db_config_getter
@@ -48,16 +88,22 @@ class BackupService(BackupArchiveOpsMixin, BackupDatabaseOpsMixin, BackupSchedul
         self.schedule_enabled_getter = schedule_enabled_getter
         self.schedule_time_getter = schedule_time_getter
         self.retention_count_getter = retention_count_getter
+        self.incremental_getter = incremental_getter
+        self.full_interval_getter = full_interval_getter
+        self.compression_getter = compression_getter
+        self.dump_format_getter = dump_format_getter
+        self.schedule_cron_getter = schedule_cron_getter
         self.scheduled_prefix = scheduled_prefix
         self.maintenance_lock = threading.Lock()
         self.state_lock = threading.Lock()
-        self.thread_lock = threading.Lock()
-        self.thread_started = False
+        self.catalog_lock = threading.Lock()
+        self.catalog_cache = None
         self.state = {
             'next_run_at': '',
             'last_run_at': '',
             'last_result': '',
-            'last_message': ''
+            'last_message': '',
+            'last_verification': None
         }
 
     @property
@@ -84,6 +130,26 @@ class BackupService(BackupArchiveOpsMixin, BackupDatabaseOpsMixin, BackupSchedul
     def schedule_time(self):
         return self.schedule_time_getter()
 
+    @property
+    def schedule_cron(self):
+        return (self.schedule_cron_getter() or '').strip()
+
     @property
     def retention_count(self):
         return self.retention_count_getter()
+
+    @property
+    def incremental_backups_enabled(self):
+        return self.incremental_getter()
+
+    @property
+    def full_backup_interval(self):
+        return max(1, int(self.full_interval_getter()))
+
+    @property
+    def compression(self):
+        return normalize_backup_compression(self.compression_getter(), self.logger)
+
+    @property
+    def dump_format(self):
+        return normalize_backup_dump_format(self.dump_format_getter(), self.logger)
@@ -1,5 +1,10 @@
 import os
-from contextlib import contextmanager
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Optional
 
 import mysql.connector
 
@@ -14,11 +19,150 @@ def build_db_config(environ=None):
     }
 
 
+SQL_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+SQL_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+SQL_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)')
+SQL_WHITESPACE = re.compile(r'\s+')
+QUERY_TRACE_MAX_STATEMENTS = 200
+
+
+def normalize_sql_statement(statement):
+    """Collapse ``statement`` to its shape: literals become ``?`` and
+    ``IN (%s, %s, ...)`` lists collapse, so repeats of one query group together.
+    """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    statement = SQL_STRING_LITERAL.sub('?', str(statement))
+    statement = SQL_NUMBER_LITERAL.sub('?', statement)
+    statement = SQL_PLACEHOLDER_LIST.sub('(...)', statement)
+    return SQL_WHITESPACE.sub(' ', statement).strip()
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    duration: float
+    rows: Optional[int] = None
+
+
+class QueryTrace:
+    """Statements issued while serving one request.
+
+    Shared by the threads of a batched API request, hence the lock. Only
+    the first ``max_statements`` records are kept; counts and time cover
+    every statement.
+    """
+
+    def __init__(self, max_statements=QUERY_TRACE_MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self.lock = threading.Lock()
+        self.records = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, record):
+        with self.lock:
+            self.count += 1
+            self.seconds += record.duration
+            if len(self.records) < self.max_statements:
+                self.records.append(record)
+
+    def summary(self, limit=5):
+        """The most expensive statement shapes as ``(statement, count, seconds)``."""
+        groups = {}
+        with self.lock:
+            records = list(self.records)
+        for record in records:
+            count, seconds = groups.get(record.statement, (0, 0.0))
+            groups[record.statement] = (count + 1, seconds + record.duration)
+        ranked = sorted(groups.items(), key=lambda item: (-item[1][1], -item[1][0]))
+        return [(statement, count, seconds) for statement, (count, seconds) in ranked[:limit]]
+
+
+class InstrumentedCursor:
+    """Cursor proxy that reports a ``QueryRecord`` for each ``execute`` call.
+
+    The record's row count is refreshed on every fetch, because unbuffered
+    MySQL cursors only know how many rows a ``SELECT`` returned once they
+    have been read.
+    """
+
+    def __init__(self, cursor, observer):
+        self._cursor = cursor
+        self._observer = observer
+        self._record = None
+
+    def _row_count(self):
+        rowcount = getattr(self._cursor, 'rowcount', -1)
+        return rowcount if isinstance(rowcount, int) and rowcount >= 0 else None
+
+    def _timed(self, method, statement, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            self._record = QueryRecord(
+                normalize_sql_statement(statement),
+                time.perf_counter() - started,
+                self._row_count()
+            )
+            self._observer(self._record)
+
+    def _fetched(self, result):
+        if self._record is not None:
+            rows = self._row_count()
+            if rows is not None:
+                self._record.rows = rows
+        return result
+
+    def execute(self, statement, *args, **kwargs):
+        return self._timed(self._cursor.execute, statement, *args, **kwargs)
+
+    def executemany(self, statement, *args, **kwargs):
+        return self._timed(self._cursor.executemany, statement, *args, **kwargs)
+
+    def fetchone(self):
+        return self._fetched(self._cursor.fetchone())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._fetched(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._fetched(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors report statement timings to ``observer``."""
+
+    def __init__(self, conn, observer):
+        self._conn = conn
+        self._observer = observer
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._observer)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
 @contextmanager
-def get_db_connection(db_config):
+def get_db_connection(db_config, observer=None):
     conn = mysql.connector.connect(**db_config)
     try:
-        yield conn
+        yield InstrumentedConnection(conn, observer) if observer else conn
     finally:
         if conn.is_connected():
             conn.close()
@@ -36,3 +180,57 @@ def check_database_connection(connection_factory):
         cursor.execute("SELECT 1")
         result = cursor.fetchone()
         return first_column_value(result) == 1
+
+
+ADVISORY_LOCK_NAME_MAX_LENGTH = 64
+
+
+@contextmanager
+def advisory_lock(connection_factory, name, timeout=0):
+    """Hold a MariaDB ``GET_LOCK`` named ``name`` for the duration of the block.
+
+    Yields whether the lock was acquired. The lock is tied to the connection
+    opened here, so it is released even if the process dies.
+    """
+    name = name[:ADVISORY_LOCK_NAME_MAX_LENGTH]
+    with connection_factory() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+        acquired = first_column_value(cursor.fetchone()) == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchone()
+
+
+class SharedConnection:
+    """Lend one lazily opened connection to consecutive ``with`` blocks.
+
+    Used to serve several API events from one connection. Whatever a block
+    leaves uncommitted is rolled back when it returns, as closing the
+    connection would have done.
+    """
+
+    def __init__(self, connection_factory):
+        self.connection_factory = connection_factory
+        self.exit_stack = ExitStack()
+        self.conn = None
+
+    @contextmanager
+    def borrow(self):
+        if self.conn is not None and not self.conn.is_connected():
+            self.close()
+        if self.conn is None:
+            self.conn = self.exit_stack.enter_context(self.connection_factory())
+        conn = self.conn
+        try:
+            yield conn
+        finally:
+            if getattr(conn, 'in_transaction', False) and conn.is_connected():
+                conn.rollback()
+
+    def close(self):
+        self.conn = None
+        self.exit_stack.close()
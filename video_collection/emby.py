@@ -1,4 +1,44 @@
+import ipaddress
 import os
+from urllib.parse import quote, urlencode
+
+
+EMBY_PLAYBACK_MODES = {'proxy', 'direct', 'auto'}
+
+
+def parse_network_list(value):
+    networks = []
+    for item in str(value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def normalize_emby_playback_mode(value):
+    mode = str(value or '').strip().lower()
+    return mode if mode in EMBY_PLAYBACK_MODES else 'proxy'
+
+
+def resolve_emby_playback_mode(configured_mode, client_address, direct_networks=None, requested_mode=None):
+    """Pick 'direct' or 'proxy' for one request; clients may only downgrade to proxy."""
+    configured_mode = normalize_emby_playback_mode(configured_mode)
+    if configured_mode == 'proxy' or str(requested_mode or '').strip().lower() == 'proxy':
+        return 'proxy'
+    if configured_mode == 'direct':
+        return 'direct'
+
+    try:
+        address = ipaddress.ip_address(str(client_address or '').split('%', 1)[0])
+    except ValueError:
+        return 'proxy'
+    if direct_networks:
+        return 'direct' if any(address in network for network in direct_networks) else 'proxy'
+    return 'direct' if address.is_private or address.is_loopback else 'proxy'
 
 
 class EmbyClient:
@@ -85,6 +125,12 @@ class EmbyClient:
         self.token_cache['user_id'] = user_id
         return access_token, user_id
 
+    def build_stream_url(self, item_id, params=None):
+        server_url = self.get_server_url()
+        access_token, _ = self.authenticate()
+        query = {'Static': 'true', **(params or {}), 'api_key': access_token}
+        return f'{server_url}/emby/Videos/{quote(str(item_id), safe="")}/stream?{urlencode(query)}'
+
     def request(self, method, path, params=None, headers=None, stream=False, timeout=15, force_refresh=False):
         server_url = self.get_server_url()
         access_token, _ = self.authenticate(force_refresh)
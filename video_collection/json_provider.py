@@ -0,0 +1,91 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def json_default(value):
+    """Fallback for values neither encoder handles natively.
+
+    Dates and times become ISO 8601 strings on both encoders, so responses
+    look the same whether or not orjson is installed. Naive datetimes are
+    UTC, as they were for Flask's HTTP-date format, and carry an explicit
+    ``+00:00`` so browsers do not read them as local time.
+    """
+    if isinstance(value, datetime.datetime) and value.utcoffset() is None:
+        return value.replace(tzinfo=datetime.timezone.utc).isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed.
+
+    Calls with extra ``json.dumps`` options (indentation in debug mode,
+    custom separators) and values orjson rejects, such as integers wider
+    than 64 bits, go through the stdlib encoder instead.
+    """
+
+    default = staticmethod(json_default)
+    ensure_ascii = False
+    use_orjson = orjson is not None
+
+    def orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self.orjson_options())
+            except TypeError:
+                pass
+        if not kwargs:
+            kwargs['separators'] = (',', ':')
+        return self.stdlib_dumps(obj, **kwargs).encode('utf-8')
+
+    def stdlib_dumps(self, obj, **kwargs):
+        return super().dumps(obj, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return self.stdlib_dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self.dumps_bytes(obj, indent=2)
+        else:
+            body = self.dumps_bytes(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+__all__ = [
+    'FastJSONProvider',
+    'json_default',
+]
@@ -0,0 +1,319 @@
+import base64
+import datetime
+import decimal
+import gzip
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import ExitStack
+
+from .maintenance_jobs import report_maintenance_progress
+
+
+BACKUP_DUMP_FORMATS = ('sql', 'logical')
+DEFAULT_BACKUP_DUMP_FORMAT = 'sql'
+LOGICAL_DUMP_FORMAT = 'video-collection-logical'
+LOGICAL_DUMP_VERSION = 1
+LOGICAL_EXPORT_BATCH_ROWS = 2000
+LOGICAL_EXPORT_GZIP_LEVEL = 6
+LOGICAL_EXPORT_WORKERS = 4
+LOGICAL_RESTORE_BATCH_ROWS = 1000
+LOGICAL_COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class LogicalDumpError(ValueError):
+    pass
+
+
+def normalize_backup_dump_format(value, logger=None):
+    dump_format = (value or DEFAULT_BACKUP_DUMP_FORMAT).strip().lower()
+    if dump_format in BACKUP_DUMP_FORMATS:
+        return dump_format
+    if logger:
+        logger.warning("Unknown DB_BACKUP_DUMP_FORMAT %r; using %s", value, DEFAULT_BACKUP_DUMP_FORMAT)
+    return DEFAULT_BACKUP_DUMP_FORMAT
+
+
+def quote_identifier(name):
+    return '`' + str(name).replace('`', '``') + '`'
+
+
+def row_first_value(row):
+    if isinstance(row, dict):
+        return next(iter(row.values()))
+    return row[0]
+
+
+def encode_logical_value(value):
+    """JSON fallback for column values the ``json`` module cannot encode.
+
+    Temporal and decimal values become the strings MariaDB accepts back on
+    insert; binary values are wrapped so the loader can tell them apart.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return {'b64': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        sign = '-' if value < datetime.timedelta(0) else ''
+        total = abs(value)
+        hours, remainder = divmod(total.days * 86400 + total.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f'{sign}{hours:02d}:{minutes:02d}:{seconds:02d}.{total.microseconds:06d}'
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return ','.join(sorted(value))
+    raise TypeError(f'Unsupported column value: {type(value).__name__}')
+
+
+def decode_logical_value(value):
+    if isinstance(value, dict) and 'b64' in value:
+        return base64.b64decode(value['b64'])
+    return value
+
+
+def encode_logical_line(record):
+    return (json.dumps(record, default=encode_logical_value, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def list_logical_tables(cursor, database):
+    """Base tables of ``database``, largest first so they start exporting earliest."""
+    cursor.execute("""
+        SELECT TABLE_NAME
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY DATA_LENGTH DESC, TABLE_NAME
+    """, (database,))
+    return [row_first_value(row) for row in cursor.fetchall()]
+
+
+def export_logical_table(conn, table, output, batch_rows=LOGICAL_EXPORT_BATCH_ROWS, stop_event=None):
+    """Write one table as NDJSON: a header with its DDL, one array per row, a footer."""
+    cursor = conn.cursor()
+    cursor.execute(f"SHOW CREATE TABLE {quote_identifier(table)}")
+    create_rows = cursor.fetchall()
+    create_row = create_rows[0]
+    create_table = create_row['Create Table'] if isinstance(create_row, dict) else create_row[1]
+
+    # Unbuffered cursor: rows stream from the server in batches instead of
+    # being materialised client-side.
+    cursor.execute(f"SELECT * FROM {quote_identifier(table)}")
+    columns = [description[0] for description in cursor.description]
+    output.write(encode_logical_line({'table': table, 'columns': columns, 'create_table': create_table}))
+    row_count = 0
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            raise LogicalDumpError('Logical export was stopped')
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            break
+        if isinstance(rows[0], dict):
+            rows = [[row[column] for column in columns] for row in rows]
+        output.write(b''.join(encode_logical_line(list(row)) for row in rows))
+        row_count += len(rows)
+    output.write(encode_logical_line({'table_end': table, 'rows': row_count}))
+    return row_count
+
+
+def load_logical_dump(conn, input_file, batch_rows=LOGICAL_RESTORE_BATCH_ROWS, progress=None):
+    """Recreate every table of a logical dump and bulk-insert its rows.
+
+    Rows go in as multi-row ``INSERT`` statements (``executemany`` batches
+    them client-side). Returns ``{table: row_count}``.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute("SET UNIQUE_CHECKS = 0")
+    loaded = {}
+    header_seen = False
+    table = None
+    insert_sql = None
+    batch = []
+    row_count = 0
+
+    def flush():
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            if progress:
+                progress(len(batch))
+            batch.clear()
+
+    try:
+        for raw_line in iter(input_file.readline, b''):
+            record = json.loads(raw_line)
+            if isinstance(record, list):
+                if table is None:
+                    raise LogicalDumpError('Row found outside of a table section')
+                batch.append(tuple(decode_logical_value(value) for value in record))
+                row_count += 1
+                if len(batch) >= batch_rows:
+                    flush()
+            elif not header_seen:
+                if record.get('format') != LOGICAL_DUMP_FORMAT or record.get('version') != LOGICAL_DUMP_VERSION:
+                    raise LogicalDumpError('Unsupported logical dump format')
+                header_seen = True
+            elif 'columns' in record:
+                table = record['table']
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+                cursor.execute(record['create_table'])
+                columns = ', '.join(quote_identifier(column) for column in record['columns'])
+                placeholders = ', '.join(['%s'] * len(record['columns']))
+                insert_sql = f"INSERT INTO {quote_identifier(table)} ({columns}) VALUES ({placeholders})"
+                row_count = 0
+            elif 'table_end' in record:
+                flush()
+                if record['table_end'] != table or record.get('rows') != row_count:
+                    raise LogicalDumpError(f'Logical dump section for {table} is incomplete')
+                conn.commit()
+                loaded[table] = row_count
+                table = None
+        if not header_seen or table is not None:
+            raise LogicalDumpError('Logical dump is truncated')
+    finally:
+        cursor.execute("SET UNIQUE_CHECKS = 1")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    return loaded
+
+
+class BackupLogicalDumpMixin:
+    """Native per-table export/import used when ``DB_BACKUP_DUMP_FORMAT=logical``.
+
+    The dump is one gzip stream of NDJSON: a header line, then for each table
+    its DDL, rows and a footer with the row count. Tables are exported in
+    parallel into per-table gzip members that are concatenated in order.
+    """
+
+    def open_logical_snapshots(self, coordinator, connections, tables):
+        """Start a consistent snapshot on every connection.
+
+        The tables are read-locked while the snapshots open so they all see
+        the same committed state. Without the LOCK TABLES privilege the
+        export falls back to a single connection.
+        """
+        locked = False
+        lock_cursor = coordinator.cursor()
+        if len(connections) > 1:
+            try:
+                lock_cursor.execute('LOCK TABLES ' + ', '.join(f'{quote_identifier(table)} READ' for table in tables))
+                locked = True
+            except Exception as e:
+                self.logger.warning("Unable to lock tables for a parallel logical export; using one connection: %s", e)
+                del connections[1:]
+        try:
+            for conn in connections:
+                cursor = conn.cursor()
+                cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        finally:
+            if locked:
+                lock_cursor.execute('UNLOCK TABLES')
+
+    def stream_logical_dump(self, output, workers=LOGICAL_EXPORT_WORKERS):
+        os.makedirs(self.backup_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix='.logical-', dir=self.backup_dir)
+        stop_event = threading.Event()
+        try:
+            with ExitStack() as stack:
+                coordinator = stack.enter_context(self.db_connection_factory())
+                tables = list_logical_tables(coordinator.cursor(), self.db_config['database'])
+                connections = [
+                    stack.enter_context(self.db_connection_factory())
+                    for _ in range(max(1, min(workers, len(tables))))
+                ]
+                self.open_logical_snapshots(coordinator, connections, tables)
+
+                pending = queue.Queue()
+                results = {}
+                failures = []
+                for index, table in enumerate(tables):
+                    results[table] = Future()
+                    pending.put((table, os.path.join(temp_dir, f'{index:04d}.ndjson.gz')))
+
+                def export_worker(conn):
+                    while not stop_event.is_set():
+                        try:
+                            table, path = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        try:
+                            with gzip.open(path, 'wb', compresslevel=LOGICAL_EXPORT_GZIP_LEVEL) as table_output:
+                                export_logical_table(conn, table, table_output, stop_event=stop_event)
+                            results[table].set_result(path)
+                        except BaseException as e:
+                            results[table].set_exception(e)
+                            if not stop_event.is_set():
+                                stop_event.set()
+                                failures.append(e)
+                            # Fail the tables nobody will pick up now.
+                            while True:
+                                try:
+                                    queued_table, _ = pending.get_nowait()
+                                except queue.Empty:
+                                    break
+                                results[queued_table].set_exception(e)
+
+                threads = [
+                    threading.Thread(target=export_worker, args=(conn,), name=f'logical-export-{index}', daemon=True)
+                    for index, conn in enumerate(connections)
+                ]
+                for thread in threads:
+                    thread.start()
+                try:
+                    output.write(gzip.compress(encode_logical_line({
+                        'format': LOGICAL_DUMP_FORMAT,
+                        'version': LOGICAL_DUMP_VERSION,
+                        'database': self.db_config['database'],
+                        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'tables': tables
+                    }), compresslevel=LOGICAL_EXPORT_GZIP_LEVEL))
+                    report_maintenance_progress(files_total=len(tables))
+                    for table in tables:
+                        exception = results[table].exception()
+                        if exception is not None:
+                            raise failures[0] if failures else exception
+                        path = results[table].result()
+                        with open(path, 'rb') as table_input:
+                            while True:
+                                chunk = table_input.read(LOGICAL_COPY_CHUNK_BYTES)
+                                if not chunk:
+                                    break
+                                output.write(chunk)
+                                report_maintenance_progress(add_bytes=len(chunk))
+                        os.remove(path)
+                        report_maintenance_progress(add_files=1)
+                finally:
+                    stop_event.set()
+                    for thread in threads:
+                        thread.join()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def stream_logical_restore(self, input_file):
+        with self.db_connection_factory() as conn:
+            loaded = load_logical_dump(
+                conn,
+                input_file,
+                progress=lambda rows: report_maintenance_progress()
+            )
+        self.logger.info("Logical restore loaded %s table(s), %s row(s)", len(loaded), sum(loaded.values()))
+        return loaded
+
+
+__all__ = [
+    'BACKUP_DUMP_FORMATS',
+    'BackupLogicalDumpMixin',
+    'LogicalDumpError',
+    'encode_logical_value',
+    'export_logical_table',
+    'list_logical_tables',
+    'load_logical_dump',
+    'normalize_backup_dump_format',
+]
@@ -0,0 +1,344 @@
+import threading
+import time
+import uuid
+
+
+MAINTENANCE_JOB_HISTORY = 20
+MAINTENANCE_JOB_FINISHED_STATUSES = {'succeeded', 'failed', 'cancelled'}
+MAINTENANCE_JOB_PUBLISH_INTERVAL_SECONDS = 0.5
+MAINTENANCE_JOB_HEARTBEAT_SECONDS = 10
+MAINTENANCE_JOB_STALE_SECONDS = 60
+
+_current = threading.local()
+
+
+class MaintenanceJobCancelled(Exception):
+    pass
+
+
+class MaintenanceJob:
+    """Progress and outcome of one background backup or restore."""
+
+    def __init__(self, kind, params=None, publisher=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = dict(params or {})
+        self.status = 'queued'
+        self.stage = ''
+        self.progress = {'files_done': 0, 'files_total': 0, 'bytes_done': 0}
+        self.cancellable = True
+        self.cancel_requested = False
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.updated_at = self.created_at
+        self.publisher = publisher
+        self._published_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """A read-only copy of a job published by this or another worker."""
+        job = cls(snapshot['kind'], snapshot.get('params'))
+        job.id = snapshot['id']
+        job.status = snapshot['status']
+        job.stage = snapshot.get('stage', '')
+        job.progress = dict(snapshot.get('progress') or job.progress)
+        job.cancellable = bool(snapshot.get('cancellable'))
+        job.cancel_requested = bool(snapshot.get('cancel_requested'))
+        job.result = snapshot.get('result')
+        job.created_at = snapshot.get('created_at')
+        job.started_at = snapshot.get('started_at')
+        job.finished_at = snapshot.get('finished_at')
+        job.updated_at = snapshot.get('updated_at')
+        return job
+
+    @property
+    def finished(self):
+        return self.status in MAINTENANCE_JOB_FINISHED_STATUSES
+
+    def update(self, stage=None, cancellable=None, add_files=0, add_bytes=0, **counters):
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            if cancellable is not None:
+                self.cancellable = cancellable
+            for key, value in counters.items():
+                if key in self.progress and value is not None:
+                    self.progress[key] = int(value)
+            self.progress['files_done'] += add_files
+            self.progress['bytes_done'] += add_bytes
+        self.publish()
+        with self._lock:
+            cancel = self.cancel_requested and self.cancellable
+        if cancel:
+            raise MaintenanceJobCancelled()
+
+    def request_cancel(self):
+        with self._lock:
+            if self.finished or not self.cancellable:
+                return False
+            self.cancel_requested = True
+        self.publish(force=True)
+        return True
+
+    def mark_running(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = time.time()
+        self.publish(force=True)
+
+    def finish(self, status, result=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.cancellable = False
+            self.finished_at = time.time()
+        self.publish(force=True)
+
+    def publish(self, force=False):
+        """Hand a snapshot to ``publisher``, at most every publish interval unless forced.
+
+        The publisher returns whether a cancel was requested elsewhere, which
+        is how a cancel made on another worker reaches this job.
+        """
+        if self.publisher is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._published_at is not None and now - self._published_at < MAINTENANCE_JOB_PUBLISH_INTERVAL_SECONDS:
+                return
+            self._published_at = now
+            self.updated_at = time.time()
+        if self.publisher(self.to_dict()):
+            with self._lock:
+                if self.cancellable:
+                    self.cancel_requested = True
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'params': dict(self.params),
+                'status': self.status,
+                'stage': self.stage,
+                'progress': dict(self.progress),
+                'cancellable': self.cancellable and not self.finished,
+                'cancel_requested': self.cancel_requested,
+                'result': self.result,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'updated_at': self.updated_at
+            }
+
+
+def current_maintenance_job():
+    return getattr(_current, 'job', None)
+
+
+def report_maintenance_progress(stage=None, cancellable=None, **counters):
+    """Update the job running on this thread, raising if it was cancelled.
+
+    Outside a background job (synchronous requests, the scheduler) this is
+    a no-op, so backup code can report progress unconditionally.
+    """
+    job = current_maintenance_job()
+    if job is not None:
+        job.update(stage=stage, cancellable=cancellable, **counters)
+
+
+def snapshot_is_stale(snapshot, now=None):
+    if snapshot.get('status') in MAINTENANCE_JOB_FINISHED_STATUSES:
+        return False
+    return (now or time.time()) - (snapshot.get('updated_at') or 0) > MAINTENANCE_JOB_STALE_SECONDS
+
+
+class MaintenanceJobStore:
+    """Job snapshots in a shared-state namespace, so any worker can report or cancel a job.
+
+    Running jobs refresh their snapshot on a heartbeat; an unfinished job
+    that stops refreshing belonged to a worker that exited and is reported
+    as failed.
+    """
+
+    def __init__(self, state=None, lock=None, history=MAINTENANCE_JOB_HISTORY):
+        self.state = {} if state is None else state
+        self.lock = lock or threading.Lock()
+        self.history = history
+
+    def visible(self, snapshot, now=None):
+        if not snapshot_is_stale(snapshot, now):
+            return snapshot
+        return dict(
+            snapshot,
+            status='failed',
+            cancellable=False,
+            result={'success': False, 'message': '维护任务所在进程已退出'}
+        )
+
+    def claim(self, snapshot):
+        """Store a new job unless another worker has one running."""
+        with self.lock:
+            now = time.time()
+            if any(
+                stored.get('status') not in MAINTENANCE_JOB_FINISHED_STATUSES and not snapshot_is_stale(stored, now)
+                for stored in self.state.values()
+            ):
+                return False
+            self.state[snapshot['id']] = snapshot
+            self._trim_history()
+            return True
+
+    def save(self, snapshot):
+        """Store ``snapshot``; returns whether a cancel was requested for it."""
+        with self.lock:
+            stored = self.state.get(snapshot['id'])
+            if stored and stored.get('cancel_requested'):
+                snapshot = dict(snapshot, cancel_requested=True)
+            self.state[snapshot['id']] = snapshot
+            return bool(snapshot.get('cancel_requested'))
+
+    def load(self, job_id):
+        with self.lock:
+            snapshot = self.state.get(job_id)
+        return self.visible(snapshot) if snapshot else None
+
+    def snapshots(self):
+        with self.lock:
+            snapshots = list(self.state.values())
+        now = time.time()
+        return [self.visible(snapshot, now) for snapshot in snapshots]
+
+    def request_cancel(self, job_id):
+        with self.lock:
+            snapshot = self.state.get(job_id)
+            if (
+                not snapshot
+                or snapshot.get('status') in MAINTENANCE_JOB_FINISHED_STATUSES
+                or not snapshot.get('cancellable')
+                or snapshot_is_stale(snapshot)
+            ):
+                return False
+            self.state[job_id] = dict(snapshot, cancel_requested=True)
+            return True
+
+    def _trim_history(self):
+        finished = [
+            snapshot for snapshot in self.state.values()
+            if snapshot.get('status') in MAINTENANCE_JOB_FINISHED_STATUSES or snapshot_is_stale(snapshot)
+        ]
+        finished.sort(key=lambda snapshot: snapshot.get('created_at') or 0)
+        for snapshot in finished[:max(0, len(self.state) - self.history)]:
+            self.state.pop(snapshot['id'], None)
+
+
+class MaintenanceJobManager:
+    """Runs maintenance work on a background thread while holding ``lock``.
+
+    ``target`` returns the JSON payload the synchronous endpoint would have
+    sent; payloads with ``success: False`` mark the job as failed. Job state
+    is published to ``state`` (a shared-state namespace guarded by
+    ``state_lock``) so status polls and cancels work from any worker.
+    """
+
+    def __init__(self, lock, logger, history=MAINTENANCE_JOB_HISTORY, state=None, state_lock=None):
+        self.lock = lock
+        self.logger = logger
+        self.history = history
+        self.store = MaintenanceJobStore(state, state_lock, history)
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+
+    def start(self, kind, target, params=None):
+        if not self.lock.acquire(blocking=False):
+            return None
+        job = MaintenanceJob(kind, params, publisher=self.store.save)
+        try:
+            if not self.store.claim(job.to_dict()):
+                self.lock.release()
+                return None
+            with self._jobs_lock:
+                self._jobs[job.id] = job
+                self._trim_history()
+            threading.Thread(
+                target=self._run,
+                args=(job, target),
+                name=f'maintenance-{kind}',
+                daemon=True
+            ).start()
+        except Exception:
+            self.lock.release()
+            raise
+        return job
+
+    def _trim_history(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        finished.sort(key=lambda job: job.created_at)
+        for job in finished[:max(0, len(self._jobs) - self.history)]:
+            self._jobs.pop(job.id, None)
+
+    def _heartbeat(self, job, stopped):
+        while not stopped.wait(MAINTENANCE_JOB_HEARTBEAT_SECONDS):
+            job.publish(force=True)
+
+    def _run(self, job, target):
+        _current.job = job
+        stopped = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job, stopped), name='maintenance-heartbeat', daemon=True).start()
+        job.mark_running()
+        try:
+            result = target()
+            failed = isinstance(result, dict) and result.get('success') is False
+            job.finish('failed' if failed else 'succeeded', result)
+        except MaintenanceJobCancelled:
+            self.logger.info("Maintenance job %s (%s) was cancelled", job.id, job.kind)
+            job.finish('cancelled', {'success': False, 'message': '任务已取消'})
+        except Exception as e:
+            self.logger.exception("Maintenance job %s (%s) failed: %s", job.id, job.kind, e)
+            job.finish('failed', {'success': False, 'message': '维护任务执行失败'})
+        finally:
+            stopped.set()
+            _current.job = None
+            self.lock.release()
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        snapshot = self.store.load(job_id)
+        return MaintenanceJob.from_snapshot(snapshot) if snapshot else None
+
+    def list_jobs(self):
+        with self._jobs_lock:
+            local_jobs = dict(self._jobs)
+        jobs = [
+            local_jobs.get(snapshot['id']) or MaintenanceJob.from_snapshot(snapshot)
+            for snapshot in self.store.snapshots()
+        ]
+        jobs.sort(key=lambda job: job.created_at or 0, reverse=True)
+        return jobs
+
+    def active_job(self):
+        return next((job for job in self.list_jobs() if not job.finished), None)
+
+    def cancel(self, job_id):
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.request_cancel()
+        return self.store.request_cancel(job_id)
+
+
+__all__ = [
+    'MAINTENANCE_JOB_HISTORY',
+    'MaintenanceJob',
+    'MaintenanceJobCancelled',
+    'MaintenanceJobManager',
+    'MaintenanceJobStore',
+    'current_maintenance_job',
+    'report_maintenance_progress',
+]
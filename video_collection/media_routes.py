@@ -3,7 +3,7 @@ import os
 from dataclasses import dataclass
 from typing import Any
 
-from flask import Response, request, send_from_directory, stream_with_context
+from flask import Response, redirect, request, send_from_directory, stream_with_context
 
 
 @dataclass(frozen=True)
@@ -19,6 +19,9 @@ class MediaRouteDependencies:
     parse_byte_range: Any
     stream_file_slice: Any
     emby_request: Any
+    proxy_stream: Any
+    verify_emby_direct_signature: Any
+    build_emby_stream_url: Any
     log_exception: Any
     get_service_url: Any
 
@@ -183,16 +186,8 @@ class MediaRouteHandlers:
                     response_headers[header_name] = upstream.headers[header_name]
             response_headers.setdefault('Accept-Ranges', 'bytes')
 
-            def generate():
-                try:
-                    for chunk in upstream.iter_content(chunk_size=1024 * 1024):
-                        if chunk:
-                            yield chunk
-                finally:
-                    upstream.close()
-
             return Response(
-                stream_with_context(generate()),
+                stream_with_context(self.dependencies.proxy_stream(upstream, f'emby:{item_id}')),
                 status=upstream.status_code,
                 headers=response_headers,
                 direct_passthrough=True
@@ -201,6 +196,25 @@ class MediaRouteHandlers:
             self.dependencies.log_exception('Emby stream proxy', e)
             return Response('Unable to stream this Emby item', status=502)
 
+    def redirect_emby_video(self, item_id):
+        if not self.dependencies.verify_emby_direct_signature(
+            item_id,
+            request.args.get('expires', ''),
+            request.args.get('signature', '')
+        ):
+            return Response('Direct play link is invalid or expired', status=403)
+
+        try:
+            target_url = self.dependencies.build_emby_stream_url(item_id)
+        except Exception as e:
+            self.dependencies.log_exception('Emby direct play redirect', e)
+            return Response('Unable to stream this Emby item', status=502)
+
+        response = redirect(target_url, code=302)
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['Referrer-Policy'] = 'no-referrer'
+        return response
+
     def build_service_redirect_url(self, service_name):
         service_url = self.dependencies.get_service_url(service_name)
         if not service_url:
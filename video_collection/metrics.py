@@ -0,0 +1,252 @@
+import bisect
+import functools
+import math
+import threading
+import time
+
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def format_metric_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+class MetricFamily:
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def label_key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f'{self.name} expects labels {self.label_names}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self):
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.metric_type}'
+        ]
+
+    def render(self):
+        with self.lock:
+            samples = sorted(self.samples.items())
+        lines = self.header()
+        for key, value in samples:
+            lines.append(f'{self.name}{format_labels(self.label_names, key)} {format_metric_value(value)}')
+        return lines
+
+
+class Counter(MetricFamily):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+
+class Gauge(MetricFamily):
+    metric_type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.samples[key] = value
+
+
+class Histogram(MetricFamily):
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            sample[0][index] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def render(self):
+        with self.lock:
+            samples = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.samples.items())
+        lines = self.header()
+        for key, (counts, total, count) in samples:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.label_names, key, [('le', format_metric_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {format_metric_value(round(total, 6))}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metric families rendered in the Prometheus text format.
+
+    ``collectors`` are called at scrape time to refresh gauges that mirror
+    state kept elsewhere (cache sizes, active streams). With several
+    gunicorn workers each process reports its own values.
+    """
+
+    def __init__(self):
+        self.families = []
+        self.collectors = []
+
+    def register(self, family):
+        self.families.append(family)
+        return family
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class AppMetrics:
+    """The application's metric families and the helpers that feed them."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        registry = self.registry
+        self.http_requests = registry.counter(
+            'vc_http_requests_total', 'HTTP requests by endpoint, method and status.', ('endpoint', 'method', 'status')
+        )
+        self.http_duration = registry.histogram(
+            'vc_http_request_duration_seconds', 'Time until the response headers were ready.', ('endpoint',)
+        )
+        self.http_in_flight = registry.gauge('vc_http_requests_in_flight', 'HTTP requests being handled.')
+        self.http_response_bytes = registry.counter(
+            'vc_http_response_bytes_total', 'Declared Content-Length of responses by endpoint.', ('endpoint',)
+        )
+        self.api_events = registry.counter('vc_api_events_total', 'API events by name and status.', ('event', 'status'))
+        self.api_duration = registry.histogram('vc_api_event_duration_seconds', 'API event handler latency.', ('event',))
+        self.db_queries = registry.counter('vc_db_queries_total', 'SQL statements executed.')
+        self.db_query_seconds = registry.counter('vc_db_query_seconds_total', 'Time spent executing SQL statements.')
+        self.db_queries_per_request = registry.histogram(
+            'vc_db_queries_per_request', 'SQL statements per HTTP request.', ('endpoint',), QUERY_COUNT_BUCKETS
+        )
+        self.db_time_per_request = registry.histogram(
+            'vc_db_time_per_request_seconds', 'SQL time per HTTP request.', ('endpoint',)
+        )
+        self.streamed_bytes = registry.counter(
+            'vc_streamed_bytes_total', 'Bytes written by streaming responses.', ('source',)
+        )
+        self.image_processing = registry.histogram(
+            'vc_image_processing_seconds', 'Image decode, resize and encode time.', ('operation',)
+        )
+        self.cache_stats = registry.gauge('vc_cache_stat', 'In-process cache statistics, sampled at scrape time.', ('cache', 'stat'))
+        self.proxy_streams = registry.gauge('vc_stream_proxy', 'Emby stream proxy totals, sampled at scrape time.', ('stat',))
+
+    def render(self):
+        return self.registry.render()
+
+    def observe_http(self, endpoint, method, status, duration, content_length=None):
+        self.http_requests.inc(endpoint=endpoint, method=method, status=status)
+        self.http_duration.observe(duration, endpoint=endpoint)
+        if content_length:
+            self.http_response_bytes.inc(content_length, endpoint=endpoint)
+
+    def observe_api_event(self, event, status, duration):
+        self.api_events.inc(event=event, status=status)
+        self.api_duration.observe(duration, event=event)
+
+    def observe_db_query(self, duration):
+        self.db_queries.inc()
+        self.db_query_seconds.inc(duration)
+
+    def observe_request_db_usage(self, endpoint, query_count, query_seconds):
+        self.db_queries_per_request.observe(query_count, endpoint=endpoint)
+        self.db_time_per_request.observe(query_seconds, endpoint=endpoint)
+
+    def observe_cache_stats(self, cache, stats):
+        for stat, value in stats.items():
+            self.cache_stats.set(value, cache=cache, stat=stat)
+
+    def observe_stream_proxy(self, totals):
+        for stat, value in totals.items():
+            self.proxy_streams.set(value, stat=stat)
+
+    def count_streamed_bytes(self, source, chunks):
+        """Pass ``chunks`` through, counting each chunk as it is handed to the server."""
+        try:
+            for chunk in chunks:
+                self.streamed_bytes.inc(len(chunk), source=source)
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+
+    def timed_image_operation(self, operation, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.image_processing.observe(time.perf_counter() - started, operation=operation)
+        return wrapper
+
+
+__all__ = [
+    'AppMetrics',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'METRICS_CONTENT_TYPE',
+    'MetricsRegistry',
+]
@@ -208,6 +208,7 @@ def delete_unreferenced_uploaded_images(
     delete_uploaded_image,
     logger
 ):
+    deleted = 0
     for filename in filenames:
         safe_filename = filename_normalizer(filename)
         if not safe_filename:
@@ -216,9 +217,16 @@ def delete_unreferenced_uploaded_images(
             cursor.execute("SELECT COUNT(*) FROM movie_images WHERE filename = %s", (safe_filename,))
             if first_row_value(cursor.fetchone()) > 0:
                 continue
-            delete_uploaded_image(safe_filename)
+            if delete_uploaded_image(safe_filename):
+                deleted += 1
         except Exception as e:
             logger.warning("Failed to delete unreferenced image %r: %s", safe_filename, e)
+    return deleted
+
+
+def list_referenced_image_filenames(cursor):
+    cursor.execute("SELECT DISTINCT filename FROM movie_images")
+    return {row['filename'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
 
 
 def sync_movie_metadata(cursor, movie_title, tag_names_value, ratings_value):
@@ -280,12 +288,6 @@ def hydrate_movie_rows(cursor, movies):
         movie['ratings'] = ','.join(f"{dimension_id}:{rating}" for dimension_id, rating in ratings)
         movie['ratings_display'] = ratings_display_by_title.get(title, {})
 
-        added_date = movie.get('added_date')
-        if hasattr(added_date, 'strftime'):
-            movie['formatted_added_date'] = added_date.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            movie['formatted_added_date'] = str(added_date or '')
-
     return movies
 
 
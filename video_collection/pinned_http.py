@@ -0,0 +1,35 @@
+import ipaddress
+
+from requests.adapters import HTTPAdapter
+
+
+def pinned_url(parsed_url, address):
+    """Return ``parsed_url`` with its host replaced by the validated ``address``."""
+    host = f'[{address}]' if ipaddress.ip_address(address).version == 6 else address
+    netloc = host if parsed_url.port is None else f'{host}:{parsed_url.port}'
+    return parsed_url._replace(netloc=netloc).geturl()
+
+
+class PinnedHostAdapter(HTTPAdapter):
+    """HTTPS adapter that connects to a pre-resolved address.
+
+    The request URL names the IP address that passed the public-address
+    check, so no second DNS lookup happens at connect time. The original
+    hostname travels in the ``Host`` header and is used for SNI and
+    certificate verification. Requests without a ``Host`` header are sent
+    unchanged.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        hostname = request.headers.get('Host')
+        if hostname and host_params.get('scheme') == 'https':
+            pool_kwargs['server_hostname'] = hostname
+            pool_kwargs['assert_hostname'] = hostname
+        return host_params, pool_kwargs
+
+
+__all__ = [
+    'PinnedHostAdapter',
+    'pinned_url',
+]
@@ -0,0 +1,139 @@
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+
+PROFILE_FILE_SUFFIX = '.folded'
+PROFILE_LABEL_PATTERN = re.compile(r'[^A-Za-z0-9_.-]+')
+PROFILE_FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+\.folded$')
+DEFAULT_PROFILE_INTERVAL_SECONDS = 0.005
+DEFAULT_PROFILE_MAX_DEPTH = 128
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+
+def sample_stack(frame, max_depth=DEFAULT_PROFILE_MAX_DEPTH):
+    """Return the stack of ``frame`` root first, as flamegraph frame labels."""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+class SamplingProfiler:
+    """Periodically sample one thread's stack from a helper thread.
+
+    Unlike ``cProfile`` this adds no per-call overhead to the profiled
+    thread; the cost is one ``sys._current_frames()`` walk per interval.
+    Samples are counted by collapsed stack, the input format of
+    ``flamegraph.pl`` and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=DEFAULT_PROFILE_INTERVAL_SECONDS, max_depth=DEFAULT_PROFILE_MAX_DEPTH):
+        self.thread_id = thread_id
+        self.interval = max(0.001, float(interval))
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return self.stacks
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.stacks[sample_stack(frame, self.max_depth)] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+
+class ProfileStore:
+    """Collapsed-stack profiles in one directory, newest ``retention_count`` kept."""
+
+    def __init__(self, directory, retention_count=50):
+        self.directory = directory
+        self.retention_count = max(1, int(retention_count))
+        self.lock = threading.Lock()
+
+    def save(self, label, profiler, now=None):
+        now = now or datetime.now(timezone.utc)
+        label = PROFILE_LABEL_PATTERN.sub('-', str(label or 'request')).strip('-.')[:64] or 'request'
+        filename = f"{now.strftime('%Y%m%dT%H%M%S%fZ')}-{label}-{int(profiler.duration * 1000)}ms{PROFILE_FILE_SUFFIX}"
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.profile-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as profile_file:
+                profile_file.write(profiler.collapsed())
+            os.replace(temp_path, os.path.join(self.directory, filename))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.prune()
+        return filename
+
+    def list_profiles(self):
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for entry in entries:
+            if not entry.is_file() or not PROFILE_FILENAME_PATTERN.match(entry.name):
+                continue
+            stat_result = entry.stat()
+            profiles.append({
+                'filename': entry.name,
+                'size': stat_result.st_size,
+                'created_at': datetime.fromtimestamp(stat_result.st_mtime, timezone.utc).isoformat()
+            })
+        return sorted(profiles, key=lambda profile: profile['filename'], reverse=True)
+
+    def read_profile(self, filename):
+        if not PROFILE_FILENAME_PATTERN.match(filename or ''):
+            raise ValueError('Invalid profile filename')
+        with open(os.path.join(self.directory, filename), encoding='utf-8') as profile_file:
+            return profile_file.read()
+
+    def prune(self):
+        with self.lock:
+            for profile in self.list_profiles()[self.retention_count:]:
+                try:
+                    os.remove(os.path.join(self.directory, profile['filename']))
+                except FileNotFoundError:
+                    pass
+
+
+__all__ = [
+    'ProfileStore',
+    'SamplingProfiler',
+    'sample_stack',
+]
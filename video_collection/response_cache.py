@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Size-bounded LRU of serialized response bodies for one data version.
+
+    Callers pass the current data version with every lookup. When it
+    differs from the version the entries were stored under, the whole cache
+    is dropped, so an edit invalidates every cached page at once and stale
+    bodies never linger until LRU eviction.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.version = None
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def sync_version(self, version):
+        if version == self.version:
+            return
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.size_bytes = 0
+        self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self.sync_version(version)
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, version, body):
+        if not self.enabled or len(body) > self.max_bytes:
+            return False
+        with self.lock:
+            self.sync_version(version)
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+            self.entries[key] = body
+            self.size_bytes += len(body)
+            while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'size_bytes': self.size_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+__all__ = ['ResponseCache']
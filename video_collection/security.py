@@ -1,3 +1,4 @@
+import hashlib
 import hmac
 import os
 import secrets
@@ -173,6 +174,27 @@ def clear_auth_failures(failures_by_key, lock, key):
         failures_by_key.pop(key, None)
 
 
+def _secret_bytes(secret):
+    return secret if isinstance(secret, bytes) else str(secret or '').encode('utf-8')
+
+
+def sign_expiring_value(secret, value, expires_at):
+    message = f'{value}:{int(expires_at)}'.encode('utf-8')
+    return hmac.new(_secret_bytes(secret), message, hashlib.sha256).hexdigest()
+
+
+def verify_expiring_signature(secret, value, expires_at, signature, now=None):
+    try:
+        expires_at = int(expires_at)
+    except (TypeError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    if expires_at < now or not signature:
+        return False
+    expected = sign_expiring_value(secret, value, expires_at)
+    return hmac.compare_digest(str(signature), expected)
+
+
 def add_security_headers(response):
     response.headers.setdefault('X-Content-Type-Options', 'nosniff')
     response.headers.setdefault('X-Frame-Options', 'SAMEORIGIN')
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import MutableMapping
+
+
+SHARED_STATE_BACKENDS = {'memory', 'sqlite'}
+DEFAULT_SHARED_STATE_PATH = os.path.join(tempfile.gettempdir(), 'video-collection-shared-state.sqlite3')
+SQLITE_BUSY_TIMEOUT_SECONDS = 5
+
+
+class MemorySharedState:
+    """Per-process state: plain dicts guarded by threading locks."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._namespaces = {}
+        self._locks = {}
+
+    def namespace(self, name):
+        with self._guard:
+            return self._namespaces.setdefault(name, {})
+
+    def lock(self, name):
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def now(self):
+        return time.monotonic()
+
+
+class SQLiteSharedState:
+    """State shared by every worker process on the host through one SQLite WAL file.
+
+    Timestamps use the wall clock so entries stay meaningful across restarts.
+    Locks map to ``BEGIN IMMEDIATE`` transactions, so namespace reads and
+    writes made while holding one are atomic across processes.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=DEFAULT_SHARED_STATE_PATH, timeout=SQLITE_BUSY_TIMEOUT_SECONDS):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._transaction_lock = SQLiteLock(self)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self.connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS shared_state ('
+            'namespace TEXT NOT NULL, '
+            'key TEXT NOT NULL, '
+            'value TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, key))'
+        )
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def namespace(self, name):
+        return SQLiteNamespace(self, name)
+
+    def lock(self, name):
+        # SQLite serialises writers database-wide, so every name shares one lock.
+        return self._transaction_lock
+
+    def now(self):
+        return time.time()
+
+
+class SQLiteLock:
+    def __init__(self, state):
+        self.state = state
+        self._thread_lock = threading.RLock()
+        self._depth = threading.local()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        depth = getattr(self._depth, 'value', 0)
+        if depth == 0:
+            try:
+                self.state.connection().execute('BEGIN IMMEDIATE')
+            except Exception:
+                self._thread_lock.release()
+                raise
+        self._depth.value = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._depth.value -= 1
+        try:
+            if self._depth.value == 0:
+                self.state.connection().execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self._thread_lock.release()
+        return False
+
+
+class SQLiteNamespace(MutableMapping):
+    def __init__(self, state, name):
+        self.state = state
+        self.name = name
+
+    def _execute(self, sql, params=()):
+        return self.state.connection().execute(sql, params)
+
+    def __getitem__(self, key):
+        row = self._execute(
+            'SELECT value FROM shared_state WHERE namespace = ? AND key = ?',
+            (self.name, str(key))
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        self._execute(
+            'INSERT INTO shared_state (namespace, key, value) VALUES (?, ?, ?) '
+            'ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value',
+            (self.name, str(key), json.dumps(value))
+        )
+
+    def __delitem__(self, key):
+        cursor = self._execute(
+            'DELETE FROM shared_state WHERE namespace = ? AND key = ?',
+            (self.name, str(key))
+        )
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self):
+        rows = self._execute('SELECT key FROM shared_state WHERE namespace = ?', (self.name,)).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        return self._execute('SELECT COUNT(*) FROM shared_state WHERE namespace = ?', (self.name,)).fetchone()[0]
+
+    def __contains__(self, key):
+        return self._execute(
+            'SELECT 1 FROM shared_state WHERE namespace = ? AND key = ?',
+            (self.name, str(key))
+        ).fetchone() is not None
+
+    def clear(self):
+        self._execute('DELETE FROM shared_state WHERE namespace = ?', (self.name,))
+
+
+def create_shared_state(backend='memory', path=None):
+    backend = str(backend or 'memory').strip().lower()
+    if backend not in SHARED_STATE_BACKENDS:
+        raise ValueError(f'Unsupported shared state backend: {backend}')
+    if backend == 'sqlite':
+        return SQLiteSharedState(path or DEFAULT_SHARED_STATE_PATH)
+    return MemorySharedState()
+
+
+__all__ = [
+    'DEFAULT_SHARED_STATE_PATH',
+    'MemorySharedState',
+    'SHARED_STATE_BACKENDS',
+    'SQLiteSharedState',
+    'create_shared_state',
+]
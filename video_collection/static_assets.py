@@ -0,0 +1,87 @@
+import json
+import mimetypes
+import os
+import threading
+
+from flask import abort, send_file
+from werkzeug.security import safe_join
+
+
+ASSET_MANIFEST_NAME = 'manifest.json'
+HASHED_ASSET_DIR = 'dist'
+HASHED_ASSET_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+HASHED_ASSET_CACHE_CONTROL = f'public, max-age={HASHED_ASSET_MAX_AGE_SECONDS}, immutable'
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticAssetManifest:
+    """Maps logical static paths to the content-hashed copies in ``static/dist``.
+
+    The manifest is written by ``scripts/build-assets.js`` and re-read when
+    its mtime changes, so a rebuild is picked up without a restart. Assets
+    missing from the manifest fall back to their unhashed path.
+    """
+
+    def __init__(self, static_folder, logger=None):
+        self.manifest_path = os.path.join(static_folder, HASHED_ASSET_DIR, ASSET_MANIFEST_NAME)
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.entries = {}
+
+    def load(self):
+        try:
+            mtime_ns = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        with self.lock:
+            if mtime_ns == self.mtime_ns:
+                return self.entries
+            entries = {}
+            if mtime_ns is not None:
+                try:
+                    with open(self.manifest_path, encoding='utf-8') as manifest_file:
+                        entries = json.load(manifest_file)
+                except (OSError, ValueError) as e:
+                    if self.logger:
+                        self.logger.warning("Unable to read static asset manifest: %s", e)
+            self.entries = entries if isinstance(entries, dict) else {}
+            self.mtime_ns = mtime_ns
+            return self.entries
+
+    def resolve(self, filename):
+        return self.load().get(filename, filename)
+
+
+def send_precompressed_asset(directory, filename, accept_encodings):
+    """Send a hashed asset, preferring its prebuilt ``.br`` or ``.gz`` sibling.
+
+    The response carries ``Content-Encoding`` itself, so Flask-Compress
+    leaves it alone and no compression happens per request.
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in PRECOMPRESSED_ENCODINGS:
+        if accept_encodings[candidate] and os.path.isfile(path + suffix):
+            encoding = candidate
+            path += suffix
+            break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=HASHED_ASSET_MAX_AGE_SECONDS)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = HASHED_ASSET_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+__all__ = [
+    'HASHED_ASSET_CACHE_CONTROL',
+    'HASHED_ASSET_DIR',
+    'StaticAssetManifest',
+    'send_precompressed_asset',
+]
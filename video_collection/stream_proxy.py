@@ -0,0 +1,209 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+
+DEFAULT_STREAM_CHUNK_BYTES = 1024 * 1024
+DEFAULT_STREAM_READAHEAD_CHUNKS = 4
+DEFAULT_STREAM_HISTORY_SIZE = 50
+READAHEAD_PUT_TIMEOUT_SECONDS = 0.5
+READAHEAD_JOIN_TIMEOUT_SECONDS = 2
+
+
+_STREAM_END = object()
+
+
+class _UpstreamFailure:
+    def __init__(self, error):
+        self.error = error
+
+
+class StreamProxyStats:
+    def __init__(self, stream_id, label=''):
+        self.stream_id = stream_id
+        self.label = label
+        self.bytes_sent = 0
+        self.chunks_sent = 0
+        self.started_at = time.monotonic()
+        self.first_byte_at = None
+        self.finished_at = None
+        self.status = 'streaming'
+
+    def record_chunk(self, size):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+        self.bytes_sent += size
+        self.chunks_sent += 1
+
+    def snapshot(self):
+        finished_at = self.finished_at or time.monotonic()
+        duration = max(finished_at - self.started_at, 0)
+        ttfb_ms = None
+        if self.first_byte_at is not None:
+            ttfb_ms = round((self.first_byte_at - self.started_at) * 1000, 2)
+        return {
+            'id': self.stream_id,
+            'label': self.label,
+            'status': self.status,
+            'bytes': self.bytes_sent,
+            'chunks': self.chunks_sent,
+            'duration_ms': round(duration * 1000, 2),
+            'ttfb_ms': ttfb_ms,
+            'throughput_bytes_per_second': int(self.bytes_sent / duration) if duration > 0 else 0
+        }
+
+
+class StreamProxyEngine:
+    """Copy an upstream ``requests`` response to the client with optional read-ahead.
+
+    With ``readahead_chunks`` > 0 a producer thread keeps up to that many chunks
+    buffered so upstream latency overlaps with client writes. Closing the
+    generator (the WSGI server does this when the client disconnects) stops the
+    producer and closes the upstream connection immediately. Upstream read
+    errors are re-raised so the server aborts the connection instead of ending
+    a response whose Content-Length was already sent.
+    """
+
+    def __init__(
+        self,
+        chunk_bytes=DEFAULT_STREAM_CHUNK_BYTES,
+        readahead_chunks=DEFAULT_STREAM_READAHEAD_CHUNKS,
+        history_size=DEFAULT_STREAM_HISTORY_SIZE,
+        logger=None
+    ):
+        self.chunk_bytes = max(1, int(chunk_bytes))
+        self.readahead_chunks = max(0, int(readahead_chunks))
+        self.logger = logger or logging.getLogger(__name__)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = {}
+        self._recent = deque(maxlen=max(1, int(history_size)))
+        self._totals = {
+            'streams': 0,
+            'bytes': 0,
+            'completed': 0,
+            'disconnected': 0,
+            'failed': 0
+        }
+
+    def stream(self, upstream, label=''):
+        if self.readahead_chunks:
+            return self._stream_buffered(upstream, label)
+        return self._stream_direct(upstream, label)
+
+    def active_streams(self):
+        with self._lock:
+            return [stats.snapshot() for stats in self._active.values()]
+
+    def recent_streams(self):
+        with self._lock:
+            return list(self._recent)
+
+    def totals(self):
+        with self._lock:
+            totals = dict(self._totals)
+            totals['active'] = len(self._active)
+            totals['bytes'] += sum(stats.bytes_sent for stats in self._active.values())
+        return totals
+
+    def _register(self, label):
+        stats = StreamProxyStats(next(self._ids), label)
+        with self._lock:
+            self._active[stats.stream_id] = stats
+            self._totals['streams'] += 1
+        return stats
+
+    def _finish(self, stats, status):
+        stats.status = status
+        stats.finished_at = time.monotonic()
+        snapshot = stats.snapshot()
+        with self._lock:
+            self._active.pop(stats.stream_id, None)
+            self._recent.append(snapshot)
+            self._totals['bytes'] += stats.bytes_sent
+            self._totals[status] += 1
+        self.logger.debug(
+            "Stream proxy %s %s: %d bytes in %.0f ms (ttfb %s ms)",
+            stats.label or stats.stream_id,
+            status,
+            snapshot['bytes'],
+            snapshot['duration_ms'],
+            snapshot['ttfb_ms']
+        )
+
+    def _stream_direct(self, upstream, label):
+        stats = self._register(label)
+        status = 'disconnected'
+        try:
+            for chunk in upstream.iter_content(chunk_size=self.chunk_bytes):
+                if not chunk:
+                    continue
+                stats.record_chunk(len(chunk))
+                yield chunk
+            status = 'completed'
+        except Exception as e:
+            status = 'failed'
+            self.logger.warning("Stream proxy upstream read failed: %s", e)
+            raise
+        finally:
+            upstream.close()
+            self._finish(stats, status)
+
+    def _stream_buffered(self, upstream, label):
+        stats = self._register(label)
+        buffer = queue.Queue(maxsize=self.readahead_chunks)
+        stop_event = threading.Event()
+
+        def offer(item):
+            while not stop_event.is_set():
+                try:
+                    buffer.put(item, timeout=READAHEAD_PUT_TIMEOUT_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for chunk in upstream.iter_content(chunk_size=self.chunk_bytes):
+                    if not chunk:
+                        continue
+                    if not offer(chunk):
+                        return
+                offer(_STREAM_END)
+            except Exception as e:
+                if not stop_event.is_set():
+                    offer(_UpstreamFailure(e))
+
+        producer = threading.Thread(target=produce, name='stream-proxy-readahead', daemon=True)
+        status = 'disconnected'
+        try:
+            producer.start()
+            while True:
+                item = buffer.get()
+                if item is _STREAM_END:
+                    status = 'completed'
+                    break
+                if isinstance(item, _UpstreamFailure):
+                    status = 'failed'
+                    self.logger.warning("Stream proxy upstream read failed: %s", item.error)
+                    raise item.error
+                stats.record_chunk(len(item))
+                yield item
+        finally:
+            stop_event.set()
+            upstream.close()
+            while True:
+                try:
+                    buffer.get_nowait()
+                except queue.Empty:
+                    break
+            if producer.is_alive():
+                producer.join(READAHEAD_JOIN_TIMEOUT_SECONDS)
+            self._finish(stats, status)
+
+
+__all__ = ['StreamProxyEngine', 'StreamProxyStats']
@@ -0,0 +1,368 @@
+import calendar
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+
+CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+CRON_MONTH_NAMES = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+CRON_WEEKDAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+CRON_SEARCH_YEARS = 5
+SCHEDULER_MAX_SLEEP_SECONDS = 300
+SCHEDULER_RETRY_BASE_SECONDS = 30
+SCHEDULER_RETRY_MAX_SECONDS = 1800
+TASK_RESULT_SUCCESS = 'success'
+TASK_RESULT_FAILED = 'failed'
+TASK_RESULT_SKIPPED = 'skipped'
+
+
+def format_task_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def parse_cron_field(value, minimum, maximum, names=None):
+    values = set()
+    for part in value.split(','):
+        part = part.strip().lower()
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f'Invalid cron step: {value}')
+        if part in {'*', ''}:
+            start, end = minimum, maximum
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start = parse_cron_value(start_text, names)
+            end = parse_cron_value(end_text, names)
+        else:
+            start = parse_cron_value(part, names)
+            end = maximum if step > 1 else start
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f'Cron field out of range: {value}')
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def parse_cron_value(value, names=None):
+    value = value.strip().lower()
+    if names and value in names:
+        return names[value]
+    return int(value)
+
+
+class CronExpression:
+    """Five-field cron schedule (minute hour day-of-month month day-of-week).
+
+    Supports ``*``, lists, ranges, steps, month/weekday names and the usual
+    ``@daily``-style aliases. As in cron, when both day fields are restricted
+    a day matches if either does.
+    """
+
+    def __init__(self, expression):
+        self.expression = (expression or '').strip()
+        fields = CRON_ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression needs five fields: {expression!r}')
+        minute, hour, day, month, weekday = fields
+        self.minutes = parse_cron_field(minute, 0, 59)
+        self.hours = parse_cron_field(hour, 0, 23)
+        self.days = parse_cron_field(day, 1, 31)
+        self.months = parse_cron_field(month, 1, 12, CRON_MONTH_NAMES)
+        weekdays = parse_cron_field(weekday, 0, 7, CRON_WEEKDAY_NAMES)
+        self.weekdays = frozenset(value % 7 for value in weekdays)
+        self.day_restricted = day != '*'
+        self.weekday_restricted = weekday != '*'
+
+    def __str__(self):
+        return self.expression
+
+    def day_matches(self, moment):
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment):
+        """Return the first matching minute strictly after ``moment``."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * CRON_SEARCH_YEARS)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f'Cron expression never matches: {self.expression!r}')
+
+
+@contextmanager
+def no_task_lock(name):
+    yield True
+
+
+class ScheduledTask:
+    """One named job: a cron schedule, a callable and its last outcome.
+
+    ``target`` may return ``None``, a message string, or a dict with
+    ``result`` and ``message`` keys. ``last_run_getter`` lets a task report
+    when it last ran from durable evidence (for example the newest scheduled
+    backup file) so missed runs are caught up after a restart.
+    """
+
+    def __init__(self, name, schedule, target, jitter_seconds=0, catch_up=True, last_run_getter=None):
+        self.name = name
+        self.schedule = schedule if isinstance(schedule, CronExpression) else CronExpression(schedule)
+        self.target = target
+        self.jitter_seconds = max(0, int(jitter_seconds or 0))
+        self.catch_up = catch_up
+        self.last_run_getter = last_run_getter
+        self.next_slot = None
+        self.next_run_at = None
+        self.running = False
+        self.failures = 0
+
+    def jitter_for(self, slot):
+        # Seeded by task and slot so every worker picks the same offset and
+        # the advisory lock, not timing luck, decides which one runs it.
+        if not self.jitter_seconds:
+            return timedelta(0)
+        seed = f'{self.name}:{slot.isoformat()}'
+        return timedelta(seconds=random.Random(seed).uniform(0, self.jitter_seconds))
+
+    def plan(self, slot):
+        self.next_slot = slot
+        self.next_run_at = slot + self.jitter_for(slot)
+
+    def plan_retry(self, now):
+        """Retry the current slot after an exponential back-off.
+
+        If the back-off would reach past the following slot, the current one
+        is given up and the task simply waits for its next scheduled run.
+        """
+        delay = min(SCHEDULER_RETRY_BASE_SECONDS * 2 ** (self.failures - 1), SCHEDULER_RETRY_MAX_SECONDS)
+        retry_at = now + timedelta(seconds=delay)
+        following = self.schedule.next_after(max(now, self.next_slot or now))
+        if retry_at >= following:
+            self.plan(following)
+        else:
+            self.next_run_at = retry_at
+
+
+class TaskScheduler:
+    """In-process cron scheduler shared by every maintenance job.
+
+    Each gunicorn worker runs its own scheduler thread. Before running a
+    slot a worker takes ``lock_factory(name)`` (a database advisory lock in
+    production) without waiting, and the outcome of each slot is written to
+    ``state`` so workers that lose the race skip it and report the shared
+    result.
+    """
+
+    def __init__(self, logger, lock_factory=no_task_lock, state=None, state_lock=None, clock=datetime.now):
+        self.logger = logger
+        self.lock_factory = lock_factory
+        self.state = state if state is not None else {}
+        self.state_lock = state_lock or threading.Lock()
+        self.clock = clock
+        self.tasks = {}
+        self.thread_lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def add_task(self, name, schedule, target, **options):
+        task = ScheduledTask(name, schedule, target, **options)
+        self.tasks[name] = task
+        return task
+
+    def task_record(self, name):
+        with self.state_lock:
+            return dict(self.state.get(name) or {})
+
+    def save_task_record(self, name, **updates):
+        with self.state_lock:
+            record = dict(self.state.get(name) or {})
+            record.update(updates)
+            self.state[name] = record
+        return record
+
+    def last_run_time(self, task):
+        record = self.task_record(task.name)
+        candidates = []
+        if record.get('last_slot'):
+            candidates.append(datetime.fromisoformat(record['last_slot']))
+        if task.last_run_getter:
+            try:
+                last_run = task.last_run_getter()
+            except Exception as e:
+                self.logger.warning("Unable to read last run of scheduled task %s: %s", task.name, e)
+                last_run = None
+            if last_run:
+                candidates.append(last_run)
+        return max(candidates) if candidates else None
+
+    def plan_task(self, task, now=None):
+        now = now or self.clock()
+        last_run = self.last_run_time(task) if task.catch_up else None
+        if last_run:
+            missed_slot = task.schedule.next_after(last_run)
+            if missed_slot <= now:
+                self.logger.info("Scheduled task %s missed its %s run; catching up", task.name, missed_slot)
+                task.next_slot = missed_slot
+                task.next_run_at = now
+                return task
+        task.plan(task.schedule.next_after(now))
+        return task
+
+    def run_task(self, task, slot=None):
+        slot = slot or task.next_slot or self.clock().replace(second=0, microsecond=0)
+        with self.lock_factory(task.name) as acquired:
+            if not acquired:
+                self.logger.info("Scheduled task %s is running in another worker; skipped", task.name)
+                return self.task_record(task.name)
+            if self.task_record(task.name).get('last_slot', '') >= slot.isoformat():
+                return self.task_record(task.name)
+
+            started_at = self.clock()
+            started = time.monotonic()
+            task.running = True
+            try:
+                outcome = task.target()
+                result, message = TASK_RESULT_SUCCESS, ''
+                if isinstance(outcome, dict):
+                    result = outcome.get('result') or TASK_RESULT_SUCCESS
+                    message = outcome.get('message') or ''
+                elif outcome is not None:
+                    message = str(outcome)
+            except Exception as e:
+                self.logger.exception("Scheduled task %s failed", task.name)
+                result, message = TASK_RESULT_FAILED, str(e) or e.__class__.__name__
+            finally:
+                task.running = False
+
+            record = self.save_task_record(
+                task.name,
+                last_slot=slot.isoformat(),
+                last_run_at=format_task_datetime(started_at),
+                last_result=result,
+                last_message=message,
+                last_duration_seconds=round(time.monotonic() - started, 3),
+                run_count=self.task_record(task.name).get('run_count', 0) + 1
+            )
+            self.logger.info("Scheduled task %s finished: %s %s", task.name, result, message)
+            return record
+
+    def run_pending(self, now=None):
+        now = now or self.clock()
+        ran = []
+        for task in list(self.tasks.values()):
+            if task.next_run_at is None:
+                self.plan_task(task, now)
+            if task.next_run_at > now:
+                continue
+            try:
+                self.run_task(task, task.next_slot)
+            except Exception as e:
+                # Usually the advisory lock could not be taken (database
+                # down). Without rescheduling here the task stays due and
+                # the worker loop would spin on it.
+                task.failures += 1
+                self.logger.exception("Unable to run scheduled task %s", task.name)
+                task.plan_retry(now)
+                self.save_task_record(
+                    task.name,
+                    last_run_at=format_task_datetime(now),
+                    last_result=TASK_RESULT_FAILED,
+                    last_message=str(e) or e.__class__.__name__
+                )
+                continue
+            task.failures = 0
+            ran.append(task.name)
+            task.plan(task.schedule.next_after(max(now, task.next_slot)))
+        return ran
+
+    def seconds_until_next_run(self, now=None):
+        now = now or self.clock()
+        upcoming = [task.next_run_at for task in self.tasks.values() if task.next_run_at]
+        if not upcoming:
+            return SCHEDULER_MAX_SLEEP_SECONDS
+        remaining = (min(upcoming) - now).total_seconds()
+        return max(0.0, min(remaining, SCHEDULER_MAX_SLEEP_SECONDS))
+
+    def worker(self):
+        for task in self.tasks.values():
+            self.plan_task(task)
+        while not self.stop_event.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                self.logger.exception("Task scheduler loop failed")
+            self.stop_event.wait(self.seconds_until_next_run())
+
+    def start(self):
+        with self.thread_lock:
+            if self.thread is not None or not self.tasks:
+                return False
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.worker, name='task-scheduler', daemon=True)
+            self.thread.start()
+        self.logger.info(
+            "Task scheduler started: %s",
+            ', '.join(f'{task.name} ({task.schedule})' for task in self.tasks.values())
+        )
+        return True
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        with self.thread_lock:
+            thread, self.thread = self.thread, None
+        if thread:
+            thread.join(timeout)
+
+    def status(self):
+        tasks = []
+        for task in self.tasks.values():
+            record = self.task_record(task.name)
+            next_run_at = task.next_run_at
+            if next_run_at is None:
+                next_run_at = task.schedule.next_after(self.clock())
+            tasks.append({
+                'name': task.name,
+                'schedule': str(task.schedule),
+                'running': task.running,
+                'next_run_at': format_task_datetime(next_run_at),
+                'last_run_at': record.get('last_run_at', ''),
+                'last_result': record.get('last_result', ''),
+                'last_message': record.get('last_message', ''),
+                'last_duration_seconds': record.get('last_duration_seconds'),
+                'run_count': record.get('run_count', 0)
+            })
+        return tasks
+
+
+__all__ = [
+    'CronExpression',
+    'ScheduledTask',
+    'TASK_RESULT_FAILED',
+    'TASK_RESULT_SKIPPED',
+    'TASK_RESULT_SUCCESS',
+    'TaskScheduler',
+    'format_task_datetime',
+]
@@ -3,6 +3,7 @@ import os
 import stat
 import tempfile
 import threading
+import time
 
 from PIL import Image, ImageOps
 
@@ -111,15 +112,23 @@ def process_image_variants(
 
     image_file.stream.seek(0)
     with Image.open(image_file.stream) as image:
-        image = ImageOps.exif_transpose(image)
-        width, height = image.size
-        if not width or not height:
-            raise ValueError('Invalid image dimensions')
+        return process_pil_image_variants(image, target_height, cover_max_dimension)
 
-        return {
-            'primary': _save_webp(image, target_height=target_height),
-            IMAGE_COVER_VARIANT: _save_webp(image, max_dimension=cover_max_dimension)
-        }
+
+def process_pil_image_variants(
+    image,
+    target_height=IMAGE_PRIMARY_TARGET_HEIGHT,
+    cover_max_dimension=IMAGE_COVER_MAX_DIMENSION
+):
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    if not width or not height:
+        raise ValueError('Invalid image dimensions')
+
+    return {
+        'primary': _save_webp(image, target_height=target_height),
+        IMAGE_COVER_VARIANT: _save_webp(image, max_dimension=cover_max_dimension)
+    }
 
 
 def delete_uploaded_image(filename, upload_folder, logger=None, allowed_extensions=ALLOWED_STORED_IMAGE_EXTENSIONS):
@@ -190,6 +199,53 @@ def normalize_uploaded_image_permissions(upload_folder, logger=None, allowed_ext
     return normalized_count
 
 
+def iter_uploaded_images(upload_folder, allowed_extensions=ALLOWED_STORED_IMAGE_EXTENSIONS, min_age_seconds=0):
+    """Yield ``(filename, path)`` for every primary image in the upload directory.
+
+    Cover variants are skipped; ``min_age_seconds`` skips files modified
+    more recently than that, such as uploads whose movie is not saved yet.
+    """
+    root_path = os.path.realpath(upload_folder)
+    if not os.path.isdir(root_path):
+        return
+    newest_mtime = time.time() - min_age_seconds
+    for current_path, directory_names, filenames in os.walk(root_path, followlinks=False):
+        directory_names[:] = [
+            directory_name
+            for directory_name in directory_names
+            if not os.path.islink(os.path.join(current_path, directory_name))
+        ]
+        for filename in filenames:
+            if filename.endswith(IMAGE_COVER_SUFFIX):
+                continue
+            file_path = os.path.join(current_path, filename)
+            relative_path = os.path.relpath(file_path, root_path).replace(os.sep, '/')
+            safe_filename = normalize_upload_filename(relative_path, allowed_extensions)
+            if not safe_filename:
+                continue
+            try:
+                file_stat = os.lstat(file_path)
+            except OSError:
+                continue
+            if stat.S_ISREG(file_stat.st_mode) and file_stat.st_mtime <= newest_mtime:
+                yield safe_filename, file_path
+
+
+def prewarm_image_covers(upload_folder, allowed_extensions=ALLOWED_STORED_IMAGE_EXTENSIONS, limit=None):
+    """Generate missing cover variants ahead of the first request that needs them."""
+    generated = 0
+    for filename, _ in iter_uploaded_images(upload_folder, allowed_extensions):
+        if limit is not None and generated >= limit:
+            break
+        cover_filename = get_image_variant_filename(filename, IMAGE_COVER_VARIANT, allowed_extensions)
+        cover_path = get_upload_file_path(cover_filename, upload_folder, allowed_extensions)
+        if not cover_path or os.path.isfile(cover_path):
+            continue
+        if ensure_image_cover(filename, upload_folder, allowed_extensions):
+            generated += 1
+    return generated
+
+
 def save_image_variants(filename, variants, upload_folder, allowed_extensions=ALLOWED_STORED_IMAGE_EXTENSIONS):
     safe_filename = normalize_upload_filename(filename, allowed_extensions)
     cover_filename = get_image_variant_filename(safe_filename, IMAGE_COVER_VARIANT, allowed_extensions)